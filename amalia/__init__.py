@@ -0,0 +1 @@
+"""Operaciones por lotes de AMALIA sin interfaz gráfica (python -m amalia)"""
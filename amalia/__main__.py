@@ -0,0 +1,5 @@
+import sys
+
+from amalia.cli import main
+
+sys.exit(main())
@@ -0,0 +1,477 @@
+"""
+Línea de comandos de AMALIA, sin interfaz gráfica
+
+Reutiliza SupabaseClient y no importa PyQt6 (los comandos de PDF cargan QtGui,
+sin ventanas, para dibujarlos). Sirve para correr las tareas pesadas por
+la noche (cron, tarea programada o SSH) en lugar de hacerlo en horario de oficina.
+
+Uso:
+    python -m amalia promover [--max-reprobadas 2] [--lote 200] [--plan 1:2 2:3 ...]
+    python -m amalia importar estudiantes.csv [--actualizar]
+    python -m amalia exportar {estudiantes,calificaciones,historial} salida.csv|.xlsx [--grado ID]
+    python -m amalia historiales carpeta/ (--grado ID | --cedula C [C ...])
+    python -m amalia boletas carpeta/ (--grado ID | --cedula C [C ...])
+    python -m amalia listas listas.pdf [--grado ID ...]
+    python -m amalia recalcular [--grado ID]
+    python -m amalia benchmark [--repeticiones 5]
+
+Opciones generales (antes del subcomando):
+    --workers N         conexiones en paralelo (importar, PDF, recalcular, benchmark)
+    --database-url URL  por defecto DATABASE_URL del entorno o del .env
+"""
+import argparse
+import csv
+import itertools
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from dotenv import load_dotenv
+
+from database.supabase_client import SupabaseClient
+from database.rollover import MotorPromocion, plan_por_defecto
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Columnas aceptadas al importar estudiantes (las de create_estudiante)
+CAMPOS_ESTUDIANTE = ['cedula', 'nombre', 'apellido', 'fecha_nacimiento', 'municipio',
+                     'telefono', 'correo', 'id_grado', 'estado', 'pais', 'observacion',
+                     'id_mencion', 'seccion']
+OBLIGATORIOS = ['cedula', 'nombre', 'apellido', 'fecha_nacimiento']
+
+
+class Conexiones:
+    """
+    Un SupabaseClient por hilo: cada cliente tiene una sola conexión y serializa
+    sus operaciones, así que el paralelismo sale de abrir una conexión por worker
+    """
+
+    def __init__(self, database_url: str):
+        self.database_url = database_url
+        self._local = threading.local()
+        self._clientes: List[SupabaseClient] = []
+        self._lock = threading.Lock()
+
+    def cliente(self) -> SupabaseClient:
+        cliente = getattr(self._local, 'cliente', None)
+        if cliente is None:
+            cliente = SupabaseClient(self.database_url)
+            self._local.cliente = cliente
+            with self._lock:
+                self._clientes.append(cliente)
+        return cliente
+
+    def cerrar(self):
+        for cliente in self._clientes:
+            cliente.disconnect()
+
+
+def en_paralelo(funcion: Callable[[SupabaseClient, Any], Any], elementos: Iterable,
+                conexiones: Conexiones, workers: int):
+    """
+    Aplica funcion(cliente, elemento) con hasta `workers` conexiones a la vez
+
+    Genera (elemento, resultado, error) a medida que terminan
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ejecutor:
+        futuros = {
+            ejecutor.submit(lambda e: funcion(conexiones.cliente(), e), elemento): elemento
+            for elemento in elementos
+        }
+        for futuro in as_completed(futuros):
+            try:
+                yield futuros[futuro], futuro.result(), None
+            except Exception as e:
+                yield futuros[futuro], None, e
+
+
+# ==================== ARCHIVOS ====================
+
+def leer_filas(ruta: str) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Filas de un CSV (UTF-8, con encabezados) o de la primera hoja de un XLSX
+
+    Returns:
+        Lista de (línea del archivo, fila); las líneas vacías se omiten
+    """
+    if ruta.lower().endswith(".xlsx"):
+        from openpyxl import load_workbook
+        libro = load_workbook(ruta, read_only=True, data_only=True)
+        filas = libro.active.iter_rows(values_only=True)
+        encabezados = [str(c or '').strip().lower() for c in next(filas, [])]
+        datos = [(linea, dict(zip(encabezados, fila))) for linea, fila in enumerate(filas, start=2)
+                 if any(v is not None for v in fila)]
+        libro.close()
+        return datos
+
+    with open(ruta, newline='', encoding='utf-8-sig') as f:
+        lector = csv.DictReader(f)
+        # line_num es la última línea leída (una fila puede ocupar varias)
+        return [(lector.line_num, {(k or '').strip().lower(): v for k, v in fila.items()})
+                for fila in lector]
+
+
+def escribir_filas(ruta: str, filas: Iterable[Dict[str, Any]]) -> int:
+    """
+    Escribe las filas en CSV o XLSX según la extensión
+
+    Acepta un iterador (lectura por partes) sin cargarlo entero en memoria
+
+    Returns:
+        Cantidad de filas escritas
+    """
+    filas = iter(filas)
+    primera = next(filas, None)
+    columnas = list(primera.keys()) if primera else []
+    filas = itertools.chain([primera], filas) if primera else iter(())
+    total = 0
+    if ruta.lower().endswith(".xlsx"):
+        from openpyxl import Workbook
+        libro = Workbook(write_only=True)
+        hoja = libro.create_sheet()
+        hoja.append(columnas)
+        for fila in filas:
+            hoja.append([fila[c] for c in columnas])
+            total += 1
+        libro.save(ruta)
+        return total
+
+    with open(ruta, 'w', newline='', encoding='utf-8-sig') as f:
+        escritor = csv.DictWriter(f, fieldnames=columnas)
+        escritor.writeheader()
+        for fila in filas:
+            escritor.writerow(fila)
+            total += 1
+    return total
+
+
+# ==================== SUBCOMANDOS ====================
+
+def promover(args, conexiones: Conexiones) -> int:
+    cliente = conexiones.cliente()
+    grados = {g['id_grado']: g['nombre_grado'] for g in cliente.get_all_grados()}
+
+    if args.plan:
+        try:
+            plan = {int(o): int(d) for o, d in (p.split(':') for p in args.plan)}
+        except ValueError:
+            print("El plan debe tener la forma origen:destino (IDs de grado), por ejemplo 1:2")
+            return 2
+    else:
+        plan = plan_por_defecto([{'id_grado': i, 'nombre_grado': n} for i, n in grados.items()])
+
+    print("Plan de promoción:")
+    for origen, destino in plan.items():
+        print(f"  {grados.get(origen, origen)} -> {grados.get(destino, destino)}")
+    if args.solo_plan:
+        return 0
+
+    def mostrar(avance):
+        print(f"  {avance}")
+
+    motor = MotorPromocion(cliente, tam_lote=args.lote, progreso=mostrar)
+    if motor.promover(plan, args.max_reprobadas):
+        print("Promoción completada")
+        return 0
+    print("La promoción no terminó; ejecute el mismo comando para reanudarla")
+    return 1
+
+
+def importar(args, conexiones: Conexiones) -> int:
+    filas = leer_filas(args.archivo)
+    grados = {g['nombre_grado'].strip().lower(): g['id_grado']
+              for g in conexiones.cliente().get_all_grados()}
+
+    registros = []
+    rechazadas = 0
+    for numero, fila in filas:
+        # Las celdas vacías (o solo con espacios) cuentan como sin valor
+        datos = {c: fila.get(c) for c in CAMPOS_ESTUDIANTE
+                 if fila.get(c) is not None and str(fila.get(c)).strip() != ''}
+        # El grado se puede indicar por nombre (columna "grado")
+        if 'id_grado' not in datos and fila.get('grado'):
+            datos['id_grado'] = grados.get(str(fila['grado']).strip().lower())
+        faltantes = [c for c in OBLIGATORIOS if c not in datos]
+        if faltantes:
+            print(f"  fila {numero}: faltan {', '.join(faltantes)}")
+            rechazadas += 1
+            continue
+        try:
+            for campo in ('id_grado', 'id_mencion'):
+                if datos.get(campo) is not None:
+                    datos[campo] = int(str(datos[campo]).strip())
+        except ValueError:
+            print(f"  fila {numero}: {campo} no es un número ({datos[campo]!r})")
+            rechazadas += 1
+            continue
+        datos['cedula'] = str(datos['cedula']).strip()
+        registros.append(datos)
+
+    def guardar(cliente: SupabaseClient, datos: Dict[str, Any]) -> str:
+        if args.actualizar and cliente.get_estudiante_by_cedula(datos['cedula']):
+            campos = {k: v for k, v in datos.items() if k != 'cedula'}
+            return 'actualizado' if cliente.update_estudiante(datos['cedula'], **campos) else 'error'
+        return 'creado' if cliente.create_estudiante(**datos) else 'error'
+
+    conteo = {'creado': 0, 'actualizado': 0, 'error': 0}
+    inicio = time.perf_counter()
+    for datos, resultado, error in en_paralelo(guardar, registros, conexiones, args.workers):
+        resultado = 'error' if error else resultado
+        conteo[resultado] += 1
+        if resultado == 'error':
+            print(f"  {datos['cedula']}: no se pudo guardar{f' ({error})' if error else ''}")
+
+    print(f"Importación: {conteo['creado']} creados, {conteo['actualizado']} actualizados, "
+          f"{conteo['error']} con error, {rechazadas} filas rechazadas "
+          f"({time.perf_counter() - inicio:.1f} s)")
+    return 0 if not conteo['error'] and not rechazadas else 1
+
+
+def exportar(args, conexiones: Conexiones) -> int:
+    cliente = conexiones.cliente()
+    if args.tabla == 'estudiantes':
+        filas = (cliente.get_estudiantes_by_grado(args.grado) if args.grado
+                 else cliente.get_all_estudiantes())
+    elif args.tabla == 'calificaciones':
+        filas = cliente.get_all_calificaciones()
+        if args.grado:
+            cedulas = {e['cedula'] for e in cliente.get_estudiantes_by_grado(args.grado)}
+            filas = [f for f in filas if f['cedula_estudiante'] in cedulas]
+    else:
+        # El historial de todos los años es la tabla más grande: se lee por partes
+        filas = itertools.chain.from_iterable(cliente.iterar_consulta("""
+            SELECT h.cedula_estudiante, e.nombre, e.apellido, h.codigo_asignatura,
+                h.nombre_asignatura, g.nombre_grado, h.nota_final, h.estado, h.fecha_curso
+            FROM historial_academico h
+            JOIN estudiante e ON e.cedula = h.cedula_estudiante
+            LEFT JOIN grado g ON g.id_grado = h.id_grado
+            WHERE %s::int IS NULL OR e.id_grado = %s
+            ORDER BY e.apellido, e.nombre, h.id_grado, h.nombre_asignatura
+        """, (args.grado, args.grado)))
+
+    total = escribir_filas(args.salida, filas)
+    print(f"Exportación: {total} filas en {args.salida}")
+    return 0
+
+
+def _pdf_por_estudiante(args, conexiones: Conexiones, consultar: Callable, nombre_guardar: str,
+                        prefijo: str, descripcion: str) -> int:
+    """Un PDF por estudiante: las consultas van en paralelo; el dibujo, en este hilo"""
+    try:
+        from ui import reportes
+    except ImportError as e:
+        print(f"Los PDF requieren PyQt6 (QtGui): {e}")
+        return 1
+    guardar = getattr(reportes, nombre_guardar)
+
+    cedulas = args.cedula or [e['cedula'] for e in conexiones.cliente().get_estudiantes_by_grado(args.grado)]
+    os.makedirs(args.carpeta, exist_ok=True)
+
+    generados = 0
+    inicio = time.perf_counter()
+    for cedula, datos, error in en_paralelo(consultar, cedulas, conexiones, args.workers):
+        if error or not datos:
+            print(f"  {cedula}: sin datos{f' ({error})' if error else ''}")
+            continue
+        ruta = os.path.join(args.carpeta, f"{prefijo}_{cedula}.pdf")
+        if guardar(ruta, datos):
+            generados += 1
+
+    print(f"{descripcion}: {generados} de {len(cedulas)} PDF en {args.carpeta} "
+          f"({time.perf_counter() - inicio:.1f} s)")
+    print(reportes.rendimiento.resumen())
+    return 0 if generados == len(cedulas) else 1
+
+
+def historiales(args, conexiones: Conexiones) -> int:
+    return _pdf_por_estudiante(args, conexiones,
+                               lambda cliente, c: cliente.get_historial_completo_estudiante(c),
+                               'guardar_historial_pdf', "Historial_Academico", "Historiales")
+
+
+def boletas(args, conexiones: Conexiones) -> int:
+    return _pdf_por_estudiante(args, conexiones,
+                               lambda cliente, c: cliente.get_estudiante_con_calificaciones(c),
+                               'guardar_boleta_pdf', "Boleta", "Boletas")
+
+
+def listas(args, conexiones: Conexiones) -> int:
+    try:
+        from ui import reportes
+    except ImportError as e:
+        print(f"Los PDF requieren PyQt6 (QtGui): {e}")
+        return 1
+
+    grados = conexiones.cliente().get_all_grados()
+    if args.grado:
+        grados = [g for g in grados if g['id_grado'] in args.grado]
+
+    # Un documento por grado en el mismo PDF
+    documentos = [
+        {'grado': grado, 'estudiantes': estudiantes}
+        for grado, estudiantes, error in en_paralelo(
+            lambda cliente, g: cliente.get_estudiantes_by_grado(g['id_grado']), grados, conexiones, args.workers)
+        if not error
+    ]
+    documentos.sort(key=lambda d: d['grado']['id_grado'])
+
+    inicio = time.perf_counter()
+    if not reportes.guardar_listas_pdf(args.salida, documentos):
+        print(f"No se pudo escribir {args.salida}")
+        return 1
+    print(f"Listas de clase: {len(documentos)} grados en {args.salida} ({time.perf_counter() - inicio:.1f} s)")
+    print(reportes.rendimiento.resumen())
+    return 0 if len(documentos) == len(grados) else 1
+
+
+def recalcular(args, conexiones: Conexiones) -> int:
+    grados = [args.grado] if args.grado else [g['id_grado'] for g in conexiones.cliente().get_all_grados()]
+    total = 0
+    for id_grado, corregidas, error in en_paralelo(
+            lambda cliente, g: cliente.recalcular_notas_finales(g), grados, conexiones, args.workers):
+        if error:
+            print(f"  grado {id_grado}: {error}")
+            continue
+        total += corregidas
+    print(f"Recálculo: {total} notas finales corregidas")
+    return 0
+
+
+def benchmark(args, conexiones: Conexiones) -> int:
+    cliente = conexiones.cliente()
+    grados = cliente.get_all_grados()
+    estudiantes = cliente.get_all_estudiantes()
+    id_grado = grados[0]['id_grado'] if grados else None
+    cedula = estudiantes[0]['cedula'] if estudiantes else None
+
+    operaciones = {
+        'get_all_estudiantes': lambda c: c.get_all_estudiantes(),
+        'get_all_grados': lambda c: c.get_all_grados(),
+        'search_estudiantes': lambda c: c.search_estudiantes("ma"),
+    }
+    if id_grado is not None:
+        operaciones['get_estudiantes_by_grado'] = lambda c: c.get_estudiantes_by_grado(id_grado)
+    if cedula is not None:
+        operaciones['get_historial_completo'] = lambda c: c.get_historial_completo_estudiante(cedula)
+
+    def correr(c: SupabaseClient, _ronda) -> Dict[str, List[float]]:
+        tiempos = {}
+        for nombre, operacion in operaciones.items():
+            inicio = time.perf_counter()
+            operacion(c)
+            tiempos[nombre] = time.perf_counter() - inicio
+        return tiempos
+
+    medidas: Dict[str, List[float]] = {nombre: [] for nombre in operaciones}
+    inicio = time.perf_counter()
+    for _, tiempos, error in en_paralelo(correr, range(args.repeticiones * args.workers),
+                                         conexiones, args.workers):
+        if error:
+            print(f"  error: {error}")
+            continue
+        for nombre, segundos in tiempos.items():
+            medidas[nombre].append(segundos * 1000)
+    duracion = time.perf_counter() - inicio
+
+    print(f"Benchmark: {args.repeticiones} rondas x {args.workers} workers")
+    for nombre, valores in medidas.items():
+        if not valores:
+            continue
+        valores.sort()
+        p95 = valores[min(len(valores) - 1, int(len(valores) * 0.95))]
+        print(f"  {nombre:<28} mediana {statistics.median(valores):>8.1f} ms"
+              f"   p95 {p95:>8.1f} ms   máx {valores[-1]:>8.1f} ms")
+    total = sum(len(v) for v in medidas.values())
+    print(f"  {total} operaciones en {duracion:.1f} s ({total / duracion:.1f} op/s)")
+    return 0
+
+
+# ==================== PUNTO DE ENTRADA ====================
+
+def crear_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m amalia",
+                                     description="Operaciones por lotes de AMALIA sin interfaz gráfica")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Conexiones en paralelo (por defecto 4)")
+    parser.add_argument("--database-url", help="URL de PostgreSQL (por defecto DATABASE_URL)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("promover", help="Promoción de fin de año (reanudable)")
+    p.add_argument("--max-reprobadas", type=int, default=None,
+                   help="Materias reprobadas permitidas para promover (por defecto promueven todos)")
+    p.add_argument("--lote", type=int, default=200, help="Estudiantes por transacción")
+    p.add_argument("--plan", nargs="+", metavar="ORIGEN:DESTINO",
+                   help="IDs de grado (por defecto cada grado pasa al siguiente)")
+    p.add_argument("--solo-plan", action="store_true", help="Muestra el plan sin ejecutarlo")
+    p.set_defaults(funcion=promover)
+
+    p = sub.add_parser("importar", help="Importa estudiantes desde CSV o XLSX")
+    p.add_argument("archivo")
+    p.add_argument("--actualizar", action="store_true",
+                   help="Actualiza los estudiantes que ya existen en lugar de fallar")
+    p.set_defaults(funcion=importar)
+
+    p = sub.add_parser("exportar", help="Exporta a CSV o XLSX")
+    p.add_argument("tabla", choices=["estudiantes", "calificaciones", "historial"])
+    p.add_argument("salida")
+    p.add_argument("--grado", type=int, help="Solo un grado (ID)")
+    p.set_defaults(funcion=exportar)
+
+    p = sub.add_parser("historiales", help="PDF del historial académico por lotes")
+    p.add_argument("carpeta")
+    grupo = p.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--grado", type=int, help="Todos los estudiantes de un grado (ID)")
+    grupo.add_argument("--cedula", nargs="+", help="Cédulas de los estudiantes")
+    p.set_defaults(funcion=historiales)
+
+    p = sub.add_parser("boletas", help="PDF de la boleta de calificaciones por lotes")
+    p.add_argument("carpeta")
+    grupo = p.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--grado", type=int, help="Todos los estudiantes de un grado (ID)")
+    grupo.add_argument("--cedula", nargs="+", help="Cédulas de los estudiantes")
+    p.set_defaults(funcion=boletas)
+
+    p = sub.add_parser("listas", help="Listas de clase en un solo PDF")
+    p.add_argument("salida")
+    p.add_argument("--grado", type=int, nargs="+", help="Solo estos grados (IDs); por defecto todos")
+    p.set_defaults(funcion=listas)
+
+    p = sub.add_parser("recalcular", help="Recalcula las notas finales desactualizadas")
+    p.add_argument("--grado", type=int, help="Solo un grado (ID)")
+    p.set_defaults(funcion=recalcular)
+
+    p = sub.add_parser("benchmark", help="Mide la latencia de las consultas principales")
+    p.add_argument("--repeticiones", type=int, default=5, help="Rondas por worker")
+    p.set_defaults(funcion=benchmark)
+
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = crear_parser().parse_args(argv)
+
+    load_dotenv(os.path.join(RAIZ, '.env'))
+    database_url = args.database_url or os.getenv("DATABASE_URL")
+    if not database_url:
+        print("No se encontró DATABASE_URL (entorno o .env); use --database-url")
+        return 2
+
+    # La CLI trabaja siempre contra el servidor, nunca sobre la réplica local
+    os.environ.pop("AMALIA_REPLICA_LOCAL", None)
+
+    conexiones = Conexiones(database_url)
+    try:
+        if not conexiones.cliente().test_connection():
+            print("No se pudo conectar a la base de datos")
+            return 1
+        return args.funcion(args, conexiones)
+    finally:
+        conexiones.cerrar()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
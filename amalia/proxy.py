@@ -0,0 +1,464 @@
+"""
+Proxy de la red local con caché compartida de lecturas
+
+Un solo proceso en el laboratorio mantiene las conexiones al pooler de Supabase
+y una caché compartida; cada AMALIA con AMALIA_PROXY_URL le envía sus sentencias
+por HTTP (database/proxy_transport.py). Así N equipos cuestan un solo juego de
+conexiones y una sola descarga de los datos frecuentes (get_all_estudiantes,
+get_all_asignaturas...).
+
+Uso:
+    AMALIA_PROXY_TOKEN=secreto python -m amalia.proxy [--host 0.0.0.0] [--puerto 8765]
+                                                      [--conexiones 5] [--ttl 60]
+
+En cada equipo (.env):
+    AMALIA_PROXY_URL=http://IP_DEL_PROXY:8765
+    AMALIA_PROXY_TOKEN=secreto
+
+Caché: solo SELECT sobre las tablas de TABLAS_CACHEABLES. Una entrada se invalida
+cuando el servidor notifica un cambio en una de sus tablas (LISTEN, ver
+database/notificaciones.py), cuando una escritura confirmada a través del proxy
+toca una de ellas, o al vencer el TTL, que acota lo que tarda en verse un cambio
+hecho por fuera del proxy en una tabla sin trigger de notificación (docente,
+historial_academico). Si la escucha se reconecta, la caché se vacía entera.
+
+El proxy habla HTTP sin cifrar y solo debe escuchar en la red del laboratorio;
+las credenciales de la base quedan en este equipo y los demás solo tienen el token.
+"""
+import argparse
+import hmac
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Set
+from urllib.parse import parse_qs, urlsplit
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+from dotenv import load_dotenv
+
+from database.local_replica import TABLAS_REPLICADAS, tablas_de_consulta
+from database.notificaciones import EscuchaCambios, SondeoCambios
+from database.pooler import url_sesion
+from database.proxy_transport import (PUERTO_POR_DEFECTO, ESPERA_CAMBIOS, codificar,
+                                      decodificar, es_lectura)
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TABLAS_CACHEABLES = set(TABLAS_REPLICADAS) | {'periodo_academico'}
+
+# Entradas máximas de la caché (las búsquedas con texto generan una por texto)
+MAXIMO_ENTRADAS = 2000
+
+# Segundos sin actividad tras los que una sesión abandonada se revierte
+TIEMPO_SESION = 60
+
+# Cambios recientes que se guardan para los equipos que consultan /cambios
+MAXIMO_CAMBIOS = 1000
+
+
+class ErrorSesion(Exception):
+    """La sesión pedida no existe (expiró o ya terminó)"""
+
+
+class CacheCompartida:
+    """
+    Resultados de lecturas ya serializados, indexados por tabla para invalidar
+
+    Las lecturas concurrentes de la misma consulta esperan a la primera en lugar
+    de ir todas al servidor (15 equipos abriendo AMALIA a la vez).
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._por_tabla: Dict[str, Set[bytes]] = {}
+        self._generacion: Dict[str, int] = {}
+        self._epoca = 0
+        self._en_curso: Dict[bytes, threading.Event] = {}
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave: bytes, tablas: Set[str], calcular: Callable[[], bytes]) -> bytes:
+        while True:
+            with self._lock:
+                entrada = self._entradas.get(clave)
+                if entrada is not None and entrada[1] > time.monotonic():
+                    self.aciertos += 1
+                    return entrada[0]
+                evento = self._en_curso.get(clave)
+                if evento is None:
+                    evento = self._en_curso[clave] = threading.Event()
+                    version = (self._epoca, [self._generacion.get(t, 0) for t in sorted(tablas)])
+                    self.fallos += 1
+                    break
+            # Otro hilo ya la está trayendo del servidor
+            evento.wait()
+
+        try:
+            contenido = calcular()
+            with self._lock:
+                # Si se invalidó mientras se consultaba, el resultado puede estar viejo
+                if version == (self._epoca, [self._generacion.get(t, 0) for t in sorted(tablas)]):
+                    self._entradas.pop(clave, None)
+                    self._entradas[clave] = (contenido, time.monotonic() + self.ttl)
+                    for tabla in tablas:
+                        self._por_tabla.setdefault(tabla, set()).add(clave)
+                    while len(self._entradas) > MAXIMO_ENTRADAS:
+                        self._entradas.popitem(last=False)
+            return contenido
+        finally:
+            with self._lock:
+                del self._en_curso[clave]
+            evento.set()
+
+    def invalidar(self, tablas: Set[str]):
+        """Descarta las entradas que leen alguna de las tablas"""
+        with self._lock:
+            for tabla in tablas:
+                self._generacion[tabla] = self._generacion.get(tabla, 0) + 1
+                for clave in self._por_tabla.pop(tabla, ()):
+                    self._entradas.pop(clave, None)
+
+    def vaciar(self):
+        """Descarta todo (la escucha de cambios se reconectó)"""
+        with self._lock:
+            self._epoca += 1
+            self._entradas.clear()
+            self._por_tabla.clear()
+
+    def estado(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entradas': len(self._entradas), 'aciertos': self.aciertos, 'fallos': self.fallos}
+
+
+class Sesion:
+    """Transacción abierta por un equipo: retiene una conexión hasta confirmar"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.tablas_escritas: Set[str] = set()
+        self.ultimo_uso = time.monotonic()
+
+
+class ServicioProxy:
+    """Conexiones al servidor, sesiones, caché y cambios recientes"""
+
+    def __init__(self, database_url: str, conexiones: int, ttl: float):
+        self.database_url = database_url
+        self.maximo_conexiones = conexiones
+        self._pool = ThreadedConnectionPool(1, conexiones, database_url, sslmode='require',
+                                            cursor_factory=RealDictCursor, connect_timeout=10)
+        # El pool de psycopg2 falla al agotarse; el semáforo hace esperar en su lugar
+        self._cupos = threading.BoundedSemaphore(conexiones)
+        self.cache = CacheCompartida(ttl)
+
+        self._sesiones: Dict[str, Sesion] = {}
+        self._lock_sesiones = threading.Lock()
+
+        self._cambios = deque(maxlen=MAXIMO_CAMBIOS)
+        self._ultimo_cambio = 0
+        self._hay_cambios = threading.Condition()
+
+        self._detener = threading.Event()
+        # LISTEN necesita una conexión en modo sesión; sin ella, sondeo de updated_at
+        self._url_escucha = url_sesion(database_url)
+        escucha = EscuchaCambios if self._url_escucha else SondeoCambios
+        self._escucha = escucha(self._nueva_conexion, self.registrar_cambio,
+                                al_conectar=self.cache.vaciar)
+
+    # ==================== CONEXIONES ====================
+
+    def _nueva_conexion(self):
+        return psycopg2.connect(self._url_escucha or self.database_url, sslmode='require',
+                                cursor_factory=RealDictCursor, connect_timeout=10)
+
+    def _tomar(self):
+        if not self._cupos.acquire(timeout=30):
+            raise psycopg2.OperationalError("Sin conexiones libres en el proxy")
+        try:
+            return self._pool.getconn()
+        except Exception:
+            self._cupos.release()
+            raise
+
+    def _devolver(self, conn, descartar: bool = False):
+        self._pool.putconn(conn, close=descartar or bool(conn.closed))
+        self._cupos.release()
+
+    def iniciar(self):
+        """Aplica las migraciones pendientes y arranca la escucha y la limpieza de sesiones"""
+        from database.migrations import aplicar_migraciones
+
+        conn = self._tomar()
+        try:
+            aplicar_migraciones(conn)
+        finally:
+            self._devolver(conn)
+        self._escucha.iniciar()
+        threading.Thread(target=self._limpiar_sesiones, name="amalia-proxy-sesiones",
+                         daemon=True).start()
+
+    def cerrar(self):
+        self._detener.set()
+        self._escucha.detener()
+        self._pool.closeall()
+
+    # ==================== LECTURAS ====================
+
+    def _leer(self, query: str, params) -> bytes:
+        conn = self._tomar()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            filas = cursor.fetchall() if cursor.description is not None else None
+            cursor.close()
+            conn.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self._devolver(conn, descartar=True)
+            raise
+        except Exception:
+            conn.rollback()
+            self._devolver(conn)
+            raise
+        self._devolver(conn)
+        return codificar({'filas': filas})
+
+    def consulta(self, query: str, params) -> bytes:
+        """Lectura fuera de transacción; las de tablas conocidas pasan por la caché"""
+        tablas = tablas_de_consulta(query)
+        if es_lectura(query) and tablas and tablas <= TABLAS_CACHEABLES:
+            clave = codificar([query, params])
+            return self.cache.obtener(clave, tablas, lambda: self._leer(query, params))
+        return self._leer(query, params)
+
+    # ==================== SESIONES ====================
+
+    def ejecutar(self, id_sesion: Optional[str], sentencias: List[list], confirmar: bool) -> bytes:
+        """Ejecuta sentencias en la sesión (la abre si no hay); con confirmar, la termina"""
+        if id_sesion:
+            with self._lock_sesiones:
+                sesion = self._sesiones.pop(id_sesion, None)
+            if sesion is None:
+                raise ErrorSesion("La transacción expiró en el proxy")
+        else:
+            sesion = Sesion(self._tomar())
+
+        conn = sesion.conn
+        filas = None
+        try:
+            if sentencias:
+                cursor = conn.cursor()
+                if len(sentencias) == 1:
+                    cursor.execute(*sentencias[0])
+                else:
+                    # Un solo viaje al servidor, igual que SupabaseClient._ejecutar_lote
+                    cursor.execute(b";\n".join(cursor.mogrify(q, p) for q, p in sentencias))
+                filas = cursor.fetchall() if cursor.description is not None else None
+                cursor.close()
+            for query, _ in sentencias:
+                if not es_lectura(query):
+                    sesion.tablas_escritas |= tablas_de_consulta(query)
+            if confirmar:
+                conn.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self._devolver(conn, descartar=True)
+            raise
+        except Exception:
+            conn.rollback()
+            self._devolver(conn)
+            raise
+
+        if confirmar:
+            self._devolver(conn)
+            # La notificación del servidor llega después: quien escribió no debe leer de la caché vieja
+            self.cache.invalidar(sesion.tablas_escritas)
+            return codificar({'sesion': None, 'filas': filas})
+
+        id_sesion = id_sesion or secrets.token_hex(16)
+        sesion.ultimo_uso = time.monotonic()
+        with self._lock_sesiones:
+            self._sesiones[id_sesion] = sesion
+        return codificar({'sesion': id_sesion, 'filas': filas})
+
+    def revertir(self, id_sesion: str):
+        with self._lock_sesiones:
+            sesion = self._sesiones.pop(id_sesion, None)
+        if sesion is not None:
+            self._terminar(sesion)
+
+    def _terminar(self, sesion: Sesion):
+        try:
+            sesion.conn.rollback()
+            self._devolver(sesion.conn)
+        except Exception:
+            self._devolver(sesion.conn, descartar=True)
+
+    def _limpiar_sesiones(self):
+        """Revierte las sesiones de equipos que se colgaron o perdieron la red"""
+        while not self._detener.wait(10):
+            limite = time.monotonic() - TIEMPO_SESION
+            with self._lock_sesiones:
+                vencidas = [i for i, s in self._sesiones.items() if s.ultimo_uso < limite]
+                sesiones = [self._sesiones.pop(i) for i in vencidas]
+            for sesion in sesiones:
+                self._terminar(sesion)
+            if sesiones:
+                print(f"Proxy: {len(sesiones)} transacciones abandonadas revertidas")
+
+    # ==================== CAMBIOS ====================
+
+    def registrar_cambio(self, conn, cambio: Dict):
+        """Callback de EscuchaCambios: invalida la caché y despierta a los equipos"""
+        self.cache.invalidar({cambio.get('tabla')})
+        with self._hay_cambios:
+            self._ultimo_cambio += 1
+            self._cambios.append((self._ultimo_cambio, cambio))
+            self._hay_cambios.notify_all()
+
+    def cambios_desde(self, desde: Optional[int], espera: float) -> bytes:
+        """Cambios posteriores a `desde`, esperando hasta `espera` segundos si no hay"""
+        with self._hay_cambios:
+            # Primera consulta o proxy reiniciado: se empieza desde ahora
+            if desde is None or desde > self._ultimo_cambio:
+                return codificar({'ultimo': self._ultimo_cambio, 'cambios': []})
+            self._hay_cambios.wait_for(lambda: self._ultimo_cambio > desde, timeout=espera)
+            cambios = [c for numero, c in self._cambios if numero > desde]
+            return codificar({'ultimo': self._ultimo_cambio, 'cambios': cambios})
+
+    def estado(self) -> bytes:
+        with self._lock_sesiones:
+            sesiones = len(self._sesiones)
+        return codificar(dict(self.cache.estado(), sesiones=sesiones,
+                              conexiones=self.maximo_conexiones, ultimo_cambio=self._ultimo_cambio))
+
+
+class ManejadorProxy(BaseHTTPRequestHandler):
+    """Peticiones de los equipos: JSON por POST, /cambios y /estado por GET"""
+
+    protocol_version = "HTTP/1.1"
+    # Conexiones keep-alive inactivas más de esto se cierran (el cliente reintenta)
+    timeout = 300
+
+    @property
+    def servicio(self) -> ServicioProxy:
+        return self.server.servicio
+
+    def _autorizado(self) -> bool:
+        token = self.server.token
+        recibido = self.headers.get("Authorization", "")
+        if hmac.compare_digest(recibido.encode(), f"Bearer {token}".encode()):
+            return True
+        self._responder(401, codificar({'error': "Token inválido"}))
+        return False
+
+    def _responder(self, estado: int, contenido: bytes):
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(contenido)))
+        self.end_headers()
+        self.wfile.write(contenido)
+
+    def _atender(self, accion: Callable[[], bytes]):
+        try:
+            self._responder(200, accion())
+        except (psycopg2.OperationalError, psycopg2.InterfaceError, PoolError) as e:
+            self._responder(503, codificar({'error': str(e)}))
+        except (psycopg2.Error, ErrorSesion) as e:
+            self._responder(409, codificar({'error': str(e).strip()}))
+        except (ValueError, KeyError, TypeError) as e:
+            self._responder(400, codificar({'error': f"Petición inválida: {e}"}))
+
+    def do_POST(self):
+        cuerpo = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self._autorizado():
+            return
+
+        def accion() -> bytes:
+            datos = decodificar(cuerpo)
+            if self.path == "/consulta":
+                return self.servicio.consulta(*datos['sentencia'])
+            if self.path == "/ejecutar":
+                return self.servicio.ejecutar(datos.get('sesion'), datos['sentencias'],
+                                              bool(datos.get('confirmar')))
+            if self.path == "/revertir":
+                self.servicio.revertir(datos['sesion'])
+                return codificar({})
+            raise KeyError(self.path)
+
+        self._atender(accion)
+
+    def do_GET(self):
+        if not self._autorizado():
+            return
+        partes = urlsplit(self.path)
+        argumentos = {k: v[0] for k, v in parse_qs(partes.query).items()}
+
+        def accion() -> bytes:
+            if partes.path == "/cambios":
+                desde = int(argumentos['desde']) if argumentos.get('desde') else None
+                espera = min(float(argumentos.get('espera', ESPERA_CAMBIOS)), ESPERA_CAMBIOS)
+                return self.servicio.cambios_desde(desde, espera)
+            if partes.path == "/estado":
+                return self.servicio.estado()
+            raise KeyError(partes.path)
+
+        self._atender(accion)
+
+    def log_message(self, formato, *args):
+        pass  # Una línea por consulta inundaría la consola del laboratorio
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m amalia.proxy",
+                                     description="Proxy de la red local con caché compartida")
+    parser.add_argument("--host", default="0.0.0.0", help="Interfaz donde escuchar")
+    parser.add_argument("--puerto", type=int, default=PUERTO_POR_DEFECTO)
+    parser.add_argument("--conexiones", type=int, default=5,
+                        help="Conexiones máximas al pooler (por defecto 5)")
+    parser.add_argument("--ttl", type=float, default=60,
+                        help="Segundos máximos que vive una entrada de la caché")
+    parser.add_argument("--database-url", help="URL de PostgreSQL (por defecto DATABASE_URL)")
+    args = parser.parse_args(argv)
+
+    load_dotenv(os.path.join(RAIZ, '.env'))
+    database_url = args.database_url or os.getenv("DATABASE_URL")
+    token = os.getenv("AMALIA_PROXY_TOKEN")
+    if not database_url:
+        print("No se encontró DATABASE_URL (entorno o .env); use --database-url")
+        return 2
+    if not token:
+        print("Defina AMALIA_PROXY_TOKEN: los equipos deben enviar el mismo token")
+        return 2
+
+    try:
+        servicio = ServicioProxy(database_url, args.conexiones, args.ttl)
+        servicio.iniciar()
+    except psycopg2.Error as e:
+        print(f"No se pudo conectar a la base de datos: {e}")
+        return 1
+
+    servidor = ThreadingHTTPServer((args.host, args.puerto), ManejadorProxy)
+    servidor.daemon_threads = True
+    servidor.servicio = servicio
+    servidor.token = token
+    print(f"Proxy de AMALIA en {args.host}:{args.puerto} "
+          f"({args.conexiones} conexiones, caché con TTL de {args.ttl:g} s)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servicio.cerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
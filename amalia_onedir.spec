@@ -0,0 +1,73 @@
+# -*- mode: python ; coding: utf-8 -*-
+"""
+Build de arranque rápido (onedir) de AMALIA
+
+    python -m PyInstaller amalia_onedir.spec --clean
+
+Genera dist/AMALIA/AMALIA.exe con sus dependencias en dist/AMALIA/_internal.
+A diferencia del build --onefile del Read.MD:
+  - no descomprime el paquete en un temporal en cada arranque (onedir)
+  - solo incluye los módulos que el código importa: nada de --collect-all
+    supabase (la aplicación usa psycopg2) ni el código fuente como datos
+  - el bytecode va precompilado con optimize=2 (sin docstrings ni asserts)
+  - sin UPX: descomprimir las DLL en cada arranque cuesta más de lo que ahorra
+Para comparar ambos builds: scripts/benchmark_arranque.py
+"""
+
+# Módulos de Qt y de la biblioteca estándar que la aplicación no usa
+EXCLUIR = [
+    'tkinter', 'unittest', 'pydoc', 'doctest', 'test', 'lib2to3',
+    'PyQt6.QtQml', 'PyQt6.QtQuick', 'PyQt6.QtQuickWidgets', 'PyQt6.QtWebEngineCore',
+    'PyQt6.QtWebEngineWidgets', 'PyQt6.QtMultimedia', 'PyQt6.QtMultimediaWidgets',
+    'PyQt6.QtBluetooth', 'PyQt6.QtNetwork', 'PyQt6.QtOpenGL', 'PyQt6.QtOpenGLWidgets',
+    'PyQt6.QtPositioning', 'PyQt6.QtSensors', 'PyQt6.QtSerialPort', 'PyQt6.QtSql',
+    'PyQt6.QtTest', 'PyQt6.QtXml', 'PyQt6.QtDesigner', 'PyQt6.QtHelp',
+    'PyQt6.Qt3DCore', 'PyQt6.QtCharts', 'PyQt6.QtDataVisualization',
+    'supabase', 'setuptools', 'pkg_resources', 'PyInstaller',
+]
+
+a = Analysis(
+    ['main.py'],
+    pathex=[],
+    binaries=[],
+    datas=[
+        ('assets', 'assets'),
+        ('.env', '.'),
+    ],
+    # Importaciones dentro de funciones que el análisis ya detecta; se listan
+    # para que un cambio de estilo no las deje fuera del paquete
+    hiddenimports=[
+        'ui.main_window',
+        'PyQt6.QtPrintSupport',
+        'database.local_replica',
+        'database.migrations',
+    ],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=['pyinstaller_hooks/pyi_rth_amalia.py'],
+    excludes=EXCLUIR,
+    noarchive=False,
+    optimize=2,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='AMALIA',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=True,
+    upx=False,
+    console=False,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=True,
+    upx=False,
+    name='AMALIA',
+)
@@ -0,0 +1,475 @@
+import asyncio
+import os
+import re
+from datetime import date
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
+
+from dotenv import load_dotenv
+
+from database import consultas
+from database.supabase_client import organizar_historial_por_año
+from database.pooler import MODO_TRANSACCION, modo_pooler
+
+try:
+    import asyncpg
+except ImportError:  # Dependencia opcional: sin ella se usa solo SupabaseClient
+    asyncpg = None
+
+
+PATRON_PARAMETRO = re.compile(r'%s')
+
+# Columnas de tipo date que los diálogos envían como texto 'yyyy-MM-dd'
+# (asyncpg no convierte texto a date automáticamente como psycopg2)
+CAMPOS_FECHA = {'fecha_nacimiento', 'fecha_inicio', 'fecha_fin'}
+
+
+@lru_cache(maxsize=256)
+def a_posicional(query: str) -> str:
+    """Convierte los parámetros estilo psycopg2 (%s) a los de asyncpg ($1, $2, ...)"""
+    contador = iter(range(1, 10000))
+    return PATRON_PARAMETRO.sub(lambda _: f"${next(contador)}", query)
+
+
+def _fecha(valor):
+    """Convierte 'yyyy-MM-dd' a date; deja otros valores intactos"""
+    if isinstance(valor, str) and valor:
+        return date.fromisoformat(valor)
+    return valor
+
+
+def disponible() -> bool:
+    """True si el driver asíncrono está instalado"""
+    return asyncpg is not None
+
+
+class AsyncSupabaseClient:
+    """Variante asíncrona de SupabaseClient sobre asyncpg, con pool propio"""
+
+    def __init__(self, database_url: str = None, min_size: int = 1, max_size: int = 8,
+                 respaldo=None):
+        """
+        Inicializa el cliente asíncrono
+
+        Args:
+            database_url: URL de conexión a PostgreSQL (opcional, si no se proporciona
+                        se construye desde las variables de entorno)
+            min_size: Conexiones mínimas del pool
+            max_size: Conexiones máximas del pool (consultas concurrentes)
+            respaldo: SupabaseClient que repite la operación (en un hilo) cuando
+                    el pool no puede hacerla
+        """
+        if asyncpg is None:
+            raise ImportError("AsyncSupabaseClient requiere el paquete asyncpg")
+
+        if database_url:
+            self.database_url = database_url
+        else:
+            load_dotenv()
+            user = os.getenv("user")
+            password = os.getenv("password")
+            host = os.getenv("host")
+            port = os.getenv("port")
+            dbname = os.getenv("dbname")
+            self.database_url = f"postgresql://{user}:{password}@{host}:{port}/{dbname}"
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.respaldo = respaldo
+        # True tras perder la conexión: desde entonces todo va al cliente síncrono
+        self.desactivado = False
+        self.pool = None
+        self._creando_pool = None
+
+    async def connect(self):
+        """Crea el pool de conexiones si no existe"""
+        if self.pool is not None:
+            return self.pool
+        if self._creando_pool is None:
+            opciones = {}
+            if modo_pooler(self.database_url) == MODO_TRANSACCION:
+                # Los prepared statements con nombre no sobreviven al cambio de backend
+                opciones['statement_cache_size'] = 0
+            self._creando_pool = asyncio.ensure_future(asyncpg.create_pool(
+                self.database_url,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                ssl='require',
+                timeout=10,
+                **opciones
+            ))
+        try:
+            self.pool = await self._creando_pool
+        finally:
+            self._creando_pool = None
+        return self.pool
+
+    async def disconnect(self):
+        """Cierra el pool de conexiones"""
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    async def test_connection(self) -> bool:
+        """Verifica la conexión con la base de datos"""
+        try:
+            pool = await self.connect()
+            return await pool.fetchval("SELECT 1") == 1
+        except Exception as e:
+            print(f"Error de conexión (async): {e}")
+            return False
+
+    def _registrar_fallo(self, operacion: str, error: Exception) -> bool:
+        """
+        Informa un error del pool
+
+        Returns:
+            True si la operación debe repetirse con el cliente síncrono. Un rechazo
+            del servidor (restricción, SQL inválido) no se repite: fallaría igual.
+        """
+        sin_conexion = isinstance(error, (OSError, asyncio.TimeoutError,
+                                          asyncpg.exceptions.PostgresConnectionError))
+        rechazo = isinstance(error, asyncpg.PostgresError) and not sin_conexion
+        if rechazo or self.respaldo is None:
+            print(f"Error en {operacion} (async): {error}")
+            return False
+        if sin_conexion:
+            self.desactivado = True
+        print(f"Error en {operacion} (async), se repite con el cliente síncrono: {error}")
+        return True
+
+    async def _intentar(self, operacion: str, vacio, accion, respaldo):
+        """
+        Ejecuta accion() en el pool; si falla por conexión o por el driver,
+        ejecuta respaldo(cliente_sincrono) en un hilo
+
+        Args:
+            operacion: Nombre para los mensajes de error
+            vacio: Resultado si la operación no se pudo hacer
+            accion: Corrutina sin argumentos que usa el pool
+            respaldo: Función que recibe el SupabaseClient y repite la operación
+        """
+        if not self.desactivado:
+            try:
+                return await accion()
+            except Exception as e:
+                if not self._registrar_fallo(operacion, e):
+                    return vacio
+        if self.respaldo is None:
+            return vacio
+        return await asyncio.to_thread(respaldo, self.respaldo)
+
+    async def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
+        """
+        Ejecuta una consulta SELECT y retorna los resultados
+
+        Args:
+            query: Consulta SQL con parámetros estilo psycopg2 (%s)
+            params: Parámetros para la consulta
+
+        Returns:
+            Lista de diccionarios con los resultados
+        """
+        async def consultar():
+            pool = await self.connect()
+            filas = await pool.fetch(a_posicional(query), *(params or ()))
+            return [dict(fila) for fila in filas]
+
+        return await self._intentar("consulta", [], consultar,
+                                    lambda cliente: cliente.execute_query(query, params))
+
+    async def execute_update(self, query: str, params: tuple = None) -> bool:
+        """Ejecuta una consulta INSERT, UPDATE o DELETE"""
+        async def ejecutar():
+            pool = await self.connect()
+            await pool.execute(a_posicional(query), *(params or ()))
+            return True
+
+        return await self._intentar("actualización", False, ejecutar,
+                                    lambda cliente: cliente.execute_update(query, params))
+
+    async def execute_many(self, query: str, params_list: List[tuple]) -> bool:
+        """Ejecuta múltiples operaciones INSERT/UPDATE en una transacción"""
+        async def ejecutar():
+            pool = await self.connect()
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.executemany(a_posicional(query), params_list)
+            return True
+
+        return await self._intentar("lote", False, ejecutar,
+                                    lambda cliente: cliente.execute_many(query, params_list))
+
+    async def _en_transaccion(self, sentencias: List[tuple], verificar: tuple = None) -> bool:
+        """
+        Ejecuta las sentencias (query, params) en una sola transacción del pool
+
+        Args:
+            sentencias: Lista de tuplas (query, params)
+            verificar: (query, params) que debe devolver un valor antes de escribir
+        """
+        pool = await self.connect()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                if verificar is not None:
+                    query, params = verificar
+                    if await conn.fetchval(a_posicional(query), *params) is None:
+                        return False
+                for query, params in sentencias:
+                    await conn.execute(a_posicional(query), *params)
+        return True
+
+    async def gather(self, **consultas) -> Dict[str, Any]:
+        """
+        Ejecuta varias corrutinas del cliente a la vez, cada una en su conexión del pool
+
+        Ejemplo:
+            datos = await cliente.gather(
+                estudiantes=cliente.get_all_estudiantes(),
+                grados=cliente.get_grado_counts()
+            )
+
+        Returns:
+            Diccionario nombre -> resultado
+        """
+        resultados = await asyncio.gather(*consultas.values())
+        return dict(zip(consultas.keys(), resultados))
+
+    # ==================== ESTUDIANTES ====================
+
+    async def get_all_estudiantes(self) -> List[Dict[str, Any]]:
+        """Obtiene todos los estudiantes con información del grado"""
+        return await self.execute_query(consultas.ESTUDIANTES)
+
+    async def get_estudiante_by_cedula(self, cedula: str) -> Optional[Dict[str, Any]]:
+        """Obtiene un estudiante por su cédula"""
+        results = await self.execute_query(consultas.ESTUDIANTE_POR_CEDULA, (cedula,))
+        return results[0] if results else None
+
+    async def get_estudiantes_by_grado(self, id_grado: int) -> List[Dict[str, Any]]:
+        """Obtiene todos los estudiantes de un grado específico"""
+        return await self.execute_query(consultas.ESTUDIANTES_POR_GRADO, (id_grado,))
+
+    async def create_estudiante(self, cedula: str, nombre: str, apellido: str,
+                                fecha_nacimiento: str, municipio: str = None,
+                                telefono: str = None, correo: str = None,
+                                id_grado: int = None, estado: str = None,
+                                pais: str = None, observacion: str = None,
+                                id_mencion: int = None, seccion: str = None) -> bool:
+        """Crea un nuevo estudiante y le asigna las asignaturas de su grado (en una transacción)"""
+        datos = dict(cedula=cedula, nombre=nombre, apellido=apellido,
+                     fecha_nacimiento=fecha_nacimiento, municipio=municipio,
+                     telefono=telefono, correo=correo, id_grado=id_grado, estado=estado,
+                     pais=pais, observacion=observacion, id_mencion=id_mencion, seccion=seccion)
+        sentencias = [(consultas.INSERTAR_ESTUDIANTE, (cedula, nombre, apellido, _fecha(fecha_nacimiento),
+                                                      municipio, telefono, correo, id_grado,
+                                                      estado, pais, observacion, id_mencion, seccion))]
+        if id_grado is not None:
+            sentencias.extend(consultas.pasos_asignacion(cedula, id_grado))
+
+        return await self._intentar("create_estudiante", False,
+                                    lambda: self._en_transaccion(sentencias),
+                                    lambda cliente: cliente.create_estudiante(**datos))
+
+    async def update_estudiante(self, cedula: str, **kwargs) -> bool:
+        """Actualiza un estudiante existente (y sus asignaturas si cambia de grado, en la misma transacción)"""
+        allowed_fields = ['nombre', 'apellido', 'fecha_nacimiento',
+                        'municipio', 'telefono', 'correo', 'id_grado',
+                        'estado', 'pais', 'observacion', 'id_mencion', 'seccion']
+
+        fields = []
+        values = []
+        for key, value in kwargs.items():
+            if key in allowed_fields:
+                fields.append(f"{key} = %s")
+                values.append(_fecha(value) if key in CAMPOS_FECHA else value)
+
+        if not fields:
+            return False
+
+        id_grado_actual = None
+        if 'id_grado' in kwargs:
+            resultado = await self.execute_query(consultas.GRADO_DE_ESTUDIANTE, (cedula,))
+            if resultado:
+                id_grado_actual = resultado[0]['id_grado']
+
+        values.append(cedula)
+        sentencias = [(f"UPDATE estudiante SET {', '.join(fields)} WHERE cedula = %s", tuple(values))]
+        if kwargs.get('id_grado') is not None and id_grado_actual is not None:
+            sentencias.extend(consultas.pasos_asignacion(cedula, kwargs['id_grado'], id_grado_actual))
+
+        return await self._intentar("update_estudiante", False,
+                                    lambda: self._en_transaccion(sentencias),
+                                    lambda cliente: cliente.update_estudiante(cedula, **kwargs))
+
+    async def delete_estudiante(self, cedula: str) -> bool:
+        """Elimina un estudiante por su cédula"""
+        return await self.execute_update(consultas.ELIMINAR_ESTUDIANTE, (cedula,))
+
+    async def asignar_asignaturas_estudiante(self, cedula_estudiante: str, id_grado_nuevo: int,
+                                             id_grado_actual: int = None) -> bool:
+        """
+        Asigna asignaturas a un estudiante basado en su historial académico y mención
+
+        Mismas sentencias que SupabaseClient.asignar_asignaturas_estudiante
+        (consultas.pasos_asignacion), dentro de una sola transacción.
+
+        Args:
+            cedula_estudiante: Cédula del estudiante
+            id_grado_nuevo: ID del nuevo grado
+            id_grado_actual: ID del grado actual (para re-asignar las reprobadas)
+
+        Returns:
+            True si se procesó correctamente
+        """
+        sentencias = consultas.pasos_asignacion(cedula_estudiante, id_grado_nuevo, id_grado_actual)
+        return await self._intentar(
+            "asignar_asignaturas_estudiante", False,
+            lambda: self._en_transaccion(sentencias,
+                                         verificar=(consultas.EXISTE_ESTUDIANTE, (cedula_estudiante,))),
+            lambda cliente: cliente.asignar_asignaturas_estudiante(cedula_estudiante, id_grado_nuevo,
+                                                                   id_grado_actual)
+        )
+
+    # ==================== DOCENTES ====================
+
+    async def get_all_docentes(self) -> List[Dict[str, Any]]:
+        """Obtiene todos los docentes"""
+        return await self.execute_query(consultas.DOCENTES)
+
+    async def create_docente(self, cedula: str, nombre: str, apellido: str,
+                             correo: str, telefono: str, especialidad: str) -> bool:
+        """Crea un nuevo docente"""
+        if not cedula or not nombre or not apellido:
+            return False
+        return await self.execute_update(consultas.INSERTAR_DOCENTE,
+                                         (cedula, nombre, apellido, correo, telefono, especialidad))
+
+    async def update_docente(self, cedula: str, **kwargs) -> bool:
+        """Actualiza un docente existente"""
+        allowed_fields = ['nombre', 'apellido', 'correo', 'telefono', 'especialidad']
+        fields = [f"{k} = %s" for k in kwargs if k in allowed_fields]
+        if not fields:
+            return False
+        values = [v for k, v in kwargs.items() if k in allowed_fields] + [cedula]
+        query = f"UPDATE docente SET {', '.join(fields)} WHERE cedula = %s"
+        return await self.execute_update(query, tuple(values))
+
+    # ==================== ASIGNATURAS ====================
+
+    async def get_all_asignaturas(self) -> List[Dict[str, Any]]:
+        """Obtiene todas las asignaturas con información del grado y docente"""
+        return await self.execute_query(consultas.ASIGNATURAS)
+
+    async def create_asignatura(self, codigo: str, nombre_asignatura: str,
+                                id_grado: int, id_mencion: int, cedula_docente: str = None) -> bool:
+        """Crea una nueva asignatura"""
+        if not codigo or not nombre_asignatura or id_grado is None:
+            return False
+        return await self.execute_update(
+            consultas.INSERTAR_ASIGNATURA,
+            (codigo, nombre_asignatura, id_grado, id_mencion, (cedula_docente or '').strip() or None)
+        )
+
+    async def update_asignatura(self, codigo: str, **kwargs) -> bool:
+        """Actualiza una asignatura existente"""
+        allowed_fields = ['nombre_asignatura', 'id_grado', 'cedula_docente', 'id_mencion']
+        fields = [f"{k} = %s" for k in kwargs if k in allowed_fields]
+        if not fields:
+            return False
+        values = [v for k, v in kwargs.items() if k in allowed_fields] + [codigo]
+        query = f"UPDATE asignatura SET {', '.join(fields)} WHERE codigo = %s"
+        return await self.execute_update(query, tuple(values))
+
+    # ==================== CALIFICACIONES ====================
+
+    async def get_calificaciones_by_estudiante(self, cedula_estudiante: str) -> List[Dict[str, Any]]:
+        """Obtiene todas las calificaciones de un estudiante"""
+        return await self.execute_query(consultas.CALIFICACIONES_DE_ESTUDIANTE, (cedula_estudiante,))
+
+    async def get_all_calificaciones(self) -> List[Dict[str, Any]]:
+        """Obtiene todas las calificaciones del sistema"""
+        return await self.execute_query(consultas.CALIFICACIONES)
+
+    async def create_calificacion(self, cedula_estudiante: str, codigo_asignatura: str,
+                                  nota_1: float = None, nota_2: float = None, nota_3: float = None,
+                                  ajuste_1: float = 0.0, ajuste_2: float = 0.0, ajuste_3: float = 0.0) -> bool:
+        """Registra una nueva calificación"""
+        notas = [n for n in [nota_1, nota_2, nota_3] if n is not None]
+        nota_final = sum(notas) / len(notas) if notas else 0.0
+        return await self.execute_update(consultas.INSERTAR_CALIFICACION,
+                                         (cedula_estudiante, codigo_asignatura, nota_1, ajuste_1,
+                                          nota_2, ajuste_2, nota_3, ajuste_3, nota_final))
+
+    async def update_calificacion(self, codigo_calificacion, **kwargs) -> bool:
+        """Actualiza una calificación existente (recalcula la nota final si cambian las notas)"""
+        allowed_fields = ['nota_1', 'ajuste_1', 'nota_2', 'ajuste_2', 'nota_3', 'ajuste_3', 'nota_final']
+        fields = [f"{k} = %s" for k in kwargs if k in allowed_fields]
+        if not fields:
+            return False
+        values = [v for k, v in kwargs.items() if k in allowed_fields]
+
+        if any(k in kwargs for k in ['nota_1', 'nota_2', 'nota_3']):
+            current = await self.execute_query(consultas.NOTAS_DE_CALIFICACION, (codigo_calificacion,))
+            if current:
+                notas = [kwargs.get(n, current[0][n]) for n in ['nota_1', 'nota_2', 'nota_3']]
+                notas = [n for n in notas if n is not None]
+                fields.append("nota_final = %s")
+                values.append(sum(notas) / len(notas) if notas else None)
+
+        values.append(codigo_calificacion)
+        query = f"UPDATE calificacion SET {', '.join(fields)} WHERE codigo_calificacion = %s"
+        return await self.execute_update(query, tuple(values))
+
+    # ==================== GRADOS ====================
+
+    async def get_all_grados(self) -> List[Dict[str, Any]]:
+        """Obtiene todos los grados"""
+        return await self.execute_query(consultas.GRADOS)
+
+    async def get_grado_counts(self) -> List[Dict[str, Any]]:
+        """Grados con total de estudiantes y desglose por sección y mención"""
+        return consultas.plegar_conteo_grados(await self.execute_query(consultas.CONTEO_GRADOS))
+
+    async def create_grado(self, nombre_grado: str) -> bool:
+        """Crea un nuevo grado"""
+        return await self.execute_update(consultas.INSERTAR_GRADO, (nombre_grado,))
+
+    async def update_grado(self, grado_id: int, nombre_grado: str) -> bool:
+        """Actualiza un grado"""
+        return await self.execute_update(consultas.ACTUALIZAR_GRADO, (nombre_grado, grado_id))
+
+    # ==================== PERÍODOS ACADÉMICOS ====================
+
+    async def get_all_periodos(self) -> List[Dict[str, Any]]:
+        """Obtiene todos los períodos académicos"""
+        return await self.execute_query(consultas.PERIODOS)
+
+    async def create_periodo(self, anio: int, fecha_inicio: str, fecha_fin: str) -> bool:
+        """Crea un nuevo período académico"""
+        return await self.execute_update(consultas.INSERTAR_PERIODO, (anio, _fecha(fecha_inicio), _fecha(fecha_fin)))
+
+    # ==================== HISTORIAL ACADÉMICO ====================
+
+    async def get_historial_completo_estudiante(self, cedula_estudiante: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene el historial académico completo de un estudiante organizado por año
+
+        Las tres consultas son independientes: se lanzan a la vez, cada una en
+        una conexión del pool, y la pantalla espera solo la más lenta.
+
+        Returns:
+            Mismo formato que SupabaseClient.get_historial_completo_estudiante
+        """
+        estudiante, historial, actuales = await asyncio.gather(
+            self.execute_query(consultas.HISTORIAL_ESTUDIANTE, (cedula_estudiante,)),
+            self.execute_query(consultas.HISTORIAL_MATERIAS, (cedula_estudiante,)),
+            self.execute_query(consultas.HISTORIAL_ACTUALES, (cedula_estudiante,)),
+        )
+        if not estudiante:
+            return None
+
+        return {
+            'info_estudiante': estudiante[0],
+            'historial_por_año': organizar_historial_por_año(historial, actuales)
+        }
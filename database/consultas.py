@@ -0,0 +1,287 @@
+"""
+Sentencias SQL compartidas por SupabaseClient y AsyncSupabaseClient
+
+Parámetros estilo psycopg2 (%s); el cliente asíncrono los convierte a $1, $2...
+Cambiar una consulta aquí la cambia en los dos clientes.
+"""
+
+# ==================== ESTUDIANTES ====================
+
+_SELECT_ESTUDIANTE = """
+    SELECT e.cedula, e.nombre, e.apellido, e.fecha_nacimiento,
+        e.municipio, e.telefono, e.correo, e.id_grado,
+        e.estado, e.pais, e.observacion, e.id_mencion,
+        e.seccion,
+        g.nombre_grado
+    FROM estudiante e
+    LEFT JOIN grado g ON e.id_grado = g.id_grado
+"""
+
+ESTUDIANTES = _SELECT_ESTUDIANTE + "ORDER BY e.apellido, e.nombre"
+
+ESTUDIANTE_POR_CEDULA = _SELECT_ESTUDIANTE + "WHERE e.cedula = %s"
+
+# Varias cédulas en una consulta: ANY en el servidor, IN (...) en la réplica (SQLite no tiene arrays)
+ESTUDIANTES_POR_CEDULAS = _SELECT_ESTUDIANTE + "WHERE e.cedula = ANY(%s)"
+
+
+def estudiantes_por_cedulas_local(cantidad: int) -> str:
+    """Variante de ESTUDIANTES_POR_CEDULAS para la réplica local"""
+    return _SELECT_ESTUDIANTE + f"WHERE e.cedula IN ({', '.join(['%s'] * cantidad)})"
+
+
+ESTUDIANTES_POR_GRADO = _SELECT_ESTUDIANTE + """
+    WHERE e.id_grado = %s
+    ORDER BY e.apellido, e.nombre
+"""
+
+INSERTAR_ESTUDIANTE = """
+    INSERT INTO estudiante
+    (cedula, nombre, apellido, fecha_nacimiento, municipio,
+    telefono, correo, id_grado, estado, pais, observacion, id_mencion, seccion)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+GRADO_DE_ESTUDIANTE = "SELECT id_grado FROM estudiante WHERE cedula = %s"
+
+ELIMINAR_ESTUDIANTE = "DELETE FROM estudiante WHERE cedula = %s"
+
+# ==================== ASIGNACIÓN DE ASIGNATURAS ====================
+# Pasos de asignar_asignaturas_estudiante, en este orden y en una transacción
+
+EXISTE_ESTUDIANTE = "SELECT cedula FROM estudiante WHERE cedula = %s"
+
+# 1. Las calificaciones con nota final pasan al historial (si no estaban). Parámetros: (cedula,)
+PASAR_A_HISTORIAL = """
+    INSERT INTO historial_academico
+    (cedula_estudiante, codigo_asignatura, nombre_asignatura,
+    id_grado, nota_final, estado, fecha_curso)
+    SELECT c.cedula_estudiante, c.codigo_asignatura, a.nombre_asignatura,
+           a.id_grado, c.nota_final,
+           CASE WHEN c.nota_final >= 9.5 THEN 'APROBADO' ELSE 'REPROBADO' END,
+           CURRENT_DATE
+    FROM calificacion c
+    JOIN asignatura a ON c.codigo_asignatura = a.codigo
+    WHERE c.cedula_estudiante = %s
+      AND c.nota_final IS NOT NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM historial_academico h
+          WHERE h.cedula_estudiante = c.cedula_estudiante
+            AND h.codigo_asignatura = c.codigo_asignatura
+      )
+"""
+
+# 2. Parámetros: (cedula,)
+BORRAR_CALIFICACIONES = "DELETE FROM calificacion WHERE cedula_estudiante = %s"
+
+# 3. Las reprobadas del grado que deja se vuelven a cursar. Parámetros: (cedula, id_grado_actual)
+REASIGNAR_REPROBADAS = """
+    INSERT INTO calificacion
+    (cedula_estudiante, codigo_asignatura, nota_1, ajuste_1,
+    nota_2, ajuste_2, nota_3, ajuste_3, nota_final)
+    SELECT ha.cedula_estudiante, ha.codigo_asignatura, NULL, 0.0, NULL, 0.0, NULL, 0.0, NULL
+    FROM historial_academico ha
+    WHERE ha.cedula_estudiante = %s
+      AND ha.id_grado = %s
+      AND ha.estado = 'REPROBADO'
+"""
+
+# 4. Las del nuevo grado (de su mención, o todas si no tiene) que aún no tenga.
+#    Parámetros: (id_grado_nuevo, cedula)
+ASIGNAR_MATERIAS_GRADO = """
+    INSERT INTO calificacion
+    (cedula_estudiante, codigo_asignatura, nota_1, ajuste_1,
+    nota_2, ajuste_2, nota_3, ajuste_3, nota_final)
+    SELECT e.cedula, a.codigo, NULL, 0.0, NULL, 0.0, NULL, 0.0, NULL
+    FROM estudiante e
+    JOIN asignatura a ON a.id_grado = %s
+    WHERE e.cedula = %s
+      AND (COALESCE(e.id_mencion, 0) = 0 OR a.id_mencion = e.id_mencion)
+      AND NOT EXISTS (
+          SELECT 1 FROM calificacion c
+          WHERE c.cedula_estudiante = e.cedula AND c.codigo_asignatura = a.codigo
+      )
+"""
+
+
+def pasos_asignacion(cedula: str, id_grado_nuevo: int, id_grado_actual: int = None) -> list:
+    """Sentencias (query, params) de la asignación de asignaturas, en orden"""
+    pasos = [
+        (PASAR_A_HISTORIAL, (cedula,)),
+        (BORRAR_CALIFICACIONES, (cedula,)),
+    ]
+    if id_grado_actual is not None:
+        pasos.append((REASIGNAR_REPROBADAS, (cedula, id_grado_actual)))
+    pasos.append((ASIGNAR_MATERIAS_GRADO, (id_grado_nuevo, cedula)))
+    return pasos
+
+# ==================== DOCENTES ====================
+
+DOCENTES = """
+    SELECT d.cedula, d.nombre, d.apellido, d.correo,
+           d.telefono, d.especialidad
+    FROM docente d
+    ORDER BY d.apellido, d.nombre
+"""
+
+INSERTAR_DOCENTE = """
+    INSERT INTO docente (cedula, nombre, apellido, correo, telefono, especialidad)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+# ==================== ASIGNATURAS ====================
+
+ASIGNATURAS = """
+    SELECT a.codigo, a.nombre_asignatura, a.id_grado, a.cedula_docente, a.id_mencion,
+        g.nombre_grado,
+        d.nombre as docente_nombre, d.apellido as docente_apellido
+    FROM asignatura a
+    LEFT JOIN grado g ON a.id_grado = g.id_grado
+    LEFT JOIN docente d ON a.cedula_docente = d.cedula
+    ORDER BY a.nombre_asignatura
+"""
+
+INSERTAR_ASIGNATURA = """
+    INSERT INTO asignatura (codigo, nombre_asignatura, id_grado, id_mencion, cedula_docente)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+# ==================== CALIFICACIONES ====================
+
+CALIFICACIONES_DE_ESTUDIANTE = """
+    SELECT c.codigo_calificacion, c.cedula_estudiante, c.codigo_asignatura,
+    c.nota_1, c.ajuste_1,
+    c.nota_2, c.ajuste_2,
+    c.nota_3, c.ajuste_3,
+    c.nota_final, a.nombre_asignatura, a.codigo
+    FROM calificacion c
+    JOIN asignatura a ON c.codigo_asignatura = a.codigo
+    WHERE c.cedula_estudiante = %s
+    ORDER BY a.nombre_asignatura
+"""
+
+CALIFICACIONES = """
+    SELECT c.codigo_calificacion, c.cedula_estudiante, c.codigo_asignatura,
+        c.nota_1, c.ajuste_1, c.nota_2,
+        c.ajuste_2, c.nota_3, c.ajuste_3,
+        c.nota_final,
+        e.nombre AS nombre_estudiante,
+        e.apellido AS apellido_estudiante,
+        a.nombre_asignatura,
+        a.codigo
+    FROM calificacion c
+    JOIN estudiante e ON c.cedula_estudiante = e.cedula
+    JOIN asignatura a ON c.codigo_asignatura = a.codigo
+    ORDER BY e.apellido, e.nombre, a.nombre_asignatura
+"""
+
+INSERTAR_CALIFICACION = """
+    INSERT INTO calificacion (cedula_estudiante, codigo_asignatura, nota_1, ajuste_1, nota_2,
+                            ajuste_2, nota_3, ajuste_3, nota_final)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+NOTAS_DE_CALIFICACION = "SELECT nota_1, nota_2, nota_3 FROM calificacion WHERE codigo_calificacion = %s"
+
+# ==================== GRADOS ====================
+
+GRADOS = """
+    SELECT id_grado, nombre_grado
+    FROM grado
+    ORDER BY nombre_grado
+"""
+
+# Una fila por grado, sección y mención (ver plegar_conteo_grados)
+CONTEO_GRADOS = """
+    SELECT g.id_grado, g.nombre_grado, e.seccion, e.id_mencion,
+           COUNT(e.cedula) AS total
+    FROM grado g
+    LEFT JOIN estudiante e ON e.id_grado = g.id_grado
+    GROUP BY g.id_grado, g.nombre_grado, e.seccion, e.id_mencion
+    ORDER BY g.nombre_grado
+"""
+
+INSERTAR_GRADO = """
+    INSERT INTO grado (nombre_grado)
+    VALUES (%s)
+"""
+
+ACTUALIZAR_GRADO = """
+    UPDATE grado
+    SET nombre_grado = %s
+    WHERE id_grado = %s
+"""
+
+
+def plegar_conteo_grados(filas) -> list:
+    """
+    Pliega las filas de CONTEO_GRADOS en una por grado con count,
+    count_by_seccion ({seccion: n}) y count_by_mencion ({id_mencion: n})
+    """
+    grados = {}
+    for fila in filas:
+        grado = grados.setdefault(fila['id_grado'], {
+            'id_grado': fila['id_grado'],
+            'nombre_grado': fila['nombre_grado'],
+            'count': 0,
+            'count_by_seccion': {},
+            'count_by_mencion': {},
+        })
+        total = fila['total']
+        if not total:
+            continue
+        grado['count'] += total
+        por_seccion = grado['count_by_seccion']
+        por_seccion[fila['seccion']] = por_seccion.get(fila['seccion'], 0) + total
+        por_mencion = grado['count_by_mencion']
+        por_mencion[fila['id_mencion']] = por_mencion.get(fila['id_mencion'], 0) + total
+    return list(grados.values())
+
+# ==================== PERÍODOS ACADÉMICOS ====================
+
+PERIODOS = """
+    SELECT id_periodo, anio, fecha_inicio, fecha_fin
+    FROM periodo_academico
+    ORDER BY anio DESC, fecha_inicio DESC
+"""
+
+INSERTAR_PERIODO = """
+    INSERT INTO periodo_academico (anio, fecha_inicio, fecha_fin)
+    VALUES (%s, %s, %s)
+"""
+
+# ==================== HISTORIAL ACADÉMICO ====================
+# Las tres consultas de get_historial_completo_estudiante (parámetro: cédula)
+
+HISTORIAL_ESTUDIANTE = """
+    SELECT e.cedula, e.nombre, e.apellido, e.fecha_nacimiento,
+        e.id_grado, e.pais, e.estado, e.municipio,
+        e.observacion, e.id_mencion, e.seccion, g.nombre_grado
+    FROM estudiante e
+    LEFT JOIN grado g ON e.id_grado = g.id_grado
+    WHERE e.cedula = %s
+"""
+
+# Materias que ya completó en años anteriores
+HISTORIAL_MATERIAS = """
+    SELECT h.id_historial, h.cedula_estudiante, h.codigo_asignatura,
+        h.nota_final, h.estado, h.fecha_curso,
+        a.nombre_asignatura, a.id_grado, g.nombre_grado
+    FROM historial_academico h
+    JOIN asignatura a ON h.codigo_asignatura = a.codigo
+    JOIN grado g ON a.id_grado = g.id_grado
+    WHERE h.cedula_estudiante = %s
+    ORDER BY a.id_grado, a.nombre_asignatura
+"""
+
+# Calificaciones del año en curso
+HISTORIAL_ACTUALES = """
+    SELECT c.codigo_calificacion, c.cedula_estudiante, c.codigo_asignatura,
+        c.nota_final,
+        a.nombre_asignatura, a.id_grado, g.nombre_grado
+    FROM calificacion c
+    JOIN asignatura a ON c.codigo_asignatura = a.codigo
+    JOIN grado g ON a.id_grado = g.id_grado
+    WHERE c.cedula_estudiante = %s
+    ORDER BY a.id_grado, a.nombre_asignatura
+"""
@@ -0,0 +1,592 @@
+import sqlite3
+import threading
+import json
+import re
+import os
+import unicodedata
+from datetime import datetime, date
+from decimal import Decimal
+from typing import List, Dict, Any, Callable
+
+from database.pooler import cursor_por_partes, leer_por_partes
+
+
+# Tablas replicadas localmente: nombre -> (clave primaria, columnas)
+TABLAS_REPLICADAS = {
+    'grado': ('id_grado', [
+        'id_grado', 'nombre_grado'
+    ]),
+    'docente': ('cedula', [
+        'cedula', 'nombre', 'apellido', 'correo', 'telefono', 'especialidad'
+    ]),
+    'estudiante': ('cedula', [
+        'cedula', 'nombre', 'apellido', 'fecha_nacimiento', 'municipio',
+        'telefono', 'correo', 'id_grado', 'estado', 'pais', 'observacion',
+        'id_mencion', 'seccion'
+    ]),
+    'asignatura': ('codigo', [
+        'codigo', 'nombre_asignatura', 'id_grado', 'cedula_docente', 'id_mencion'
+    ]),
+    'calificacion': ('codigo_calificacion', [
+        'codigo_calificacion', 'cedula_estudiante', 'codigo_asignatura',
+        'nota_1', 'ajuste_1', 'nota_2', 'ajuste_2', 'nota_3', 'ajuste_3', 'nota_final'
+    ]),
+    'historial_academico': ('id_historial', [
+        'id_historial', 'cedula_estudiante', 'codigo_asignatura', 'nombre_asignatura',
+        'id_grado', 'nota_final', 'estado', 'fecha_curso'
+    ]),
+}
+
+# Tablas cuya clave la asigna el servidor (SERIAL). Sus INSERT no se reflejan
+# localmente estando en línea: se trae la fila real con un delta inmediato.
+TABLAS_CLAVE_SERIAL = {'grado', 'calificacion', 'historial_academico'}
+
+# Margen para no perder filas de transacciones largas que confirman con un
+# updated_at anterior a la última marca de agua recibida
+MARGEN_WATERMARK = "5 minutes"
+
+# SQL del servidor: columna updated_at + trigger que la mantiene
+SQL_FUNCION_UPDATED_AT = """
+    CREATE OR REPLACE FUNCTION amalia_touch_updated_at() RETURNS trigger AS $$
+    BEGIN
+        NEW.updated_at := now();
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+SQL_UPDATED_AT_TABLA = [
+    "ALTER TABLE {tabla} ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now()",
+    "DROP TRIGGER IF EXISTS trg_{tabla}_updated_at ON {tabla}",
+    """CREATE TRIGGER trg_{tabla}_updated_at
+       BEFORE INSERT OR UPDATE ON {tabla}
+       FOR EACH ROW EXECUTE FUNCTION amalia_touch_updated_at()""",
+    "CREATE INDEX IF NOT EXISTS idx_{tabla}_updated_at ON {tabla} (updated_at)",
+]
+
+PATRON_TABLAS = re.compile(r'\b(?:FROM|JOIN|INTO|UPDATE)\s+([a-z_][a-z0-9_]*)', re.IGNORECASE)
+
+
+def tablas_de_consulta(query: str) -> set:
+    """Obtiene los nombres de tabla referenciados por una consulta SQL"""
+    return {t.lower() for t in PATRON_TABLAS.findall(query)}
+
+
+def sql_watermarks_servidor(tablas: List[str] = None) -> List[str]:
+    """
+    Sentencias que preparan el servidor para la sincronización por deltas
+
+    Args:
+        tablas: Tablas a preparar (por defecto todas las replicadas)
+
+    Returns:
+        Lista de sentencias SQL idempotentes
+    """
+    sentencias = [SQL_FUNCION_UPDATED_AT]
+    for tabla in (tablas or TABLAS_REPLICADAS):
+        sentencias.extend(s.format(tabla=tabla) for s in SQL_UPDATED_AT_TABLA)
+    return sentencias
+
+
+def texto_busqueda(*valores) -> str:
+    """
+    Equivalente local de amalia_busqueda() del servidor: une los campos y los
+    pasa a minúsculas sin acentos
+    """
+    texto = " ".join(str(v) for v in valores if v is not None).lower()
+    return "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+
+
+def _valor_local(valor):
+    """Convierte un valor de PostgreSQL a uno almacenable en SQLite"""
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+class LocalReplica:
+    """Réplica SQLite local con bandeja de salida (outbox) y sincronización por deltas"""
+
+    def __init__(self, ruta: str, conectar_remoto: Callable = None, intervalo: int = 30):
+        """
+        Inicializa la réplica local
+
+        Args:
+            ruta: Ruta del archivo SQLite
+            conectar_remoto: Función que abre una conexión psycopg2 nueva
+                            (la usa el hilo de sincronización)
+            intervalo: Segundos entre sincronizaciones en segundo plano
+        """
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        self.ruta = ruta
+        self.conectar_remoto = conectar_remoto
+        self.intervalo = intervalo
+
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(ruta, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.create_function("amalia_busqueda", -1, texto_busqueda, deterministic=True)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self.crear_esquema()
+
+        # Estado de conectividad (lo actualiza el hilo de sincronización)
+        self.sin_conexion = False
+        self.ultimo_error = None
+        self._tablas_sucias = set()
+        self._tablas_en_sincronizacion = set()
+        # Tablas de lotes rechazados: se vuelven a traer completas
+        self._tablas_a_recargar = set()
+        self._rechazos: List[Dict[str, Any]] = []
+        # Función que recibe cada lote rechazado por el servidor (hilo de sincronización)
+        self.al_rechazar: Callable[[Dict[str, Any]], None] = None
+        self._hilo = None
+        self._detener = threading.Event()
+        self._despertar = threading.Event()
+        self._ciclos = 0
+
+    def crear_esquema(self):
+        """Crea las tablas replicadas y las tablas internas si no existen"""
+        with self._lock:
+            for tabla, (pk, columnas) in TABLAS_REPLICADAS.items():
+                definicion = ", ".join(
+                    f"{col} PRIMARY KEY" if col == pk else col for col in columnas
+                )
+                self._db.execute(f"CREATE TABLE IF NOT EXISTS {tabla} ({definicion})")
+
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS _outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    creado TEXT NOT NULL,
+                    sentencias TEXT NOT NULL
+                )
+            """)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS _outbox_fallidos (
+                    id INTEGER PRIMARY KEY,
+                    creado TEXT NOT NULL,
+                    sentencias TEXT NOT NULL,
+                    error TEXT
+                )
+            """)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS _watermark (
+                    tabla TEXT PRIMARY KEY,
+                    valor TEXT
+                )
+            """)
+
+            # Índices equivalentes a los filtros más usados por SupabaseClient
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_estudiante_grado ON estudiante (id_grado, seccion)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_calificacion_estudiante ON calificacion (cedula_estudiante)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_asignatura_grado ON asignatura (id_grado, id_mencion)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_historial_estudiante ON historial_academico (cedula_estudiante, codigo_asignatura)")
+            self._db.commit()
+
+    # ==================== LECTURAS ====================
+
+    @property
+    def inicializada(self) -> bool:
+        """True si todas las tablas completaron al menos una sincronización"""
+        with self._lock:
+            filas = self._db.execute("SELECT COUNT(*) FROM _watermark WHERE valor IS NOT NULL").fetchone()
+        return filas[0] >= len(TABLAS_REPLICADAS)
+
+    def puede_responder(self, query: str) -> bool:
+        """
+        Indica si una consulta puede resolverse localmente
+
+        Solo se sirven SELECT cuyas tablas estén todas replicadas.
+        """
+        if not query.lstrip().upper().startswith("SELECT"):
+            return False
+        tablas = tablas_de_consulta(query)
+        return bool(tablas) and tablas.issubset(TABLAS_REPLICADAS.keys())
+
+    def tablas_desactualizadas(self) -> set:
+        """
+        Tablas con escrituras confirmadas en el servidor que la réplica aún no trajo
+
+        Mientras el delta no las traiga, las lecturas de estas tablas se resuelven
+        en el servidor (por ejemplo, las filas recién insertadas con clave serial).
+        """
+        with self._lock:
+            return self._tablas_sucias | self._tablas_en_sincronizacion
+
+    def consultar(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
+        """
+        Ejecuta una consulta SELECT sobre la réplica
+
+        Args:
+            query: Consulta SQL con parámetros estilo psycopg2 (%s)
+            params: Parámetros de la consulta
+
+        Returns:
+            Lista de diccionarios con los resultados
+        """
+        with self._lock:
+            cursor = self._db.execute(self._traducir(query), tuple(params or ()))
+            return [dict(fila) for fila in cursor.fetchall()]
+
+    # ==================== ESCRITURAS ====================
+
+    def reflejar(self, sentencias: List[tuple], en_linea: bool = True):
+        """
+        Aplica localmente escrituras ya confirmadas (o encoladas) para el servidor
+
+        Args:
+            sentencias: Lista de tuplas (query, params)
+            en_linea: True si las sentencias ya se aplicaron en el servidor
+        """
+        with self._lock:
+            for query, params in sentencias:
+                tablas = tablas_de_consulta(query) & TABLAS_REPLICADAS.keys()
+                if not tablas:
+                    continue
+
+                es_insert = query.lstrip().upper().startswith("INSERT")
+                if en_linea and es_insert and tablas & TABLAS_CLAVE_SERIAL:
+                    # La clave real la asignó el servidor: traer la fila en el próximo delta
+                    self._tablas_sucias.update(tablas)
+                    continue
+
+                try:
+                    self._db.execute(self._traducir(query), tuple(params or ()))
+                except sqlite3.Error as e:
+                    print(f"Réplica: no se pudo reflejar la escritura localmente: {e}")
+                    self._tablas_sucias.update(tablas)
+
+                if not en_linea:
+                    self._tablas_sucias.update(tablas)
+            self._db.commit()
+
+        if en_linea and self._tablas_sucias & TABLAS_CLAVE_SERIAL:
+            self.despertar()
+
+    def encolar(self, sentencias: List[tuple], reflejar: bool = True):
+        """
+        Guarda un lote de escrituras en la bandeja de salida durable
+
+        El lote se reproduce completo (en una sola transacción) al volver la conexión.
+
+        Args:
+            sentencias: Lista de tuplas (query, params)
+            reflejar: False si las sentencias ya se aplicaron localmente
+        """
+        payload = json.dumps([[q, list(p) if p else None] for q, p in sentencias], default=str)
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO _outbox (creado, sentencias) VALUES (?, ?)",
+                (datetime.now().isoformat(), payload)
+            )
+            self._db.commit()
+        self.sin_conexion = True
+        if reflejar:
+            self.reflejar(sentencias, en_linea=False)
+
+    def pendientes(self) -> int:
+        """Cantidad de lotes pendientes en la bandeja de salida"""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM _outbox").fetchone()[0]
+
+    # ==================== SINCRONIZACIÓN ====================
+
+    def iniciar(self):
+        """Inicia el hilo de sincronización en segundo plano"""
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="amalia-replica", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        """Detiene el hilo de sincronización"""
+        self._detener.set()
+        self._despertar.set()
+
+    def despertar(self):
+        """Adelanta la próxima sincronización"""
+        self._despertar.set()
+
+    def _bucle(self):
+        """
+        Bucle del hilo de sincronización
+
+        Solo los errores de conexión ponen la réplica en modo sin conexión. Los
+        demás (esquema sin migrar, permisos, SQL) se informan y quedan en
+        ultimo_error; la réplica sigue en línea y se reintenta en el próximo ciclo.
+        """
+        import psycopg2
+
+        conn = None
+        while not self._detener.is_set():
+            try:
+                if conn is None or conn.closed:
+                    conn = self.conectar_remoto()
+                self.sincronizar(conn)
+                self.sin_conexion = False
+                self.ultimo_error = None
+                conn_invalida = False
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                print(f"Réplica: sin conexión con el servidor ({e.__class__.__name__})")
+                self.sin_conexion = True
+                conn_invalida = True
+            except Exception as e:
+                print(f"Réplica: error al sincronizar con el servidor: {e.__class__.__name__}: {e}")
+                self.ultimo_error = e
+                conn_invalida = True
+
+            if conn_invalida:
+                try:
+                    if conn is not None:
+                        conn.close()
+                except Exception:
+                    pass
+                conn = None
+
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+
+        if conn is not None and not conn.closed:
+            conn.close()
+
+    def sincronizar(self, conn):
+        """
+        Ejecuta un ciclo completo: reproducir outbox, traer deltas y reconciliar borrados
+
+        Args:
+            conn: Conexión psycopg2 propia del hilo de sincronización
+        """
+        self._ciclos += 1
+        tablas_reconciliar = self.reproducir_outbox(conn)
+
+        # Las tablas tocadas hasta aquí dejan de estar desactualizadas cuando el
+        # ciclo termina; las que se toquen durante el ciclo quedan para el próximo
+        with self._lock:
+            self._tablas_en_sincronizacion |= self._tablas_sucias
+            self._tablas_sucias = set()
+            sucias = set(self._tablas_en_sincronizacion)
+            recargar = set(self._tablas_a_recargar)
+
+        # Las tablas de un lote rechazado se traen completas: el servidor no cambió,
+        # así que ningún delta deshace lo que se aplicó localmente sin conexión
+        for tabla in TABLAS_REPLICADAS:
+            self.traer_delta(conn, tabla, completa=tabla in recargar)
+
+        # Los borrados no dejan rastro en updated_at: se detectan comparando claves.
+        # Las tablas tocadas se reconcilian siempre; el resto cada 10 ciclos.
+        tablas_reconciliar |= sucias
+        if self._ciclos % 10 == 1:
+            tablas_reconciliar = set(TABLAS_REPLICADAS)
+
+        for tabla in tablas_reconciliar:
+            self.reconciliar_claves(conn, tabla)
+
+        with self._lock:
+            self._tablas_en_sincronizacion -= sucias
+            self._tablas_a_recargar -= recargar
+            rechazos, self._rechazos = self._rechazos, []
+
+        # Se avisa cuando la réplica ya muestra otra vez los datos del servidor
+        for rechazo in rechazos:
+            if self.al_rechazar is not None:
+                try:
+                    self.al_rechazar(rechazo)
+                except Exception as e:
+                    print(f"Réplica: error al avisar el lote rechazado: {e}")
+
+    def reproducir_outbox(self, conn) -> set:
+        """
+        Reproduce en orden los lotes encolados sin conexión
+
+        Los lotes rechazados pasan a _outbox_fallidos; sus tablas se recargan
+        completas en el mismo ciclo y se avisa a al_rechazar.
+
+        Returns:
+            Conjunto de tablas afectadas por los lotes reproducidos
+        """
+        import psycopg2
+
+        tablas = set()
+        with self._lock:
+            lotes = self._db.execute("SELECT id, creado, sentencias FROM _outbox ORDER BY id").fetchall()
+
+        for lote in lotes:
+            sentencias = json.loads(lote['sentencias'])
+            cursor = conn.cursor()
+            try:
+                for query, params in sentencias:
+                    cursor.execute(query, tuple(params) if params else None)
+                    tablas |= tablas_de_consulta(query) & TABLAS_REPLICADAS.keys()
+                conn.commit()
+                error = None
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                # Se perdió la conexión otra vez: reintentar en el próximo ciclo
+                raise
+            except Exception as e:
+                conn.rollback()
+                error = str(e)
+                print(f"Réplica: el lote {lote['id']} fue rechazado por el servidor: {e}")
+            finally:
+                cursor.close()
+
+            with self._lock:
+                if error is not None:
+                    # Todas las tablas del lote, también las de sentencias que no llegaron a ejecutarse
+                    tablas_lote = set()
+                    for query, _ in sentencias:
+                        tablas_lote |= tablas_de_consulta(query) & TABLAS_REPLICADAS.keys()
+                    tablas |= tablas_lote
+                    self._tablas_a_recargar |= tablas_lote
+                    self._rechazos.append({'lote': lote['id'], 'creado': lote['creado'],
+                                           'error': error, 'tablas': sorted(tablas_lote)})
+                    self._db.execute(
+                        "INSERT INTO _outbox_fallidos (id, creado, sentencias, error) VALUES (?, ?, ?, ?)",
+                        (lote['id'], lote['creado'], lote['sentencias'], error)
+                    )
+                self._db.execute("DELETE FROM _outbox WHERE id = ?", (lote['id'],))
+                self._db.commit()
+
+        return tablas
+
+    def traer_delta(self, conn, tabla: str, completa: bool = False):
+        """
+        Trae las filas modificadas desde la última marca de agua de una tabla
+
+        Args:
+            conn: Conexión psycopg2
+            tabla: Nombre de la tabla replicada
+            completa: True para traer todas las filas sin mirar la marca de agua
+        """
+        pk, columnas = TABLAS_REPLICADAS[tabla]
+        with self._lock:
+            fila = self._db.execute("SELECT valor FROM _watermark WHERE tabla = ?", (tabla,)).fetchone()
+        watermark = fila['valor'] if fila else None
+        desde = None if completa else watermark
+
+        marcadores = ", ".join("?" for _ in columnas)
+        actualizar = ", ".join(f"{c} = excluded.{c}" for c in columnas if c != pk)
+        query = (
+            f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({marcadores}) "
+            f"ON CONFLICT ({pk}) DO UPDATE SET {actualizar}"
+        )
+
+        # La primera sincronización trae tablas completas: se leen por partes
+        # (cursor del servidor dentro de una transacción, válido con cualquier pooler)
+        cursor = cursor_por_partes(conn, f"amalia_delta_{tabla}")
+        if desde:
+            cursor.execute(
+                f"SELECT {', '.join(columnas)}, updated_at FROM {tabla} "
+                f"WHERE updated_at > %s::timestamptz - interval '{MARGEN_WATERMARK}' "
+                f"ORDER BY updated_at",
+                (desde,)
+            )
+        else:
+            cursor.execute(f"SELECT {', '.join(columnas)}, updated_at FROM {tabla} ORDER BY updated_at")
+
+        nuevo_watermark = watermark
+        for filas in leer_por_partes(cursor):
+            with self._lock:
+                self._db.executemany(
+                    query,
+                    [tuple(_valor_local(f[c]) for c in columnas) for f in filas]
+                )
+            nuevo_watermark = _valor_local(filas[-1]['updated_at'])
+        cursor.close()
+        conn.commit()
+
+        with self._lock:
+            if nuevo_watermark != watermark or not watermark:
+                self._db.execute(
+                    "INSERT INTO _watermark (tabla, valor) VALUES (?, ?) "
+                    "ON CONFLICT (tabla) DO UPDATE SET valor = excluded.valor",
+                    (tabla, nuevo_watermark or datetime.now().astimezone().isoformat())
+                )
+            self._db.commit()
+
+    def reconciliar_claves(self, conn, tabla: str):
+        """
+        Elimina de la réplica las filas que ya no existen en el servidor
+
+        Las filas insertadas sin conexión en tablas de clave serial quedan con
+        la clave en NULL; con la bandeja de salida vacía ya se reprodujeron (o
+        se rechazaron) y el delta trajo las filas reales, así que se eliminan.
+
+        Args:
+            conn: Conexión psycopg2
+            tabla: Nombre de la tabla replicada
+        """
+        pk, _ = TABLAS_REPLICADAS[tabla]
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {pk} FROM {tabla}")
+        claves_remotas = {fila[pk] for fila in cursor.fetchall()}
+        cursor.close()
+        conn.commit()
+
+        with self._lock:
+            claves_locales = {fila[0] for fila in self._db.execute(f"SELECT {pk} FROM {tabla}")}
+            sobrantes = claves_locales - claves_remotas
+            sin_clave = None in sobrantes
+            sobrantes.discard(None)
+            if sobrantes:
+                self._db.executemany(
+                    f"DELETE FROM {tabla} WHERE {pk} = ?",
+                    [(clave,) for clave in sobrantes]
+                )
+            if sin_clave and not self.pendientes():
+                self._db.execute(f"DELETE FROM {tabla} WHERE {pk} IS NULL")
+            self._db.commit()
+
+    def aplicar_cambio(self, conn, tabla: str, operacion: str, clave):
+        """
+        Aplica a la réplica un cambio notificado por el servidor (fila por fila)
+
+        Args:
+            conn: Conexión psycopg2
+            tabla: Nombre de la tabla replicada
+            operacion: INSERT, UPDATE o DELETE
+            clave: Valor de la clave primaria de la fila
+        """
+        if tabla not in TABLAS_REPLICADAS:
+            return
+        pk, columnas = TABLAS_REPLICADAS[tabla]
+
+        if operacion == 'DELETE':
+            with self._lock:
+                # Las columnas locales no tienen tipo: comparar como texto
+                self._db.execute(f"DELETE FROM {tabla} WHERE CAST({pk} AS TEXT) = ?", (str(clave),))
+                self._db.commit()
+            return
+
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {', '.join(columnas)} FROM {tabla} WHERE {pk}::text = %s", (str(clave),))
+        fila = cursor.fetchone()
+        cursor.close()
+        if fila is None:
+            return
+
+        marcadores = ", ".join("?" for _ in columnas)
+        actualizar = ", ".join(f"{c} = excluded.{c}" for c in columnas if c != pk)
+        with self._lock:
+            self._db.execute(
+                f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({marcadores}) "
+                f"ON CONFLICT ({pk}) DO UPDATE SET {actualizar}",
+                tuple(_valor_local(fila[c]) for c in columnas)
+            )
+            self._db.commit()
+
+    @staticmethod
+    def _traducir(query: str) -> str:
+        """Adapta una consulta de psycopg2 al estilo de parámetros de sqlite3"""
+        return query.replace("%s", "?")
+
+    def cerrar(self):
+        """Detiene la sincronización y cierra el archivo local"""
+        self.detener()
+        with self._lock:
+            self._db.close()
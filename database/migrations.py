@@ -0,0 +1,375 @@
+"""
+Migraciones versionadas del esquema y verificación de planes de consulta
+
+Uso:
+    python -m database.migrations aplicar      # aplica las migraciones pendientes
+    python -m database.migrations estado       # lista aplicadas y pendientes
+    python -m database.migrations verificar    # EXPLAIN de las consultas de SupabaseClient
+"""
+import argparse
+import json
+import os
+import sys
+from typing import List, Dict, Any, Tuple
+
+from database.local_replica import sql_watermarks_servidor
+from database.notificaciones import sql_notificaciones_servidor
+from database.rollover import SQL_TABLAS_PROMOCION
+
+
+def _indice_unico_o_simple(tabla: str, columnas: List[str], nombre: str) -> str:
+    """
+    Crea un índice único si los datos actuales lo permiten; si hay duplicados
+    crea un índice simple (mismo beneficio de búsqueda) y lo avisa con NOTICE
+    """
+    lista = ", ".join(columnas)
+    return f"""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM {tabla} GROUP BY {lista} HAVING COUNT(*) > 1
+            ) THEN
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_{nombre} ON {tabla} ({lista});
+            ELSE
+                RAISE NOTICE '{tabla} tiene filas duplicadas en ({lista}): se crea un índice no único';
+                CREATE INDEX IF NOT EXISTS idx_{nombre} ON {tabla} ({lista});
+            END IF;
+        END
+        $$
+    """
+
+
+# unaccent() no es IMMUTABLE (depende del diccionario en search_path): el envoltorio
+# fija el diccionario con el esquema donde quedó instalada la extensión
+SQL_FUNCION_UNACCENT = """
+    DO $$
+    DECLARE
+        esquema text;
+    BEGIN
+        SELECT n.nspname INTO esquema
+        FROM pg_extension x JOIN pg_namespace n ON n.oid = x.extnamespace
+        WHERE x.extname = 'unaccent';
+
+        EXECUTE format(
+            'CREATE OR REPLACE FUNCTION public.amalia_unaccent(text) RETURNS text
+             LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+             AS $f$ SELECT %1$I.unaccent(%2$L::regdictionary, $1) $f$',
+            esquema, esquema || '.unaccent'
+        );
+    END
+    $$
+"""
+
+# Texto de búsqueda de una fila: campos unidos, en minúsculas y sin acentos
+# (la réplica local registra una función equivalente: texto_busqueda)
+SQL_FUNCION_BUSQUEDA = """
+    CREATE OR REPLACE FUNCTION public.amalia_busqueda(VARIADIC campos text[]) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$ SELECT public.amalia_unaccent(lower(array_to_string(campos, ' '))) $$
+"""
+
+# Expresiones indexadas: las consultas de SupabaseClient.search_* deben usarlas tal cual
+DOCUMENTO_ESTUDIANTE = (
+    "amalia_busqueda(cedula::text, nombre, apellido, municipio, observacion)"
+)
+DOCUMENTO_ASIGNATURA = "amalia_busqueda(codigo::text, nombre_asignatura)"
+
+
+# Lista ordenada de migraciones: (versión, descripción, sentencias)
+# Nunca modificar una migración ya publicada: agregar una nueva.
+MIGRACIONES: List[Tuple[int, str, List[str]]] = [
+    (1, "Columnas updated_at para la réplica local", sql_watermarks_servidor()),
+    (2, "Triggers de notificación de cambios", sql_notificaciones_servidor()),
+    (3, "Índices compuestos y restricciones únicas", [
+        # Estudiantes por grado (y sección): pestaña Grados, promociones
+        "CREATE INDEX IF NOT EXISTS idx_estudiante_grado_seccion ON estudiante (id_grado, seccion)",
+        # Calificaciones por estudiante; una fila por estudiante y asignatura
+        _indice_unico_o_simple('calificacion', ['cedula_estudiante', 'codigo_asignatura'],
+                               'calificacion_estudiante_asignatura'),
+        # Borrado/consulta de calificaciones por asignatura
+        "CREATE INDEX IF NOT EXISTS idx_calificacion_asignatura ON calificacion (codigo_asignatura)",
+        # Asignaturas del grado filtradas por mención
+        "CREATE INDEX IF NOT EXISTS idx_asignatura_grado_mencion ON asignatura (id_grado, id_mencion)",
+        # Historial: una entrada por estudiante y asignatura (así lo asume asignar_asignaturas_estudiante)
+        _indice_unico_o_simple('historial_academico', ['cedula_estudiante', 'codigo_asignatura'],
+                               'historial_estudiante_asignatura'),
+    ]),
+    (4, "Credenciales con hash e índice de inicio de sesión", [
+        # Los hashes PBKDF2 no caben en un varchar corto (varchar -> text no reescribe la tabla)
+        "ALTER TABLE usuario ALTER COLUMN contrasena TYPE text",
+        # Inicio de sesión: búsqueda por nombre de usuario
+        _indice_unico_o_simple('usuario', ['nombre_usuario'], 'usuario_nombre'),
+    ]),
+    (5, "Búsqueda por trigramas sin acentos", [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE EXTENSION IF NOT EXISTS unaccent",
+        SQL_FUNCION_UNACCENT,
+        SQL_FUNCION_BUSQUEDA,
+        f"""CREATE INDEX IF NOT EXISTS idx_estudiante_busqueda ON estudiante
+            USING gin ({DOCUMENTO_ESTUDIANTE} gin_trgm_ops)""",
+        f"""CREATE INDEX IF NOT EXISTS idx_asignatura_busqueda ON asignatura
+            USING gin ({DOCUMENTO_ASIGNATURA} gin_trgm_ops)""",
+    ]),
+    (6, "Punto de control de la promoción de fin de año", SQL_TABLAS_PROMOCION),
+]
+
+SQL_TABLA_MIGRACIONES = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version integer PRIMARY KEY,
+        descripcion text NOT NULL,
+        aplicada timestamptz NOT NULL DEFAULT now()
+    )
+"""
+
+# Clave del candado consultivo: evita que dos equipos migren a la vez
+CANDADO_MIGRACIONES = 4141201
+
+
+def versiones_aplicadas(conn) -> set:
+    """
+    Versiones ya registradas en schema_migrations
+
+    Solo lee: cada inicio de la aplicación la llama en cada equipo, y sin
+    migraciones pendientes no debe ejecutar DDL (vacío si la tabla no existe).
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL AS existe")
+    versiones = set()
+    if cursor.fetchone()['existe']:
+        cursor.execute("SELECT version FROM schema_migrations")
+        versiones = {fila['version'] for fila in cursor.fetchall()}
+    cursor.close()
+    conn.commit()
+    return versiones
+
+
+def aplicar_migraciones(conn) -> List[int]:
+    """
+    Aplica en orden las migraciones pendientes, cada una en su transacción
+
+    Args:
+        conn: Conexión psycopg2 (con RealDictCursor)
+
+    Returns:
+        Lista de versiones aplicadas en esta llamada
+    """
+    aplicadas = []
+    if versiones_aplicadas(conn) >= {v for v, _, _ in MIGRACIONES}:
+        return aplicadas
+
+    cursor = conn.cursor()
+    cursor.execute(SQL_TABLA_MIGRACIONES)
+    cursor.close()
+    conn.commit()
+
+    for version, descripcion, sentencias in MIGRACIONES:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (CANDADO_MIGRACIONES,))
+            cursor.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+            if cursor.fetchone():
+                conn.commit()
+                continue
+            for sentencia in sentencias:
+                cursor.execute(sentencia)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, descripcion) VALUES (%s, %s)",
+                (version, descripcion)
+            )
+            conn.commit()
+            aplicadas.append(version)
+            print(f"Migración {version:03d} aplicada: {descripcion}")
+        except Exception as e:
+            conn.rollback()
+            print(f"Error en la migración {version:03d} ({descripcion}): {e}")
+            raise
+        finally:
+            cursor.close()
+    return aplicadas
+
+
+# ==================== VERIFICACIÓN DE PLANES ====================
+
+def _consultas_cliente(cliente) -> List[Tuple[str, str, tuple]]:
+    """
+    Ejecuta los métodos de lectura de SupabaseClient con datos reales de la base
+    y captura cada consulta que emiten
+
+    Returns:
+        Lista de (método, query, params)
+    """
+    capturadas = []
+    original = cliente.execute_query
+    original_many = cliente.fetch_many
+
+    def capturar(query, params=None):
+        if not en_fetch_many[0]:
+            capturadas.append((metodo_actual[0], query, params))
+        return original(query, params)
+
+    def capturar_many(consultas):
+        # Cada consulta del lote se analiza por separado (el EXPLAIN de la
+        # sentencia combinada esconde los planes bajo subplanes json_agg)
+        for nombre, (query, params) in consultas.items():
+            capturadas.append((f"{metodo_actual[0]}[{nombre}]", query, params))
+        en_fetch_many[0] = True
+        try:
+            return original_many(consultas)
+        finally:
+            en_fetch_many[0] = False
+
+    # Valores de ejemplo tomados del propio conjunto de datos
+    def primero(query, campo, params=None):
+        filas = original(query, params)
+        return filas[0][campo] if filas else None
+
+    cedula = primero("SELECT cedula_estudiante FROM calificacion LIMIT 1", 'cedula_estudiante')
+    docente = primero("SELECT cedula FROM docente LIMIT 1", 'cedula')
+    codigo = primero("SELECT codigo FROM asignatura LIMIT 1", 'codigo')
+    grado = primero("SELECT id_grado FROM estudiante WHERE seccion IS NOT NULL LIMIT 1", 'id_grado')
+    seccion = primero("SELECT seccion FROM estudiante WHERE id_grado = %s LIMIT 1", 'seccion', (grado,))
+
+    llamadas = [
+        ('get_all_estudiantes', ()),
+        ('get_estudiante_by_cedula', (cedula,)),
+        ('get_all_docentes', ()),
+        ('get_docente_by_cedula', (docente,)),
+        ('get_all_asignaturas', ()),
+        ('get_asignatura_by_codigo', (codigo,)),
+        ('get_calificaciones_by_estudiante', (cedula,)),
+        ('get_all_calificaciones', ()),
+        ('get_all_grados', ()),
+        ('get_grado_by_id', (grado,)),
+        ('get_grado_counts', ()),
+        ('get_estudiantes_by_grado', (grado,)),
+        ('get_estudiantes_by_grado_seccion', (grado, seccion)),
+        ('get_materias_por_grado', (grado,)),
+        ('get_all_periodos', ()),
+        ('get_estudiante_con_calificaciones', (cedula,)),
+        ('get_historial_completo_estudiante', (cedula,)),
+        ('search_estudiantes', (cedula,)),
+        ('search_asignaturas', (codigo,)),
+    ]
+
+    metodo_actual = [None]
+    en_fetch_many = [False]
+    cliente.execute_query = capturar
+    cliente.fetch_many = capturar_many
+    try:
+        for metodo, args in llamadas:
+            if not hasattr(cliente, metodo):
+                continue
+            metodo_actual[0] = metodo
+            getattr(cliente, metodo)(*args)
+    finally:
+        del cliente.execute_query
+        del cliente.fetch_many
+    return capturadas
+
+
+def _nodos(plan: Dict[str, Any]):
+    """Recorre recursivamente los nodos de un plan JSON"""
+    yield plan
+    for hijo in plan.get('Plans', []):
+        yield from _nodos(hijo)
+
+
+def verificar_planes(cliente, filas_minimas: int = 1000) -> List[Dict[str, Any]]:
+    """
+    Ejecuta EXPLAIN (ANALYZE, BUFFERS) sobre cada consulta de lectura del cliente
+    y marca los Seq Scan con filtro sobre tablas grandes
+
+    Un Seq Scan sin filtro (leer la tabla completa en get_all_*) es esperado;
+    uno con filtro indica que falta un índice para ese predicado.
+
+    Args:
+        cliente: SupabaseClient conectado al conjunto de datos de prueba
+        filas_minimas: Tamaño mínimo de tabla (filas leídas) para marcar el scan
+
+    Returns:
+        Lista de hallazgos con método, tabla, filas, buffers y query
+    """
+    hallazgos = []
+    conn = cliente.connect()
+    for metodo, query, params in _consultas_cliente(cliente):
+        if not query.lstrip().upper().startswith("SELECT"):
+            continue
+        cursor = conn.cursor()
+        try:
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query, params)
+            plan = cursor.fetchone()['QUERY PLAN'][0]['Plan']
+        except Exception as e:
+            conn.rollback()
+            print(f"No se pudo analizar {metodo}: {e}")
+            continue
+        finally:
+            cursor.close()
+        conn.rollback()
+
+        for nodo in _nodos(plan):
+            if nodo.get('Node Type') != 'Seq Scan' or 'Filter' not in nodo:
+                continue
+            leidas = nodo.get('Actual Rows', 0) + nodo.get('Rows Removed by Filter', 0)
+            if leidas < filas_minimas:
+                continue
+            hallazgos.append({
+                'metodo': metodo,
+                'tabla': nodo.get('Relation Name'),
+                'filtro': nodo.get('Filter'),
+                'filas_leidas': leidas,
+                'filas_devueltas': nodo.get('Actual Rows', 0),
+                'buffers': nodo.get('Shared Hit Blocks', 0) + nodo.get('Shared Read Blocks', 0),
+                'tiempo_ms': nodo.get('Actual Total Time'),
+                'query': " ".join(query.split()),
+            })
+    return hallazgos
+
+
+def _conexion_desde_argumentos(url: str = None):
+    """Crea un SupabaseClient sin réplica local (siempre contra el servidor)"""
+    from database.supabase_client import SupabaseClient
+
+    cliente = SupabaseClient(url or os.getenv("DATABASE_URL"))
+    if cliente.replica is not None:
+        cliente.replica.cerrar()
+        cliente.replica = None
+    return cliente
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m database.migrations")
+    parser.add_argument("accion", choices=["aplicar", "estado", "verificar"])
+    parser.add_argument("--url", help="URL de la base (por defecto DATABASE_URL)")
+    parser.add_argument("--filas-minimas", type=int, default=1000,
+                        help="Tamaño mínimo de tabla para marcar un Seq Scan")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args(argv)
+
+    cliente = _conexion_desde_argumentos(args.url)
+
+    if args.accion == "aplicar":
+        aplicar_migraciones(cliente.connect())
+        return 0
+
+    if args.accion == "estado":
+        aplicadas = versiones_aplicadas(cliente.connect())
+        for version, descripcion, _ in MIGRACIONES:
+            marca = "aplicada " if version in aplicadas else "pendiente"
+            print(f"{version:03d}  {marca}  {descripcion}")
+        return 0
+
+    hallazgos = verificar_planes(cliente, args.filas_minimas)
+    if args.json:
+        print(json.dumps(hallazgos, indent=2, ensure_ascii=False, default=str))
+    elif not hallazgos:
+        print("Sin Seq Scan filtrados sobre tablas grandes")
+    else:
+        for h in hallazgos:
+            print(f"[{h['metodo']}] Seq Scan en {h['tabla']}: "
+                  f"{h['filas_leidas']} filas leídas, {h['filas_devueltas']} devueltas, "
+                  f"{h['buffers']} buffers, {h['tiempo_ms']} ms\n    filtro: {h['filtro']}")
+    return 1 if hallazgos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
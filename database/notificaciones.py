@@ -0,0 +1,206 @@
+import json
+import select
+import threading
+from typing import Callable, Dict, List
+
+
+# Canal de PostgreSQL por el que se publican los cambios
+CANAL_CAMBIOS = "amalia_cambios"
+
+# Tablas que notifican cambios: nombre -> (clave primaria, columna de referencia)
+# La columna de referencia permite a las vistas saber a quién afecta el cambio
+# sin consultar la fila (por ejemplo, la cédula del estudiante de una calificación).
+TABLAS_NOTIFICADAS = {
+    'estudiante': ('cedula', 'id_grado'),
+    'calificacion': ('codigo_calificacion', 'cedula_estudiante'),
+    'asignatura': ('codigo', 'id_grado'),
+    'grado': ('id_grado', None),
+}
+
+SQL_FUNCION_NOTIFICAR = f"""
+    CREATE OR REPLACE FUNCTION amalia_notificar_cambio() RETURNS trigger AS $$
+    DECLARE
+        fila jsonb;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            fila := to_jsonb(OLD);
+        ELSE
+            fila := to_jsonb(NEW);
+        END IF;
+        PERFORM pg_notify('{CANAL_CAMBIOS}', json_build_object(
+            'tabla', TG_TABLE_NAME,
+            'op', TG_OP,
+            'pk', fila ->> TG_ARGV[0],
+            'ref', CASE WHEN TG_NARGS > 1 THEN fila ->> TG_ARGV[1] END
+        )::text);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+SQL_TRIGGER_TABLA = [
+    "DROP TRIGGER IF EXISTS trg_{tabla}_notificar ON {tabla}",
+    """CREATE TRIGGER trg_{tabla}_notificar
+       AFTER INSERT OR UPDATE OR DELETE ON {tabla}
+       FOR EACH ROW EXECUTE FUNCTION amalia_notificar_cambio({argumentos})""",
+]
+
+
+def sql_notificaciones_servidor() -> List[str]:
+    """
+    Sentencias que instalan los triggers de notificación de cambios
+
+    Returns:
+        Lista de sentencias SQL idempotentes
+    """
+    sentencias = [SQL_FUNCION_NOTIFICAR]
+    for tabla, (pk, referencia) in TABLAS_NOTIFICADAS.items():
+        argumentos = f"'{pk}'" + (f", '{referencia}'" if referencia else "")
+        sentencias.extend(s.format(tabla=tabla, argumentos=argumentos) for s in SQL_TRIGGER_TABLA)
+    return sentencias
+
+
+class EscuchaCambios:
+    """Hilo que escucha las notificaciones de cambios del servidor (LISTEN)"""
+
+    def __init__(self, conectar: Callable, al_cambiar: Callable, reintento: int = 10,
+                 al_conectar: Callable = None):
+        """
+        Inicializa el hilo de escucha
+
+        Args:
+            conectar: Función que abre una conexión psycopg2 nueva
+            al_cambiar: Función llamada con (conn, cambio) por cada notificación;
+                        cambio es un diccionario con tabla, op, pk y ref
+            reintento: Segundos de espera antes de reconectar tras un error
+            al_conectar: Función opcional llamada cada vez que el LISTEN queda
+                         activo (los cambios de mientras no hubo escucha se perdieron)
+        """
+        self.conectar = conectar
+        self.al_cambiar = al_cambiar
+        self.reintento = reintento
+        self.al_conectar = al_conectar
+        self._hilo = None
+        self._detener = threading.Event()
+
+    def iniciar(self):
+        """Inicia la escucha en segundo plano"""
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="amalia-listen", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        """Detiene la escucha"""
+        self._detener.set()
+
+    def _bucle(self):
+        """Bucle del hilo: LISTEN y despacho de notificaciones"""
+        while not self._detener.is_set():
+            conn = None
+            try:
+                conn = self.conectar()
+                conn.autocommit = True
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {CANAL_CAMBIOS}")
+                cursor.close()
+                if self.al_conectar is not None:
+                    self.al_conectar()
+
+                while not self._detener.is_set():
+                    # Esperar actividad en el socket sin ocupar CPU
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notificacion = conn.notifies.pop(0)
+                        self._despachar(conn, notificacion.payload)
+            except Exception as e:
+                print(f"Escucha de cambios interrumpida ({e.__class__.__name__}), reintentando...")
+                self._detener.wait(self.reintento)
+            finally:
+                try:
+                    if conn is not None and not conn.closed:
+                        conn.close()
+                except Exception:
+                    pass
+
+    def _despachar(self, conn, payload: str):
+        """Decodifica una notificación y la entrega al callback"""
+        try:
+            cambio: Dict = json.loads(payload)
+        except ValueError:
+            return
+        try:
+            self.al_cambiar(conn, cambio)
+        except Exception as e:
+            print(f"Error al aplicar cambio notificado {cambio}: {e}")
+
+
+class SondeoCambios(EscuchaCambios):
+    """
+    Alternativa a LISTEN cuando no hay conexión en modo sesión (pooler en modo
+    transacción sin URL de sesión): consulta periódicamente updated_at
+
+    Entrega los mismos diccionarios que EscuchaCambios, siempre con op 'UPDATE'
+    (las vistas vuelven a leer la fila, así que sirve también para altas). Los
+    borrados no dejan rastro en updated_at y no se detectan.
+    """
+
+    # Margen hacia atrás: una transacción larga confirma con un updated_at anterior
+    MARGEN = 30
+
+    def __init__(self, conectar: Callable, al_cambiar: Callable, intervalo: int = 15,
+                 reintento: int = 10, al_conectar: Callable = None):
+        super().__init__(conectar, al_cambiar, reintento, al_conectar)
+        self.intervalo = intervalo
+        self._sql = " UNION ALL ".join(
+            f"SELECT '{tabla}' AS tabla, {pk}::text AS pk, {referencia or 'NULL'}::text AS ref, "
+            f"updated_at FROM {tabla} WHERE updated_at > %(desde)s::timestamptz - interval '{self.MARGEN} seconds'"
+            for tabla, (pk, referencia) in TABLAS_NOTIFICADAS.items()
+        ) + " ORDER BY updated_at"
+
+    def _bucle(self):
+        """Bucle del hilo: consulta los cambios posteriores a la última vista"""
+        desde = None
+        # (tabla, pk, updated_at) ya entregados dentro del margen
+        vistos = set()
+        while not self._detener.is_set():
+            conn = None
+            try:
+                conn = self.conectar()
+                cursor = conn.cursor()
+                if desde is None:
+                    cursor.execute("SELECT now() AS ahora")
+                    desde = cursor.fetchone()['ahora']
+                    conn.commit()
+                # Al reconectar se sigue desde la última marca: no se pierden
+                # cambios, así que al_conectar no hace falta
+
+                while not self._detener.is_set():
+                    cursor.execute(self._sql, {'desde': desde})
+                    filas = cursor.fetchall()
+                    conn.commit()
+                    for fila in filas:
+                        marca = (fila['tabla'], fila['pk'], fila['updated_at'])
+                        if marca in vistos:
+                            continue
+                        vistos.add(marca)
+                        desde = max(desde, fila['updated_at'])
+                        cambio = {'tabla': fila['tabla'], 'op': 'UPDATE', 'pk': fila['pk'], 'ref': fila['ref']}
+                        try:
+                            self.al_cambiar(conn, cambio)
+                        except Exception as e:
+                            print(f"Error al aplicar cambio notificado {cambio}: {e}")
+                    vistos = {m for m in vistos if (desde - m[2]).total_seconds() <= self.MARGEN}
+                    self._detener.wait(self.intervalo)
+            except Exception as e:
+                print(f"Sondeo de cambios interrumpido ({e.__class__.__name__}), reintentando...")
+                self._detener.wait(self.reintento)
+            finally:
+                try:
+                    if conn is not None and not conn.closed:
+                        conn.close()
+                except Exception:
+                    pass
@@ -0,0 +1,130 @@
+"""
+Modo de ejecución según el pooler de conexiones (Supavisor / PgBouncer)
+
+En modo sesión cada cliente conserva su backend y todo el estado de sesión
+funciona. En modo transacción (puerto 6543 de Supabase) cada transacción puede
+caer en un backend distinto: los prepared statements con nombre, los cursores
+con nombre fuera de una transacción y LISTEN dejan de funcionar. Este módulo
+decide el modo y ofrece los caminos que sirven en ambos:
+
+- Lotes armados en el cliente (INSERT con varias filas, sentencias agrupadas)
+  en lugar de un viaje por fila.
+- Lectura por partes con un cursor con nombre dentro de una sola transacción.
+- LISTEN a través de la URL en modo sesión, o sondeo si no hay.
+
+El modo se configura con AMALIA_POOLER_MODO=sesion|transaccion; por defecto
+(auto) se deduce del puerto de la URL.
+"""
+import os
+import re
+from typing import Iterator, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+MODO_SESION = "sesion"
+MODO_TRANSACCION = "transaccion"
+
+# Puertos del pooler de Supabase
+PUERTO_SESION = 5432
+PUERTO_TRANSACCION = 6543
+
+# Filas por viaje en los lotes y en la lectura por partes
+TAMAÑO_PAGINA = 500
+TAMAÑO_PARTE = 2000
+
+# INSERT ... VALUES (fila) [ON CONFLICT ...] con una sola fila de marcadores
+PATRON_VALUES = re.compile(
+    r'^(?P<insert>\s*INSERT\s.+?\bVALUES)\s*(?P<fila>\((?:[^()]|\([^()]*\))*\))\s*(?P<resto>.*?)\s*;?\s*$',
+    re.IGNORECASE | re.DOTALL
+)
+
+
+def modo_pooler(database_url: str) -> str:
+    """
+    Modo del pooler para una URL
+
+    Returns:
+        MODO_SESION o MODO_TRANSACCION
+    """
+    configurado = os.getenv("AMALIA_POOLER_MODO", "auto").strip().lower()
+    if configurado in (MODO_SESION, MODO_TRANSACCION):
+        return configurado
+    try:
+        puerto = urlsplit(database_url or "").port
+    except ValueError:
+        puerto = None
+    return MODO_TRANSACCION if puerto == PUERTO_TRANSACCION else MODO_SESION
+
+
+def url_sesion(database_url: str) -> Optional[str]:
+    """
+    URL en modo sesión para lo que necesita estado de sesión (LISTEN)
+
+    AMALIA_URL_SESION la define explícitamente; si no, en el pooler de Supabase
+    se usa el puerto de sesión del mismo host.
+
+    Returns:
+        La URL, o None si no hay forma de obtener una conexión en modo sesión
+    """
+    explicita = os.getenv("AMALIA_URL_SESION")
+    if explicita:
+        return explicita
+    if modo_pooler(database_url) == MODO_SESION:
+        return database_url
+    partes = urlsplit(database_url)
+    if partes.port == PUERTO_TRANSACCION and (partes.hostname or "").endswith(".pooler.supabase.com"):
+        sin_puerto = partes.netloc.rsplit(":", 1)[0]
+        return urlunsplit(partes._replace(netloc=f"{sin_puerto}:{PUERTO_SESION}"))
+    return None
+
+
+def ejecutar_en_lote(cursor, query: str, params_list: List[tuple], pagina: int = TAMAÑO_PAGINA):
+    """
+    executemany sin un viaje al servidor por fila
+
+    Un INSERT ... VALUES (...) se envía con varias filas por sentencia
+    (execute_values); cualquier otra sentencia se agrupa separada por ';'
+    (execute_batch). Ambos se arman en el cliente, sin prepared statements,
+    así que funcionan con el pooler en cualquier modo.
+    """
+    if not hasattr(cursor, 'mogrify'):
+        # Transporte del proxy: el lote completo ya viaja en una sola petición
+        cursor.executemany(query, params_list)
+        return
+
+    from psycopg2.extras import execute_batch, execute_values
+
+    coincidencia = PATRON_VALUES.match(query)
+    if coincidencia and '%' not in coincidencia['resto']:
+        execute_values(
+            cursor,
+            f"{coincidencia['insert']} %s {coincidencia['resto']}",
+            params_list,
+            template=coincidencia['fila'],
+            page_size=pagina
+        )
+    else:
+        execute_batch(cursor, query, params_list, page_size=pagina)
+
+
+def cursor_por_partes(conn, nombre: str):
+    """
+    Cursor para leer un resultado grande sin traerlo entero a memoria
+
+    Con psycopg2 es un cursor con nombre (del lado del servidor) sin WITH HOLD:
+    vive dentro de la transacción en curso, que en modo transacción mantiene el
+    mismo backend hasta el commit. Quien lo usa no debe confirmar hasta terminar
+    de leer. Con el transporte del proxy es un cursor normal.
+    """
+    try:
+        return conn.cursor(name=nombre, withhold=False)
+    except TypeError:
+        return conn.cursor()
+
+
+def leer_por_partes(cursor, tamaño: int = TAMAÑO_PARTE) -> Iterator[List]:
+    """Genera el resultado de un cursor en listas de hasta `tamaño` filas"""
+    while True:
+        filas = cursor.fetchmany(tamaño)
+        if not filas:
+            return
+        yield filas
@@ -0,0 +1,319 @@
+"""
+Transporte de SupabaseClient a través del proxy de la red local
+
+Con AMALIA_PROXY_URL (por ejemplo http://192.168.1.10:8765) el cliente no abre
+conexiones al pooler de Supabase: ProxyConnection imita la parte de la API de
+psycopg2 que usa el cliente y envía las sentencias por HTTP al proxy
+(python -m amalia.proxy), que mantiene las conexiones y una caché compartida.
+"""
+import base64
+import http.client
+import json
+import threading
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import psycopg2
+
+PUERTO_POR_DEFECTO = 8765
+
+# Segundos que el proxy retiene una petición de /cambios esperando novedades
+ESPERA_CAMBIOS = 25
+
+
+def es_lectura(query: str) -> bool:
+    """True si la sentencia solo lee (candidata a /consulta y a la caché)"""
+    texto = query.lstrip().upper()
+    return texto.startswith("SELECT") and "FOR UPDATE" not in texto
+
+
+# ==================== CODIFICACIÓN ====================
+# JSON con etiquetas para los tipos que psycopg2 distingue y JSON no:
+# {"$": tipo, "v": valor}
+
+def _preparar(valor):
+    """Etiqueta las tuplas (psycopg2 las adapta como lista IN, no como ARRAY)"""
+    if isinstance(valor, tuple):
+        return {"$": "tupla", "v": [_preparar(v) for v in valor]}
+    if isinstance(valor, list):
+        return [_preparar(v) for v in valor]
+    if isinstance(valor, dict):
+        return {k: _preparar(v) for k, v in valor.items()}
+    return valor
+
+
+def _etiquetar(valor):
+    if isinstance(valor, Decimal):
+        return {"$": "dec", "v": str(valor)}
+    if isinstance(valor, datetime):
+        return {"$": "dt", "v": valor.isoformat()}
+    if isinstance(valor, date):
+        return {"$": "fecha", "v": valor.isoformat()}
+    if isinstance(valor, time):
+        return {"$": "hora", "v": valor.isoformat()}
+    if isinstance(valor, timedelta):
+        return {"$": "intervalo", "v": valor.total_seconds()}
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return {"$": "bytes", "v": base64.b64encode(bytes(valor)).decode("ascii")}
+    raise TypeError(f"Tipo no soportado por el proxy: {type(valor).__name__}")
+
+
+_TIPOS = {
+    "tupla": tuple,
+    "dec": Decimal,
+    "dt": datetime.fromisoformat,
+    "fecha": date.fromisoformat,
+    "hora": time.fromisoformat,
+    "intervalo": lambda v: timedelta(seconds=v),
+    "bytes": base64.b64decode,
+}
+
+
+def _desetiquetar(objeto: Dict):
+    convertir = _TIPOS.get(objeto.get("$")) if len(objeto) == 2 else None
+    return convertir(objeto["v"]) if convertir else objeto
+
+
+def codificar(datos) -> bytes:
+    """Serializa una petición o respuesta del proxy"""
+    return json.dumps(_preparar(datos), default=_etiquetar, ensure_ascii=False).encode("utf-8")
+
+
+def decodificar(contenido: bytes):
+    """Inverso de codificar (las filas vuelven con Decimal, date, etc.)"""
+    return json.loads(contenido.decode("utf-8"), object_hook=_desetiquetar)
+
+
+def sentencia(query: str, params=None) -> List:
+    """Forma serializable de (query, params); los params posicionales viajan como lista"""
+    return [query, list(params) if isinstance(params, tuple) else params]
+
+
+# ==================== CONEXIÓN ====================
+
+class ProxyCursor:
+    """Cursor de ProxyConnection: execute difiere, fetch* envía"""
+
+    def __init__(self, conexion: "ProxyConnection"):
+        self.connection = conexion
+        self._filas: Optional[List[Dict[str, Any]]] = None
+        self._posicion = 0
+        self._enviado = True
+
+    def execute(self, query: str, params=None):
+        self.connection._pendientes.append((query, params))
+        self._enviado = False
+
+    def executemany(self, query: str, params_list):
+        self.connection._pendientes.extend((query, params) for params in params_list)
+        self._enviado = False
+
+    def ejecutar_lote(self, sentencias: List[tuple]):
+        """Varias sentencias en una sola petición (los resultados son los de la última)"""
+        self.connection._pendientes.extend(sentencias)
+        self._enviado = False
+
+    def _resultado(self) -> List[Dict[str, Any]]:
+        if not self._enviado:
+            self._filas = self.connection._enviar()
+            self._posicion = 0
+            self._enviado = True
+        if self._filas is None:
+            raise psycopg2.ProgrammingError("no results to fetch")
+        return self._filas
+
+    def fetchone(self) -> Optional[Dict[str, Any]]:
+        filas = self._resultado()
+        if self._posicion >= len(filas):
+            return None
+        self._posicion += 1
+        return filas[self._posicion - 1]
+
+    def fetchmany(self, size: int = 1) -> List[Dict[str, Any]]:
+        filas = self._resultado()
+        parte = filas[self._posicion:self._posicion + size]
+        self._posicion += len(parte)
+        return parte
+
+    def fetchall(self) -> List[Dict[str, Any]]:
+        filas = self._resultado()
+        restantes = filas[self._posicion:]
+        self._posicion = len(filas)
+        return restantes
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ProxyConnection:
+    """
+    Conexión al proxy con la interfaz de psycopg2 que usa SupabaseClient
+
+    Las sentencias se acumulan y viajan en la siguiente lectura de resultados o
+    en commit(), así que una escritura cuesta una sola petición. Una SELECT fuera
+    de transacción va a /consulta (cacheable); lo demás abre una sesión en el
+    proxy, que retiene una conexión hasta commit() o rollback().
+
+    Los errores de red se lanzan como psycopg2.OperationalError (el cliente pasa
+    a modo sin conexión igual que con el pooler) y los de SQL como DatabaseError.
+    """
+
+    def __init__(self, url: str, token: str = None, timeout: int = ESPERA_CAMBIOS + 10):
+        partes = urlsplit(url if "://" in url else f"http://{url}")
+        self._host = partes.hostname
+        self._puerto = partes.port or PUERTO_POR_DEFECTO
+        self._token = token
+        self._timeout = timeout
+        self._http = None
+        self._sesion = None
+        self._pendientes: List[tuple] = []
+        self.closed = 0
+        self.autocommit = False
+
+    def pedir(self, metodo: str, ruta: str, cuerpo=None):
+        """Una petición al proxy; devuelve la respuesta decodificada"""
+        if self.closed:
+            raise psycopg2.InterfaceError("connection already closed")
+        datos = codificar(cuerpo) if cuerpo is not None else None
+        cabeceras = {"Content-Type": "application/json"}
+        if self._token:
+            cabeceras["Authorization"] = f"Bearer {self._token}"
+
+        for intento in range(2):
+            reutilizada = self._http is not None
+            try:
+                if self._http is None:
+                    self._http = http.client.HTTPConnection(self._host, self._puerto, timeout=self._timeout)
+                self._http.request(metodo, ruta, body=datos, headers=cabeceras)
+                respuesta = self._http.getresponse()
+                contenido = respuesta.read()
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as e:
+                # El proxy cerró la conexión keep-alive inactiva: se reintenta una vez
+                self._cerrar_http()
+                if not reutilizada or intento:
+                    raise psycopg2.OperationalError(f"Proxy no disponible: {e}")
+            except (OSError, http.client.HTTPException) as e:
+                self._cerrar_http()
+                raise psycopg2.OperationalError(f"Proxy no disponible: {e}")
+
+        if respuesta.status == 200:
+            return decodificar(contenido)
+        try:
+            error = decodificar(contenido).get("error", "")
+        except ValueError:
+            error = contenido[:200].decode("utf-8", "replace")
+        if respuesta.status == 409:
+            raise psycopg2.DatabaseError(error)
+        raise psycopg2.OperationalError(f"Proxy: HTTP {respuesta.status} {error}")
+
+    def _enviar(self, confirmar: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """Envía las sentencias pendientes; devuelve las filas de la última"""
+        sentencias, self._pendientes = self._pendientes, []
+        if not confirmar and self._sesion is None and len(sentencias) == 1 and es_lectura(sentencias[0][0]):
+            query, params = sentencias[0]
+            return self.pedir("POST", "/consulta", {"sentencia": sentencia(query, params)})["filas"]
+
+        try:
+            respuesta = self.pedir("POST", "/ejecutar", {
+                "sesion": self._sesion,
+                "sentencias": [sentencia(q, p) for q, p in sentencias],
+                "confirmar": confirmar,
+            })
+        except psycopg2.Error:
+            # El proxy ya revirtió la sesión (o se perdió con la conexión)
+            self._sesion = None
+            raise
+        self._sesion = respuesta.get("sesion")
+        return respuesta.get("filas")
+
+    def cursor(self) -> ProxyCursor:
+        return ProxyCursor(self)
+
+    def commit(self):
+        if self._pendientes or self._sesion:
+            self._enviar(confirmar=True)
+
+    def rollback(self):
+        self._pendientes = []
+        sesion, self._sesion = self._sesion, None
+        if sesion and not self.closed:
+            try:
+                self.pedir("POST", "/revertir", {"sesion": sesion})
+            except psycopg2.Error:
+                pass  # El proxy revierte solo las sesiones abandonadas
+
+    def _cerrar_http(self):
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+
+    def close(self):
+        if self.closed:
+            return
+        self.rollback()
+        self._cerrar_http()
+        self.closed = 1
+
+
+# ==================== CAMBIOS ====================
+
+class EscuchaProxy:
+    """
+    Equivalente de EscuchaCambios en modo proxy: el proxy es el único que
+    escucha el canal del servidor y los equipos esperan los cambios con long polling
+    """
+
+    def __init__(self, conectar: Callable, al_cambiar: Callable, reintento: int = 10):
+        """
+        Args:
+            conectar: Función que abre una ProxyConnection nueva
+            al_cambiar: Función llamada con (conn, cambio) por cada cambio
+            reintento: Segundos de espera antes de reconectar tras un error
+        """
+        self.conectar = conectar
+        self.al_cambiar = al_cambiar
+        self.reintento = reintento
+        self._hilo = None
+        self._detener = threading.Event()
+
+    def iniciar(self):
+        """Inicia la escucha en segundo plano"""
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="amalia-proxy-cambios", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        """Detiene la escucha (a más tardar al vencer la espera en curso)"""
+        self._detener.set()
+
+    def _bucle(self):
+        ultimo = ""
+        while not self._detener.is_set():
+            conn = None
+            try:
+                conn = self.conectar()
+                while not self._detener.is_set():
+                    respuesta = conn.pedir("GET", f"/cambios?desde={ultimo}&espera={ESPERA_CAMBIOS}")
+                    ultimo = respuesta["ultimo"]
+                    for cambio in respuesta["cambios"]:
+                        try:
+                            self.al_cambiar(conn, cambio)
+                        except Exception as e:
+                            print(f"Error al aplicar cambio notificado {cambio}: {e}")
+            except Exception as e:
+                print(f"Escucha de cambios del proxy interrumpida ({e.__class__.__name__}), reintentando...")
+                self._detener.wait(self.reintento)
+            finally:
+                if conn is not None:
+                    conn.close()
@@ -0,0 +1,402 @@
+"""
+Promoción de fin de año escolar (rollover) por lotes reanudables
+
+Para cada estudiante de los grados a promover:
+  1. pasa sus calificaciones con nota final al historial académico
+  2. decide si promueve (o repite si supera el máximo de materias reprobadas)
+  3. reemplaza sus calificaciones por las asignaturas del grado destino
+     (filtradas por mención) más las reprobadas del grado que termina
+
+Es lo mismo que hace asignar_asignaturas_estudiante al cambiar de grado a un
+estudiante, pero con sentencias por conjuntos sobre un lote de cédulas. Cada
+lote y su punto de control se confirman en una sola transacción. La lista de
+trabajo se fija al iniciar la promoción (tabla promocion_estudiante), así que
+un corte a mitad de camino se retoma donde quedó, sin promover a nadie dos veces.
+
+Uso:
+    motor = MotorPromocion(cliente, progreso=print)
+    motor.promover(plan_por_defecto(cliente.get_all_grados()))
+"""
+import re
+import time
+from typing import Callable, Dict, List, Optional, Any
+
+# Tablas del punto de control (migración 6)
+SQL_TABLAS_PROMOCION = [
+    """
+    CREATE TABLE IF NOT EXISTS promocion (
+        id_promocion serial PRIMARY KEY,
+        iniciada timestamptz NOT NULL DEFAULT now(),
+        terminada timestamptz,
+        estado text NOT NULL DEFAULT 'EN_CURSO',
+        max_reprobadas integer,
+        total integer NOT NULL DEFAULT 0,
+        procesados integer NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS promocion_estudiante (
+        id_promocion integer NOT NULL REFERENCES promocion ON DELETE CASCADE,
+        cedula varchar NOT NULL,
+        id_grado_origen integer NOT NULL,
+        id_grado_siguiente integer NOT NULL,
+        id_grado_destino integer,
+        procesado boolean NOT NULL DEFAULT false,
+        omitido boolean NOT NULL DEFAULT false,
+        PRIMARY KEY (id_promocion, cedula)
+    )
+    """,
+    # Siguiente lote: pendientes de la promoción en orden de cédula
+    """CREATE INDEX IF NOT EXISTS idx_promocion_estudiante_pendientes
+       ON promocion_estudiante (id_promocion, cedula) WHERE NOT procesado""",
+]
+
+# Filas del lote que aún no se procesaron (%(id)s y %(cedulas)s). Cada sentencia
+# las vuelve a filtrar: si un lote encolado sin conexión se reprodujera después
+# de reanudar, no tendría efecto
+_LOTE = """
+    pe.id_promocion = %(id)s AND pe.cedula = ANY(%(cedulas)s) AND NOT pe.procesado
+"""
+
+SQL_LOTE = [
+    # 0. Quien ya no está en el grado de origen (lo movieron a mano) se omite
+    f"""
+    UPDATE promocion_estudiante pe
+    SET procesado = true, omitido = true
+    FROM estudiante e
+    WHERE e.cedula = pe.cedula AND {_LOTE}
+      AND e.id_grado IS DISTINCT FROM pe.id_grado_origen
+    """,
+    # 1. Calificaciones con nota final -> historial (una entrada por asignatura)
+    f"""
+    INSERT INTO historial_academico
+        (cedula_estudiante, codigo_asignatura, nombre_asignatura,
+         id_grado, nota_final, estado, fecha_curso)
+    SELECT c.cedula_estudiante, c.codigo_asignatura, a.nombre_asignatura, a.id_grado,
+           c.nota_final,
+           CASE WHEN c.nota_final >= 9.5 THEN 'APROBADO' ELSE 'REPROBADO' END,
+           CURRENT_DATE
+    FROM calificacion c
+    JOIN asignatura a ON a.codigo = c.codigo_asignatura
+    JOIN promocion_estudiante pe ON pe.cedula = c.cedula_estudiante
+    WHERE {_LOTE} AND c.nota_final IS NOT NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM historial_academico h
+          WHERE h.cedula_estudiante = c.cedula_estudiante
+            AND h.codigo_asignatura = c.codigo_asignatura
+      )
+    """,
+    # 2. Destino: el grado siguiente, o el mismo si reprobó más de lo permitido
+    f"""
+    UPDATE promocion_estudiante pe
+    SET id_grado_destino = CASE
+        WHEN p.max_reprobadas IS NULL OR (
+            SELECT COUNT(*) FROM historial_academico h
+            WHERE h.cedula_estudiante = pe.cedula
+              AND h.id_grado = pe.id_grado_origen
+              AND h.estado = 'REPROBADO'
+        ) <= p.max_reprobadas
+        THEN pe.id_grado_siguiente
+        ELSE pe.id_grado_origen
+    END
+    FROM promocion p
+    WHERE p.id_promocion = pe.id_promocion AND {_LOTE}
+    """,
+    # 3. Se cierran las calificaciones del año
+    f"""
+    DELETE FROM calificacion c
+    USING promocion_estudiante pe
+    WHERE c.cedula_estudiante = pe.cedula AND {_LOTE}
+    """,
+    # 4. Cambio de grado
+    f"""
+    UPDATE estudiante e
+    SET id_grado = pe.id_grado_destino
+    FROM promocion_estudiante pe
+    WHERE e.cedula = pe.cedula AND {_LOTE}
+    """,
+    # 5. Asignaturas del grado destino (por mención) más las reprobadas del grado de origen
+    f"""
+    INSERT INTO calificacion
+        (cedula_estudiante, codigo_asignatura, nota_1, ajuste_1,
+         nota_2, ajuste_2, nota_3, ajuste_3, nota_final)
+    SELECT x.cedula, x.codigo, NULL, 0.0, NULL, 0.0, NULL, 0.0, NULL
+    FROM (
+        SELECT h.cedula_estudiante AS cedula, h.codigo_asignatura AS codigo
+        FROM historial_academico h
+        JOIN promocion_estudiante pe ON pe.cedula = h.cedula_estudiante
+        WHERE {_LOTE} AND h.id_grado = pe.id_grado_origen AND h.estado = 'REPROBADO'
+        UNION
+        SELECT pe.cedula, a.codigo
+        FROM promocion_estudiante pe
+        JOIN estudiante e ON e.cedula = pe.cedula
+        JOIN asignatura a ON a.id_grado = pe.id_grado_destino
+        WHERE {_LOTE}
+          AND (COALESCE(e.id_mencion, 0) = 0 OR a.id_mencion = e.id_mencion)
+    ) x
+    """,
+    # 6. Punto de control: en la misma transacción que el trabajo del lote
+    f"""
+    UPDATE promocion_estudiante pe
+    SET procesado = true
+    WHERE {_LOTE}
+    """,
+    """
+    UPDATE promocion
+    SET procesados = (
+        SELECT COUNT(*) FROM promocion_estudiante
+        WHERE id_promocion = %(id)s AND procesado
+    )
+    WHERE id_promocion = %(id)s
+    """,
+]
+
+
+def _posicional(sentencia: str, valores: Dict[str, Any]) -> tuple:
+    """
+    Convierte %(nombre)s en %s con sus parámetros en orden: la bandeja de salida
+    de la réplica solo guarda parámetros posicionales
+    """
+    nombres = re.findall(r"%\((\w+)\)s", sentencia)
+    return re.sub(r"%\(\w+\)s", "%s", sentencia), tuple(valores[n] for n in nombres)
+
+
+def numero_grado(nombre_grado: str) -> int:
+    """
+    Número de orden de un grado a partir de su nombre ("1er año" -> 1,
+    "Egresados" -> 7); 999 si no se reconoce (por ejemplo el grado test)
+    """
+    if not nombre_grado:
+        return 999
+
+    nombre = nombre_grado.lower()
+
+    # Mapear nombres comunes
+    if '1er' in nombre or '1ro' in nombre or 'primero' in nombre:
+        return 1
+    elif '2do' in nombre or '2ndo' in nombre or 'segundo' in nombre:
+        return 2
+    elif '3er' in nombre or '3ro' in nombre or 'tercero' in nombre:
+        return 3
+    elif '4to' in nombre or 'cuarto' in nombre:
+        return 4
+    elif '5to' in nombre or 'quinto' in nombre:
+        return 5
+    elif '6to' in nombre or 'sexto' in nombre:
+        return 6
+    elif 'egresado' in nombre or 'graduado' in nombre:
+        return 7
+
+    # Buscar el primer número en el nombre del grado
+    match = re.search(r'(\d+)', nombre)
+    if match:
+        return int(match.group(1))
+
+    return 999  # coloca al final
+
+
+def plan_por_defecto(grados: List[Dict[str, Any]]) -> Dict[int, int]:
+    """
+    Plan de promoción id_grado -> id_grado siguiente según el número de cada grado
+
+    Cada grado pasa al del número siguiente (6to pasa a Egresados si existe).
+    Los grados sin número (test) o con el número repetido quedan fuera.
+    """
+    por_numero: Dict[int, List[Dict[str, Any]]] = {}
+    for grado in grados:
+        por_numero.setdefault(numero_grado(grado['nombre_grado']), []).append(grado)
+
+    plan = {}
+    for numero, del_numero in por_numero.items():
+        if numero >= 7 or numero + 1 not in por_numero:
+            continue
+        siguientes = por_numero[numero + 1]
+        if len(del_numero) > 1 or len(siguientes) > 1:
+            print(f"Promoción: grados con número {numero} o {numero + 1} repetido, se omiten")
+            continue
+        plan[del_numero[0]['id_grado']] = siguientes[0]['id_grado']
+    return plan
+
+
+class ProgresoPromocion:
+    """Avance de una promoción en curso"""
+
+    def __init__(self, id_promocion: int, total: int, procesados: int):
+        self.id_promocion = id_promocion
+        self.total = total
+        self.procesados = procesados
+        self.lotes = 0
+        self.en_esta_ejecucion = 0
+        self.inicio = time.perf_counter()
+
+    @property
+    def segundos(self) -> float:
+        return time.perf_counter() - self.inicio
+
+    @property
+    def por_segundo(self) -> float:
+        """Estudiantes procesados por segundo en esta ejecución"""
+        return self.en_esta_ejecucion / self.segundos if self.segundos > 0 else 0.0
+
+    @property
+    def restante_estimado(self) -> Optional[float]:
+        """Segundos estimados para terminar (None sin datos suficientes)"""
+        if not self.por_segundo:
+            return None
+        return (self.total - self.procesados) / self.por_segundo
+
+    def __str__(self):
+        texto = (f"Promoción {self.id_promocion}: {self.procesados}/{self.total} estudiantes "
+                 f"({self.por_segundo:.1f}/s")
+        if self.restante_estimado is not None:
+            texto += f", faltan ~{self.restante_estimado:.0f} s"
+        return texto + ")"
+
+
+class MotorPromocion:
+    """
+    Ejecuta promociones por lotes con punto de control
+
+    Args:
+        cliente: SupabaseClient conectado al servidor (la promoción no corre sin conexión)
+        tam_lote: Estudiantes por transacción
+        progreso: Función llamada con un ProgresoPromocion tras cada lote
+    """
+
+    def __init__(self, cliente, tam_lote: int = 200,
+                 progreso: Callable[[ProgresoPromocion], None] = None):
+        self.cliente = cliente
+        self.tam_lote = max(1, tam_lote)
+        self.progreso = progreso
+        self._detener = False
+
+    def _sin_conexion(self) -> bool:
+        replica = self.cliente.replica
+        return replica is not None and replica.sin_conexion
+
+    def detener(self):
+        """Pide terminar después del lote en curso (se puede reanudar luego)"""
+        self._detener = True
+
+    def pendiente(self) -> Optional[Dict[str, Any]]:
+        """Promoción iniciada y no terminada, si la hay"""
+        filas = self.cliente.execute_query("""
+            SELECT id_promocion, iniciada, max_reprobadas, total, procesados
+            FROM promocion
+            WHERE estado = 'EN_CURSO'
+            ORDER BY id_promocion DESC
+            LIMIT 1
+        """)
+        return filas[0] if filas else None
+
+    def iniciar(self, plan: Dict[int, int], max_reprobadas: Optional[int] = None) -> Optional[int]:
+        """
+        Registra una promoción y fija su lista de trabajo
+
+        Args:
+            plan: id_grado de origen -> id_grado destino
+            max_reprobadas: Materias reprobadas permitidas para promover
+                            (None: promueven todos, como el cambio de grado manual)
+
+        Returns:
+            ID de la promoción, o None si hay otra en curso o falló el registro
+        """
+        if not plan:
+            print("Promoción: el plan no tiene grados")
+            return None
+        if self.pendiente():
+            print("Promoción: ya hay una promoción en curso; reanúdela antes de iniciar otra")
+            return None
+
+        origenes = list(plan.keys())
+        siguientes = [plan[o] for o in origenes]
+        with self.cliente.transaction() as tx:
+            filas = self.cliente.execute_query(
+                "INSERT INTO promocion (max_reprobadas) VALUES (%s) RETURNING id_promocion",
+                (max_reprobadas,)
+            )
+            if not filas:
+                return None
+            id_promocion = filas[0]['id_promocion']
+            self.cliente.execute_update("""
+                INSERT INTO promocion_estudiante (id_promocion, cedula, id_grado_origen, id_grado_siguiente)
+                SELECT %s, e.cedula, e.id_grado, destino.siguiente
+                FROM estudiante e
+                JOIN unnest(%s::int[], %s::int[]) AS destino(origen, siguiente)
+                    ON destino.origen = e.id_grado
+            """, (id_promocion, origenes, siguientes))
+            self.cliente.execute_update("""
+                UPDATE promocion
+                SET total = (SELECT COUNT(*) FROM promocion_estudiante WHERE id_promocion = %s)
+                WHERE id_promocion = %s
+            """, (id_promocion, id_promocion))
+        return id_promocion if tx.ok else None
+
+    def ejecutar(self, id_promocion: int) -> bool:
+        """
+        Procesa los lotes pendientes de una promoción
+
+        Returns:
+            True si la promoción quedó completa; False si se detuvo o falló
+            (en ambos casos se puede volver a llamar para reanudarla)
+        """
+        if self._sin_conexion():
+            print("Promoción: se requiere conexión con el servidor")
+            return False
+
+        estado = self.cliente.execute_query(
+            "SELECT total, procesados FROM promocion WHERE id_promocion = %s", (id_promocion,)
+        )
+        if not estado:
+            return False
+        avance = ProgresoPromocion(id_promocion, estado[0]['total'], estado[0]['procesados'])
+        self._detener = False
+
+        while not self._detener:
+            lote = [fila['cedula'] for fila in self.cliente.execute_query("""
+                SELECT cedula FROM promocion_estudiante
+                WHERE id_promocion = %s AND NOT procesado
+                ORDER BY cedula
+                LIMIT %s
+            """, (id_promocion, self.tam_lote))]
+            if not lote:
+                break
+
+            valores = {'id': id_promocion, 'cedulas': lote}
+            with self.cliente.transaction() as tx:
+                for sentencia in SQL_LOTE:
+                    self.cliente.execute_update(*_posicional(sentencia, valores))
+            if not tx.ok or self._sin_conexion():
+                print(f"Promoción {id_promocion}: el lote no se confirmó; se puede reanudar")
+                return False
+
+            avance.lotes += 1
+            avance.en_esta_ejecucion += len(lote)
+            avance.procesados += len(lote)
+            if self.progreso:
+                self.progreso(avance)
+
+        restantes = self.cliente.execute_query(
+            "SELECT COUNT(*) AS n FROM promocion_estudiante WHERE id_promocion = %s AND NOT procesado",
+            (id_promocion,)
+        )
+        if not restantes or restantes[0]['n']:
+            return False
+
+        return self.cliente.execute_update("""
+            UPDATE promocion SET estado = 'COMPLETADA', terminada = now()
+            WHERE id_promocion = %s
+        """, (id_promocion,))
+
+    def promover(self, plan: Dict[int, int], max_reprobadas: Optional[int] = None) -> bool:
+        """Reanuda la promoción en curso o, si no hay, inicia una con el plan dado"""
+        pendiente = self.pendiente()
+        if pendiente:
+            print(f"Promoción: reanudando la promoción {pendiente['id_promocion']} "
+                  f"({pendiente['procesados']}/{pendiente['total']})")
+            id_promocion = pendiente['id_promocion']
+        else:
+            id_promocion = self.iniciar(plan, max_reprobadas)
+            if id_promocion is None:
+                return False
+        return self.ejecutar(id_promocion)
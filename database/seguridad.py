@@ -0,0 +1,119 @@
+"""
+Hash de contraseñas con sal (PBKDF2-HMAC-SHA256)
+
+Formato almacenado en usuario.contrasena:
+    pbkdf2_sha256$<iteraciones>$<sal base64>$<hash base64>
+
+Las contraseñas antiguas en texto plano se siguen aceptando y se reemplazan
+por su hash en el primer inicio de sesión correcto.
+
+Uso:
+    python -m database.seguridad      # pide una contraseña e imprime su hash
+"""
+import base64
+import getpass
+import hashlib
+import hmac
+import os
+import secrets
+from typing import Tuple
+
+ALGORITMO = "pbkdf2_sha256"
+
+# Costo del KDF: subirlo con el hardware; los hashes con menos iteraciones
+# se actualizan solos en el siguiente inicio de sesión
+ITERACIONES_POR_DEFECTO = 600000
+
+_hash_ficticio = None
+
+
+def iteraciones_configuradas() -> int:
+    """Iteraciones del KDF (variable de entorno AMALIA_KDF_ITERACIONES)"""
+    try:
+        return max(1, int(os.getenv("AMALIA_KDF_ITERACIONES", ITERACIONES_POR_DEFECTO)))
+    except ValueError:
+        return ITERACIONES_POR_DEFECTO
+
+
+def _derivar(contraseña: str, sal: bytes, iteraciones: int) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", contraseña.encode("utf-8"), sal, iteraciones)
+
+
+def generar_hash(contraseña: str, iteraciones: int = None) -> str:
+    """
+    Genera el hash con sal de una contraseña
+
+    Args:
+        contraseña: Contraseña en texto plano
+        iteraciones: Costo del KDF (por defecto iteraciones_configuradas())
+
+    Returns:
+        Cadena en el formato pbkdf2_sha256$iteraciones$sal$hash
+    """
+    iteraciones = iteraciones or iteraciones_configuradas()
+    sal = secrets.token_bytes(16)
+    derivado = _derivar(contraseña, sal, iteraciones)
+    return "$".join([
+        ALGORITMO,
+        str(iteraciones),
+        base64.b64encode(sal).decode("ascii"),
+        base64.b64encode(derivado).decode("ascii"),
+    ])
+
+
+def es_hash(valor: str) -> bool:
+    """True si el valor almacenado ya es un hash (y no texto plano)"""
+    return bool(valor) and valor.startswith(ALGORITMO + "$") and valor.count("$") == 3
+
+
+def verificar_contraseña(contraseña: str, almacenado: str) -> Tuple[bool, bool]:
+    """
+    Verifica una contraseña contra el valor almacenado
+
+    Args:
+        contraseña: Contraseña ingresada
+        almacenado: Valor de usuario.contrasena (hash o texto plano antiguo)
+
+    Returns:
+        (válida, necesita_rehash): necesita_rehash es True si el valor almacenado
+        es texto plano o usa menos iteraciones que las configuradas
+    """
+    if not almacenado:
+        return False, False
+
+    if not es_hash(almacenado):
+        valida = hmac.compare_digest(contraseña.encode("utf-8"), almacenado.encode("utf-8"))
+        return valida, valida
+
+    try:
+        _, iteraciones, sal, esperado = almacenado.split("$")
+        iteraciones = int(iteraciones)
+        derivado = _derivar(contraseña, base64.b64decode(sal), iteraciones)
+        valida = hmac.compare_digest(derivado, base64.b64decode(esperado))
+    except (ValueError, TypeError):
+        return False, False
+    return valida, valida and iteraciones < iteraciones_configuradas()
+
+
+def simular_verificacion(contraseña: str) -> None:
+    """
+    Calcula un hash descartable para usuarios inexistentes: el tiempo de respuesta
+    no revela si el nombre de usuario existe
+    """
+    global _hash_ficticio
+    if _hash_ficticio is None:
+        _hash_ficticio = generar_hash(secrets.token_hex(8))
+    verificar_contraseña(contraseña, _hash_ficticio)
+
+
+def main() -> int:
+    contraseña = getpass.getpass("Contraseña: ")
+    if contraseña != getpass.getpass("Repetir contraseña: "):
+        print("Las contraseñas no coinciden")
+        return 1
+    print(generar_hash(contraseña))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
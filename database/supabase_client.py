@@ -1,28 +1,139 @@
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from typing import List, Dict, Any, Optional
-import traceback
+from typing import List, Dict, Any, Iterator, Optional
 import os
+import re
+import json
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from decimal import Decimal
 from dotenv import load_dotenv
 
+from database.seguridad import generar_hash, verificar_contraseña, simular_verificacion
+from database.pooler import (TAMAÑO_PARTE, url_sesion,
+                             ejecutar_en_lote, cursor_por_partes, leer_por_partes)
+from database.local_replica import tablas_de_consulta
+from database import consultas
+
+# Segundos que se espera la notificación de una escritura propia (su eco)
+ESPERA_ECO = 30
+
+
+def organizar_historial_por_año(historial: List[Dict[str, Any]],
+                                actuales: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Agrupa las materias del historial y las calificaciones en curso por año (1ro a 6to)
+    
+    Args:
+        historial: Filas de historial_academico (con nombre_grado y nombre_asignatura)
+        actuales: Filas de calificacion del año en curso
+        
+    Returns:
+        Dict con keys '1' a '6' conteniendo las materias y notas de cada año
+    """
+    historial_por_año = {
+        '1': [],
+        '2': [],
+        '3': [],
+        '4': [],
+        '5': [],
+        '6': []
+    }
+    
+    # Extraer número de año del nombre del grado (ej: "1er Año" -> 1)
+    # Procesar historial (materias completadas)
+    for registro in historial:
+        nombre_grado = registro['nombre_grado']
+        # Buscar el primer número en el nombre del grado
+        match = re.search(r'(\d+)', nombre_grado)
+        if match:
+            año = match.group(1)
+            if año in historial_por_año:
+                historial_por_año[año].append({
+                    'nombre_asignatura': registro['nombre_asignatura'],
+                    'nota_final': registro['nota_final'],
+                    'estado': registro['estado'],
+                    'origen': 'historial'  # Marca que viene del historial
+                })
+    
+    # Procesar calificaciones actuales
+    for registro in actuales:
+        nombre_grado = registro['nombre_grado']
+        match = re.search(r'(\d+)', nombre_grado)
+        if match:
+            año = match.group(1)
+            if año in historial_por_año:
+                # Verificar si ya existe esta materia en el historial
+                materia_existe = any(
+                    m['nombre_asignatura'] == registro['nombre_asignatura'] 
+                    for m in historial_por_año[año]
+                    if m.get('origen') == 'historial'
+                )
+                
+                # Solo agregar si no existe en historial (evitar duplicados)
+                if not materia_existe:
+                    nota = registro['nota_final'] if registro['nota_final'] is not None else 0.0
+                    historial_por_año[año].append({
+                        'nombre_asignatura': registro['nombre_asignatura'],
+                        'nota_final': nota,
+                        'estado': 'EN CURSO',  # Marca que está cursando actualmente
+                        'origen': 'actual',
+                        'sin_nota': registro['nota_final'] is None  # 0.0 de relleno, no una nota
+                    })
+    
+    return historial_por_año
+
+
+def _sincronizado(metodo):
+    """Serializa el acceso a la conexión compartida (búsquedas en segundo plano)"""
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        with self._lock:
+            return metodo(self, *args, **kwargs)
+    return envoltura
+
+
+class Transaccion:
+    """Estado de una unidad de trabajo abierta con SupabaseClient.transaction()"""
+    
+    def __init__(self):
+        # Escrituras del bloque, en orden: (query, params)
+        self.sentencias: List[tuple] = []
+        # Cuántas ya se enviaron al servidor (sin confirmar)
+        self.enviadas = 0
+        # Cuántas ya se aplicaron en la réplica local (modo sin conexión)
+        self.reflejadas = 0
+        # False si alguna sentencia falló: el bloque se revierte completo
+        self.ok = True
+    
+    def agregar(self, sentencias: List[tuple]) -> bool:
+        """Difiere un grupo de escrituras hasta la próxima lectura o el final del bloque"""
+        if self.ok:
+            self.sentencias.extend(sentencias)
+        return self.ok
+
+
 class SupabaseClient:
     """Cliente para interactuar con PostgreSQL/Supabase"""
     
-    def __init__(self, database_url: str = None):
+    def __init__(self, database_url: str = None, replica_path: str = None):
             """
             Inicializa el cliente de base de datos
             
             Args:
                 database_url: URL de conexión a PostgreSQL (opcional, si no se proporciona
                             se construye desde las variables de entorno)
+                replica_path: Ruta del archivo SQLite de la réplica local (opcional, si no
+                            se proporciona se usa AMALIA_REPLICA_LOCAL)
             """
-            # Cargar variables de entorno
-            load_dotenv()
-            
             if database_url:
                 self.database_url = database_url
             else:
-                pass
+                # Cargar variables de entorno (main.py ya cargó el .env y pasa la URL)
+                load_dotenv()
+                
                 # Construir la URL de conexión desde las variables de entorno
                 user = os.getenv("user")
                 password = os.getenv("password")
@@ -34,19 +145,135 @@ class SupabaseClient:
                 self.database_url = f"postgresql://{user}:{password}@{host}:{port}/{dbname}"
                 
             self.connection = None
+            
+            # Proxy de la red local (python -m amalia.proxy): las conexiones van a él
+            # en lugar de ir directo al pooler
+            self.proxy_url = os.getenv("AMALIA_PROXY_URL")
+            
+            # La conexión se comparte con los hilos de búsqueda: una operación a la vez
+            # (una transacción retiene el candado hasta confirmar)
+            self._lock = threading.RLock()
+            
+            # Unidad de trabajo abierta (ver transaction())
+            self._tx = None
+            
+            # Variante asíncrona (AsyncSupabaseClient), la asigna main.py cuando
+            # hay un event loop de asyncio integrado con Qt
+            self.async_client = None
+            
+            # Suscriptores a los cambios notificados por el servidor (LISTEN/NOTIFY)
+            self._suscriptores = []
+            self._escucha = None
+            
+            # Ecos esperados de escrituras propias: (tabla, clave) -> (cantidad, vence).
+            # Esas notificaciones no se reenvían a los suscriptores (ver _esperar_eco)
+            self._ecos = {}
+            self._lock_ecos = threading.Lock()
+            
+            # Avisos de lotes sin conexión que el servidor rechazó (réplica local)
+            self._suscriptores_rechazos = []
+            
+            # Réplica local (modo offline-first). El hilo de sincronización lo
+            # inicia main.py después de aplicar las migraciones del esquema
+            self.replica = None
+            self._replica_compartida = False  # ver cliente_independiente()
+            replica_path = replica_path or os.getenv("AMALIA_REPLICA_LOCAL")
+            if replica_path:
+                self.activar_replica(replica_path, iniciar=False)
+    
+    def activar_replica(self, ruta: str, iniciar: bool = True):
+        """
+        Activa la réplica SQLite local: las lecturas se sirven desde ella y las
+        escrituras sin conexión se encolan para reproducirse después
+        
+        Args:
+            ruta: Ruta del archivo SQLite ("1" usa ~/.amalia/replica.sqlite3)
+            iniciar: False para abrir la réplica sin iniciar la sincronización
+                     (replica.iniciar() la inicia después)
+        """
+        from database.local_replica import LocalReplica
+        
+        if ruta == "1":
+            ruta = os.path.join(os.path.expanduser("~"), ".amalia", "replica.sqlite3")
+        
+        self.replica = LocalReplica(ruta, conectar_remoto=self._nueva_conexion)
+        self.replica.al_rechazar = self._avisar_rechazo
+        if iniciar:
+            self.replica.iniciar()
+    
+    def cliente_independiente(self) -> 'SupabaseClient':
+        """
+        Cliente con su propia conexión para operaciones largas en segundo plano
+        
+        No comparte el candado de este cliente: la GUI y las búsquedas no esperan
+        a que termine. Comparte la réplica local, que solo cierra el cliente original.
+        """
+        cliente = SupabaseClient(self.database_url)
+        if cliente.replica is not None:
+            cliente.replica.cerrar()
+        cliente.replica = self.replica
+        cliente._replica_compartida = True
+        # Sus escrituras también son propias para la escucha de este cliente
+        cliente._ecos = self._ecos
+        cliente._lock_ecos = self._lock_ecos
+        return cliente
+    
+    def aplicar_migraciones(self) -> bool:
+        """
+        Aplica las migraciones pendientes del esquema (ver database/migrations.py)
+        
+        Returns:
+            True si el esquema quedó al día
+        """
+        from database.migrations import aplicar_migraciones
+        
+        if self.proxy_url:
+            return True  # El proxy aplica las migraciones al iniciar
+        
+        try:
+            aplicar_migraciones(self.connect())
+            return True
+        except Exception as e:
+            print(f"No se pudo actualizar el esquema: {e}")
+            return False
+    
+    def _nueva_conexion(self, database_url: str = None):
+        """Abre una conexión nueva e independiente (para hilos en segundo plano)"""
+        if self.proxy_url:
+            from database.proxy_transport import ProxyConnection
+            return ProxyConnection(self.proxy_url, os.getenv("AMALIA_PROXY_TOKEN"))
+        return psycopg2.connect(
+            database_url or self.database_url,
+            sslmode='require',
+            cursor_factory=RealDictCursor,
+            connect_timeout=10
+        )
+    
+    def _usar_replica(self, query: str) -> bool:
+        """
+        Indica si una lectura debe resolverse desde la réplica local
+        
+        Con conexión, las tablas con escrituras que la réplica aún no trajo se
+        leen del servidor (el cliente ve sus propias escrituras).
+        """
+        if self.replica is None or not self.replica.puede_responder(query) or not self.replica.inicializada:
+            return False
+        if self._sin_conexion():
+            return True
+        return not (tablas_de_consulta(query) & self.replica.tablas_desactualizadas())
+    
+    def _sin_conexion(self) -> bool:
+        """True si la réplica detectó que el servidor no está disponible"""
+        return self.replica is not None and self.replica.sin_conexion
     
     def connect(self):
         """Establece conexión con la base de datos"""
         try:
             if self.connection is None or self.connection.closed:
-                self.connection = psycopg2.connect(
-                    self.database_url,
-                    sslmode='require',
-                    cursor_factory=RealDictCursor
-                )
+                self.connection = self._nueva_conexion()
                 self.connection.autocommit = False
             return self.connection
-        except Exception as e:
+        except Exception:
             raise
     
     def disconnect(self):
@@ -69,13 +296,14 @@ class SupabaseClient:
             cursor.close()
             conn.commit()
             return True
-        except Exception as e:
+        except Exception:
             pass
             # Verificar variables de entorno cargadas
             if self.connection and not self.connection.closed:
                 self.connection.rollback()
             return False
     
+    @_sincronizado
     def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
         """
         Ejecuta una consulta SELECT y retorna los resultados
@@ -87,6 +315,20 @@ class SupabaseClient:
         Returns:
             Lista de diccionarios con los resultados
         """
+        if self._tx is not None:
+            return self._consultar_en_transaccion(query, params)
+        
+        if self._usar_replica(query):
+            try:
+                return self.replica.consultar(query, params)
+            except Exception as e:
+                # Consulta no soportada por SQLite: se resuelve en el servidor
+                print(f"Réplica: consulta resuelta en el servidor ({e}): {' '.join(query.split())[:200]}")
+        
+        if self._sin_conexion():
+            return []
+        
+        conn = None
         try:
             conn = self.connect()
             cursor = conn.cursor()
@@ -94,16 +336,27 @@ class SupabaseClient:
             results = cursor.fetchall()
             cursor.close()
             conn.commit()
+            if self.replica is not None and not query.lstrip().upper().startswith("SELECT"):
+                # INSERT ... RETURNING y similares también modifican datos replicados
+                self.replica.reflejar([(query, params)])
             return results
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self._marcar_sin_conexion()
+            return []
         except Exception as e:
+            print(f"Error en la consulta: {e}")
             if conn and not conn.closed:
                 conn.rollback()
             return []
     
+    @_sincronizado
     def execute_update(self, query: str, params: tuple = None) -> bool:
         """
         Ejecuta una consulta INSERT, UPDATE o DELETE
         
+        Si la réplica local está activa y no hay conexión, la operación se encola
+        en la bandeja de salida y se aplica localmente.
+        
         Args:
             query: Consulta SQL
             params: Parámetros para la consulta (opcional)
@@ -111,6 +364,13 @@ class SupabaseClient:
         Returns:
             True si la operación fue exitosa, False en caso contrario
         """
+        if self._tx is not None:
+            return self._tx.agregar([(query, params)])
+        
+        if self._sin_conexion():
+            self.replica.encolar([(query, params)])
+            return True
+        
         conn = None
         try:
             conn = self.connect()
@@ -118,12 +378,22 @@ class SupabaseClient:
             cursor.execute(query, params)
             conn.commit()            
             cursor.close()
+            if self.replica is not None:
+                self.replica.reflejar([(query, params)])
             return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self._marcar_sin_conexion()
+            if self.replica is not None:
+                self.replica.encolar([(query, params)])
+                return True
+            return False
         except Exception as e:
+            print(f"Error en la actualización: {e}")
             if conn and not conn.closed:
                 conn.rollback()
             return False
     
+    @_sincronizado
     def execute_many(self, query: str, params_list: List[tuple]) -> bool:
         """
         Ejecuta múltiples operaciones INSERT/UPDATE
@@ -135,57 +405,395 @@ class SupabaseClient:
         Returns:
             True si todas las operaciones fueron exitosas
         """
+        sentencias = [(query, params) for params in params_list]
+        if self._tx is not None:
+            return self._tx.agregar(sentencias)
+        
+        if self._sin_conexion():
+            self.replica.encolar(sentencias)
+            return True
+        
+        conn = None
         try:
             conn = self.connect()
             cursor = conn.cursor()
-            cursor.executemany(query, params_list)
+            # Lote armado en el cliente: no depende del modo del pooler
+            ejecutar_en_lote(cursor, query, params_list)
             conn.commit()
             cursor.close()
+            if self.replica is not None:
+                self.replica.reflejar(sentencias)
             return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self._marcar_sin_conexion()
+            if self.replica is not None:
+                self.replica.encolar(sentencias)
+                return True
+            return False
         except Exception as e:
+            print(f"Lote revertido: {e}")
             if conn and not conn.closed:
                 conn.rollback()
             return False
     
+    @_sincronizado
+    def fetch_many(self, consultas: Dict[str, tuple]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Ejecuta varias consultas SELECT independientes en un solo viaje al servidor
+        
+        Cada consulta se envuelve en un subselect que agrega sus filas como JSON;
+        todas viajan en una única sentencia y vuelven en una sola fila.
+        
+        Args:
+            consultas: Diccionario nombre -> (query, params)
+            
+        Returns:
+            Diccionario nombre -> lista de diccionarios con los resultados
+        """
+        if not consultas:
+            return {}
+        
+        # Réplica local, sin conexión o dentro de una transacción: cada consulta por
+        # separado (execute_query ya resuelve esos casos)
+        if (self._tx is not None or self._sin_conexion()
+                or all(self._usar_replica(q) for q, _ in consultas.values())):
+            return self._fetch_secuencial(consultas)
+        
+        columnas = []
+        parametros = []
+        for i, (query, params) in enumerate(consultas.values()):
+            columnas.append(
+                f"(SELECT COALESCE(json_agg(t), '[]'::json) FROM ({query.strip().rstrip(';')}) t)::text AS r{i}"
+            )
+            parametros.extend(params or ())
+        query_combinada = "SELECT " + ",\n       ".join(columnas)
+        
+        conn = None
+        try:
+            conn = self.connect()
+            cursor = conn.cursor()
+            cursor.execute(query_combinada, tuple(parametros))
+            fila = cursor.fetchone()
+            cursor.close()
+            conn.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self._marcar_sin_conexion()
+            return self._fetch_secuencial(consultas)
+        except Exception as e:
+            print(f"Consultas agrupadas: se repiten una por una ({e})")
+            if conn and not conn.closed:
+                conn.rollback()
+            return self._fetch_secuencial(consultas)
+        
+        # Decimal para los numeric, igual que las consultas normales de psycopg2
+        return {
+            nombre: json.loads(fila[f"r{i}"], parse_float=Decimal)
+            for i, nombre in enumerate(consultas)
+        }
+    
+    def _fetch_secuencial(self, consultas: Dict[str, tuple]) -> Dict[str, List[Dict[str, Any]]]:
+        """Ejecuta las consultas de fetch_many una por una"""
+        return {nombre: self.execute_query(query, params) for nombre, (query, params) in consultas.items()}
+    
+    def iterar_consulta(self, query: str, params: tuple = None,
+                        tamaño: int = TAMAÑO_PARTE) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Lee un resultado grande por partes (exportaciones, sincronización)
+        
+        Usa un cursor con nombre dentro de una transacción que se confirma al
+        terminar, así que funciona también con el pooler en modo transacción.
+        Mientras se consume retiene la conexión compartida: consumirlo completo
+        (o cerrarlo) antes de hacer otras consultas desde otros hilos.
+        
+        Args:
+            query: Consulta SELECT
+            params: Parámetros para la consulta
+            tamaño: Filas por parte
+            
+        Returns:
+            Iterador de listas de diccionarios
+        """
+        with self._lock:
+            if self._tx is not None or self._sin_conexion() or self._usar_replica(query):
+                yield self.execute_query(query, params)
+                return
+            
+            conn = None
+            terminado = False
+            try:
+                conn = self.connect()
+                cursor = cursor_por_partes(conn, "amalia_partes")
+                cursor.execute(query, params)
+                yield from leer_por_partes(cursor, tamaño)
+                cursor.close()
+                conn.commit()
+                terminado = True
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                self._marcar_sin_conexion()
+            except Exception as e:
+                print(f"Error al leer por partes: {e}")
+            finally:
+                # También si se abandonó la lectura a medias: cierra el cursor del servidor
+                if not terminado and conn is not None and not conn.closed:
+                    conn.rollback()
+    
+    def _marcar_sin_conexion(self):
+        """Descarta la conexión caída y pasa a modo sin conexión si hay réplica"""
+        try:
+            if self.connection and not self.connection.closed:
+                self.connection.close()
+        except Exception:
+            pass
+        self.connection = None
+        if self.replica is not None:
+            self.replica.sin_conexion = True
+            self.replica.despertar()
+    
+    # ==================== TRANSACCIONES ====================
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Unidad de trabajo que agrupa varias llamadas del cliente en una transacción
+        
+        Dentro del bloque execute_update y execute_many no confirman: las escrituras
+        se acumulan y viajan juntas al servidor antes de la siguiente lectura (en la
+        misma sentencia que la lectura) o al salir, donde se confirma una sola vez.
+        Los bloques anidados se unen al exterior. Sin conexión, todo el bloque se
+        encola como un único lote en la réplica local.
+        
+        Uso:
+            with cliente.transaction() as tx:
+                cliente.update_estudiante(cedula, id_grado=2)
+                cliente.update_estudiante(otra_cedula, id_grado=2)
+            if not tx.ok:
+                ...  # nada se aplicó
+        """
+        with self._lock:
+            if self._tx is not None:
+                yield self._tx
+                return
+            
+            tx = Transaccion()
+            self._tx = tx
+            try:
+                yield tx
+            except BaseException:
+                tx.ok = False
+                raise
+            finally:
+                self._tx = None
+                self._terminar_transaccion(tx)
+    
+    def _ejecutar_lote(self, cursor, sentencias: List[tuple]):
+        """Envía varias sentencias en un solo viaje (los resultados son los de la última)"""
+        if hasattr(cursor, 'ejecutar_lote'):
+            cursor.ejecutar_lote(sentencias)  # Proxy: el lote viaja en una sola petición
+            return
+        cursor.execute(b";\n".join(cursor.mogrify(q, p) for q, p in sentencias))
+    
+    def _reflejar_pendientes(self, tx: Transaccion):
+        """Sin conexión: aplica en la réplica las escrituras del bloque aún no aplicadas"""
+        pendientes = tx.sentencias[tx.reflejadas:]
+        if pendientes:
+            self.replica.reflejar(pendientes, en_linea=False)
+        tx.reflejadas = len(tx.sentencias)
+    
+    def _consultar_en_transaccion(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
+        """
+        Lectura dentro de una transacción: ve las escrituras anteriores del bloque
+        
+        Las escrituras pendientes se envían en la misma sentencia que la lectura.
+        """
+        tx = self._tx
+        if not tx.ok:
+            return []
+        
+        if self._sin_conexion():
+            if self.replica is None:
+                return []
+            self._reflejar_pendientes(tx)
+            try:
+                return self.replica.consultar(query, params)
+            except Exception:
+                return []
+        
+        conn = None
+        try:
+            conn = self.connect()
+            cursor = conn.cursor()
+            self._ejecutar_lote(cursor, tx.sentencias[tx.enviadas:] + [(query, params)])
+            results = cursor.fetchall()
+            cursor.close()
+            tx.enviadas = len(tx.sentencias)
+            if not query.lstrip().upper().startswith("SELECT"):
+                # INSERT ... RETURNING: se confirma (y refleja) con el resto del bloque
+                tx.sentencias.append((query, params))
+                tx.enviadas += 1
+            return results
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # Lo enviado se perdió con la conexión: el bloque completo se encolará
+            self._marcar_sin_conexion()
+            tx.enviadas = 0
+            if self.replica is None:
+                tx.ok = False
+                return []
+            return self._consultar_en_transaccion(query, params)
+        except Exception as e:
+            print(f"Transacción revertida: {e}")
+            if conn and not conn.closed:
+                conn.rollback()
+            tx.ok = False
+            return []
+    
+    def _terminar_transaccion(self, tx: Transaccion):
+        """Confirma (o revierte) la transacción al salir del bloque más externo"""
+        if not tx.ok:
+            if tx.enviadas and self.connection and not self.connection.closed:
+                self.connection.rollback()
+            return
+        
+        if self._sin_conexion():
+            if self.replica is None:
+                tx.ok = False
+                return
+            self._reflejar_pendientes(tx)
+            if tx.sentencias:
+                self.replica.encolar(tx.sentencias, reflejar=False)
+            return
+        
+        if not tx.sentencias and not self.connection:
+            return
+        
+        conn = None
+        try:
+            conn = self.connect()
+            pendientes = tx.sentencias[tx.enviadas:]
+            if pendientes:
+                cursor = conn.cursor()
+                self._ejecutar_lote(cursor, pendientes)
+                cursor.close()
+            conn.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self._marcar_sin_conexion()
+            if self.replica is not None:
+                self.replica.encolar(tx.sentencias)
+            else:
+                tx.ok = False
+            return
+        except Exception as e:
+            print(f"Transacción revertida: {e}")
+            if conn and not conn.closed:
+                conn.rollback()
+            tx.ok = False
+            return
+        
+        if self.replica is not None and tx.sentencias:
+            self.replica.reflejar(tx.sentencias)
+    
     # ==================== USUARIOS ====================
     
     def get_user_by_credentials(self, nombre_usuario: str, contraseña: str) -> Optional[Dict[str, Any]]:
         """
-        Obtiene un usuario por nombre_usuario y contraseña
+        Verifica las credenciales y obtiene el perfil del usuario en una sola consulta
+        
+        La contraseña nunca viaja en la consulta: se trae el hash del usuario (junto
+        con los datos del docente asociado) y se verifica localmente. Las contraseñas
+        en texto plano o con un costo de KDF menor al configurado se actualizan.
         
         Args:
             nombre_usuario: Nombre de usuario
             contraseña: Contraseña del usuario
             
         Returns:
-            Diccionario con los datos del usuario o None
+            Diccionario con el perfil del usuario (sin la contraseña) o None
         """
-        
+        # usuario.cedula es opcional en el esquema: to_jsonb evita depender de ella
         query = """
-            SELECT id_usuario, nombre_usuario, contrasena, rol
-            FROM usuario
-            WHERE nombre_usuario = %s AND contrasena = %s
+            SELECT u.*, d.nombre, d.apellido, d.correo, d.telefono, d.especialidad
+            FROM usuario u
+            LEFT JOIN docente d ON d.cedula = to_jsonb(u) ->> 'cedula'
+            WHERE u.nombre_usuario = %s
         """
-        results = self.execute_query(query, (nombre_usuario, contraseña))
+        results = self.execute_query(query, (nombre_usuario,))
         
-        if results:
-            return results[0]
-        else:
-            pass
-            # Debug: buscar solo por nombre de usuario
-            debug_query = "SELECT id_usuario, nombre_usuario, contrasena, rol FROM usuario WHERE nombre_usuario = %s"
-            debug_results = self.execute_query(debug_query, (nombre_usuario,))
-            if debug_results:
-                pass  # Usuario existe pero contraseña no coincide
-            else:
-                all_users = self.execute_query("SELECT nombre_usuario FROM usuario")
+        if not results:
+            simular_verificacion(contraseña)
+            return None
+        
+        usuario = dict(results[0])
+        valida, necesita_rehash = verificar_contraseña(contraseña, usuario.pop('contrasena', None))
+        if not valida:
             return None
+        
+        if necesita_rehash:
+            self.execute_update(
+                "UPDATE usuario SET contrasena = %s WHERE id_usuario = %s",
+                (generar_hash(contraseña), usuario['id_usuario'])
+            )
+        
+        return usuario
 
+    # ==================== BÚSQUEDA ====================
+    
+    def _patron_busqueda(self, texto: str) -> str:
+        """Escapa los comodines de LIKE en el texto buscado"""
+        return texto.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    
+    def _buscar(self, query_servidor: str, params_servidor: tuple,
+                query_local: str, params_local: tuple) -> List[Dict[str, Any]]:
+        """
+        Ejecuta una búsqueda en el servidor (índices de trigramas) o, sin conexión
+        o con la réplica activa, con LIKE sobre la réplica local
+        """
+        if self.replica is not None and (self._sin_conexion() or self._usar_replica(query_local)):
+            try:
+                return self.replica.consultar(query_local, params_local)
+            except Exception as e:
+                print(f"Réplica: no se pudo buscar localmente: {e}")
+                return []
+        return self.execute_query(query_servidor, params_servidor)
+    
     # ==================== ESTUDIANTES ====================
     
     def get_all_estudiantes(self) -> List[Dict[str, Any]]:
         """Obtiene todos los estudiantes con información del grado"""
-        query = """
+        return self.execute_query(consultas.ESTUDIANTES)
+    
+    def get_estudiante_by_cedula(self, cedula: str) -> Optional[Dict[str, Any]]:
+        """Obtiene un estudiante por su cédula"""
+        results = self.execute_query(consultas.ESTUDIANTE_POR_CEDULA, (cedula,))
+        return results[0] if results else None
+
+    def get_estudiantes_by_cedulas(self, cedulas: List[str]) -> List[Dict[str, Any]]:
+        """Obtiene varios estudiantes por su cédula en una sola consulta"""
+        if not cedulas:
+            return []
+        return self._buscar(consultas.ESTUDIANTES_POR_CEDULAS, (list(cedulas),),
+                            consultas.estudiantes_por_cedulas_local(len(cedulas)), tuple(cedulas))
+    
+    def search_estudiantes(self, texto: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Busca estudiantes en toda la base por cédula, nombre, apellido, municipio
+        u observación, sin distinguir mayúsculas ni acentos
+        
+        Coinciden las filas que contienen el texto o que tienen una palabra parecida
+        (trigramas, tolera errores de tipeo). La cédula exacta va primero y el resto
+        se ordena por parecido.
+        
+        Args:
+            texto: Texto buscado
+            limit: Máximo de resultados
+            
+        Returns:
+            Lista de estudiantes con nombre_grado, como get_all_estudiantes
+        """
+        if not texto.strip():
+            return []
+        
+        # La expresión debe coincidir con el índice idx_estudiante_busqueda (migración 5)
+        documento = "amalia_busqueda(e.cedula::text, e.nombre, e.apellido, e.municipio, e.observacion)"
+        query = f"""
             SELECT e.cedula, e.nombre, e.apellido, e.fecha_nacimiento,
                 e.municipio, e.telefono, e.correo, e.id_grado,
                 e.estado, e.pais, e.observacion, e.id_mencion,
@@ -193,13 +801,14 @@ class SupabaseClient:
                 g.nombre_grado
             FROM estudiante e
             LEFT JOIN grado g ON e.id_grado = g.id_grado
-            ORDER BY e.apellido, e.nombre
+            WHERE {documento} LIKE '%%' || amalia_busqueda(%s) || '%%' ESCAPE '\\'
+               OR {documento} %%> amalia_busqueda(%s)
+            ORDER BY e.cedula = %s DESC,
+                word_similarity(amalia_busqueda(%s), {documento}) DESC,
+                e.apellido, e.nombre
+            LIMIT %s
         """
-        return self.execute_query(query)
-    
-    def get_estudiante_by_cedula(self, cedula: str) -> Optional[Dict[str, Any]]:
-        """Obtiene un estudiante por su cédula"""
-        query = """
+        query_local = """
             SELECT e.cedula, e.nombre, e.apellido, e.fecha_nacimiento,
                 e.municipio, e.telefono, e.correo, e.id_grado,
                 e.estado, e.pais, e.observacion, e.id_mencion,
@@ -207,10 +816,48 @@ class SupabaseClient:
                 g.nombre_grado
             FROM estudiante e
             LEFT JOIN grado g ON e.id_grado = g.id_grado
+            WHERE amalia_busqueda(e.cedula, e.nombre, e.apellido, e.municipio, e.observacion)
+                LIKE '%' || amalia_busqueda(%s) || '%' ESCAPE '\\'
+            ORDER BY e.cedula = %s DESC, e.apellido, e.nombre
+            LIMIT %s
+        """
+        patron = self._patron_busqueda(texto)
+        texto = texto.strip()
+        return self._buscar(query, (patron, texto, texto, texto, limit),
+                            query_local, (patron, texto, limit))
+    
+    def get_estudiante_con_calificaciones(self, cedula: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene un estudiante y sus calificaciones en un solo viaje al servidor
+        
+        Returns:
+            Diccionario {'estudiante': ..., 'calificaciones': [...]} o None si no existe
+        """
+        query_estudiante = """
+            SELECT e.cedula, e.nombre, e.apellido, e.id_grado, e.id_mencion,
+                e.seccion, g.nombre_grado
+            FROM estudiante e
+            LEFT JOIN grado g ON e.id_grado = g.id_grado
             WHERE e.cedula = %s
         """
-        results = self.execute_query(query, (cedula,))
-        return results[0] if results else None
+        query_calificaciones = """
+            SELECT c.codigo_calificacion, c.cedula_estudiante, c.codigo_asignatura, 
+            c.nota_1, c.ajuste_1, 
+            c.nota_2, c.ajuste_2, 
+            c.nota_3, c.ajuste_3, 
+            c.nota_final, a.nombre_asignatura, a.codigo
+            FROM calificacion c
+            JOIN asignatura a ON c.codigo_asignatura = a.codigo
+            WHERE c.cedula_estudiante = %s
+            ORDER BY a.nombre_asignatura
+        """
+        datos = self.fetch_many({
+            'estudiante': (query_estudiante, (cedula,)),
+            'calificaciones': (query_calificaciones, (cedula,)),
+        })
+        if not datos['estudiante']:
+            return None
+        return {'estudiante': datos['estudiante'][0], 'calificaciones': datos['calificaciones']}
 
     def create_estudiante(self, cedula: str, nombre: str, apellido: str,
                         fecha_nacimiento: str, municipio: str = None,
@@ -232,35 +879,31 @@ class SupabaseClient:
                 if not grado:
                     return False
             
-            query = """
-                INSERT INTO estudiante 
-                (cedula, nombre, apellido, fecha_nacimiento, municipio, 
-                telefono, correo, id_grado, estado, pais, observacion, id_mencion, seccion)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            
-            result = self.execute_update(query, (cedula, nombre, apellido, fecha_nacimiento,
-                                                municipio, telefono, correo, id_grado,
-                                                estado, pais, observacion, id_mencion, seccion))
-            
-            if result:
-                pass
+            # El estudiante y sus asignaturas se confirman juntos
+            self._esperar_eco('estudiante', cedula)
+            with self.transaction() as tx:
+                result = self.execute_update(consultas.INSERTAR_ESTUDIANTE, (cedula, nombre, apellido, fecha_nacimiento,
+                                                    municipio, telefono, correo, id_grado,
+                                                    estado, pais, observacion, id_mencion, seccion))
                 
-                # ASIGNAR AUTOMÁTICAMENTE LAS ASIGNATURAS DEL GRADO (solo si tiene grado asignado)
-                if id_grado is not None:
-                    asignacion_result = self.asignar_asignaturas_estudiante(cedula, id_grado)
+                if result:
+                    pass
                     
-                    if not asignacion_result:
-                        pass  # Advertencia: problemas al asignar asignaturas
-                else:
-                    pass  # No se asignaron asignaturas
-                
-                return True
-            else:
-                return False
+                    # ASIGNAR AUTOMÁTICAMENTE LAS ASIGNATURAS DEL GRADO (solo si tiene grado asignado)
+                    if id_grado is not None:
+                        asignacion_result = self.asignar_asignaturas_estudiante(cedula, id_grado)
+                        
+                        if not asignacion_result:
+                            pass  # Advertencia: problemas al asignar asignaturas
+                    else:
+                        pass  # No se asignaron asignaturas
             
-        except Exception as e:
-            import traceback
+            if not tx.ok:
+                self._olvidar_eco('estudiante', cedula)
+            return tx.ok
+            
+        except Exception:
+            self._olvidar_eco('estudiante', cedula)
             return False
 
     def update_estudiante(self, cedula: str, **kwargs) -> bool:
@@ -276,8 +919,7 @@ class SupabaseClient:
         
         # Primero obtener el grado actual del estudiante
         if 'id_grado' in kwargs:
-            query_grado_actual = "SELECT id_grado FROM estudiante WHERE cedula = %s"
-            resultado = self.execute_query(query_grado_actual, (cedula,))
+            resultado = self.execute_query(consultas.GRADO_DE_ESTUDIANTE, (cedula,))
             if resultado:
                 id_grado_actual = resultado[0]['id_grado']
         
@@ -294,26 +936,39 @@ class SupabaseClient:
         
         values.append(cedula)
         query = f"UPDATE estudiante SET {', '.join(fields)} WHERE cedula = %s"
-        result = self.execute_update(query, tuple(values))
         
-        # Si se cambió de grado, procesar asignaturas según historial
-        if result and id_grado_nuevo is not None and id_grado_actual is not None:
-            pass
+        # El cambio de grado y el paso de asignaturas al historial se confirman juntos
+        self._esperar_eco('estudiante', cedula)
+        with self.transaction() as tx:
+            result = self.execute_update(query, tuple(values))
             
-            # Usar la nueva función con lógica de aprobado/reprobado
-            self.asignar_asignaturas_estudiante(cedula, id_grado_nuevo, id_grado_actual)
+            # Si se cambió de grado, procesar asignaturas según historial
+            if result and id_grado_nuevo is not None and id_grado_actual is not None:
+                pass
+                
+                # Usar la nueva función con lógica de aprobado/reprobado
+                self.asignar_asignaturas_estudiante(cedula, id_grado_nuevo, id_grado_actual)
         
-        return result
+        if not tx.ok:
+            self._olvidar_eco('estudiante', cedula)
+        return tx.ok
 
     def delete_estudiante(self, cedula: str) -> bool:
         """Elimina un estudiante por su cédula"""
-        query = "DELETE FROM estudiante WHERE cedula = %s"
-        return self.execute_update(query, (cedula,))
+        self._esperar_eco('estudiante', cedula)
+        if self.execute_update(consultas.ELIMINAR_ESTUDIANTE, (cedula,)):
+            return True
+        self._olvidar_eco('estudiante', cedula)
+        return False
 
     def asignar_asignaturas_estudiante(self, cedula_estudiante: str, id_grado_nuevo: int, id_grado_actual: int = None) -> bool:
         """
         Asigna asignaturas a un estudiante basado en su historial académico y mención
         
+        Las sentencias (compartidas con AsyncSupabaseClient) trabajan por conjuntos:
+        las calificaciones con nota pasan al historial, se re-asignan las reprobadas
+        del grado actual y se agregan las del nuevo grado que aún no tenga.
+        
         Args:
             cedula_estudiante: Cédula del estudiante
             id_grado_nuevo: ID del nuevo grado
@@ -323,168 +978,26 @@ class SupabaseClient:
             True si se procesó correctamente
         """
         try:
-            pass
-            
-            # ============ PASO 0: OBTENER MENCIÓN DEL ESTUDIANTE ============
-            query_mencion = "SELECT id_mencion FROM estudiante WHERE cedula = %s"
-            resultado_mencion = self.execute_query(query_mencion, (cedula_estudiante,))
-            
-            if not resultado_mencion:
-                return False
-            
-            id_mencion = resultado_mencion[0].get('id_mencion')
-            
-            # ============ PASO 1: OBTENER HISTORIAL DEL ESTUDIANTE ============
-            
-            # Obtener todas las calificaciones del estudiante
-            query_calificaciones = """
-                SELECT c.codigo_asignatura, c.nota_final, a.nombre_asignatura, a.id_grado
-                FROM calificacion c
-                JOIN asignatura a ON c.codigo_asignatura = a.codigo
-                WHERE c.cedula_estudiante = %s
-            """
-            calificaciones = self.execute_query(query_calificaciones, (cedula_estudiante,))
-            
-            # ============ PASO 2: GUARDAR EN HISTORIAL ACADÉMICO ============
-            for cal in calificaciones:
-                # VALIDAR: Solo guardar en historial si tiene nota_final
-                if cal['nota_final'] is None:
-                    continue
-                
-                # Determinar si está aprobado (nota >= 9.5)
-                estado = "APROBADO" if cal['nota_final'] >= 9.5 else "REPROBADO"
-                
-                # Verificar si ya existe en historial
-                query_check_historial = """
-                    SELECT id_historial 
-                    FROM historial_academico 
-                    WHERE cedula_estudiante = %s AND codigo_asignatura = %s
-                """
-                existe = self.execute_query(query_check_historial, (cedula_estudiante, cal['codigo_asignatura']))
-                
-                if not existe:
-                    pass
-                    # Insertar en historial
-                    query_insert_historial = """
-                        INSERT INTO historial_academico 
-                        (cedula_estudiante, codigo_asignatura, nombre_asignatura, 
-                        id_grado, nota_final, estado, fecha_curso)
-                        VALUES (%s, %s, %s, %s, %s, %s, CURRENT_DATE)
-                    """
-                    self.execute_update(query_insert_historial, (
-                        cedula_estudiante, cal['codigo_asignatura'], cal['nombre_asignatura'],
-                        cal['id_grado'], cal['nota_final'], estado
-                    ))
-                else:
-                    pass
-            
-            # ============ PASO 3: ELIMINAR CALIFICACIONES ACTUALES ============
-            query_delete_calificaciones = """
-                DELETE FROM calificacion 
-                WHERE cedula_estudiante = %s
-            """
-            self.execute_update(query_delete_calificaciones, (cedula_estudiante,))
-            
-            # ============ PASO 4: ASIGNAR NUEVAS ASIGNATURAS (CON FILTRO DE MENCIÓN) ============
-            
-            # Obtener asignaturas del nuevo grado filtradas por mención
-            if id_mencion:
-                pass
-                # Si tiene mención, filtrar por mención
-                query_asignaturas_nuevo = """
-                    SELECT codigo, nombre_asignatura
-                    FROM asignatura
-                    WHERE id_grado = %s AND id_mencion = %s
-                    ORDER BY nombre_asignatura
-                """
-                asignaturas_nuevo_grado = self.execute_query(query_asignaturas_nuevo, (id_grado_nuevo, id_mencion))
-            else:
-                pass
-                # Si NO tiene mención, asignar todas
-                query_asignaturas_nuevo = """
-                    SELECT codigo, nombre_asignatura
-                    FROM asignatura
-                    WHERE id_grado = %s
-                    ORDER BY nombre_asignatura
-                """
-                asignaturas_nuevo_grado = self.execute_query(query_asignaturas_nuevo, (id_grado_nuevo,))
-            
-            # ============ PASO 5: RE-ASIGNAR MATERIAS REPROBADAS ============
-            if id_grado_actual is not None:
-                pass
-                
-                # Obtener materias reprobadas del grado actual
-                query_reprobadas = """
-                    SELECT ha.codigo_asignatura, ha.nombre_asignatura
-                    FROM historial_academico ha
-                    WHERE ha.cedula_estudiante = %s 
-                    AND ha.id_grado = %s 
-                    AND ha.estado = 'REPROBADO'
-                    ORDER BY ha.fecha_curso DESC
-                """
-                materias_reprobadas = self.execute_query(query_reprobadas, (cedula_estudiante, id_grado_actual))
-                
-                # Re-asignar materias reprobadas
-                for materia in materias_reprobadas:
-                    query_insert_reprobada = """
-                        INSERT INTO calificacion 
-                        (cedula_estudiante, codigo_asignatura, nota_1, ajuste_1, 
-                        nota_2, ajuste_2, nota_3, ajuste_3, nota_final)
-                        VALUES (%s, %s, NULL, 0.0, NULL, 0.0, NULL, 0.0, NULL)
-                    """
-                    self.execute_update(query_insert_reprobada, (
-                        cedula_estudiante, materia['codigo_asignatura']
-                    ))
-            
-            # ============ PASO 6: ASIGNAR MATERIAS DEL NUEVO GRADO ============
-            
-            # Verificar qué materias ya tiene asignadas (incluyendo reprobadas)
-            query_asignadas = "SELECT codigo_asignatura FROM calificacion WHERE cedula_estudiante = %s"
-            ya_asignadas = [a['codigo_asignatura'] for a in 
-                        self.execute_query(query_asignadas, (cedula_estudiante,))]
-            
-            # Asignar solo las materias que no tiene
-            asignaturas_a_asignar = []
-            for asignatura in asignaturas_nuevo_grado:
-                if asignatura['codigo'] not in ya_asignadas:
-                    asignaturas_a_asignar.append((
-                        cedula_estudiante, asignatura['codigo'], 
-                        None, 0.0, None, 0.0, None, 0.0, None  # Notas en NULL para nuevas
-                    ))
-            
-            if asignaturas_a_asignar:
-                query_insert_nuevas = """
-                    INSERT INTO calificacion 
-                    (cedula_estudiante, codigo_asignatura, nota_1, ajuste_1, 
-                    nota_2, ajuste_2, nota_3, ajuste_3, nota_final)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """
-                success = self.execute_many(query_insert_nuevas, asignaturas_a_asignar)
+            # Todos los pasos en una transacción: las escrituras viajan juntas
+            # y se confirman una sola vez
+            with self.transaction() as tx:
+                if not self.execute_query(consultas.EXISTE_ESTUDIANTE, (cedula_estudiante,)):
+                    return False
                 
-                if success:
-                    pass
-                else:
-                    pass
-            else:
-                pass
+                for query, params in consultas.pasos_asignacion(cedula_estudiante, id_grado_nuevo,
+                                                                id_grado_actual):
+                    self.execute_update(query, params)
             
-            return True
+            return tx.ok
             
-        except Exception as e:
-            import traceback
+        except Exception:
             return False
 
     # ==================== DOCENTES ====================
     
     def get_all_docentes(self) -> List[Dict[str, Any]]:
         """Obtiene todos los docentes"""
-        query = """
-            SELECT d.cedula, d.nombre, d.apellido, d.correo,
-                   d.telefono, d.especialidad
-            FROM docente d
-            ORDER BY d.apellido, d.nombre
-        """
-        return self.execute_query(query)
+        return self.execute_query(consultas.DOCENTES)
     
     def get_docente_by_cedula(self, cedula: str) -> Optional[Dict[str, Any]]:
         """Obtiene un docente por su cédula"""
@@ -511,12 +1024,8 @@ class SupabaseClient:
             if docente_existente:
                 return False
             
-            query = """
-                INSERT INTO docente (cedula, nombre, apellido, correo, telefono, especialidad)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            return self.execute_update(query, (cedula, nombre, apellido, correo, telefono, especialidad))
-        except Exception as e:
+            return self.execute_update(consultas.INSERTAR_DOCENTE, (cedula, nombre, apellido, correo, telefono, especialidad))
+        except Exception:
             return False
     
     def update_docente(self, cedula: str, **kwargs) -> bool:
@@ -546,21 +1055,12 @@ class SupabaseClient:
     
     def get_all_asignaturas(self) -> List[Dict[str, Any]]:
         """Obtiene todas las asignaturas con información del grado y docente"""
-        query = """
-            SELECT a.codigo, a.nombre_asignatura, a.id_grado, a.cedula_docente, a.id_mencion,
-                g.nombre_grado,
-                d.nombre as docente_nombre, d.apellido as docente_apellido
-            FROM asignatura a
-            LEFT JOIN grado g ON a.id_grado = g.id_grado
-            LEFT JOIN docente d ON a.cedula_docente = d.cedula
-            ORDER BY a.nombre_asignatura
-        """
-        return self.execute_query(query)
+        return self.execute_query(consultas.ASIGNATURAS)
     
     def get_asignatura_by_codigo(self, codigo: str) -> Optional[Dict[str, Any]]:
         """Obtiene una asignatura por su código"""
         query = """
-            SELECT a.codigo, a.nombre_asignatura, a.id_grado,
+            SELECT a.codigo, a.nombre_asignatura, a.id_grado, a.id_mencion,
                    g.nombre_grado, a.cedula_docente,
                    d.nombre as docente_nombre, d.apellido as docente_apellido
             FROM asignatura a
@@ -571,6 +1071,55 @@ class SupabaseClient:
         results = self.execute_query(query, (codigo,))
         return results[0] if results else None
     
+    def search_asignaturas(self, texto: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Busca asignaturas por código o nombre (y por grado o docente), sin
+        distinguir mayúsculas ni acentos, ordenadas por parecido
+        
+        Args:
+            texto: Texto buscado
+            limit: Máximo de resultados
+            
+        Returns:
+            Lista de asignaturas como get_all_asignaturas
+        """
+        if not texto.strip():
+            return []
+        
+        # La expresión debe coincidir con el índice idx_asignatura_busqueda (migración 5)
+        documento = "amalia_busqueda(a.codigo::text, a.nombre_asignatura)"
+        query = f"""
+            SELECT a.codigo, a.nombre_asignatura, a.id_grado, a.cedula_docente, a.id_mencion,
+                g.nombre_grado,
+                d.nombre as docente_nombre, d.apellido as docente_apellido
+            FROM asignatura a
+            LEFT JOIN grado g ON a.id_grado = g.id_grado
+            LEFT JOIN docente d ON a.cedula_docente = d.cedula
+            WHERE {documento} LIKE '%%' || amalia_busqueda(%s) || '%%' ESCAPE '\\'
+               OR {documento} %%> amalia_busqueda(%s)
+               OR amalia_busqueda(g.nombre_grado, d.nombre, d.apellido) LIKE '%%' || amalia_busqueda(%s) || '%%' ESCAPE '\\'
+            ORDER BY a.codigo::text = %s DESC,
+                word_similarity(amalia_busqueda(%s), {documento}) DESC,
+                a.nombre_asignatura
+            LIMIT %s
+        """
+        query_local = """
+            SELECT a.codigo, a.nombre_asignatura, a.id_grado, a.cedula_docente, a.id_mencion,
+                g.nombre_grado,
+                d.nombre as docente_nombre, d.apellido as docente_apellido
+            FROM asignatura a
+            LEFT JOIN grado g ON a.id_grado = g.id_grado
+            LEFT JOIN docente d ON a.cedula_docente = d.cedula
+            WHERE amalia_busqueda(a.codigo, a.nombre_asignatura, g.nombre_grado, d.nombre, d.apellido)
+                LIKE '%' || amalia_busqueda(%s) || '%' ESCAPE '\\'
+            ORDER BY CAST(a.codigo AS TEXT) = %s DESC, a.nombre_asignatura
+            LIMIT %s
+        """
+        patron = self._patron_busqueda(texto)
+        texto = texto.strip()
+        return self._buscar(query, (patron, texto, patron, texto, texto, limit),
+                            query_local, (patron, texto, limit))
+    
     def create_asignatura(self, codigo: str, nombre_asignatura: str,
                         id_grado: int, id_mencion: int, cedula_docente: str = None) -> bool:
         """Crea una nueva asignatura"""
@@ -599,12 +1148,8 @@ class SupabaseClient:
                 return False
             
             # Insertar la asignatura
-            query = """
-                INSERT INTO asignatura (codigo, nombre_asignatura, id_grado, id_mencion, cedula_docente)
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            return self.execute_update(query, (codigo, nombre_asignatura, id_grado, id_mencion, cedula_docente))
-        except Exception as e:
+            return self.execute_update(consultas.INSERTAR_ASIGNATURA, (codigo, nombre_asignatura, id_grado, id_mencion, cedula_docente))
+        except Exception:
             return False
     
     def update_asignatura(self, codigo: str, **kwargs) -> bool:
@@ -648,36 +1193,11 @@ class SupabaseClient:
     
     def get_calificaciones_by_estudiante(self, cedula_estudiante: str) -> List[Dict[str, Any]]:
         """Obtiene todas las calificaciones de un estudiante"""
-        query = """
-            SELECT c.codigo_calificacion, c.cedula_estudiante, c.codigo_asignatura, 
-            c.nota_1, c.ajuste_1, 
-            c.nota_2, c.ajuste_2, 
-            c.nota_3, c.ajuste_3, 
-            c.nota_final, a.nombre_asignatura, a.codigo
-            FROM calificacion c
-            JOIN asignatura a ON c.codigo_asignatura = a.codigo
-            WHERE c.cedula_estudiante = %s
-            ORDER BY a.nombre_asignatura
-        """
-        return self.execute_query(query, (cedula_estudiante,))   
+        return self.execute_query(consultas.CALIFICACIONES_DE_ESTUDIANTE, (cedula_estudiante,))
 
     def get_all_calificaciones(self) -> List[Dict[str, Any]]:
         """Obtiene todas las calificaciones del sistema"""
-        query = """
-            SELECT c.codigo_calificacion, c.cedula_estudiante, c.codigo_asignatura,
-                c.nota_1, c.ajuste_1, c.nota_2,
-                c.ajuste_2, c.nota_3, c.ajuste_3,
-                c.nota_final,
-                e.nombre AS nombre_estudiante,
-                e.apellido AS apellido_estudiante,
-                a.nombre_asignatura,
-                a.codigo
-            FROM calificacion c
-            JOIN estudiante e ON c.cedula_estudiante = e.cedula
-            JOIN asignatura a ON c.codigo_asignatura = a.codigo
-            ORDER BY e.apellido, e.nombre, a.nombre_asignatura
-        """
-        return self.execute_query(query)
+        return self.execute_query(consultas.CALIFICACIONES)
     
     def create_calificacion(self, cedula_estudiante: str, codigo_asignatura: str,
                       nota_1: float = None, nota_2: float = None, nota_3: float = None,
@@ -687,12 +1207,7 @@ class SupabaseClient:
         notas = [n for n in [nota_1, nota_2, nota_3] if n is not None]
         nota_final = sum(notas) / len(notas) if notas else 0.0
         
-        query = """
-            INSERT INTO calificacion (cedula_estudiante, codigo_asignatura, nota_1, ajuste_1, nota_2, 
-                                    ajuste_2, nota_3, ajuste_3, nota_final)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        return self.execute_update(query, (cedula_estudiante, codigo_asignatura, nota_1, ajuste_1, nota_2,
+        return self.execute_update(consultas.INSERTAR_CALIFICACION, (cedula_estudiante, codigo_asignatura, nota_1, ajuste_1, nota_2,
                                         ajuste_2, nota_3, ajuste_3, nota_final))
     
     def update_calificacion(self, codigo_calificacion: str, **kwargs) -> bool:
@@ -713,8 +1228,7 @@ class SupabaseClient:
         if any(k in kwargs for k in ['nota_1', 'nota_2', 'nota_3']):
             pass
             # Obtener calificación actual
-            query_current = "SELECT nota_1, nota_2, nota_3 FROM calificacion WHERE codigo_calificacion = %s"
-            current = self.execute_query(query_current, (codigo_calificacion,))
+            current = self.execute_query(consultas.NOTAS_DE_CALIFICACION, (codigo_calificacion,))
             if current:
                 nota_1 = kwargs.get('nota_1', current[0]['nota_1'])
                 nota_2 = kwargs.get('nota_2', current[0]['nota_2'])
@@ -732,17 +1246,58 @@ class SupabaseClient:
         """Elimina una calificación"""
         query = "DELETE FROM calificacion WHERE codigo_calificacion = %s"
         return self.execute_update(query, (codigo_calificacion,))
+
+    def recalcular_notas_finales(self, id_grado: int = None) -> int:
+        """
+        Recalcula en el servidor la nota final (promedio de las notas cargadas, igual
+        que update_calificacion) de las calificaciones donde quedó desactualizada
+
+        Args:
+            id_grado: Solo las asignaturas de ese grado (None: todas)
+
+        Returns:
+            Cantidad de calificaciones corregidas
+        """
+        promedio = """
+            (COALESCE(nota_1, 0) + COALESCE(nota_2, 0) + COALESCE(nota_3, 0))
+            / NULLIF((nota_1 IS NOT NULL)::int + (nota_2 IS NOT NULL)::int
+                     + (nota_3 IS NOT NULL)::int, 0)
+        """
+        filtro = ""
+        params = ()
+        if id_grado is not None:
+            filtro = "AND codigo_asignatura IN (SELECT codigo FROM asignatura WHERE id_grado = %s)"
+            params = (id_grado,)
+
+        query = f"""
+            UPDATE calificacion
+            SET nota_final = {promedio}
+            WHERE ((nota_final IS NULL) <> ({promedio} IS NULL)
+                   OR ABS(nota_final - {promedio}) > 0.005)
+            {filtro}
+            RETURNING codigo_calificacion
+        """
+        return len(self.execute_query(query, params))
     
     # ==================== GRADOS ====================
     
     def get_all_grados(self) -> List[Dict[str, Any]]:
         """Obtiene todos los grados"""
-        query = """
-            SELECT id_grado, nombre_grado
-            FROM grado
-            ORDER BY nombre_grado
+        return self.execute_query(consultas.GRADOS)
+
+    def get_grado_counts(self) -> List[Dict[str, Any]]:
+        """
+        Obtiene todos los grados con la cantidad de estudiantes, agregada en SQL
+        
+        Una sola consulta agrupa por grado, sección y mención; el desglose se
+        pliega en consultas.plegar_conteo_grados (a lo sumo grados x secciones x menciones filas).
+        
+        Returns:
+            Lista de diccionarios con id_grado, nombre_grado, count,
+            count_by_seccion ({seccion: n}) y count_by_mencion ({id_mencion: n}),
+            ordenada por nombre_grado
         """
-        return self.execute_query(query)
+        return consultas.plegar_conteo_grados(self.execute_query(consultas.CONTEO_GRADOS))
 
     def get_grado_by_id(self, grado_id: int) -> Optional[Dict[str, Any]]:
         """Obtiene un grado por su ID"""
@@ -756,23 +1311,14 @@ class SupabaseClient:
 
     def create_grado(self, nombre_grado: str) -> bool:
         """Crea un nuevo grado - Versión simple (retorna bool)"""
-        query = """
-            INSERT INTO grado (nombre_grado)
-            VALUES (%s)
-        """
         try:
-            return self.execute_update(query, (nombre_grado,))
-        except Exception as e:
+            return self.execute_update(consultas.INSERTAR_GRADO, (nombre_grado,))
+        except Exception:
             return False
 
     def update_grado(self, grado_id: int, nombre_grado: str) -> bool:
         """Actualiza un grado"""
-        query = """
-            UPDATE grado
-            SET nombre_grado = %s
-            WHERE id_grado = %s
-        """
-        return self.execute_update(query, (nombre_grado, grado_id))
+        return self.execute_update(consultas.ACTUALIZAR_GRADO, (nombre_grado, grado_id))
 
     def delete_grado(self, grado_id: int) -> bool:
         """Elimina un grado"""
@@ -784,18 +1330,7 @@ class SupabaseClient:
 
     def get_estudiantes_by_grado(self, id_grado: int) -> List[Dict[str, Any]]:
         """Obtiene todos los estudiantes de un grado específico"""
-        query = """
-            SELECT e.cedula, e.nombre, e.apellido, e.fecha_nacimiento,
-                e.municipio, e.telefono, e.correo, e.id_grado,
-                e.estado, e.pais, e.observacion, e.id_mencion,
-                e.seccion,
-                g.nombre_grado
-            FROM estudiante e
-            LEFT JOIN grado g ON e.id_grado = g.id_grado
-            WHERE e.id_grado = %s
-            ORDER BY e.apellido, e.nombre
-        """
-        return self.execute_query(query, (id_grado,))
+        return self.execute_query(consultas.ESTUDIANTES_POR_GRADO, (id_grado,))
     
     def get_estudiantes_by_grado_seccion(self, id_grado: int, seccion: str) -> List[Dict[str, Any]]:
         """Obtiene todos los estudiantes de un grado y sección específica"""
@@ -812,6 +1347,38 @@ class SupabaseClient:
         """
         return self.execute_query(query, (id_grado, seccion))
 
+    def get_cedulas_por_filtro(self, id_grado: int, seccion: Optional[str] = None,
+                               id_mencion=None) -> List[str]:
+        """
+        Obtiene solo las cédulas de los estudiantes de un grado que cumplen el filtro
+        (para seleccionar todos los de un grado sin traer ni dibujar sus filas)
+
+        Args:
+            id_grado: ID del grado
+            seccion: Sección, "sin_seccion" para los que no tienen, None para todas
+            id_mencion: ID de la mención, "sin_mencion" para los que no tienen, None para todas
+
+        Returns:
+            Lista de cédulas
+        """
+        condiciones = ["id_grado = %s"]
+        params = [id_grado]
+
+        if seccion == "sin_seccion":
+            condiciones.append("COALESCE(seccion, '') = ''")
+        elif seccion is not None:
+            condiciones.append("seccion = %s")
+            params.append(seccion)
+
+        if id_mencion == "sin_mencion":
+            condiciones.append("COALESCE(id_mencion, 0) = 0")
+        elif id_mencion is not None:
+            condiciones.append("id_mencion = %s")
+            params.append(id_mencion)
+
+        query = f"SELECT cedula FROM estudiante WHERE {' AND '.join(condiciones)}"
+        return [fila['cedula'] for fila in self.execute_query(query, tuple(params))]
+
     def insert_grado(self, nombre_grado: str) -> Optional[Dict[str, Any]]:
         """Inserta un nuevo grado y retorna el registro creado"""
         query = """
@@ -826,12 +1393,7 @@ class SupabaseClient:
     
     def get_all_periodos(self) -> List[Dict[str, Any]]:
         """Obtiene todos los períodos académicos"""
-        query = """
-            SELECT id_periodo, anio, fecha_inicio, fecha_fin
-            FROM periodo_academico
-            ORDER BY anio DESC, fecha_inicio DESC
-        """
-        return self.execute_query(query)
+        return self.execute_query(consultas.PERIODOS)
     
     def get_periodo_by_id(self, periodo_id: int) -> Optional[Dict[str, Any]]:
         """Obtiene un período académico por su ID"""
@@ -845,11 +1407,7 @@ class SupabaseClient:
     
     def create_periodo(self, anio: int, fecha_inicio: str, fecha_fin: str) -> bool:
         """Crea un nuevo período académico"""
-        query = """
-            INSERT INTO periodo_academico (anio, fecha_inicio, fecha_fin)
-            VALUES (%s, %s, %s)
-        """
-        return self.execute_update(query, (anio, fecha_inicio, fecha_fin))
+        return self.execute_update(consultas.INSERTAR_PERIODO, (anio, fecha_inicio, fecha_fin))
     
     # ==================== HISTORIAL ACADÉMICO ====================
     
@@ -868,109 +1426,29 @@ class SupabaseClient:
         """
         try:
             pass
-            # 1. Obtener información básica del estudiante (CON NUEVOS CAMPOS)
-            query_estudiante = """
-                SELECT e.cedula, e.nombre, e.apellido, e.fecha_nacimiento, 
-                    e.id_grado, e.pais, e.estado, e.municipio, 
-                    e.observacion, e.id_mencion, e.seccion, g.nombre_grado
-                FROM estudiante e
-                LEFT JOIN grado g ON e.id_grado = g.id_grado
-                WHERE e.cedula = %s
-            """
-            estudiante = self.execute_query(query_estudiante, (cedula_estudiante,))
+            # Las tres consultas son independientes: un solo viaje al servidor
+            datos = self.fetch_many({
+                'estudiante': (consultas.HISTORIAL_ESTUDIANTE, (cedula_estudiante,)),
+                'historial': (consultas.HISTORIAL_MATERIAS, (cedula_estudiante,)),
+                'actuales': (consultas.HISTORIAL_ACTUALES, (cedula_estudiante,)),
+            })
             
-            if not estudiante:
+            if not datos['estudiante']:
                 return None
             
-            info_estudiante = estudiante[0]
-            
-            # 2. Obtener TODAS las calificaciones del historial académico
-            # Esto incluye las materias que ya completó en años anteriores
-            query_historial = """
-                SELECT h.id_historial, h.cedula_estudiante, h.codigo_asignatura,
-                    h.nota_final, h.estado, h.fecha_curso,
-                    a.nombre_asignatura, a.id_grado, g.nombre_grado
-                FROM historial_academico h
-                JOIN asignatura a ON h.codigo_asignatura = a.codigo
-                JOIN grado g ON a.id_grado = g.id_grado
-                WHERE h.cedula_estudiante = %s
-                ORDER BY a.id_grado, a.nombre_asignatura
-            """
-            historial = self.execute_query(query_historial, (cedula_estudiante,))
-            
-            # 3. Obtener calificaciones actuales (del año en curso)
-            query_actuales = """
-                SELECT c.codigo_calificacion, c.cedula_estudiante, c.codigo_asignatura,
-                    c.nota_final,
-                    a.nombre_asignatura, a.id_grado, g.nombre_grado
-                FROM calificacion c
-                JOIN asignatura a ON c.codigo_asignatura = a.codigo
-                JOIN grado g ON a.id_grado = g.id_grado
-                WHERE c.cedula_estudiante = %s
-                ORDER BY a.id_grado, a.nombre_asignatura
-            """
-            actuales = self.execute_query(query_actuales, (cedula_estudiante,))
+            info_estudiante = datos['estudiante'][0]
+            historial = datos['historial']
+            actuales = datos['actuales']
             
             # 4. Organizar por año (1ro a 6to)
-            historial_por_año = {
-                '1': [],
-                '2': [],
-                '3': [],
-                '4': [],
-                '5': [],
-                '6': []
-            }
-            
-            # Extraer número de año del nombre del grado (ej: "1er Año" -> 1)
-            import re
-            
-            # Procesar historial (materias completadas)
-            for registro in historial:
-                nombre_grado = registro['nombre_grado']
-                # Buscar el primer número en el nombre del grado
-                match = re.search(r'(\d+)', nombre_grado)
-                if match:
-                    año = match.group(1)
-                    if año in historial_por_año:
-                        historial_por_año[año].append({
-                            'nombre_asignatura': registro['nombre_asignatura'],
-                            'nota_final': registro['nota_final'],
-                            'estado': registro['estado'],
-                            'origen': 'historial'  # Marca que viene del historial
-                        })
-            
-            # Procesar calificaciones actuales
-            for registro in actuales:
-                nombre_grado = registro['nombre_grado']
-                match = re.search(r'(\d+)', nombre_grado)
-                if match:
-                    año = match.group(1)
-                    if año in historial_por_año:
-                        pass
-                        # Verificar si ya existe esta materia en el historial
-                        materia_existe = any(
-                            m['nombre_asignatura'] == registro['nombre_asignatura'] 
-                            for m in historial_por_año[año]
-                            if m.get('origen') == 'historial'
-                        )
-                        
-                        # Solo agregar si no existe en historial (evitar duplicados)
-                        if not materia_existe:
-                            nota = registro['nota_final'] if registro['nota_final'] is not None else 0.0
-                            historial_por_año[año].append({
-                                'nombre_asignatura': registro['nombre_asignatura'],
-                                'nota_final': nota,
-                                'estado': 'EN CURSO',  # Marca que está cursando actualmente
-                                'origen': 'actual'
-                            })
+            historial_por_año = organizar_historial_por_año(historial, actuales)
             
             return {
                 'info_estudiante': info_estudiante,
                 'historial_por_año': historial_por_año
             }
             
-        except Exception as e:
-            import traceback
+        except Exception:
             return None
 
     def get_materias_por_grado(self, id_grado: int) -> List[Dict[str, Any]]:
@@ -1004,11 +1482,116 @@ class SupabaseClient:
             conn.commit()
             cursor.close()
             return True
-        except Exception as e:
+        except Exception:
             if conn and not conn.closed:
                 conn.rollback()
             return False
 
+    # ==================== NOTIFICACIONES DE CAMBIOS ====================
+    
+    def suscribir_cambios(self, callback) -> None:
+        """
+        Registra una función que recibe los cambios hechos desde cualquier equipo
+        
+        El callback se invoca desde el hilo de escucha con un diccionario
+        {'tabla', 'op', 'pk', 'ref'}; las vistas Qt deben reenviarlo al hilo
+        principal mediante una señal.
+        
+        Args:
+            callback: Función que recibe el cambio
+        """
+        if callback not in self._suscriptores:
+            self._suscriptores.append(callback)
+        self.iniciar_escucha_cambios()
+    
+    def cancelar_suscripcion(self, callback) -> None:
+        """Deja de enviar cambios a un callback registrado"""
+        if callback in self._suscriptores:
+            self._suscriptores.remove(callback)
+    
+    def suscribir_rechazos(self, callback) -> None:
+        """
+        Registra una función que recibe los lotes encolados sin conexión que el
+        servidor rechazó (se invoca desde el hilo de sincronización de la réplica
+        con {'lote', 'creado', 'error', 'tablas'}, ya recargadas esas tablas)
+        """
+        if callback not in self._suscriptores_rechazos:
+            self._suscriptores_rechazos.append(callback)
+    
+    def cancelar_suscripcion_rechazos(self, callback) -> None:
+        """Deja de enviar los lotes rechazados a un callback registrado"""
+        if callback in self._suscriptores_rechazos:
+            self._suscriptores_rechazos.remove(callback)
+    
+    def _avisar_rechazo(self, rechazo: Dict[str, Any]) -> None:
+        for callback in list(self._suscriptores_rechazos):
+            try:
+                callback(rechazo)
+            except Exception as e:
+                print(f"Error en suscriptor de rechazos: {e}")
+    
+    def _esperar_eco(self, tabla: str, clave) -> None:
+        """
+        Registra una escritura propia sobre una fila: su notificación (el eco)
+        no se reenvía a los suscriptores, que ya aplicaron el cambio
+        """
+        with self._lock_ecos:
+            cantidad, _ = self._ecos.get((tabla, str(clave)), (0, 0))
+            self._ecos[(tabla, str(clave))] = (cantidad + 1, time.monotonic() + ESPERA_ECO)
+    
+    def _olvidar_eco(self, tabla: str, clave) -> None:
+        """La escritura falló: su eco ya no llegará"""
+        with self._lock_ecos:
+            cantidad, vence = self._ecos.pop((tabla, str(clave)), (0, 0))
+            if cantidad > 1:
+                self._ecos[(tabla, str(clave))] = (cantidad - 1, vence)
+    
+    def _es_eco(self, cambio: Dict[str, Any]) -> bool:
+        """True (y lo descuenta) si el cambio es la notificación de una escritura propia"""
+        with self._lock_ecos:
+            clave = (cambio.get('tabla'), cambio.get('pk'))
+            cantidad, vence = self._ecos.pop(clave, (0, 0))
+            if cantidad > 1:
+                self._ecos[clave] = (cantidad - 1, vence)
+            return cantidad > 0 and time.monotonic() <= vence
+    
+    def iniciar_escucha_cambios(self) -> None:
+        """Inicia el hilo que escucha el canal de cambios (una sola vez)"""
+        from database.notificaciones import EscuchaCambios, SondeoCambios
+        from database.proxy_transport import EscuchaProxy
+        
+        if self._escucha is None:
+            if self.proxy_url:
+                # Con proxy, solo él escucha el canal del servidor
+                self._escucha = EscuchaProxy(self._nueva_conexion, self._aplicar_cambio)
+            elif url_sesion(self.database_url):
+                # LISTEN necesita una conexión en modo sesión (en el pooler de
+                # Supabase, el puerto 5432 del mismo host)
+                url = url_sesion(self.database_url)
+                self._escucha = EscuchaCambios(lambda: self._nueva_conexion(url), self._aplicar_cambio)
+            else:
+                print("Pooler en modo transacción sin AMALIA_URL_SESION: cambios por sondeo")
+                self._escucha = SondeoCambios(self._nueva_conexion, self._aplicar_cambio)
+        self._escucha.iniciar()
+    
+    def _aplicar_cambio(self, conn, cambio: Dict[str, Any]) -> None:
+        """Actualiza la réplica con el cambio recibido y avisa a los suscriptores"""
+        if self.replica is not None:
+            self.replica.aplicar_cambio(conn, cambio.get('tabla'), cambio.get('op'), cambio.get('pk'))
+        
+        if self._es_eco(cambio):
+            return
+        
+        for callback in list(self._suscriptores):
+            try:
+                callback(cambio)
+            except Exception as e:
+                print(f"Error en suscriptor de cambios: {e}")
+
     def __del__(self):
         """Destructor: cierra la conexión al destruir el objeto"""
-        self.disconnect()
\ No newline at end of file
+        self.disconnect()
+        if getattr(self, '_escucha', None) is not None:
+            self._escucha.detener()
+        if getattr(self, 'replica', None) is not None and not getattr(self, '_replica_compartida', False):
+            self.replica.cerrar()
\ No newline at end of file
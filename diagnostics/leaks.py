@@ -0,0 +1,247 @@
+"""
+Detector de fugas de widgets y de memoria al navegar
+
+Después de cada navegación (cambio de pestaña o de grado en MainWindow) toma
+una muestra y la compara con la anterior:
+
+- QObjects vivos por clase (árboles de las ventanas y de la QApplication):
+  una clase que crece en cada navegación son widgets que no se destruyen.
+- Memoria de Python con tracemalloc: las líneas que más asignaron desde la
+  muestra anterior.
+- Señales cuyo número de receptores crece: un connect() que se repite en
+  cada llamada (cada emisión ejecuta el slot una vez más).
+- RSS del proceso.
+
+    AMALIA_FUGAS=1            # un resumen por navegación en la consola
+    AMALIA_FUGAS=fugas.jsonl  # un JSON por línea con el detalle
+
+La prueba de resistencia que recorre los grados y falla si la memoria crece
+está en diagnostics/soak.py.
+"""
+import ctypes
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional
+
+# Una señal con al menos tantos receptores, y que sigue sumando, se informa
+UMBRAL_RECEPTORES = 5
+
+# Líneas de tracemalloc a informar por muestra
+LINEAS_MEMORIA = 10
+
+
+def rss_actual() -> Optional[int]:
+    """Memoria residente del proceso en bytes (None si la plataforma no la expone)"""
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
+    if sys.platform == "win32":
+        from ctypes import wintypes
+
+        class ContadoresMemoria(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (nombre, ctypes.c_size_t) for nombre in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                    "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                    "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")
+            ]
+
+        contadores = ContadoresMemoria()
+        contadores.cb = ctypes.sizeof(contadores)
+        proceso = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(proceso, ctypes.byref(contadores), contadores.cb):
+            return contadores.WorkingSetSize
+    return None
+
+
+def _objetos_vivos() -> List:
+    """QObjects de todas las ventanas de nivel superior y los hijos de la QApplication"""
+    from PyQt6.QtCore import QObject
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication.instance()
+    if app is None:
+        return []
+    objetos = []
+    for raiz in list(QApplication.topLevelWidgets()) + [app]:
+        objetos.append(raiz)
+        objetos.extend(raiz.findChildren(QObject))
+    return objetos
+
+
+def _receptores(objetos: List) -> Dict[tuple, int]:
+    """(clase, puntero, señal) -> receptores conectados, para señales con al menos uno"""
+    from PyQt6 import sip
+    from PyQt6.QtCore import QMetaMethod
+
+    receptores = {}
+    for objeto in objetos:
+        meta = objeto.metaObject()
+        clase = meta.className()
+        for i in range(meta.methodCount()):
+            metodo = meta.method(i)
+            if metodo.methodType() != QMetaMethod.MethodType.Signal:
+                continue
+            nombre = bytes(metodo.name()).decode()
+            try:
+                cantidad = objeto.receivers(getattr(objeto, nombre))
+            except (AttributeError, TypeError, RuntimeError):
+                # Señales sin equivalente en Python u objetos creados en C++
+                continue
+            if cantidad:
+                receptores[(clase, sip.unwrapinstance(objeto), nombre)] = cantidad
+    return receptores
+
+
+class Muestra:
+    """Estado del proceso en un momento dado"""
+
+    def __init__(self, contexto: str = ""):
+        objetos = _objetos_vivos()
+        self.contexto = contexto
+        self.fecha = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.clases = Counter(objeto.metaObject().className() for objeto in objetos)
+        self.receptores = _receptores(objetos)
+        self.memoria = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        self.rss = rss_actual()
+
+    @property
+    def total_objetos(self) -> int:
+        return sum(self.clases.values())
+
+
+def comparar(antes: Muestra, despues: Muestra) -> Dict:
+    """Lo que creció entre dos muestras"""
+    clases = {clase: despues.clases[clase] - antes.clases.get(clase, 0)
+              for clase in despues.clases
+              if despues.clases[clase] > antes.clases.get(clase, 0)}
+
+    conexiones = []
+    for clave, cantidad in despues.receptores.items():
+        previa = antes.receptores.get(clave, 0)
+        if cantidad >= UMBRAL_RECEPTORES and cantidad > previa:
+            clase, _, señal = clave
+            conexiones.append({'señal': f"{clase}.{señal}", 'receptores': cantidad, 'antes': previa})
+
+    memoria, lineas = 0, []
+    if antes.memoria is not None and despues.memoria is not None:
+        filtro = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        estadisticas = despues.memoria.filter_traces(filtro).compare_to(
+            antes.memoria.filter_traces(filtro), 'lineno')
+        memoria = sum(e.size_diff for e in estadisticas)
+        lineas = [{'lugar': f"{e.traceback[0].filename}:{e.traceback[0].lineno}",
+                   'kb': round(e.size_diff / 1024, 1), 'bloques': e.count_diff}
+                  for e in estadisticas[:LINEAS_MEMORIA] if e.size_diff > 0]
+
+    return {
+        'fecha': despues.fecha,
+        'contexto': despues.contexto,
+        'objetos': despues.total_objetos,
+        'delta_objetos': despues.total_objetos - antes.total_objetos,
+        'clases_que_crecen': dict(sorted(clases.items(), key=lambda par: par[1], reverse=True)),
+        'conexiones_repetidas': sorted(conexiones, key=lambda c: c['receptores'], reverse=True),
+        'delta_python_kb': round(memoria / 1024, 1),
+        'lineas_que_crecen': lineas,
+        'rss_mb': round(despues.rss / 2**20, 1) if despues.rss is not None else None,
+        'delta_rss_mb': (round((despues.rss - antes.rss) / 2**20, 1)
+                         if despues.rss is not None and antes.rss is not None else None),
+    }
+
+
+def resumen(diferencia: Dict) -> str:
+    """Una línea (más las conexiones repetidas) para la consola"""
+    clases = ", ".join(f"{c} +{n}" for c, n in list(diferencia['clases_que_crecen'].items())[:5])
+    rss = f", RSS {diferencia['rss_mb']} MB ({diferencia['delta_rss_mb']:+})" if diferencia['rss_mb'] else ""
+    lineas = [f"[fugas] {diferencia['contexto'] or 'muestra'}: {diferencia['objetos']} QObjects "
+              f"({diferencia['delta_objetos']:+}), Python {diferencia['delta_python_kb']:+} KB{rss}"]
+    if clases:
+        lineas.append(f"        crecen: {clases}")
+    for c in diferencia['conexiones_repetidas']:
+        lineas.append(f"        conexión repetida: {c['señal']} {c['antes']} -> {c['receptores']} receptores")
+    return "\n".join(lineas)
+
+
+class DetectorFugas:
+    """Muestras entre navegaciones de MainWindow"""
+
+    def __init__(self, destino: str = None):
+        self._destino = destino
+        self.inicial: Optional[Muestra] = None
+        self.anterior: Optional[Muestra] = None
+
+    @property
+    def destino(self) -> str:
+        """'1' la consola, otro valor un archivo JSONL, vacío inactivo"""
+        if self._destino is not None:
+            return self._destino
+        return os.getenv("AMALIA_FUGAS", "")
+
+    @property
+    def activo(self) -> bool:
+        return self.destino not in ("", "0")
+
+    def iniciar(self):
+        """Empieza a registrar asignaciones y toma la muestra de referencia"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.inicial = self.anterior = Muestra("inicio")
+
+    def marcar(self, contexto: str = "") -> Dict:
+        """Toma una muestra, la compara con la anterior y la informa"""
+        if self.anterior is None:
+            self.iniciar()
+        muestra = Muestra(contexto)
+        diferencia = comparar(self.anterior, muestra)
+        self.anterior = muestra
+        self._reportar(diferencia)
+        return diferencia
+
+    def acumulado(self) -> Dict:
+        """Diferencia entre la muestra inicial y la última"""
+        return comparar(self.inicial, self.anterior)
+
+    def _reportar(self, diferencia: Dict):
+        if self.destino == "1":
+            print(resumen(diferencia))
+            return
+        try:
+            with open(self.destino, "a", encoding="utf-8") as f:
+                f.write(json.dumps(diferencia, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"No se pudo registrar la muestra en {self.destino}: {e}")
+
+    def conectar(self, ventana):
+        """
+        Muestra después de cada navegación de la ventana (pestañas y grados)
+
+        Sin AMALIA_FUGAS no hace nada. La muestra se toma en la siguiente vuelta
+        del bucle de eventos, cuando ya se procesaron los deleteLater().
+        """
+        if not self.activo:
+            return
+        from PyQt6.QtCore import QTimer
+        from PyQt6.QtWidgets import QApplication
+
+        self.iniciar()
+        tabs = ventana.tabs
+
+        def programar(contexto):
+            QTimer.singleShot(0, lambda: self.marcar(contexto))
+
+        tabs.currentChanged.connect(lambda indice: programar(f"pestaña {tabs.tabText(indice)}"))
+        vista_grados = getattr(ventana, 'vista_grados', None)
+        if vista_grados is not None:
+            vista_grados.grado_seleccionado.connect(
+                lambda grado: programar(f"grado {grado.get('nombre_grado', '')}"))
+        QApplication.instance().aboutToQuit.connect(lambda: print(resumen(self.acumulado())))
+
+
+# Instancia única del proceso (MainWindow la conecta si AMALIA_FUGAS está definida)
+detector = DetectorFugas()
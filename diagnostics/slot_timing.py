@@ -0,0 +1,329 @@
+"""
+Tiempos por slot de MainWindow y de los diálogos
+
+Los slots marcados con @medir registran cuánto tardan, repartido en:
+
+- BD: dentro de los métodos de SupabaseClient (execute_query, transacciones...)
+- widgets: dentro de las llamadas de Qt que llenan las vistas (setItem,
+  insertRow, setCellWidget, addWidget, setStyleSheet...)
+- Python: el resto (ordenar, filtrar, armar los items)
+
+Se activa con AMALIA_TIEMPOS=1 o desde el diálogo oculto de diagnóstico
+(Ctrl+Shift+D en la ventana principal), que muestra los histogramas y los
+exporta a JSON. Sin activar, @medir solo cuesta una comprobación por llamada.
+"""
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+# Límites superiores de las cubetas del histograma, en ms (la última es "o más")
+CUBETAS_MS = (16, 50, 100, 250, 500, 1000, 2500)
+
+# Muestras recientes por slot para mediana y p95
+MAXIMO_MUESTRAS = 500
+
+# Métodos del cliente que cuentan como BD
+METODOS_BD = ('execute_query', 'execute_update', 'execute_many', 'fetch_many',
+              'execute_function', '_terminar_transaccion')
+
+# Llamadas de Qt que cuentan como widgets: (módulo, clase, métodos)
+METODOS_WIDGETS = (
+    ('QtWidgets', 'QTableWidget', ('setRowCount', 'insertRow', 'removeRow', 'setItem',
+                                   'setCellWidget', 'clearContents', 'resizeColumnsToContents',
+                                   'resizeRowsToContents')),
+    ('QtWidgets', 'QTableView', ('setRowHeight', 'setSpan')),
+    ('QtWidgets', 'QTreeWidget', ('addTopLevelItem', 'addTopLevelItems', 'clear')),
+    ('QtWidgets', 'QBoxLayout', ('addWidget', 'addLayout', 'insertWidget')),
+    ('QtWidgets', 'QGridLayout', ('addWidget',)),
+    ('QtWidgets', 'QWidget', ('setStyleSheet', 'setLayout', 'deleteLater')),
+)
+
+
+def _max_posicionales(funcion: Callable) -> Optional[int]:
+    """Argumentos posicionales que acepta la función (None si tiene *args)"""
+    codigo = funcion.__code__
+    if codigo.co_flags & inspect.CO_VARARGS:
+        return None
+    return codigo.co_argcount
+
+
+class Medicion:
+    """Una llamada en curso a un slot medido"""
+
+    __slots__ = ('nombre', 'inicio', 'bd', 'widgets')
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self.inicio = time.perf_counter()
+        self.bd = 0.0
+        self.widgets = 0.0
+
+
+class EstadisticaSlot:
+    """Acumulado de un slot: totales por categoría, histograma y muestras recientes"""
+
+    def __init__(self):
+        self.llamadas = 0
+        self.total = 0.0
+        self.bd = 0.0
+        self.widgets = 0.0
+        self.maximo = 0.0
+        self.cubetas = [0] * (len(CUBETAS_MS) + 1)
+        self.muestras = deque(maxlen=MAXIMO_MUESTRAS)
+
+    def agregar(self, total: float, bd: float, widgets: float):
+        self.llamadas += 1
+        self.total += total
+        self.bd += bd
+        self.widgets += widgets
+        self.maximo = max(self.maximo, total)
+        self.muestras.append(total)
+        ms = total * 1000
+        self.cubetas[next((i for i, limite in enumerate(CUBETAS_MS) if ms < limite), len(CUBETAS_MS))] += 1
+
+    def percentil(self, p: float) -> float:
+        ordenadas = sorted(self.muestras)
+        return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p))] if ordenadas else 0.0
+
+    def datos(self) -> Dict:
+        etiquetas = [f"<{l}" for l in CUBETAS_MS] + [f">={CUBETAS_MS[-1]}"]
+        return {
+            'llamadas': self.llamadas,
+            'total_ms': round(self.total * 1000, 1),
+            'media_ms': round(self.total * 1000 / self.llamadas, 1) if self.llamadas else 0.0,
+            'p50_ms': round(self.percentil(0.5) * 1000, 1),
+            'p95_ms': round(self.percentil(0.95) * 1000, 1),
+            'max_ms': round(self.maximo * 1000, 1),
+            'bd_ms': round(self.bd * 1000, 1),
+            'widgets_ms': round(self.widgets * 1000, 1),
+            'python_ms': round((self.total - self.bd - self.widgets) * 1000, 1),
+            'histograma_ms': dict(zip(etiquetas, self.cubetas)),
+        }
+
+
+class RegistroTiempos:
+    """Registro de tiempos por slot del proceso"""
+
+    def __init__(self):
+        self.activo = os.getenv("AMALIA_TIEMPOS", "") not in ("", "0")
+        self.estadisticas: Dict[str, EstadisticaSlot] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._widgets_instrumentados = False
+
+    def _pila(self) -> List[Medicion]:
+        pila = getattr(self._local, 'pila', None)
+        if pila is None:
+            pila = self._local.pila = []
+        return pila
+
+    @contextmanager
+    def medicion(self, nombre: str):
+        """Mide un bloque como una llamada al slot `nombre`"""
+        medicion = Medicion(nombre)
+        pila = self._pila()
+        pila.append(medicion)
+        try:
+            yield medicion
+        finally:
+            pila.pop()
+            total = time.perf_counter() - medicion.inicio
+            with self._lock:
+                self.estadisticas.setdefault(nombre, EstadisticaSlot()).agregar(
+                    total, medicion.bd, medicion.widgets)
+
+    def _contar(self, categoria: str, funcion: Callable) -> Callable:
+        """Envuelve una función para sumar su duración a la categoría de los slots en curso"""
+        local = self._local
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            pila = getattr(local, 'pila', None)
+            # Fuera de un slot medido, o dentro de otra llamada ya contada
+            if not pila or getattr(local, 'categoria', None):
+                return funcion(*args, **kwargs)
+            local.categoria = categoria
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                local.categoria = None
+                duracion = time.perf_counter() - inicio
+                for medicion in pila:
+                    setattr(medicion, categoria, getattr(medicion, categoria) + duracion)
+
+        envoltura._tiempos_original = funcion
+        return envoltura
+
+    def instrumentar_cliente(self, cliente):
+        """Cuenta como BD el tiempo dentro de los métodos del cliente (solo esta instancia)"""
+        for nombre in METODOS_BD:
+            metodo = getattr(cliente, nombre, None)
+            if metodo is not None and not hasattr(metodo, '_tiempos_original'):
+                setattr(cliente, nombre, self._contar('bd', metodo))
+
+    def instrumentar_widgets(self):
+        """Cuenta como widgets el tiempo dentro de las llamadas de Qt de METODOS_WIDGETS"""
+        if self._widgets_instrumentados:
+            return
+        import importlib
+
+        for modulo, clase, metodos in METODOS_WIDGETS:
+            tipo = getattr(importlib.import_module(f"PyQt6.{modulo}"), clase)
+            for nombre in metodos:
+                original = tipo.__dict__.get(nombre)
+                if original is None:
+                    continue
+                try:
+                    setattr(tipo, nombre, self._contar('widgets', original))
+                except (TypeError, AttributeError) as e:
+                    print(f"No se pudo medir {clase}.{nombre}: {e}")
+        self._widgets_instrumentados = True
+
+    def activar(self, cliente=None):
+        """Empieza a medir (instrumenta el cliente y Qt la primera vez)"""
+        if cliente is not None:
+            self.instrumentar_cliente(cliente)
+        self.instrumentar_widgets()
+        self.activo = True
+
+    def desactivar(self):
+        self.activo = False
+
+    def reiniciar(self):
+        with self._lock:
+            self.estadisticas = {}
+
+    def datos(self) -> Dict[str, Dict]:
+        """Estadísticas de todos los slots, de mayor a menor tiempo total"""
+        with self._lock:
+            datos = {nombre: e.datos() for nombre, e in self.estadisticas.items()}
+        return dict(sorted(datos.items(), key=lambda par: par[1]['total_ms'], reverse=True))
+
+    def exportar(self, ruta: str) -> bool:
+        try:
+            with open(ruta, "w", encoding="utf-8") as f:
+                json.dump({
+                    'fecha': time.strftime("%Y-%m-%d %H:%M:%S"),
+                    'cubetas_ms': list(CUBETAS_MS),
+                    'slots': self.datos(),
+                }, f, ensure_ascii=False, indent=2)
+            return True
+        except OSError as e:
+            print(f"No se pudieron exportar los tiempos a {ruta}: {e}")
+            return False
+
+
+# Instancia única del proceso
+registro = RegistroTiempos()
+
+
+def medir(metodo: Callable) -> Callable:
+    """
+    Decorador de slots: registra la duración de cada llamada cuando el registro está activo
+
+    Como Qt, descarta los argumentos sobrantes de la señal (clicked envía
+    `checked` aunque el slot no lo reciba).
+    """
+    nombre = metodo.__qualname__
+    maximo = _max_posicionales(metodo)
+
+    @functools.wraps(metodo)
+    def envoltura(*args, **kwargs):
+        if maximo is not None:
+            args = args[:maximo]
+        if not registro.activo:
+            return metodo(*args, **kwargs)
+        with registro.medicion(nombre):
+            return metodo(*args, **kwargs)
+
+    return envoltura
+
+
+# ==================== DIÁLOGO ====================
+
+BARRAS = "▁▂▃▄▅▆▇█"
+
+
+def _barras(cubetas: List[int]) -> str:
+    mayor = max(cubetas) or 1
+    return "".join(BARRAS[min(len(BARRAS) - 1, c * len(BARRAS) // (mayor + 1))] if c else " " for c in cubetas)
+
+
+def mostrar_dialogo(parent=None):
+    """Diálogo oculto de diagnóstico (Ctrl+Shift+D): tabla por slot y exportación a JSON"""
+    from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget,
+                                 QTableWidgetItem, QPushButton, QLabel, QFileDialog,
+                                 QHeaderView)
+
+    dialogo = QDialog(parent)
+    dialogo.setWindowTitle("Diagnóstico: tiempos por acción")
+    dialogo.resize(1000, 520)
+    layout = QVBoxLayout(dialogo)
+
+    estado = QLabel()
+    layout.addWidget(estado)
+
+    columnas = ["Slot", "Llamadas", "Mediana", "p95", "Máximo", "BD", "Python", "Widgets",
+                "Histograma " + " ".join(f"<{l}" for l in CUBETAS_MS) + " ms"]
+    tabla = QTableWidget(0, len(columnas))
+    tabla.setHorizontalHeaderLabels(columnas)
+    tabla.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+    tabla.verticalHeader().setVisible(False)
+    tabla.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+    layout.addWidget(tabla)
+
+    def porcentaje(parte: float, total: float) -> str:
+        return f"{parte * 100 / total:.0f} %" if total else "-"
+
+    def actualizar():
+        estado.setText("Midiendo" if registro.activo else
+                       "Sin medir: active la medición y repita las acciones lentas")
+        boton_medir.setText("Detener medición" if registro.activo else "Activar medición")
+        datos = registro.datos()
+        tabla.setRowCount(len(datos))
+        for fila, (nombre, d) in enumerate(datos.items()):
+            valores = [nombre, str(d['llamadas']), f"{d['p50_ms']:.0f} ms", f"{d['p95_ms']:.0f} ms",
+                       f"{d['max_ms']:.0f} ms", porcentaje(d['bd_ms'], d['total_ms']),
+                       porcentaje(d['python_ms'], d['total_ms']),
+                       porcentaje(d['widgets_ms'], d['total_ms']),
+                       _barras(list(d['histograma_ms'].values()))]
+            for columna, valor in enumerate(valores):
+                tabla.setItem(fila, columna, QTableWidgetItem(valor))
+
+    def alternar():
+        if registro.activo:
+            registro.desactivar()
+        else:
+            registro.activar(getattr(parent, 'supabase_client', None))
+        actualizar()
+
+    def exportar():
+        ruta, _ = QFileDialog.getSaveFileName(dialogo, "Exportar tiempos", "tiempos_amalia.json",
+                                              "JSON (*.json)")
+        if ruta:
+            registro.exportar(ruta)
+
+    def reiniciar():
+        registro.reiniciar()
+        actualizar()
+
+    botones = QHBoxLayout()
+    boton_medir = QPushButton()
+    boton_medir.clicked.connect(alternar)
+    botones.addWidget(boton_medir)
+    for texto, accion in (("Actualizar", actualizar), ("Reiniciar", reiniciar),
+                          ("Exportar JSON…", exportar), ("Cerrar", dialogo.accept)):
+        boton = QPushButton(texto)
+        boton.clicked.connect(accion)
+        botones.addWidget(boton)
+    layout.addLayout(botones)
+
+    actualizar()
+    dialogo.exec()
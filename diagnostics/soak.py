@@ -0,0 +1,140 @@
+"""
+Prueba de resistencia de la pestaña Grados
+
+Abre MainWindow sin pantalla (QT_QPA_PLATFORM=offscreen), hace clic en las
+tarjetas de los grados una y otra vez y compara el estado después del
+calentamiento con el del final (ver diagnostics/leaks.py). Falla (código 1) si
+crecen los QObjects vivos, la memoria de Python o el RSS más allá de los
+límites, o si alguna señal acumula receptores.
+
+    python -m diagnostics.soak                      # 500 clics
+    python -m diagnostics.soak --iteraciones 2000 --limite-mb 10
+
+Usa la base de datos del .env (o el proxy de la red local): solo lee.
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from typing import List
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def vaciar_eventos(app):
+    """Procesa los eventos pendientes y los deleteLater() (como una vuelta del bucle)"""
+    from PyQt6.QtCore import QCoreApplication, QEvent
+
+    app.processEvents()
+    QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+    app.processEvents()
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m diagnostics.soak",
+                                     description="Recorre los grados de MainWindow y verifica que la memoria no crezca")
+    parser.add_argument("--iteraciones", type=int, default=500, help="Clics medidos")
+    parser.add_argument("--calentamiento", type=int, default=50,
+                        help="Clics previos sin medir (cachés, primeras cargas)")
+    parser.add_argument("--limite-objetos", type=int, default=50, help="Crecimiento permitido de QObjects vivos")
+    parser.add_argument("--limite-mb", type=float, default=20.0,
+                        help="Crecimiento permitido de la memoria de Python y del RSS, en MB")
+    parser.add_argument("--database-url", help="Por defecto DATABASE_URL del entorno o del .env")
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = crear_parser().parse_args(argv)
+
+    from dotenv import load_dotenv
+
+    load_dotenv(os.path.join(RAIZ, '.env'))
+    database_url = args.database_url or os.getenv("DATABASE_URL")
+    if not database_url and not os.getenv("AMALIA_PROXY_URL"):
+        print("No se encontró DATABASE_URL (entorno o .env); use --database-url")
+        return 2
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    # La prueba mide la ventana, no los diagnósticos del propio proceso
+    os.environ.pop("AMALIA_FUGAS", None)
+    os.environ.pop("AMALIA_TIEMPOS", None)
+
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtTest import QTest
+    from PyQt6.QtWidgets import QApplication
+
+    from database.supabase_client import SupabaseClient
+    from diagnostics.leaks import Muestra, comparar, resumen
+
+    app = QApplication(sys.argv[:1])
+    cliente = SupabaseClient(database_url)
+    if not cliente.test_connection():
+        print("No se pudo conectar a la base de datos")
+        return 1
+
+    from ui.main_window import MainWindow
+
+    ventana = MainWindow(cliente, {'nombre_completo': 'Prueba de resistencia'})
+    ventana.show()
+    for indice in range(ventana.tabs.count()):
+        if ventana.tabs.tabText(indice) == "Grados":
+            ventana.tabs.setCurrentIndex(indice)
+    vaciar_eventos(app)
+
+    vista = ventana.vista_grados
+    filas = vista.modelo.rowCount()
+    if not filas:
+        print("No hay grados para recorrer")
+        return 1
+
+    def hacer_clic(numero: int):
+        indice = vista.modelo.index(numero % filas, 0)
+        vista.scrollTo(indice)
+        QTest.mouseClick(vista.viewport(), Qt.MouseButton.LeftButton,
+                         Qt.KeyboardModifier.NoModifier, vista.visualRect(indice).center())
+        vaciar_eventos(app)
+
+    print(f"Calentamiento: {args.calentamiento} clics en {filas} grados")
+    for numero in range(args.calentamiento):
+        hacer_clic(numero)
+
+    tracemalloc.start()
+    gc.collect()
+    inicial = Muestra("después del calentamiento")
+
+    inicio = time.perf_counter()
+    for numero in range(args.iteraciones):
+        hacer_clic(args.calentamiento + numero)
+        if (numero + 1) % 100 == 0:
+            print(f"  {numero + 1}/{args.iteraciones} clics ({time.perf_counter() - inicio:.0f} s)")
+
+    gc.collect()
+    diferencia = comparar(inicial, Muestra(f"{args.iteraciones} clics"))
+    print(resumen(diferencia))
+    for linea in diferencia['lineas_que_crecen']:
+        print(f"        {linea['kb']:+} KB en {linea['lugar']}")
+
+    fallas = []
+    if diferencia['delta_objetos'] > args.limite_objetos:
+        fallas.append(f"QObjects vivos +{diferencia['delta_objetos']} (límite {args.limite_objetos})")
+    if diferencia['delta_python_kb'] > args.limite_mb * 1024:
+        fallas.append(f"memoria de Python +{diferencia['delta_python_kb'] / 1024:.1f} MB (límite {args.limite_mb} MB)")
+    if diferencia['delta_rss_mb'] is not None and diferencia['delta_rss_mb'] > args.limite_mb:
+        fallas.append(f"RSS +{diferencia['delta_rss_mb']} MB (límite {args.limite_mb} MB)")
+    if diferencia['conexiones_repetidas']:
+        fallas.append(f"{len(diferencia['conexiones_repetidas'])} señales acumulan receptores")
+
+    ventana.close()
+    cliente.disconnect()
+
+    if fallas:
+        print("FALLA: " + "; ".join(fallas))
+        return 1
+    print("OK: la memoria se mantuvo acotada")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+Perfil de arranque de la aplicación
+
+Con la variable de entorno AMALIA_PERFIL_ARRANQUE activa se registra cuánto
+tarda cada etapa del inicio (importaciones, conexión, mantenimiento y primer
+pintado de las ventanas) y se imprime un informe:
+
+    AMALIA_PERFIL_ARRANQUE=1              # informe por consola
+    AMALIA_PERFIL_ARRANQUE=arranque.txt   # informe en ese archivo
+    AMALIA_PERFIL_ARRANQUE=arranque.json  # ídem en JSON (scripts/benchmark_arranque.py)
+
+Con AMALIA_PERFIL_SALIR=1 además la aplicación se cierra tras el primer
+pintado de la ventana de login (mediciones repetidas del arranque en frío).
+
+Este módulo solo usa la biblioteca estándar: main.py lo importa antes que
+PyQt6 para medir también esas importaciones. Para el detalle módulo por
+módulo usar python -X importtime main.py.
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+
+def _edad_proceso() -> Optional[float]:
+    """
+    Segundos desde que el sistema operativo creó el proceso
+
+    Incluye lo que pasa antes de que corra main.py (iniciar el intérprete y,
+    en el ejecutable de PyInstaller, cargar el paquete). None si no se puede
+    obtener.
+    """
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+            creacion, salida, kernel, usuario = (wintypes.FILETIME() for _ in range(4))
+            proceso = ctypes.windll.kernel32.GetCurrentProcess()
+            if not ctypes.windll.kernel32.GetProcessTimes(
+                    proceso, ctypes.byref(creacion), ctypes.byref(salida),
+                    ctypes.byref(kernel), ctypes.byref(usuario)):
+                return None
+            # FILETIME: intervalos de 100 ns desde 1601-01-01
+            intervalos = (creacion.dwHighDateTime << 32) | creacion.dwLowDateTime
+            return time.time() - (intervalos / 1e7 - 11644473600)
+        if sys.platform.startswith("linux"):
+            with open("/proc/self/stat") as f:
+                # El campo 22 (tras el nombre entre paréntesis) es el inicio en ticks
+                campos = f.read().rsplit(")", 1)[1].split()
+            with open("/proc/uptime") as f:
+                encendido = float(f.read().split()[0])
+            return encendido - int(campos[19]) / os.sysconf("SC_CLK_TCK")
+    except Exception:
+        return None
+    return None
+
+
+class PerfilArranque:
+    """Registro de las etapas del arranque (nombre, inicio y duración en segundos)"""
+
+    def __init__(self, destino: str = None):
+        self._destino = destino
+        self.t0 = time.perf_counter()
+        self.t0_reloj = time.time()
+        self.previo = _edad_proceso()
+        self.etapas: List[Tuple[str, float, float, int]] = []
+        self._pintados = set()
+
+    @property
+    def destino(self) -> str:
+        """Destino del informe: '1' la consola, otro valor un archivo, vacío inactivo"""
+        # Se lee al usarse: la variable también puede venir del .env
+        if self._destino is not None:
+            return self._destino
+        return os.getenv("AMALIA_PERFIL_ARRANQUE", "")
+
+    @property
+    def activo(self) -> bool:
+        return self.destino not in ("", "0")
+
+    def transcurrido(self) -> float:
+        return time.perf_counter() - self.t0
+
+    @contextmanager
+    def etapa(self, nombre: str):
+        """Mide el bloque como una etapa del arranque"""
+        inicio = self.transcurrido()
+        modulos = len(sys.modules)
+        try:
+            yield
+        finally:
+            self.etapas.append((nombre, inicio, self.transcurrido() - inicio,
+                                len(sys.modules) - modulos))
+
+    def marcar(self, nombre: str):
+        """Registra un instante (etapa de duración cero)"""
+        self.etapas.append((nombre, self.transcurrido(), 0.0, 0))
+
+    def esperar_primer_pintado(self, ventana, nombre: str):
+        """
+        Marca el primer pintado de la ventana y emite el informe en ese momento
+
+        Debe llamarse antes de ventana.show(). Sin perfil activo no hace nada.
+        """
+        if not self.activo or nombre in self._pintados:
+            return
+        from PyQt6.QtCore import QObject, QEvent
+
+        perfil = self
+
+        class _PrimerPintado(QObject):
+            def eventFilter(self, objeto, evento):
+                if evento.type() == QEvent.Type.Paint:
+                    objeto.removeEventFilter(self)
+                    perfil.marcar(f"primer pintado: {nombre}")
+                    perfil.reportar()
+                    self.deleteLater()
+                    if nombre == "login" and os.getenv("AMALIA_PERFIL_SALIR") == "1":
+                        from PyQt6.QtCore import QCoreApplication, QTimer
+                        QTimer.singleShot(0, QCoreApplication.instance().quit)
+                return False
+
+        self._pintados.add(nombre)
+        ventana.installEventFilter(_PrimerPintado(ventana))
+
+    def datos(self) -> dict:
+        """Informe en forma de diccionario (los instantes 'reloj' son time.time())"""
+        return {
+            'antes_de_main': self.previo,
+            'etapas': [
+                {'nombre': nombre, 'inicio': inicio, 'duracion': duracion,
+                 'modulos': modulos, 'reloj': self.t0_reloj + inicio + duracion}
+                for nombre, inicio, duracion, modulos in self.etapas
+            ],
+            'modulos_cargados': len(sys.modules),
+            'congelado': bool(getattr(sys, 'frozen', False)),
+        }
+
+    def informe(self) -> str:
+        lineas = ["Perfil de arranque de AMALIA"]
+        if self.previo is not None:
+            lineas.append(f"  {'antes de main.py (proceso + intérprete)':<44}{self.previo * 1000:>9.1f} ms")
+        for nombre, inicio, duracion, modulos in self.etapas:
+            detalle = f"  (+{modulos} módulos)" if modulos else ""
+            if duracion:
+                lineas.append(f"  {nombre:<44}{duracion * 1000:>9.1f} ms   @ {inicio * 1000:.0f} ms{detalle}")
+            else:
+                lineas.append(f"  {nombre:<44}{'':>12}   @ {inicio * 1000:.0f} ms")
+        total = self.transcurrido() + (self.previo or 0)
+        lineas.append(f"  {'total desde el inicio del proceso':<44}{total * 1000:>9.1f} ms")
+        lineas.append(f"  módulos cargados: {len(sys.modules)}")
+        return "\n".join(lineas)
+
+    def reportar(self):
+        """Imprime o guarda el informe acumulado (sin perfil activo no hace nada)"""
+        if not self.activo:
+            return
+        texto = self.informe()
+        if self.destino == "1":
+            print(texto)
+            return
+        try:
+            with open(self.destino, "w", encoding="utf-8") as f:
+                if self.destino.endswith(".json"):
+                    json.dump(self.datos(), f, ensure_ascii=False, indent=2)
+                else:
+                    f.write(texto + "\n")
+        except OSError as e:
+            print(f"No se pudo guardar el perfil de arranque en {self.destino}: {e}")
+            print(texto)
+
+
+# Instancia única del proceso: se crea al importar el módulo (inicio del reloj)
+perfil = PerfilArranque()
@@ -0,0 +1,236 @@
+"""
+Vigilante del bucle de eventos de Qt
+
+Mide cuánto se bloquea de verdad el hilo de la interfaz. Un QTimer late en el
+hilo principal y un hilo aparte revisa los latidos: si el bucle no responde
+dentro del umbral, captura la pila de Python del hilo principal
+(sys._current_frames) y, cuando el bucle se recupera, registra la duración del
+congelamiento junto con la ventana y pestaña activas y el slot que lo causó.
+
+    AMALIA_WATCHDOG=1                    # una línea por congelamiento en la consola
+    AMALIA_WATCHDOG=congelamientos.jsonl # un JSON por línea (con la pila completa)
+    AMALIA_WATCHDOG_UMBRAL=100           # umbral en ms (por defecto 100)
+
+Los archivos de varios equipos se agrupan en un ranking con:
+
+    python -m diagnostics.watchdog congelamientos*.jsonl
+
+Si el hilo principal está dentro de código C++ que no suelta el GIL, la pila
+no se puede capturar hasta que vuelve: el congelamiento se registra igual,
+sin pila.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, Iterable, List, Optional
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Archivos propios que no son slots (arranque y el propio vigilante)
+NO_SLOTS = {os.path.join(RAIZ, "main.py"), os.path.abspath(__file__)}
+
+
+def slot_de_pila(pila: List[traceback.FrameSummary]) -> str:
+    """
+    Slot que está corriendo: el primer marco de código propio desde afuera
+
+    Debajo del bucle de Qt (C++) el primer marco de Python de la aplicación es
+    el slot que Qt invocó; los de main.py, asyncio o qasync se saltan.
+    """
+    for marco in pila:
+        archivo = os.path.abspath(marco.filename)
+        if archivo.startswith(RAIZ) and archivo not in NO_SLOTS:
+            return f"{os.path.relpath(archivo, RAIZ)}:{marco.name}"
+    return pila[-1].name if pila else "(sin pila)"
+
+
+class VigilanteBucle:
+    """Latido del bucle de eventos y registro de los congelamientos"""
+
+    def __init__(self, destino: str = None, umbral_ms: float = None):
+        self._destino = destino
+        self._umbral_ms = umbral_ms
+        self.congelamientos: List[Dict] = []
+        self._lock = threading.Lock()
+        self._ultimo = 0.0
+        self._contexto = ""
+        self._captura = None
+        self._id_principal = None
+        self._timer = None
+
+    @property
+    def destino(self) -> str:
+        """'1' la consola, otro valor un archivo JSONL, vacío inactivo"""
+        if self._destino is not None:
+            return self._destino
+        return os.getenv("AMALIA_WATCHDOG", "")
+
+    @property
+    def activo(self) -> bool:
+        return self.destino not in ("", "0")
+
+    @property
+    def umbral(self) -> float:
+        """Umbral en segundos"""
+        if self._umbral_ms is not None:
+            return self._umbral_ms / 1000
+        return float(os.getenv("AMALIA_WATCHDOG_UMBRAL", "100")) / 1000
+
+    def iniciar(self, app):
+        """
+        Empieza a vigilar (llamar desde el hilo principal con la QApplication creada)
+
+        Sin AMALIA_WATCHDOG no hace nada.
+        """
+        if not self.activo or self._timer is not None:
+            return
+        from PyQt6.QtCore import QTimer
+
+        self._intervalo = self.umbral / 2
+        self._id_principal = threading.get_ident()
+        self._ultimo = time.perf_counter()
+
+        self._timer = QTimer()
+        self._timer.setInterval(max(1, int(self._intervalo * 1000)))
+        self._timer.timeout.connect(self._latido)
+        self._timer.start()
+        app.aboutToQuit.connect(self.reportar)
+
+        threading.Thread(target=self._vigilar, name="amalia-watchdog", daemon=True).start()
+        print(f"Vigilante del bucle de eventos activo (umbral {self.umbral * 1000:.0f} ms)")
+
+    # ==================== HILO PRINCIPAL ====================
+
+    def _latido(self):
+        """Cada tick del QTimer: si llegó tarde, el bucle estuvo bloqueado"""
+        ahora = time.perf_counter()
+        contexto = self._leer_contexto()
+        with self._lock:
+            retraso = ahora - self._ultimo - self._intervalo
+            captura, self._captura = self._captura, None
+            self._ultimo = ahora
+            anterior, self._contexto = self._contexto, contexto
+        if retraso >= self.umbral:
+            self._registrar(retraso, captura, anterior)
+
+    @staticmethod
+    def _leer_contexto() -> str:
+        """Ventana activa y, si tiene pestañas (MainWindow), la pestaña actual"""
+        from PyQt6.QtWidgets import QApplication
+
+        ventana = QApplication.activeModalWidget() or QApplication.activeWindow()
+        if ventana is None:
+            return ""
+        texto = ventana.windowTitle() or type(ventana).__name__
+        tabs = getattr(ventana, 'tabs', None)
+        if tabs is not None:
+            texto += f" / {tabs.tabText(tabs.currentIndex())}"
+        return texto
+
+    def _registrar(self, retraso: float, captura, contexto: str):
+        pila, contexto = captura if captura else ([], contexto)
+        congelamiento = {
+            'fecha': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'duracion_ms': round(retraso * 1000, 1),
+            'slot': slot_de_pila(pila),
+            'contexto': contexto,
+            'pila': traceback.format_list(pila),
+        }
+        self.congelamientos.append(congelamiento)
+
+        if self.destino == "1":
+            print(f"[watchdog] {congelamiento['duracion_ms']:.0f} ms en {congelamiento['slot']}"
+                  f" ({contexto or 'sin ventana activa'})")
+            return
+        try:
+            with open(self.destino, "a", encoding="utf-8") as f:
+                f.write(json.dumps(congelamiento, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"No se pudo registrar el congelamiento en {self.destino}: {e}")
+
+    def reportar(self):
+        """Al salir: ranking de los congelamientos de la sesión por consola"""
+        if self.congelamientos:
+            print(informe(self.congelamientos))
+
+    # ==================== HILO VIGILANTE ====================
+
+    def _vigilar(self):
+        """Revisa los latidos; al pasar el umbral captura la pila del hilo principal"""
+        while True:
+            time.sleep(self.umbral / 4)
+            with self._lock:
+                ultimo = self._ultimo
+                pendiente = (self._captura is None
+                             and time.perf_counter() - ultimo - self._intervalo >= self.umbral)
+                contexto = self._contexto
+            if not pendiente:
+                continue
+            marco = sys._current_frames().get(self._id_principal)
+            pila = traceback.extract_stack(marco) if marco is not None else []
+            with self._lock:
+                # Si el bucle ya se recuperó, la pila sería de otra cosa
+                if self._ultimo == ultimo:
+                    self._captura = (pila, contexto)
+
+
+def ranking(congelamientos: Iterable[Dict]) -> List[Dict]:
+    """Agrupa por slot: cantidad, total y máximo; ordenado por tiempo total congelado"""
+    por_slot: Dict[str, Dict] = {}
+    for c in congelamientos:
+        grupo = por_slot.setdefault(c['slot'], {
+            'slot': c['slot'], 'cantidad': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'contextos': set()
+        })
+        grupo['cantidad'] += 1
+        grupo['total_ms'] += c['duracion_ms']
+        grupo['max_ms'] = max(grupo['max_ms'], c['duracion_ms'])
+        if c.get('contexto'):
+            grupo['contextos'].add(c['contexto'])
+    return sorted(por_slot.values(), key=lambda g: g['total_ms'], reverse=True)
+
+
+def informe(congelamientos: Iterable[Dict], limite: Optional[int] = 20) -> str:
+    grupos = ranking(congelamientos)
+    lineas = ["Congelamientos del bucle de eventos (por tiempo total)",
+              f"  {'slot':<52}{'veces':>6}{'total':>11}{'máximo':>11}"]
+    for g in grupos[:limite]:
+        lineas.append(f"  {g['slot']:<52}{g['cantidad']:>6}{g['total_ms']:>9.0f} ms{g['max_ms']:>8.0f} ms")
+        if g['contextos']:
+            lineas.append(f"      en: {', '.join(sorted(g['contextos']))}")
+    return "\n".join(lineas)
+
+
+def main(argv: List[str] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m diagnostics.watchdog",
+                                     description="Ranking de congelamientos registrados con AMALIA_WATCHDOG")
+    parser.add_argument("archivos", nargs="+", help="Archivos JSONL de uno o más equipos")
+    parser.add_argument("--limite", type=int, default=20, help="Slots a mostrar")
+    parser.add_argument("--pilas", action="store_true", help="Muestra la pila del peor caso de cada slot")
+    args = parser.parse_args(argv)
+
+    congelamientos = []
+    for ruta in args.archivos:
+        with open(ruta, encoding="utf-8") as f:
+            congelamientos.extend(json.loads(linea) for linea in f if linea.strip())
+
+    print(informe(congelamientos, args.limite))
+    if args.pilas:
+        for g in ranking(congelamientos)[:args.limite]:
+            peor = max((c for c in congelamientos if c['slot'] == g['slot']),
+                       key=lambda c: c['duracion_ms'])
+            print(f"\n{g['slot']} ({peor['duracion_ms']:.0f} ms, {peor['fecha']}):")
+            print("".join(peor['pila']) or "  (pila no capturada)")
+    return 0
+
+
+# Instancia única del proceso (main.py la inicia si AMALIA_WATCHDOG está definida)
+vigilante = VigilanteBucle()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,32 @@
 import sys
-from dotenv import load_dotenv
 import os
-from PyQt6.QtWidgets import QApplication, QMessageBox
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QIcon   
-from ui.login_window import LoginWindow
-from ui.main_window import MainWindow
-from database.supabase_client import SupabaseClient
+# Primero el perfil de arranque: mide también las importaciones siguientes
+from diagnostics.startup import perfil
+from diagnostics.watchdog import vigilante
+
+with perfil.etapa("importar dotenv"):
+    from dotenv import load_dotenv
+with perfil.etapa("importar PyQt6"):
+    from PyQt6.QtWidgets import QApplication, QMessageBox
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtGui import QIcon
+with perfil.etapa("importar cliente y login"):
+    from ui.login_window import LoginWindow
+    from database.supabase_client import SupabaseClient
+# ui.main_window (y models.dialogs) se importan recién después del login,
+# en LoginWindow.open_main_window
 
 
 def resource_path(relative_path):
     """Obtiene la ruta absoluta al recurso para PyInstaller"""
-    try:
-        # PyInstaller crea una carpeta temporal
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
+    # La fija el runtime hook del build onedir (pyinstaller_hooks/pyi_rth_amalia.py)
+    base_path = os.getenv("AMALIA_RESOURCE_DIR")
+    if not base_path:
+        try:
+            # PyInstaller crea una carpeta temporal
+            base_path = sys._MEIPASS
+        except Exception:
+            base_path = os.path.abspath(".")
     
     return os.path.join(base_path, relative_path)
 
@@ -23,12 +34,13 @@ def resource_path(relative_path):
 # Cargar variables de entorno 
 if getattr(sys, 'frozen', False):
     # Ejecutable
-    base_path = sys._MEIPASS
+    base_path = os.getenv("AMALIA_RESOURCE_DIR") or sys._MEIPASS
 else:
     # Desarrollo
     base_path = os.path.dirname(os.path.abspath(__file__))
 
 
+# Única carga del .env: SupabaseClient ya recibe la URL desde aquí
 env_path = os.path.join(base_path, '.env')
 load_dotenv(env_path)
 
@@ -36,30 +48,67 @@ class AcademicSystem:
     """Clase principal del sistema académico"""
     
     def __init__(self):
-        self.app = QApplication(sys.argv)
+        with perfil.etapa("crear QApplication"):
+            self.app = QApplication(sys.argv)
         self.app.setApplicationName("AMALIA")
         self.app.setOrganizationName("U.E Nueva Esparta")
         
-        # Configurar el estilo de la aplicación
-        self.setup_style()
+        # Congelamientos del bucle de eventos (solo con AMALIA_WATCHDOG)
+        vigilante.iniciar(self.app)
         
-        # Configurar icono de la aplicación
-        self.setup_icon()
+        with perfil.etapa("estilos e icono"):
+            # Configurar el estilo de la aplicación
+            self.setup_style()
+            
+            # Configurar icono de la aplicación
+            self.setup_icon()
         
         # Obtener la URL de la base de datos
         self.database_url = os.getenv("DATABASE_URL")
         
-        if not self.database_url:
+        if not self.database_url and not os.getenv("AMALIA_PROXY_URL"):
             self.show_error("No se encontró DATABASE_URL en el archivo .env")
             sys.exit(1)
         
         # Inicializar conexiones
-        self.supabase_client = SupabaseClient(self.database_url)
+        with perfil.etapa("crear cliente de base de datos"):
+            self.supabase_client = SupabaseClient(self.database_url)
+        
+        # Event loop de asyncio integrado con Qt (opcional: qasync + asyncpg)
+        with perfil.etapa("integrar asyncio"):
+            self.loop = self.setup_async()
         
         
         # Ventana de login como punto de inicio
         self.login_window = None
         
+    def setup_async(self):
+        """
+        Integra asyncio con el loop de Qt y crea el cliente asíncrono
+        
+        Es opcional: solo se activa con AMALIA_ASYNC=1 y requiere qasync y asyncpg.
+        Sin ellos (o con la réplica local o el proxy de la red local activos) la
+        aplicación usa solo el cliente síncrono, que también respalda al asíncrono
+        cuando este pierde la conexión.
+        """
+        if (os.getenv("AMALIA_ASYNC", "0") != "1" or self.supabase_client.replica is not None
+                or self.supabase_client.proxy_url):
+            return None
+        try:
+            import asyncio
+            import qasync
+            from database.async_client import AsyncSupabaseClient, disponible
+        except ImportError:
+            return None
+        if not disponible():
+            return None
+        
+        loop = qasync.QEventLoop(self.app)
+        asyncio.set_event_loop(loop)
+        self.supabase_client.async_client = AsyncSupabaseClient(self.database_url,
+                                                                respaldo=self.supabase_client)
+        return loop
+    
     def setup_icon(self):
         """Configura el icono de la aplicación"""
         try:
@@ -164,23 +213,51 @@ class AcademicSystem:
         """Inicia la aplicación"""
         
         print("Verificando conexión a la base de datos...")
-        if not self.check_database_connection():
+        replica = self.supabase_client.replica
+        with perfil.etapa("conexión"):
+            conectado = self.check_database_connection()
+        if conectado:
+            print("Conexión establecida correctamente\n")
+            
+            # Migraciones del esquema (marcas de agua de la réplica, triggers de
+            # notificación e índices); sin pendientes solo se leen las versiones
+            # aplicadas (ningún DDL); el primer equipo que inicia aplica las nuevas
+            with perfil.etapa("migraciones"):
+                esquema_al_dia = self.supabase_client.aplicar_migraciones()
+            
+            # La sincronización de la réplica necesita las columnas updated_at
+            if replica is not None:
+                if esquema_al_dia:
+                    replica.iniciar()
+                else:
+                    print("Réplica local sin sincronizar: el esquema no está al día")
+            
+            # Ejecutar mantenimiento de grado test
+            print("Ejecutando mantenimiento de grado test...")
+            with perfil.etapa("mantenimiento de grado test"):
+                self.ejecutar_mantenimiento_grado()
+        elif replica is not None and replica.inicializada:
+            # Modo sin conexión: se trabaja sobre la réplica local
+            print("Sin conexión: usando la réplica local\n")
+            replica.sin_conexion = True
+            replica.iniciar()  # Reintenta la conexión en segundo plano
+        else:
             self.show_error("No se pudo conectar a la base de datos.\nVerifica tu archivo .env y la conexión a internet.")
             return 1
         
-        print("Conexión establecida correctamente\n")
-        
-        # Ejecutar mantenimiento de grado test
-        print("Ejecutando mantenimiento de grado test...")
-        self.ejecutar_mantenimiento_grado()
-        
         # Mostrar ventana de login
-        self.login_window = LoginWindow(
-            supabase_client=self.supabase_client,
-        )
+        with perfil.etapa("crear ventana de login"):
+            self.login_window = LoginWindow(
+                supabase_client=self.supabase_client,
+            )
+        perfil.esperar_primer_pintado(self.login_window, "login")
         self.login_window.show()
         
-        # Ejecutar el loop de eventos de Qt
+        # Ejecutar el loop de eventos de Qt (a través de qasync si está activo)
+        if self.loop is not None:
+            with self.loop:
+                self.loop.run_forever()
+            return 0
         return self.app.exec()
     
     def check_database_connection(self):
@@ -4,6 +4,7 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout,
                             QTableWidget, QTableWidgetItem, QHeaderView, QWidget)
 from PyQt6.QtCore import Qt, QDate
 from database.supabase_client import SupabaseClient
+from diagnostics.slot_timing import medir
 from typing import Dict, Any, Optional
 
 
@@ -15,6 +16,7 @@ class EstudianteDialog(QDialog):
         self.supabase_client = supabase_client
         self.estudiante = estudiante
         self.is_edit = estudiante is not None
+        self.estudiante_guardado = None
         
         self.setWindowTitle("Editar Estudiante" if self.is_edit else "Nuevo Estudiante")
         self.setMinimumWidth(500)
@@ -285,6 +287,7 @@ class EstudianteDialog(QDialog):
         
         return True
     
+    @medir
     def save(self):
         """Guarda los datos del estudiante"""
         if not self.validate():
@@ -372,6 +375,23 @@ class EstudianteDialog(QDialog):
             print(f"Resultado de la operación: {success}")
             
             if success:
+                # Fila resultante, para que las vistas se actualicen sin volver a consultar
+                self.estudiante_guardado = {
+                    'cedula': self.estudiante['cedula'] if self.is_edit else cedula,
+                    'nombre': nombre,
+                    'apellido': apellido,
+                    'fecha_nacimiento': fecha_nacimiento,
+                    'municipio': municipio,
+                    'telefono': telefono,
+                    'correo': correo,
+                    'id_grado': id_grado,
+                    'estado': estado,
+                    'pais': pais,
+                    'observacion': observacion,
+                    'id_mencion': id_mencion,
+                    'seccion': seccion,
+                    'nombre_grado': self.grado_combo.currentText(),
+                }
                 QMessageBox.information(self, "Éxito", mensaje)
                 self.accept()
             else:
@@ -567,6 +587,7 @@ class DocenteDialog(QDialog):
         
         return True
     
+    @medir
     def save(self):
         """Guarda los datos del docente"""
         if not self.validate():
@@ -804,6 +825,7 @@ class AsignaturaDialog(QDialog):
         return True
 
     
+    @medir
     def save(self):
         """Guarda los datos de la asignatura"""
         if not self.validate():
@@ -913,6 +935,7 @@ class GradoDialog(QDialog):
             return False
         return True
     
+    @medir
     def save(self):
         """Guarda los datos del grado"""
         if not self.validate():
@@ -1008,6 +1031,7 @@ class PeriodoDialog(QDialog):
         
         return True
     
+    @medir
     def save(self):
         """Guarda los datos del período"""
         if not self.validate():
@@ -1098,6 +1122,7 @@ class CalificacionesDialog(QDialog):
         layout.addWidget(buttons)
 
 
+    @medir
     def load_calificaciones(self):
         """Carga las calificaciones del estudiante por cédula"""
         cedula = self.cedula_input.text().strip()
@@ -1106,25 +1131,29 @@ class CalificacionesDialog(QDialog):
             QMessageBox.warning(self, "Error", "Debe ingresar una cédula")
             return
         
-        # Obtener información del estudiante
-        estudiante = self.supabase_client.get_estudiante_by_cedula(cedula)
-        if not estudiante:
+        # Obtener estudiante y calificaciones en un solo viaje al servidor
+        datos = self.supabase_client.get_estudiante_con_calificaciones(cedula)
+        if not datos:
             QMessageBox.warning(self, "Error", "No se encontró un estudiante con esa cédula")
             self.estudiante_info_label.setText("")
             self.calificaciones_table.setRowCount(0)
             return
         
         # Mostrar info del estudiante
+        estudiante = datos['estudiante']
         self.estudiante_info_label.setText(
             f"Estudiante: {estudiante['nombre']} {estudiante['apellido']} - Año: {estudiante['nombre_grado']}"
         )
         
         # Cargar calificaciones
-        self.calificaciones_data = self.supabase_client.get_calificaciones_by_estudiante(cedula)
+        self.calificaciones_data = datos['calificaciones']
         self.populate_table()
 
     def populate_table(self):
         """Llena la tabla con las calificaciones"""
+        # itemChanged ya está conectado una vez en setup_ui; mientras se llena
+        # la tabla no debe recalcular filas a medio armar
+        self.calificaciones_table.blockSignals(True)
         self.calificaciones_table.setRowCount(0)
         
         for cal in self.calificaciones_data:
@@ -1148,7 +1177,8 @@ class CalificacionesDialog(QDialog):
             nota_final_item = QTableWidgetItem(str(cal['nota_final']) if cal['nota_final'] else '0')
             nota_final_item.setFlags(nota_final_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
             self.calificaciones_table.setItem(row, 7, nota_final_item)
-            self.calificaciones_table.itemChanged.connect(self.recalcular_nota_final)
+        
+        self.calificaciones_table.blockSignals(False)
 
 
     def recalcular_nota_final(self, item):
@@ -1270,6 +1300,7 @@ class CalificacionesDialog(QDialog):
         elif role == QDialogButtonBox.ButtonRole.RejectRole:
            self.reject()
 
+    @medir
     def save_calificaciones(self):
         """Guarda todas las calificaciones modificadas"""
         if not self.calificaciones_data:
@@ -0,0 +1,59 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+from typing import Iterable, List, Set
+
+
+class SeleccionEstudiantes(QObject):
+    """
+    Estudiantes marcados para acciones en masa, indexados por cédula
+
+    La selección no depende de los checkboxes de la tabla: sobrevive al cambio
+    de página y de filtro, y marcar, desmarcar o contar no recorre widgets.
+    """
+
+    # Se emite con el total seleccionado cada vez que cambia
+    cambio = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cedulas: Set[str] = set()
+
+    def __len__(self):
+        return len(self._cedulas)
+
+    def __contains__(self, cedula: str) -> bool:
+        return cedula in self._cedulas
+
+    def cedulas(self) -> List[str]:
+        """Cédulas seleccionadas"""
+        return list(self._cedulas)
+
+    def marcar(self, cedula: str, marcado: bool = True):
+        """Agrega o quita una cédula de la selección"""
+        if marcado == (cedula in self._cedulas):
+            return
+        if marcado:
+            self._cedulas.add(cedula)
+        else:
+            self._cedulas.discard(cedula)
+        self.cambio.emit(len(self._cedulas))
+
+    def quitar(self, cedula: str):
+        """Quita una cédula (por ejemplo, si el estudiante se eliminó o cambió de grado)"""
+        self.marcar(cedula, False)
+
+    def reemplazar(self, cedulas: Iterable[str]):
+        """Reemplaza la selección completa (seleccionar todos los del filtro)"""
+        nuevas = set(cedulas)
+        if nuevas == self._cedulas:
+            return
+        self._cedulas = nuevas
+        self.cambio.emit(len(self._cedulas))
+
+    def contiene_todas(self, cedulas: Iterable[str]) -> bool:
+        """True si todas las cédulas dadas (y al menos una) están seleccionadas"""
+        cedulas = set(cedulas)
+        return bool(cedulas) and cedulas <= self._cedulas
+
+    def limpiar(self):
+        """Vacía la selección"""
+        self.reemplazar(())
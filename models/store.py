@@ -0,0 +1,48 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+from typing import Dict, Any, List, Optional
+
+
+class EstudiantesStore(QObject):
+    """Almacén en memoria de estudiantes, indexado por cédula, con eventos de cambio"""
+
+    # (operación, cédula, fila nueva, fila anterior)
+    # operación: 'INSERT', 'UPDATE' o 'DELETE'
+    cambio = pyqtSignal(str, str, object, object)
+
+    # Se emite cuando el contenido se reemplaza completo (carga inicial)
+    recargado = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._estudiantes: Dict[str, Dict[str, Any]] = {}
+
+    def cargar(self, estudiantes: List[Dict[str, Any]]):
+        """Reemplaza el contenido del almacén"""
+        self._estudiantes = {e['cedula']: e for e in estudiantes}
+        self.recargado.emit()
+
+    def todos(self) -> List[Dict[str, Any]]:
+        """Lista de todos los estudiantes"""
+        return list(self._estudiantes.values())
+
+    def obtener(self, cedula: str) -> Optional[Dict[str, Any]]:
+        """Obtiene un estudiante por su cédula"""
+        return self._estudiantes.get(cedula)
+
+    def guardar(self, estudiante: Dict[str, Any]):
+        """Inserta o actualiza un estudiante y notifica el cambio"""
+        cedula = estudiante['cedula']
+        anterior = self._estudiantes.get(cedula)
+        if anterior == estudiante:
+            return
+        self._estudiantes[cedula] = estudiante
+        self.cambio.emit('UPDATE' if anterior else 'INSERT', cedula, estudiante, anterior)
+
+    def eliminar(self, cedula: str):
+        """Elimina un estudiante y notifica el cambio"""
+        anterior = self._estudiantes.pop(cedula, None)
+        if anterior is not None:
+            self.cambio.emit('DELETE', cedula, None, anterior)
+
+    def __len__(self):
+        return len(self._estudiantes)
@@ -0,0 +1,13 @@
+"""
+Runtime hook del build onedir (amalia_onedir.spec)
+
+Corre dentro del ejecutable antes que main.py. Fija AMALIA_RESOURCE_DIR, la
+carpeta de los recursos empaquetados (assets y .env), que usan resource_path
+y la carga del .env. En onedir esa carpeta es la instalación misma
+(_internal junto a AMALIA.exe) y no un temporal que se descomprime en cada
+arranque. Una AMALIA_RESOURCE_DIR ya definida en el entorno tiene prioridad.
+"""
+import os
+import sys
+
+os.environ.setdefault("AMALIA_RESOURCE_DIR", getattr(sys, "_MEIPASS", os.path.dirname(sys.executable)))
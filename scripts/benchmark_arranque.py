@@ -0,0 +1,128 @@
+"""
+Compara el tiempo de arranque de varios builds de AMALIA
+
+Lanza cada ejecutable N veces con el perfil de arranque activo
+(diagnostics/startup.py) y AMALIA_PERFIL_SALIR=1, de modo que cada ejecución
+se cierra sola tras pintar la ventana de login. Mide desde el lanzamiento
+hasta ese primer pintado y desglosa las etapas del perfil.
+
+Uso:
+    python scripts/benchmark_arranque.py dist/AMALIA.exe dist/AMALIA/AMALIA.exe -n 10
+    python scripts/benchmark_arranque.py "python main.py"
+
+La conexión a la base de datos forma parte del arranque: conviene correr las
+comparaciones seguidas, en la misma red. Para medir arranques en frío de
+verdad hay que reiniciar el equipo (o vaciar la caché de disco) entre rondas.
+"""
+import argparse
+import json
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+PINTADO_LOGIN = "primer pintado: login"
+
+
+def medir_una_vez(comando: List[str], espera: float) -> Optional[Dict[str, float]]:
+    """
+    Ejecuta el build una vez
+
+    Returns:
+        {'login': ms hasta el primer pintado, <etapa>: ms, ...} o None si el
+        proceso no llegó a pintar el login dentro de la espera
+    """
+    fd, ruta = tempfile.mkstemp(suffix=".json", prefix="amalia_arranque_")
+    os.close(fd)
+    os.remove(ruta)
+    entorno = dict(os.environ, AMALIA_PERFIL_ARRANQUE=ruta, AMALIA_PERFIL_SALIR="1")
+
+    lanzamiento = time.time()
+    proceso = subprocess.Popen(comando, env=entorno,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        proceso.wait(timeout=espera)
+    except subprocess.TimeoutExpired:
+        proceso.kill()
+        proceso.wait()
+
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            datos = json.load(f)
+    except (OSError, ValueError):
+        return None
+    finally:
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+    resultado = {}
+    for etapa in datos['etapas']:
+        if etapa['nombre'] == PINTADO_LOGIN:
+            resultado['login'] = (etapa['reloj'] - lanzamiento) * 1000
+        elif etapa['duracion']:
+            resultado[etapa['nombre']] = etapa['duracion'] * 1000
+    if datos.get('antes_de_main') is not None:
+        resultado['antes de main.py'] = datos['antes_de_main'] * 1000
+    return resultado if 'login' in resultado else None
+
+
+def medir(comando: List[str], repeticiones: int, espera: float) -> List[Dict[str, float]]:
+    mediciones = []
+    for i in range(repeticiones):
+        resultado = medir_una_vez(comando, espera)
+        if resultado is None:
+            print(f"  ejecución {i + 1}: no llegó a pintar el login en {espera:.0f} s")
+            continue
+        print(f"  ejecución {i + 1}: {resultado['login']:.0f} ms")
+        mediciones.append(resultado)
+    return mediciones
+
+
+def resumir(nombre: str, mediciones: List[Dict[str, float]]):
+    print(f"\n{nombre}")
+    if not mediciones:
+        print("  sin mediciones válidas")
+        return
+    etapas = ['login'] + [e for e in mediciones[0] if e != 'login']
+    for etapa in etapas:
+        valores = [m[etapa] for m in mediciones if etapa in m]
+        if not valores:
+            continue
+        etiqueta = "hasta el login (total)" if etapa == 'login' else etapa
+        print(f"  {etiqueta:<36} mediana {statistics.median(valores):>8.0f} ms"
+              f"   mín {min(valores):>8.0f} ms   máx {max(valores):>8.0f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de AMALIA")
+    parser.add_argument("builds", nargs="+",
+                        help="Ejecutables (o comandos entre comillas) a comparar")
+    parser.add_argument("-n", "--repeticiones", type=int, default=5)
+    parser.add_argument("--espera", type=float, default=120.0,
+                        help="Segundos máximos por ejecución")
+    args = parser.parse_args()
+
+    resultados = {}
+    for build in args.builds:
+        comando = [build] if os.path.exists(build) else shlex.split(build)
+        print(f"Midiendo {build} ({args.repeticiones} ejecuciones)")
+        resultados[build] = medir(comando, args.repeticiones, args.espera)
+
+    for build, mediciones in resultados.items():
+        resumir(build, mediciones)
+
+    medianas = {b: statistics.median(m['login'] for m in ms) for b, ms in resultados.items() if ms}
+    if len(medianas) > 1:
+        base = next(iter(medianas.values()))
+        print("\nRelativo al primero:")
+        for build, mediana in medianas.items():
+            print(f"  {build:<40} {mediana / base:>6.2f}x")
+    return 0 if medianas else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
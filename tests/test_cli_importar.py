@@ -0,0 +1,63 @@
+"""Importación de estudiantes desde CSV con filas inválidas"""
+import argparse
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from amalia import cli  # noqa: E402
+
+
+class ClienteFalso:
+    def __init__(self):
+        self.creados = []
+
+    def get_all_grados(self):
+        return [{'id_grado': 1, 'nombre_grado': '1er Año'}]
+
+    def create_estudiante(self, **datos):
+        self.creados.append(datos)
+        return True
+
+
+class ConexionesFalsas(cli.Conexiones):
+    def __init__(self):
+        super().__init__("postgresql://u:p@localhost:5432/db")
+        self.falso = ClienteFalso()
+
+    def cliente(self):
+        return self.falso
+
+
+def importar(tmp_path, contenido: str):
+    archivo = tmp_path / "estudiantes.csv"
+    archivo.write_text(contenido, encoding="utf-8")
+    conexiones = ConexionesFalsas()
+    args = argparse.Namespace(archivo=str(archivo), actualizar=False, workers=1)
+    return cli.importar(args, conexiones), conexiones.falso.creados
+
+
+def test_fila_con_numero_invalido_se_informa_y_se_omite(tmp_path, capsys):
+    codigo, creados = importar(tmp_path, (
+        "cedula,nombre,apellido,fecha_nacimiento,id_grado,id_mencion\n"
+        "V1,Ana,Pérez,2010-01-01,1,\n"
+        "\n"
+        "V2,Luis,Gómez,2010-02-02,primero, \n"
+        "V3,Eva,Díaz,2010-03-03,1,2\n"
+    ))
+
+    assert codigo == 1
+    assert [d['cedula'] for d in creados] == ['V1', 'V3']
+    assert 'id_mencion' not in creados[0]
+    assert creados[1]['id_mencion'] == 2
+    assert "fila 4: id_grado no es un número ('primero')" in capsys.readouterr().out
+
+
+def test_archivo_valido_termina_sin_error(tmp_path):
+    codigo, creados = importar(tmp_path, (
+        "cedula,nombre,apellido,fecha_nacimiento,grado\n"
+        "V1,Ana,Pérez,2010-01-01,1er año\n"
+    ))
+
+    assert codigo == 0
+    assert creados[0]['id_grado'] == 1
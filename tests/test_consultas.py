@@ -0,0 +1,45 @@
+"""Sentencias compartidas de la asignación de asignaturas, aplicadas sobre la réplica local"""
+from database import consultas
+from database.local_replica import LocalReplica
+
+
+def test_cambio_de_grado_pasa_al_historial_y_reasigna(tmp_path):
+    replica = LocalReplica(str(tmp_path / "replica.sqlite3"))
+    with replica._lock:
+        replica._db.executescript("""
+            INSERT INTO grado (id_grado, nombre_grado) VALUES (1, '1er Año'), (2, '2do Año');
+            INSERT INTO asignatura (codigo, nombre_asignatura, id_grado, id_mencion) VALUES
+                ('MAT1', 'Matemática I', 1, NULL), ('FIS1', 'Física I', 1, NULL),
+                ('BIO2', 'Biología II', 2, 1), ('QUI2', 'Química II', 2, 2);
+            INSERT INTO estudiante (cedula, nombre, id_grado, id_mencion) VALUES ('V1', 'Ana', 2, 1);
+            INSERT INTO calificacion (codigo_calificacion, cedula_estudiante, codigo_asignatura, nota_final)
+                VALUES (1, 'V1', 'MAT1', 8), (2, 'V1', 'FIS1', 15);
+        """)
+
+    replica.reflejar(consultas.pasos_asignacion('V1', 2, 1), en_linea=False)
+
+    with replica._lock:
+        historial = replica._db.execute(
+            "SELECT codigo_asignatura, estado FROM historial_academico ORDER BY codigo_asignatura"
+        ).fetchall()
+        actuales = replica._db.execute(
+            "SELECT codigo_asignatura FROM calificacion ORDER BY codigo_asignatura"
+        ).fetchall()
+    replica.cerrar()
+
+    assert [tuple(f) for f in historial] == [('FIS1', 'APROBADO'), ('MAT1', 'REPROBADO')]
+    assert [f[0] for f in actuales] == ['BIO2', 'MAT1']
+
+
+def test_plegar_conteo_grados():
+    filas = [
+        {'id_grado': 1, 'nombre_grado': '1er Año', 'seccion': 'A', 'id_mencion': None, 'total': 3},
+        {'id_grado': 1, 'nombre_grado': '1er Año', 'seccion': 'B', 'id_mencion': None, 'total': 2},
+        {'id_grado': 2, 'nombre_grado': '2do Año', 'seccion': None, 'id_mencion': None, 'total': 0},
+    ]
+
+    grados = consultas.plegar_conteo_grados(filas)
+
+    assert grados[0]['count'] == 5
+    assert grados[0]['count_by_seccion'] == {'A': 3, 'B': 2}
+    assert grados[1]['count'] == 0 and grados[1]['count_by_seccion'] == {}
@@ -0,0 +1,48 @@
+"""Notificaciones de cambios: los ecos de las escrituras propias no llegan a las vistas"""
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from database.supabase_client import SupabaseClient  # noqa: E402
+
+CAMBIO = {'tabla': 'estudiante', 'op': 'UPDATE', 'pk': 'V1', 'ref': '1'}
+
+
+@pytest.fixture
+def recibidos():
+    return []
+
+
+@pytest.fixture
+def cliente(recibidos, monkeypatch):
+    cliente = SupabaseClient("postgresql://u:p@localhost:5432/db")
+    monkeypatch.setattr(cliente, "iniciar_escucha_cambios", lambda: None)
+    cliente.suscribir_cambios(recibidos.append)
+    return cliente
+
+
+def test_el_eco_propio_se_descarta_una_vez(cliente, recibidos):
+    cliente._esperar_eco('estudiante', 'V1')
+
+    cliente._aplicar_cambio(None, dict(CAMBIO))
+    assert recibidos == []
+
+    # El cambio siguiente de la misma fila ya viene de otro equipo
+    cliente._aplicar_cambio(None, dict(CAMBIO))
+    assert recibidos == [CAMBIO]
+
+
+def test_escritura_fallida_no_oculta_cambios_ajenos(cliente, recibidos):
+    cliente._esperar_eco('estudiante', 'V1')
+    cliente._olvidar_eco('estudiante', 'V1')
+
+    cliente._aplicar_cambio(None, dict(CAMBIO))
+    assert recibidos == [CAMBIO]
+
+
+def test_cliente_independiente_comparte_los_ecos(cliente, recibidos):
+    otro = cliente.cliente_independiente()
+    otro._esperar_eco('estudiante', 'V1')
+
+    cliente._aplicar_cambio(None, dict(CAMBIO))
+    assert recibidos == []
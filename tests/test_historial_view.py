@@ -0,0 +1,42 @@
+"""Promedio por año de la pestaña Historial con notas Decimal y materias en curso sin nota"""
+import os
+from decimal import Decimal
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt6.QtWidgets")
+
+from ui.historial_view import ModeloHistorial, promedio_notas  # noqa: E402
+
+HISTORIAL_MIXTO = [
+    {'nombre_asignatura': 'Matemática', 'nota_final': Decimal('15.50'), 'estado': 'APROBADO', 'origen': 'historial'},
+    {'nombre_asignatura': 'Castellano', 'nota_final': Decimal('12.00'), 'estado': 'APROBADO', 'origen': 'historial'},
+    {'nombre_asignatura': 'Física', 'nota_final': 16.0, 'estado': 'EN CURSO', 'origen': 'actual', 'sin_nota': False},
+    {'nombre_asignatura': 'Química', 'nota_final': 0.0, 'estado': 'EN CURSO', 'origen': 'actual', 'sin_nota': True},
+]
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def test_promedio_mezcla_decimal_y_float_sin_contar_relleno():
+    assert promedio_notas(HISTORIAL_MIXTO) == pytest.approx((15.5 + 12.0 + 16.0) / 3)
+
+
+def test_promedio_sin_notas():
+    assert promedio_notas([HISTORIAL_MIXTO[3]]) is None
+    assert promedio_notas([]) is None
+
+
+def test_fila_del_año_se_dibuja(app):
+    modelo = ModeloHistorial()
+    modelo.cargar({'3': HISTORIAL_MIXTO})
+    año = modelo.index(2, 0)
+    assert modelo.index(1, 1, año).data() is not None
+    assert modelo.index(2, 1).data() == f"{(15.5 + 12.0 + 16.0) / 3:.2f}"
+    assert modelo.index(2, 2).data() == "2/4 aprobadas"
+    # La materia en curso sin nota no muestra el 0.0 de relleno
+    assert modelo.index(3, 1, año).data() == "N/A"
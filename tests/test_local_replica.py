@@ -0,0 +1,156 @@
+"""Réplica local: lecturas tras escrituras aún no traídas y lotes sin conexión reproducidos"""
+import pytest
+
+pytest.importorskip("psycopg2")
+
+import psycopg2  # noqa: E402
+
+from database.local_replica import TABLAS_REPLICADAS  # noqa: E402
+from database.supabase_client import SupabaseClient  # noqa: E402
+
+INSERT_CALIFICACION = ("INSERT INTO calificacion (cedula_estudiante, codigo_asignatura, nota_final) "
+                       "VALUES (%s, %s, %s)", ('V1', 'MAT1', 15))
+SELECT_CALIFICACION = "SELECT * FROM calificacion WHERE cedula_estudiante = %s"
+
+
+@pytest.fixture
+def cliente(tmp_path):
+    cliente = SupabaseClient("postgresql://u:p@localhost:5432/db",
+                             replica_path=str(tmp_path / "replica.sqlite3"))
+    replica = cliente.replica
+    with replica._lock:
+        replica._db.executemany("INSERT INTO _watermark (tabla, valor) VALUES (?, '2026-01-01')",
+                                [(tabla,) for tabla in TABLAS_REPLICADAS])
+        replica._db.commit()
+    yield cliente
+    replica.cerrar()
+
+
+def test_la_replica_no_inicia_la_sincronizacion_al_crear_el_cliente(cliente):
+    assert cliente.replica._hilo is None
+
+
+def test_insert_en_linea_se_lee_del_servidor_hasta_el_delta(cliente, monkeypatch):
+    replica = cliente.replica
+    assert cliente._usar_replica(SELECT_CALIFICACION)
+
+    replica.reflejar([INSERT_CALIFICACION])
+    assert not cliente._usar_replica(SELECT_CALIFICACION)
+    assert cliente._usar_replica("SELECT * FROM docente")
+
+    # Sin conexión la réplica es la única fuente
+    replica.sin_conexion = True
+    assert cliente._usar_replica(SELECT_CALIFICACION)
+    replica.sin_conexion = False
+
+    traidas = []
+    monkeypatch.setattr(replica, "reproducir_outbox", lambda conn: set())
+    monkeypatch.setattr(replica, "traer_delta", lambda conn, tabla, completa=False: traidas.append(tabla))
+    monkeypatch.setattr(replica, "reconciliar_claves", lambda conn, tabla: None)
+    replica.sincronizar(conn=None)
+
+    assert 'calificacion' in traidas
+    assert cliente._usar_replica(SELECT_CALIFICACION)
+
+
+def test_escritura_durante_el_ciclo_queda_para_el_siguiente(cliente, monkeypatch):
+    replica = cliente.replica
+    monkeypatch.setattr(replica, "reproducir_outbox", lambda conn: set())
+    monkeypatch.setattr(replica, "reconciliar_claves", lambda conn, tabla: None)
+
+    def traer_delta(conn, tabla, completa=False):
+        if tabla == 'calificacion':
+            replica.reflejar([INSERT_CALIFICACION])
+
+    monkeypatch.setattr(replica, "traer_delta", traer_delta)
+    replica.sincronizar(conn=None)
+
+    assert 'calificacion' in replica.tablas_desactualizadas()
+
+
+class CursorFalso:
+    def __init__(self, servidor):
+        self.servidor = servidor
+        self.filas = []
+
+    def execute(self, query, params=None):
+        if self.servidor.rechazar and not query.lstrip().upper().startswith("SELECT"):
+            raise psycopg2.IntegrityError("viola la restricción nota_rango")
+        pk = query.split()[1]
+        self.filas = [{pk: clave} for clave in self.servidor.claves]
+
+    def fetchall(self):
+        return self.filas
+
+    def close(self):
+        pass
+
+
+class ServidorFalso:
+    """Conexión que acepta (o rechaza) las escrituras y lista las claves remotas"""
+
+    def __init__(self, claves=(), rechazar=False):
+        self.claves = list(claves)
+        self.rechazar = rechazar
+
+    def cursor(self):
+        return CursorFalso(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def filas(replica, query):
+    with replica._lock:
+        return [dict(f) for f in replica._db.execute(query)]
+
+
+def test_insert_sin_conexion_no_deja_fila_fantasma(cliente, monkeypatch):
+    replica = cliente.replica
+    replica.encolar([INSERT_CALIFICACION])
+    assert filas(replica, "SELECT codigo_calificacion FROM calificacion") == [{'codigo_calificacion': None}]
+
+    def traer_delta(conn, tabla, completa=False):
+        if tabla == 'calificacion':
+            with replica._lock:
+                replica._db.execute("INSERT INTO calificacion (codigo_calificacion, cedula_estudiante, "
+                                    "codigo_asignatura, nota_final) VALUES (7, 'V1', 'MAT1', 15)")
+
+    monkeypatch.setattr(replica, "traer_delta", traer_delta)
+    replica.sincronizar(ServidorFalso(claves=[7]))
+
+    assert replica.pendientes() == 0
+    assert filas(replica, "SELECT codigo_calificacion FROM calificacion") == [{'codigo_calificacion': 7}]
+
+
+def test_lote_rechazado_recarga_la_tabla_y_avisa(cliente, monkeypatch):
+    replica = cliente.replica
+    with replica._lock:
+        replica._db.execute("INSERT INTO estudiante (cedula, nombre) VALUES ('V1', 'Ana')")
+    replica.encolar([("UPDATE estudiante SET nombre = %s WHERE cedula = %s", ('Eva', 'V1'))])
+    assert filas(replica, "SELECT nombre FROM estudiante") == [{'nombre': 'Eva'}]
+
+    completas = []
+
+    def traer_delta(conn, tabla, completa=False):
+        if completa:
+            completas.append(tabla)
+            with replica._lock:
+                replica._db.execute("UPDATE estudiante SET nombre = 'Ana' WHERE cedula = 'V1'")
+
+    rechazos = []
+    cliente.suscribir_rechazos(rechazos.append)
+    monkeypatch.setattr(replica, "traer_delta", traer_delta)
+    replica.sincronizar(ServidorFalso(claves=['V1'], rechazar=True))
+
+    assert completas == ['estudiante']
+    assert filas(replica, "SELECT nombre FROM estudiante") == [{'nombre': 'Ana'}]
+    assert [r['tablas'] for r in rechazos] == [['estudiante']]
+    assert len(filas(replica, "SELECT id FROM _outbox_fallidos")) == 1
+
+    # El ciclo siguiente ya no recarga la tabla completa
+    replica.sincronizar(ServidorFalso(claves=['V1']))
+    assert completas == ['estudiante']
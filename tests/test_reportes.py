@@ -0,0 +1,40 @@
+"""Resultado de guardar_pdf según se haya escrito o no el archivo y columnas de las plantillas"""
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+pytest.importorskip("PyQt6.QtWidgets")
+
+from ui.reportes import HISTORIAL, guardar_listas_pdf  # noqa: E402
+
+LISTA = {
+    'grado': {'nombre_grado': '1er Año'},
+    'estudiantes': [{'cedula': 'V1', 'nombre': 'Ana', 'apellido': 'Pérez', 'seccion': 'A'}],
+}
+
+
+def test_pdf_escrito(tmp_path):
+    ruta = tmp_path / "lista.pdf"
+    assert guardar_listas_pdf(str(ruta), [LISTA])
+    assert ruta.read_bytes().startswith(b"%PDF")
+
+
+def test_carpeta_inexistente(tmp_path):
+    assert not guardar_listas_pdf(str(tmp_path / "no_existe" / "lista.pdf"), [LISTA])
+
+
+def test_archivo_previo_no_cuenta_como_exito(tmp_path):
+    ruta = tmp_path / "solo_lectura.pdf"
+    ruta.write_bytes(b"anterior")
+    ruta.chmod(0o444)
+    if os.access(ruta, os.W_OK):
+        pytest.skip("el usuario puede escribir en archivos de solo lectura (root)")
+    assert not guardar_listas_pdf(str(ruta), [LISTA])
+
+
+def test_historial_materia_en_curso_sin_nota():
+    nota_final = next(c for c in HISTORIAL.tabla.columnas if c.titulo == "Nota Final")
+    assert nota_final.valor({'nota_final': 0.0, 'sin_nota': True}) == "N/A"
+    assert nota_final.valor({'nota_final': 16.0, 'sin_nota': False}) == "16.00"
+    assert nota_final.valor({'nota_final': 12.5}) == "12.50"
@@ -0,0 +1,33 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+from typing import Dict, Any
+
+
+class PuenteCambios(QObject):
+    """Lleva los cambios notificados por el servidor al hilo principal de Qt"""
+
+    # Se emite con el diccionario {'tabla', 'op', 'pk', 'ref'}
+    cambio_recibido = pyqtSignal(dict)
+    # Lote encolado sin conexión que el servidor rechazó: {'lote', 'creado', 'error', 'tablas'}
+    lote_rechazado = pyqtSignal(dict)
+
+    def __init__(self, supabase_client, parent=None):
+        super().__init__(parent)
+        self.supabase_client = supabase_client
+
+    def conectar(self):
+        """Se suscribe a los cambios del cliente de base de datos"""
+        self.supabase_client.suscribir_cambios(self.emitir)
+        self.supabase_client.suscribir_rechazos(self.emitir_rechazo)
+
+    def desconectar(self):
+        """Cancela la suscripción (al cerrar la ventana)"""
+        self.supabase_client.cancelar_suscripcion(self.emitir)
+        self.supabase_client.cancelar_suscripcion_rechazos(self.emitir_rechazo)
+
+    def emitir(self, cambio: Dict[str, Any]):
+        """Llamado desde el hilo de escucha: la señal cruza al hilo de la GUI"""
+        self.cambio_recibido.emit(cambio)
+
+    def emitir_rechazo(self, rechazo: Dict[str, Any]):
+        """Llamado desde el hilo de la réplica: la señal cruza al hilo de la GUI"""
+        self.lote_rechazado.emit(rechazo)
@@ -0,0 +1,182 @@
+from PyQt6.QtWidgets import QListView, QStyledItemDelegate, QStyle, QAbstractItemView
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRectF, QSize, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QPainter, QPen
+from typing import Dict, Any, List
+
+MENCIONES = {1: "Media General", 2: "Técnico Superior"}
+
+# Roles propios del modelo
+ROL_GRADO = Qt.ItemDataRole.UserRole + 1      # diccionario del grado
+ROL_TOTAL = Qt.ItemDataRole.UserRole + 2      # total de estudiantes
+ROL_SECCIONES = Qt.ItemDataRole.UserRole + 3  # "A: 10 · B: 12"
+
+
+class ModeloGrados(QAbstractListModel):
+    """Grados de la pestaña Grados con sus conteos de estudiantes"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._grados: List[Dict[str, Any]] = []
+        self._conteos: Dict[int, Dict[str, Any]] = {}
+        self._filas: Dict[int, int] = {}
+
+    def cargar(self, grados: List[Dict[str, Any]], conteos: Dict[int, Dict[str, Any]]):
+        """
+        Reemplaza los grados mostrados
+
+        Args:
+            grados: Grados ya filtrados y ordenados
+            conteos: id_grado -> {'count', 'count_by_seccion', 'count_by_mencion'}
+                     (se comparte: actualizar_conteo relee el mismo diccionario)
+        """
+        self.beginResetModel()
+        self._grados = list(grados)
+        self._conteos = conteos
+        self._filas = {g['id_grado']: fila for fila, g in enumerate(self._grados)}
+        self.endResetModel()
+
+    def actualizar_conteo(self, id_grado: int):
+        """Notifica que cambió el conteo de un grado: solo se repinta su celda"""
+        fila = self._filas.get(id_grado)
+        if fila is None:
+            return
+        indice = self.index(fila)
+        self.dataChanged.emit(indice, indice, [ROL_TOTAL, ROL_SECCIONES, Qt.ItemDataRole.ToolTipRole])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._grados)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        grado = self._grados[index.row()]
+        conteo = self._conteos.get(grado['id_grado'], {})
+        por_seccion = sorted(
+            ((s, n) for s, n in conteo.get('count_by_seccion', {}).items() if n),
+            key=lambda x: x[0] or ''
+        )
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return grado['nombre_grado']
+        if role == ROL_GRADO:
+            return grado
+        if role == ROL_TOTAL:
+            return conteo.get('count', 0)
+        if role == ROL_SECCIONES:
+            return " · ".join(f"{seccion or '-'}: {n}" for seccion, n in por_seccion)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            detalle = [f"Sección {seccion or 'sin asignar'}: {n}" for seccion, n in por_seccion]
+            detalle += [f"{MENCIONES.get(mencion, 'Sin mención')}: {n}"
+                        for mencion, n in conteo.get('count_by_mencion', {}).items() if n]
+            return "\n".join(detalle) or None
+        return None
+
+
+class DelegadoGrado(QStyledItemDelegate):
+    """Pinta cada grado como una tarjeta con el total de estudiantes en una insignia"""
+
+    TAMAÑO = QSize(150, 100)
+
+    BORDE = QColor("#e0e0e0")
+    BORDE_ACTIVO = QColor("#3498db")
+    FONDO = QColor("#ffffff")
+    FONDO_HOVER = QColor("#f8f9fa")
+    FONDO_SELECCION = QColor("#e3f2fd")
+    TEXTO = QColor("#2c3e50")
+    TEXTO_SECUNDARIO = QColor("#7f8c8d")
+    INSIGNIA = QColor("#2196F3")
+
+    def sizeHint(self, option, index):
+        return self.TAMAÑO
+
+    def paint(self, painter: QPainter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        seleccionado = bool(option.state & QStyle.StateFlag.State_Selected)
+        hover = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        rect = QRectF(option.rect).adjusted(2, 2, -2, -4)
+
+        # Tarjeta con borde inferior más grueso
+        activo = seleccionado or hover
+        fondo = self.FONDO_SELECCION if seleccionado else self.FONDO_HOVER if hover else self.FONDO
+        borde = self.BORDE_ACTIVO if activo else self.BORDE
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(borde)
+        painter.drawRoundedRect(rect.adjusted(0, 2, 0, 2), 8, 8)
+        painter.setPen(QPen(borde, 2))
+        painter.setBrush(fondo)
+        painter.drawRoundedRect(rect, 8, 8)
+
+        # Nombre del grado
+        fuente = QFont(option.font)
+        fuente.setPixelSize(13)
+        fuente.setWeight(QFont.Weight.DemiBold)
+        painter.setFont(fuente)
+        painter.setPen(self.TEXTO)
+        painter.drawText(rect.adjusted(8, 10, -8, 0),
+                         Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop,
+                         index.data(Qt.ItemDataRole.DisplayRole))
+
+        # Insignia con el total de estudiantes
+        total = index.data(ROL_TOTAL) or 0
+        texto_total = f"{total} estudiante" + ("s" if total != 1 else "")
+        fuente.setPixelSize(11)
+        fuente.setWeight(QFont.Weight.Bold)
+        painter.setFont(fuente)
+        ancho = painter.fontMetrics().horizontalAdvance(texto_total) + 16
+        insignia = QRectF(rect.center().x() - ancho / 2, rect.top() + 36, ancho, 20)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self.INSIGNIA)
+        painter.drawRoundedRect(insignia, 10, 10)
+        painter.setPen(QColor("white"))
+        painter.drawText(insignia, Qt.AlignmentFlag.AlignCenter, texto_total)
+
+        # Desglose por sección
+        secciones = index.data(ROL_SECCIONES)
+        if secciones:
+            fuente.setPixelSize(11)
+            fuente.setWeight(QFont.Weight.Normal)
+            painter.setFont(fuente)
+            painter.setPen(self.TEXTO_SECUNDARIO)
+            painter.drawText(rect.adjusted(6, 62, -6, -4),
+                             Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop,
+                             painter.fontMetrics().elidedText(
+                                 secciones, Qt.TextElideMode.ElideRight, int(rect.width()) - 12))
+
+        painter.restore()
+
+
+class VistaGrados(QListView):
+    """Fila de tarjetas de grados (modelo + delegado, sin un widget por grado)"""
+
+    # Se emite con el diccionario del grado al hacer clic en su tarjeta
+    grado_seleccionado = pyqtSignal(dict)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.modelo = ModeloGrados(self)
+        self.setModel(self.modelo)
+        self.setItemDelegate(DelegadoGrado(self))
+
+        self.setViewMode(QListView.ViewMode.IconMode)
+        self.setFlow(QListView.Flow.LeftToRight)
+        self.setWrapping(False)
+        self.setMovement(QListView.Movement.Static)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setUniformItemSizes(True)
+        self.setSpacing(5)
+        self.setMouseTracking(True)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setFixedHeight(DelegadoGrado.TAMAÑO.height() + 30)
+        self.setStyleSheet("QListView { background: transparent; border: none; }")
+
+        self.clicked.connect(self._al_hacer_clic)
+
+    def _al_hacer_clic(self, index):
+        grado = index.data(ROL_GRADO)
+        if grado:
+            self.grado_seleccionado.emit(grado)
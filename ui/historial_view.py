@@ -0,0 +1,253 @@
+"""
+Pestaña Historial Académico: ficha del estudiante y un árbol de años y materias
+
+Los widgets se crean una sola vez. Mostrar otro estudiante cambia el texto de
+la ficha y reinicia el modelo; no se crean ni destruyen tablas, marcos ni
+etiquetas por año.
+"""
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QFrame, QLabel, QTreeView, QHeaderView, QAbstractItemView
+from PyQt6.QtCore import Qt, QAbstractItemModel, QModelIndex
+from PyQt6.QtGui import QColor, QFont
+from typing import Dict, Any, List, Optional
+
+MENCIONES = {1: "Media General", 2: "Técnico Superior"}
+
+AÑOS = ['1', '2', '3', '4', '5', '6']
+NOMBRES_AÑOS = {
+    '1': '1er Año',
+    '2': '2do Año',
+    '3': '3er Año',
+    '4': '4to Año',
+    '5': '5to Año',
+    '6': '6to Año',
+}
+
+COLUMNAS = ["Asignatura", "Nota Final", "Estado"]
+
+# Estado de la materia -> (fondo, texto)
+COLORES_ESTADO = {
+    'APROBADO': (QColor("#d4edda"), QColor("#155724")),
+    'REPROBADO': (QColor("#f8d7da"), QColor("#721c24")),
+    'EN CURSO': (QColor("#fff3cd"), QColor("#856404")),
+}
+COLOR_SIN_DATOS = QColor("#999")
+
+SIN_MATERIAS = "No hay materias registradas para este año"
+
+def promedio_notas(materias: List[Dict[str, Any]]) -> Optional[float]:
+    """
+    Promedio de las notas registradas de un año
+
+    El historial trae Decimal y las materias en curso float; las materias en
+    curso sin nota (0.0 de relleno, marcadas con sin_nota) no cuentan.
+    """
+    notas = [float(m['nota_final']) for m in materias
+             if m is not None and m['nota_final'] is not None and not m.get('sin_nota')]
+    return sum(notas) / len(notas) if notas else None
+
+
+# internalId de los índices: 0 en los años; en las materias, la fila de su año + 1
+# (internalId es sin signo, así que no sirve -1)
+ES_AÑO = 0
+
+
+class ModeloHistorial(QAbstractItemModel):
+    """Años (1ro a 6to) con sus materias como hijas; un año sin materias tiene una fila de aviso"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._años: List[List[Optional[Dict[str, Any]]]] = []
+        self._fuente_año = QFont()
+        self._fuente_año.setBold(True)
+
+    def cargar(self, historial_por_año: Dict[str, List[Dict[str, Any]]]):
+        """Reemplaza el historial mostrado (None en las materias es la fila de aviso)"""
+        self.beginResetModel()
+        self._años = [list(historial_por_año.get(año, [])) or [None] for año in AÑOS]
+        self.endResetModel()
+
+    def limpiar(self):
+        self.beginResetModel()
+        self._años = []
+        self.endResetModel()
+
+    def es_aviso(self, index: QModelIndex) -> bool:
+        """True para la fila "No hay materias..." (la vista la extiende a todas las columnas)"""
+        ident = index.internalId() if index.isValid() else ES_AÑO
+        return ident != ES_AÑO and self._años[ident - 1][index.row()] is None
+
+    # ==================== ESTRUCTURA ====================
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, parent.row() + 1 if parent.isValid() else ES_AÑO)
+
+    def parent(self, index):
+        if not index.isValid() or index.internalId() == ES_AÑO:
+            return QModelIndex()
+        return self.createIndex(index.internalId() - 1, 0, ES_AÑO)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self._años)
+        if parent.internalId() == ES_AÑO and parent.column() == 0:
+            return len(self._años[parent.row()])
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(COLUMNAS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return COLUMNAS[section]
+        return None
+
+    # ==================== DATOS ====================
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if index.internalId() == ES_AÑO:
+            return self._dato_año(index, role)
+
+        materia = self._años[index.internalId() - 1][index.row()]
+        columna = index.column()
+        if materia is None:
+            if role == Qt.ItemDataRole.DisplayRole and columna == 0:
+                return SIN_MATERIAS
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return COLOR_SIN_DATOS
+            return None
+
+        estado = materia.get('estado') or 'N/A'
+        if role == Qt.ItemDataRole.DisplayRole:
+            if columna == 0:
+                return materia['nombre_asignatura']
+            if columna == 1:
+                nota = None if materia.get('sin_nota') else materia['nota_final']
+                return f"{nota:.2f}" if nota is not None else "N/A"
+            return estado
+        if role == Qt.ItemDataRole.TextAlignmentRole and columna > 0:
+            return Qt.AlignmentFlag.AlignCenter
+        if columna == 2 and estado in COLORES_ESTADO:
+            if role == Qt.ItemDataRole.BackgroundRole:
+                return COLORES_ESTADO[estado][0]
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return COLORES_ESTADO[estado][1]
+        return None
+
+    def _dato_año(self, index, role):
+        """Fila de un año: nombre, promedio de las notas registradas y materias aprobadas"""
+        materias = [m for m in self._años[index.row()] if m is not None]
+        columna = index.column()
+        if role == Qt.ItemDataRole.FontRole:
+            return self._fuente_año
+        if role == Qt.ItemDataRole.TextAlignmentRole and columna > 0:
+            return Qt.AlignmentFlag.AlignCenter
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if columna == 0:
+            return f"📚 {NOMBRES_AÑOS[AÑOS[index.row()]]}"
+        if columna == 1:
+            promedio = promedio_notas(materias)
+            return f"{promedio:.2f}" if promedio is not None else ""
+        if materias:
+            aprobadas = sum(1 for m in materias if m.get('estado') == 'APROBADO')
+            return f"{aprobadas}/{len(materias)} aprobadas"
+        return ""
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+
+class VistaHistorial(QWidget):
+    """Ficha del estudiante y árbol del historial, reutilizados entre búsquedas"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(20)
+
+        self.placeholder = QLabel("👤 Busque un estudiante por su cédula para ver su historial académico completo")
+        self.placeholder.setObjectName("historial_placeholder")
+        self.placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.placeholder)
+
+        # Ficha del estudiante
+        self.ficha = QFrame()
+        self.ficha.setObjectName("historial_info")
+        ficha_layout = QVBoxLayout(self.ficha)
+        ficha_layout.setContentsMargins(20, 20, 20, 20)
+        titulo = QLabel("📋 Historial Académico")
+        titulo.setObjectName("historial_titulo")
+        ficha_layout.addWidget(titulo)
+        self.info_label = QLabel()
+        self.info_label.setTextFormat(Qt.TextFormat.RichText)
+        self.info_label.setWordWrap(True)
+        ficha_layout.addWidget(self.info_label)
+        layout.addWidget(self.ficha)
+
+        # Años y materias
+        self.modelo = ModeloHistorial(self)
+        self.arbol = QTreeView()
+        self.arbol.setObjectName("historial_arbol")
+        self.arbol.setModel(self.modelo)
+        self.arbol.setUniformRowHeights(True)
+        self.arbol.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.arbol.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        encabezado = self.arbol.header()
+        encabezado.setStretchLastSection(False)
+        encabezado.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        encabezado.setSectionResizeMode(1, QHeaderView.ResizeMode.Fixed)
+        encabezado.setSectionResizeMode(2, QHeaderView.ResizeMode.Fixed)
+        self.arbol.setColumnWidth(1, 100)
+        self.arbol.setColumnWidth(2, 140)
+        self.modelo.modelReset.connect(self._al_reiniciar)
+        layout.addWidget(self.arbol, 1)
+
+        self.limpiar()
+
+    def limpiar(self):
+        """Vuelve al mensaje inicial"""
+        self.modelo.limpiar()
+        self.ficha.setVisible(False)
+        self.arbol.setVisible(False)
+        self.placeholder.setVisible(True)
+
+    def mostrar(self, historial_data: Dict[str, Any]):
+        """Muestra el historial de get_historial_completo_estudiante"""
+        self.info_label.setText(self.texto_ficha(historial_data['info_estudiante']))
+        self.modelo.cargar(historial_data['historial_por_año'])
+        self.placeholder.setVisible(False)
+        self.ficha.setVisible(True)
+        self.arbol.setVisible(True)
+
+    def _al_reiniciar(self):
+        """Años expandidos y filas de aviso a lo ancho de todas las columnas"""
+        for fila in range(self.modelo.rowCount()):
+            año = self.modelo.index(fila, 0)
+            if self.modelo.rowCount(año) == 1 and self.modelo.es_aviso(self.modelo.index(0, 0, año)):
+                self.arbol.setFirstColumnSpanned(0, año, True)
+        self.arbol.expandAll()
+
+    @staticmethod
+    def texto_ficha(info_estudiante: Dict[str, Any]) -> str:
+        id_mencion = info_estudiante.get('id_mencion')
+        mencion_texto = MENCIONES.get(id_mencion, 'No asignada') if id_mencion else 'No asignada'
+        domicilio = ", ".join(info_estudiante.get(campo) or 'N/A' for campo in ('pais', 'estado', 'municipio'))
+        return f"""
+        <p style='font-size: 14px; line-height: 1.8; color: #555;'>
+            <b>Nombre:</b> {info_estudiante['nombre']} {info_estudiante['apellido']}<br>
+            <b>Cédula:</b> {info_estudiante['cedula']}<br>
+            <b>Grado Actual:</b> {info_estudiante['nombre_grado'] or 'No asignado'}<br>
+            <b>Sección:</b> {info_estudiante.get('seccion') or 'No asignada'}<br>
+            <b>Mención:</b> {mencion_texto}<br>
+            <b>Fecha de Nacimiento:</b> {info_estudiante['fecha_nacimiento']}<br>
+            <b>Domicilio:</b> {domicilio}<br>
+            <b>Observaciones:</b> {info_estudiante.get('observacion') or 'Sin observaciones'}
+        </p>
+        """
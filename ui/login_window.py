@@ -6,15 +6,19 @@ import os  # <-- AÑADE ESTA IMPORTACIÓN
 import sys  # <-- AÑADE ESTA IMPORTACIÓN
 from database.supabase_client import SupabaseClient
 from ui.custom_title_bar import CustomTitleBar
+from diagnostics.startup import perfil
 
 
 def resource_path(relative_path):
     """Obtiene la ruta absoluta al recurso para PyInstaller"""
-    try:
-        # PyInstaller crea una carpeta temporal
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
+    # La fija el runtime hook del build onedir (pyinstaller_hooks/pyi_rth_amalia.py)
+    base_path = os.getenv("AMALIA_RESOURCE_DIR")
+    if not base_path:
+        try:
+            # PyInstaller crea una carpeta temporal
+            base_path = sys._MEIPASS
+        except Exception:
+            base_path = os.path.abspath(".")
     
     return os.path.join(base_path, relative_path)
 
@@ -267,23 +271,10 @@ class LoginWindow(QMainWindow):
         """
         user_info = user.copy()
         
-        try:
-            if user['rol'] == 'docente' and user.get('cedula'):
-                # Obtener información del docente
-                docente = self.supabase_client.get_docente_by_id(user['cedula'])
-                if docente:
-                    user_info['nombre_completo'] = f"{docente['nombre']} {docente['apellido']}"
-                    user_info['correo'] = docente['correo']
-                    user_info['telefono'] = docente['telefono']
-                    user_info['especialidad'] = docente['especialidad']
-                else:
-                    user_info['nombre_completo'] = user['nombre_usuario']
-                    
-            else:  # admin
-                user_info['nombre_completo'] = user['nombre_usuario']
-                
-        except Exception as e:
-            print(f"Error al obtener información del usuario: {e}")
+        # Los datos del docente llegan en la misma consulta del inicio de sesión
+        if user['rol'] == 'docente' and user.get('nombre'):
+            user_info['nombre_completo'] = f"{user['nombre']} {user['apellido']}"
+        else:  # admin
             user_info['nombre_completo'] = user['nombre_usuario']
         
         return user_info
@@ -300,14 +291,17 @@ class LoginWindow(QMainWindow):
         try:
             # Importar la ventana correspondiente
             if rol == 'admin':
-                from ui.main_window import MainWindow
-                self.main_window = MainWindow(self.supabase_client, user_data)
+                with perfil.etapa("importar ui.main_window"):
+                    from ui.main_window import MainWindow
+                with perfil.etapa("crear ventana principal"):
+                    self.main_window = MainWindow(self.supabase_client, user_data)
             elif rol == 'docente':
                 from ui.docente_window import DocenteWindow
                 self.main_window = DocenteWindow(self.supabase_client, user_data)
             else:
                 self.show_error(f"Rol de usuario no reconocido: {rol}")
                 return
+            perfil.esperar_primer_pintado(self.main_window, "ventana principal")
             self.main_window.show()
             self.close()
             
@@ -2,15 +2,93 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                             QLabel, QPushButton, QTabWidget, QTableWidget,
                             QTableWidgetItem, QHeaderView, QMessageBox, QFrame,
                             QLineEdit, QComboBox, QDialog, QFormLayout, QDateEdit, QInputDialog,
-                            QCheckBox, QScrollArea)
-from PyQt6.QtCore import Qt, QDate, QTimer
-from PyQt6.QtGui import QFont, QIcon, QColor
+                            QCheckBox)
+from PyQt6.QtCore import Qt, QDate, QTimer, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QFont, QIcon, QShortcut, QKeySequence
 from database.supabase_client import SupabaseClient
 from typing import Dict, Any, List
 from models.dialogs import (EstudianteDialog, DocenteDialog, AsignaturaDialog,
                         GradoDialog, PeriodoDialog, CalificacionesDialog)
+from models.store import EstudiantesStore
+from models.seleccion import SeleccionEstudiantes
+from database.rollover import numero_grado
+from ui.cambios_remotos import PuenteCambios
+from ui.search_controller import ControladorBusqueda
+from ui.grados_view import VistaGrados
+from ui.historial_view import VistaHistorial
+from ui.theme import hoja_de_estilos, boton_accion, establecer_estado
+from diagnostics.slot_timing import medir, registro as registro_tiempos, mostrar_dialogo as mostrar_tiempos
+from diagnostics.leaks import detector as detector_fugas
+import asyncio
+import bisect
 import re
 
+# Máximo de resultados que trae una búsqueda del servidor; se paginan en memoria
+LIMITE_BUSQUEDA = 500
+
+class _TareaMoverEstudiantes(QRunnable):
+    """
+    Mueve estudiantes de grado en un hilo del pool, con una conexión propia
+
+    La transacción no retiene el candado del cliente compartido: la ventana y
+    las búsquedas en segundo plano siguen respondiendo mientras dura.
+    """
+
+    class Señales(QObject):
+        # (éxito, mensaje de error)
+        terminado = pyqtSignal(bool, str)
+
+    def __init__(self, supabase_client: SupabaseClient, cedulas: List[str], id_grado: int):
+        super().__init__()
+        self.supabase_client = supabase_client
+        self.cedulas = cedulas
+        self.id_grado = id_grado
+        self.señales = self.Señales()
+
+    def run(self):
+        cliente = self.supabase_client.cliente_independiente()
+        error = ""
+        try:
+            with cliente.transaction() as tx:
+                for cedula in self.cedulas:
+                    cliente.update_estudiante(cedula, id_grado=self.id_grado)
+            ok = tx.ok
+        except Exception as e:
+            print(f"Error al mover estudiantes: {e}")
+            ok, error = False, str(e)
+        finally:
+            cliente.disconnect()
+        try:
+            self.señales.terminado.emit(ok, error)
+        except RuntimeError:
+            pass  # La ventana se cerró
+
+
+class _TareaTraerEstudiantes(QRunnable):
+    """Trae en una sola consulta, fuera del hilo de la GUI, los estudiantes cambiados en otros equipos"""
+
+    class Señales(QObject):
+        # Estudiantes encontrados
+        terminado = pyqtSignal(list)
+
+    def __init__(self, supabase_client: SupabaseClient, cedulas: List[str]):
+        super().__init__()
+        self.supabase_client = supabase_client
+        self.cedulas = cedulas
+        self.señales = self.Señales()
+
+    def run(self):
+        try:
+            estudiantes = self.supabase_client.get_estudiantes_by_cedulas(self.cedulas)
+        except Exception as e:
+            print(f"Error al traer estudiantes cambiados: {e}")
+            estudiantes = []
+        try:
+            self.señales.terminado.emit(estudiantes)
+        except RuntimeError:
+            pass  # La ventana se cerró
+
+
 class MainWindow(QMainWindow):
 
     #FUNCIONES DE INICIALIZACIÓN Y AUXILIARES
@@ -27,12 +105,17 @@ class MainWindow(QMainWindow):
         self.pagina_actual_estudiantes = 0
         self.total_estudiantes = 0
         self.estudiantes_filtrados = []
+        # Resultado de la búsqueda activa (None sin filtro) y si llegó al límite
+        self.estudiantes_buscados = None
+        self.estudiantes_busqueda_limitada = False
         
         # ============ VARIABLES DE PAGINACIÓN ASIGNATURAS ============
         self.asignaturas_por_pagina = 50
         self.pagina_actual_asignaturas = 0
         self.total_asignaturas = 0
         self.asignaturas_filtradas = []
+        self.asignaturas_buscadas = None
+        self.asignaturas_busqueda_limitada = False
         
         # ============ VARIABLES DE PAGINACIÓN GRADOS ============
         self.estudiantes_grado_por_pagina = 50
@@ -45,8 +128,64 @@ class MainWindow(QMainWindow):
         self.select_all_checkbox = None    
         self.grado_actual_mostrado = None  
         
+        # Selección de la tabla del grado por cédula: sobrevive a páginas y filtros
+        self.seleccion_estudiantes = SeleccionEstudiantes(self)
+        self.seleccion_estudiantes.cambio.connect(self.actualizar_contador_seleccion)
+        
+        # Movimiento masivo en curso (ver _TareaMoverEstudiantes)
+        self._tarea_mover = None
+        
+        # ============ ALMACÉN DE ESTUDIANTES ============
+        # Fuente única en memoria: diálogos, eliminaciones y cambios remotos
+        # lo actualizan y las vistas aplican solo la diferencia
+        self.store_estudiantes = EstudiantesStore(self)
+        self.store_estudiantes.cambio.connect(self.on_estudiante_cambiado)
+        self.estudiantes_grado_todos = []
+        self.conteo_grados = {}
+        
+        # Redibujados agrupados: varias modificaciones seguidas (p. ej. mover
+        # estudiantes en masa) producen un solo redibujado de cada vista
+        self.estudiantes_vista_timer = QTimer(self)
+        self.estudiantes_vista_timer.setSingleShot(True)
+        self.estudiantes_vista_timer.timeout.connect(self.refrescar_vista_estudiantes)
+        self.grado_vista_timer = QTimer(self)
+        self.grado_vista_timer.setSingleShot(True)
+        self.grado_vista_timer.timeout.connect(self.refrescar_grado_mostrado)
+        
+        # ============ DIAGNÓSTICO ============
+        # Tiempos por slot (AMALIA_TIEMPOS=1); Ctrl+Shift+D abre el diálogo oculto
+        if registro_tiempos.activo:
+            registro_tiempos.activar(self.supabase_client)
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self).activated.connect(lambda: mostrar_tiempos(self))
+        
         self.setup_ui()
         self.load_initial_data()
+        # Fugas de widgets y memoria entre navegaciones (AMALIA_FUGAS=1)
+        detector_fugas.conectar(self)
+        
+        # ============ CAMBIOS DESDE OTROS EQUIPOS (LISTEN/NOTIFY) ============
+        # Las ráfagas de cambios (p. ej. mover un grado completo) se agrupan
+        # en una sola actualización de los botones de grados
+        self.grados_tab_timer = QTimer(self)
+        self.grados_tab_timer.setSingleShot(True)
+        self.grados_tab_timer.timeout.connect(self.load_grados_tab)
+        # Estudiantes cambiados en otros equipos: las cédulas de una ráfaga se
+        # traen juntas (ver traer_estudiantes_remotos)
+        self.cedulas_remotas = set()
+        self._tareas_traer = set()
+        self.estudiantes_remotos_timer = QTimer(self)
+        self.estudiantes_remotos_timer.setSingleShot(True)
+        self.estudiantes_remotos_timer.timeout.connect(self.traer_estudiantes_remotos)
+        
+        self.puente_cambios = PuenteCambios(self.supabase_client, self)
+        self.puente_cambios.cambio_recibido.connect(self.aplicar_cambio_remoto)
+        self.puente_cambios.lote_rechazado.connect(self.avisar_lote_rechazado)
+        self.puente_cambios.conectar()
+
+    def closeEvent(self, event):
+        """Deja de recibir cambios remotos al cerrar la ventana"""
+        self.puente_cambios.desconectar()
+        super().closeEvent(event)
 
     def logout(self):
         """Cierra sesión y vuelve al login"""
@@ -96,288 +235,9 @@ class MainWindow(QMainWindow):
         
         # Centrar ventana
         self.center_window()
-        # Aplicar estilos globales
-        # Reemplaza el setStyleSheet() en setup_ui() con este código completo:
+        # Aplicar estilos globales (hoja compilada una sola vez, ver ui/theme.py)
+        self.setStyleSheet(hoja_de_estilos())
 
-        self.setStyleSheet("""
-            /* Campos de texto */
-            QLineEdit {
-                background-color: white;
-                border: 1px solid #e0e0e0;
-                border-radius: 6px;
-                padding: 8px 12px;
-                font-size: 14px;
-                color: #333;
-            }
-            QLineEdit:focus {
-                border: 1px solid #2563eb;
-                background-color: white;
-            }
-            
-            /* Pestañas */
-            QTabWidget::pane {
-                border: none;
-                background-color: #f0f4f8;
-            }
-            
-            QTabBar::tab {
-                background-color: #dae3ed;
-                color: #4a5568;
-                padding: 10px 20px;
-                border: none;
-                border-bottom: 2px solid transparent;
-                font-size: 14px;
-                margin-right: 2px;
-            }
-            
-            QTabBar::tab:selected {
-                background-color: #f0f4f8;
-                color: #0d1f3d;
-                border-bottom: 2px solid #2563eb;
-                font-weight: bold;
-            }
-            
-            QTabBar::tab:hover {
-                background-color: #c9d6e3;
-                color: #0d1f3d;
-            }
-            
-            /* Tablas */
-            QTableWidget {
-                border: 2px solid #2563eb;
-                border-radius: 8px;
-                background-color: white;
-                gridline-color: #e5e7eb;
-            }
-            
-            QTableWidget::item {
-                padding: 8px;
-                font-size: 13px;
-                color: #333;
-                background-color: white;
-            }
-            
-            QTableWidget::item:selected {
-                background-color: #e3f2fd;
-                color: #1565c0;
-            }
-            
-            /* Headers de tabla */
-            QHeaderView::section {
-                background-color: #f8f9fa;
-                color: #1f2937;
-                padding: 10px;
-                border: none;
-                border-bottom: 2px solid #e0e0e0;
-                font-weight: bold;
-                font-size: 13px;
-            }
-            
-            /* Números de fila */
-            QHeaderView::section:vertical {
-                background-color: #f8f9fa;
-                color: #666;
-                padding: 5px;
-                border: none;
-                border-right: 1px solid #e0e0e0;
-                border-bottom: 1px solid #f0f0f0;
-                font-size: 12px;
-                min-width: 40px;
-                max-width: 40px;
-            }
-            
-            QTableCornerButton::section {
-                background-color: #f8f9fa;
-                border: none;
-            }
-            
-            /* Scrollbars */
-            QScrollBar:vertical {
-                background: #f0f4f8;
-                width: 12px;
-                border-radius: 6px;
-            }
-            
-            QScrollBar::handle:vertical {
-                background: #cbd5e1;
-                border-radius: 6px;
-                min-height: 20px;
-            }
-            
-            QScrollBar::handle:vertical:hover {
-                background: #94a3b8;
-            }
-            
-            QScrollBar:horizontal {
-                background: #f0f4f8;
-                height: 12px;
-                border-radius: 6px;
-            }
-            
-            QScrollBar::handle:horizontal {
-                background: #cbd5e1;
-                border-radius: 6px;
-                min-width: 20px;
-            }
-            
-            QScrollBar::handle:horizontal:hover {
-                background: #94a3b8;
-            }
-            
-            QScrollBar::add-line, QScrollBar::sub-line {
-                border: none;
-                background: none;
-            }
-            
-            /* ============ ESTILOS DE BOTONES ============ */
-            
-            /* Botones principales */
-            QPushButton {
-                background-color: #2563eb;
-                color: white;
-                border: none;
-                border-radius: 6px;
-                padding: 10px 20px;
-                font-size: 14px;
-                font-weight: 600;
-                min-width: 120px;
-            }
-            
-            /* Botones de acción (pequeños, en tablas) */
-            QPushButton#action_btn {
-                padding: 2px 4px;
-                font-size: 14px;
-                min-width: 23px;
-                max-width: 25px;
-                min-height: 23px;
-                max-height: 25px;
-                border-radius: 4px;
-                
-            }
-            
-            QPushButton:hover {
-                background-color: #1d4ed8;
-            }
-            
-            QPushButton:pressed {
-                background-color: #1e40af;
-            }
-            
-            QPushButton:disabled {
-                background-color: #cbd5e1;
-                color: #94a3b8;
-            }
-            
-            /* Botón de cerrar sesión */
-            QPushButton#logout_btn {
-                background-color: rgba(255, 255, 255, 0.2);
-                border: 1px solid rgba(255, 255, 255, 0.3);
-                min-width: 100px;
-            }
-            
-            QPushButton#logout_btn:hover {
-                background-color: rgba(255, 255, 255, 0.3);
-            }
-            
-            /* Botón de volver */
-            QPushButton#volver_btn {
-                background-color: #64748b;
-            }
-            
-            QPushButton#volver_btn:hover {
-                background-color: #475569;
-            }
-            
-            /* Botón de búsqueda */
-            QPushButton#search_btn {
-                background-color: #10b981;
-                min-width: 100px;
-            }
-            
-            QPushButton#search_btn:hover {
-                background-color: #059669;
-            }
-            
-            /* Botón de actualizar */
-            QPushButton#refresh_btn {
-                background-color: #2563eb;
-                min-width: 100px;
-            }
-            
-            QPushButton#refresh_btn:hover {
-                background-color: #1d4ed8;
-            }
-            
-            /* Botón de agregar */
-            QPushButton#add_btn {
-                background-color: #2563eb;
-            }
-            
-            QPushButton#add_btn:hover {
-                background-color: #1d4ed8;
-            }
-            
-            /* Botón de mover seleccionados */
-            QPushButton#mover_btn {
-                background-color: #2196F3;
-                font-weight: bold;
-                padding: 8px 16px;
-            }
-            
-            QPushButton#mover_btn:hover {
-                background-color: #1976D2;
-            }
-            /* Campos de fecha (DateEdit) */
-            QDateEdit {
-                background-color: white;
-                border: 1px solid #e0e0e0;
-                border-radius: 6px;
-                padding: 8px 12px;
-                font-size: 14px;
-                color: #333;
-            }
-            QDateEdit:focus {
-                border: 1px solid #2563eb;
-                background-color: white;
-            }
-            QDateEdit::drop-down {
-                subcontrol-origin: padding;
-                subcontrol-position: top right;
-                width: 25px;
-                border-left: 1px solid #e0e0e0;
-                border-radius: 0 6px 6px 0;
-            }
-            
-            /* Combos (QComboBox) */
-            QComboBox {
-                background-color: white;
-                border: 1px solid #e0e0e0;
-                border-radius: 6px;
-                padding: 8px 12px;
-                font-size: 14px;
-                color: #333;
-                min-height: 40px;
-            }
-            QComboBox:focus {
-                border: 1px solid #2563eb;
-                background-color: white;
-            }
-            QComboBox::drop-down {
-                subcontrol-origin: padding;
-                subcontrol-position: top right;
-                width: 25px;
-                border-left: 1px solid #e0e0e0;
-                border-radius: 0 6px 6px 0;
-            }
-            QComboBox QAbstractItemView {
-                background-color: white;
-                border: 1px solid #e0e0e0;
-                border-radius: 6px;
-                padding: 4px;
-                selection-background-color: #e3f2fd;
-                selection-color: #1565c0;
-            }
-        """)
     def center_window(self):
         """Centra la ventana en la pantalla"""
         screen = self.screen().geometry()
@@ -387,34 +247,7 @@ class MainWindow(QMainWindow):
 
     def extraer_numero_grado(self, nombre_grado):
         """Extrae el número del grado para ordenamiento"""
-        if not nombre_grado:
-            return 999
-        
-        nombre = nombre_grado.lower()
-        
-        # Mapear nombres comunes
-        if '1er' in nombre or '1ro' in nombre or 'primero' in nombre:
-            return 1
-        elif '2do' in nombre or '2ndo' in nombre or 'segundo' in nombre:
-            return 2
-        elif '3er' in nombre or '3ro' in nombre or 'tercero' in nombre:
-            return 3
-        elif '4to' in nombre or 'cuarto' in nombre:
-            return 4
-        elif '5to' in nombre or 'quinto' in nombre:
-            return 5
-        elif '6to' in nombre or 'sexto' in nombre:
-            return 6
-        elif 'egresado' in nombre or 'graduado' in nombre:
-            return 7
-        
-        # Buscar el primer número en el nombre del grado
-        import re
-        match = re.search(r'(\d+)', nombre)
-        if match:
-            return int(match.group(1))
-
-        return 999  # coloca al final
+        return numero_grado(nombre_grado)
 
     def show_error(self, message: str):
         """Muestra un mensaje de error"""
@@ -429,79 +262,49 @@ class MainWindow(QMainWindow):
         QMessageBox.information(self, "Información", message)
 
     def get_estudiantes_seleccionados(self):
-        """Obtiene las cédulas de los estudiantes seleccionados (VERSIÓN ANTI-FANTASMA)"""
-
-        if not hasattr(self, 'checkboxes_estudiantes'):
-            self.checkboxes_estudiantes = []
-            return []
-        
-        if not self.checkboxes_estudiantes:
-            return []
-        
-        seleccionados = []
-        checkboxes_validos = 0
-        
-        for i, checkbox in enumerate(self.checkboxes_estudiantes):
-            if checkbox is None:
-                continue
-            
-            try:
-                # Verificar si el checkbox todavía existe en la UI
-                if not checkbox.isVisible():
-                    continue
-                
-                checkboxes_validos += 1
-                is_checked = checkbox.isChecked()
-                cedula = checkbox.property('cedula')
-                
-                if is_checked and cedula:
-                    seleccionados.append(cedula)
-                    
-            except RuntimeError as e:
-                
-                continue
-            except Exception as e:
-                continue
-        
-        return seleccionados
+        """Obtiene las cédulas de los estudiantes seleccionados (todas las páginas y filtros)"""
+        return self.seleccion_estudiantes.cedulas()
 
     def toggle_select_all(self, state):
-        """Selecciona o deselecciona todos los checkboxes (VERSIÓN ANTI-FANTASMA)"""
-        
-        if not hasattr(self, 'checkboxes_estudiantes'):
-            self.checkboxes_estudiantes = []
-            return
-        
-        if not self.checkboxes_estudiantes:
-            return
-        
+        """
+        Selecciona todos los estudiantes del grado que cumplen el filtro actual
+        (resuelto en el servidor, no solo los de la página visible) o vacía la selección
+        """
         is_checked = (state == Qt.CheckState.Checked.value or state == Qt.CheckState.Checked)
         
-        modificados = 0
-        errores = 0
+        if is_checked and self.grado_actual_mostrado:
+            cedulas = self.supabase_client.get_cedulas_por_filtro(
+                self.grado_actual_mostrado['id_grado'],
+                self.filtro_seccion_actual,
+                self.filtro_mencion_actual
+            )
+            self.seleccion_estudiantes.reemplazar(cedulas)
+        else:
+            self.seleccion_estudiantes.limpiar()
         
-        for i, checkbox in enumerate(self.checkboxes_estudiantes):
-            if checkbox is None:
-                errores += 1
-                continue
-            
+        self.sincronizar_checkboxes_pagina()
+
+    def sincronizar_checkboxes_pagina(self):
+        """Refleja la selección en los checkboxes de la página visible"""
+        for checkbox in self.checkboxes_estudiantes:
             try:
-                if checkbox.isVisible():
-                    checkbox.setChecked(is_checked)
-                    modificados += 1
-                else:
-                    errores += 1
+                checkbox.blockSignals(True)
+                checkbox.setChecked(checkbox.property('cedula') in self.seleccion_estudiantes)
+                checkbox.blockSignals(False)
             except RuntimeError:
-                errores += 1
-            except Exception as e:
-                errores += 1
-        
+                continue  # Checkbox ya eliminado
+
+    @medir
     def mover_estudiantes_seleccionados(self, grado_actual):
         """Mueve todos los estudiantes seleccionados a otro grado (VERSIÓN ANTI-FANTASMA)"""
         
         #  OBTENER ESTUDIANTES SELECCIONADOS (con verificación)
         estudiantes_seleccionados = self.get_estudiantes_seleccionados()
         
+        if self._tarea_mover is not None:
+            self.show_info("Todavía se están moviendo los estudiantes anteriores")
+            return
+        
         if not estudiantes_seleccionados:
             QMessageBox.warning(
                 self, 
@@ -554,36 +357,40 @@ class MainWindow(QMainWindow):
                 
                 if reply == QMessageBox.StandardButton.Yes:
                     
-                    # Mover cada estudiante seleccionado
-                    exitosos = 0
-                    fallidos = 0
-                    
-                    for cedula in estudiantes_seleccionados:
-                        try:
-                            if self.supabase_client.update_estudiante(cedula, id_grado=nuevo_grado_id):
-                                exitosos += 1
-                            else:
-                                fallidos += 1
-                        except Exception as e:
-                            fallidos += 1
-                    
-                    # Mostrar resultado
-                    mensaje = f" Se movieron {exitosos} estudiantes correctamente"
-                    if fallidos > 0:
-                        mensaje += f"\n {fallidos} estudiantes NO se pudieron mover"
-                    
-                    QMessageBox.information(self, "Resultado", mensaje)
-                    
-                    #  RECARGAR VISTA ACTUAL
-                    grado_actual_obj = next((g for g in grados if g['id_grado'] == grado_actual), None)
-                    if grado_actual_obj:
-                        self.mostrar_estudiantes_grado(grado_actual_obj)
-                    
-                    #  ACTUALIZAR BOTONES DE GRADOS
-                    self.load_grados_tab()
+                    # Mover todos los estudiantes en una sola transacción (o se
+                    # mueven todos o no se mueve ninguno), fuera del hilo de la GUI
+                    tarea = _TareaMoverEstudiantes(self.supabase_client, list(estudiantes_seleccionados),
+                                                   nuevo_grado_id)
+                    tarea.señales.terminado.connect(
+                        lambda ok, error: self._al_mover_estudiantes(ok, error, tarea.cedulas,
+                                                                     nuevo_grado_id, nuevo_grado_nombre))
+                    # La referencia mantiene vivas las señales hasta entregar el resultado
+                    self._tarea_mover = tarea
+                    QThreadPool.globalInstance().start(tarea)
             else:
                 QMessageBox.critical(self, "Error", "No se pudo obtener el ID del nuevo grado")
 
+    def _al_mover_estudiantes(self, ok: bool, error: str, cedulas: List[str],
+                              nuevo_grado_id: int, nuevo_grado_nombre: str):
+        """Resultado del movimiento masivo (hilo de la GUI)"""
+        self._tarea_mover = None
+        if not ok:
+            detalle = f"\n\n{error}" if error else ""
+            self.show_error(f"No se pudo mover a los {len(cedulas)} estudiantes "
+                            f"(no se aplicó ningún cambio){detalle}")
+            return
+        
+        # Actualizar el almacén: las vistas aplican el cambio
+        for cedula in cedulas:
+            previo = self.store_estudiantes.obtener(cedula)
+            if previo:
+                self.store_estudiantes.guardar({
+                    **previo,
+                    'id_grado': nuevo_grado_id,
+                    'nombre_grado': nuevo_grado_nombre
+                })
+        QMessageBox.information(self, "Resultado", f" Se movieron {len(cedulas)} estudiantes correctamente")
+
     def get_historial_academico(self, cedula_estudiante: str) -> List[Dict[str, Any]]:
         """Obtiene el historial académico de un estudiante"""
         query = """
@@ -601,22 +408,57 @@ class MainWindow(QMainWindow):
 
     # FUNCIONES DE CARGA DE DATOS
 
+    def cliente_async(self):
+        """Cliente asíncrono si hay un event loop de asyncio integrado con Qt, o None"""
+        cliente = getattr(self.supabase_client, 'async_client', None)
+        if cliente is None:
+            return None
+        try:
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            return None
+        return cliente if loop.is_running() else None
+
+    @medir
     def load_initial_data(self):
         """Carga los datos iniciales"""
+        cliente = self.cliente_async()
+        if cliente is not None:
+            # Las cinco consultas se lanzan a la vez sin bloquear la ventana
+            asyncio.ensure_future(self.load_initial_data_async(cliente))
+            return
+        
         self.load_estudiantes()
         self.load_docentes()
         self.load_asignaturas()
         self.load_grados_tab()
         self.load_periodos()
 
-    def load_estudiantes(self, reset_pagina=True):
-        """Carga la lista de estudiantes CON PAGINACIÓN"""
+    async def load_initial_data_async(self, cliente):
+        """Carga los datos iniciales con consultas concurrentes (AsyncSupabaseClient)"""
+        datos = await cliente.gather(
+            estudiantes=cliente.get_all_estudiantes(),
+            docentes=cliente.get_all_docentes(),
+            asignaturas=cliente.get_all_asignaturas(),
+            grados=cliente.get_grado_counts(),
+            periodos=cliente.get_all_periodos(),
+        )
+        self.load_estudiantes(estudiantes=datos['estudiantes'])
+        self.load_docentes(docentes=datos['docentes'])
+        self.load_asignaturas(asignaturas=datos['asignaturas'])
+        self.load_grados_tab(grados=datos['grados'])
+        self.load_periodos(periodos=datos['periodos'])
+
+    @medir
+    def load_estudiantes(self, estudiantes=None):
+        """Carga la lista de estudiantes CON PAGINACIÓN (desde la primera página)"""
         
-        if reset_pagina:
-            self.pagina_actual_estudiantes = 0
+        self.pagina_actual_estudiantes = 0
         
         # Obtener TODOS los estudiantes
-        estudiantes = self.supabase_client.get_all_estudiantes()
+        if estudiantes is None:
+            estudiantes = self.supabase_client.get_all_estudiantes()
+        self.store_estudiantes.cargar(estudiantes)
         
         # Ordenar correctamente
         estudiantes_ordenados = sorted(
@@ -628,6 +470,14 @@ class MainWindow(QMainWindow):
         self.total_estudiantes = len(estudiantes_ordenados)
         self.estudiantes_filtrados = estudiantes_ordenados
         
+        # Con una búsqueda activa se repite sobre los datos nuevos
+        self.refrescar_vista_estudiantes()
+
+    def mostrar_pagina_estudiantes(self):
+        """Dibuja la página actual de estudiantes (o del resultado de la búsqueda) desde memoria"""
+        estudiantes = self.estudiantes_filtrados if self.estudiantes_buscados is None else self.estudiantes_buscados
+        self.total_estudiantes = len(estudiantes)
+        
         # Calcular paginación
         total_paginas = max(1, (self.total_estudiantes + self.estudiantes_por_pagina - 1) // self.estudiantes_por_pagina)
         
@@ -640,76 +490,72 @@ class MainWindow(QMainWindow):
         fin = min(inicio + self.estudiantes_por_pagina, self.total_estudiantes)
         
         # Obtener estudiantes de la página actual
-        estudiantes_pagina = estudiantes_ordenados[inicio:fin]
+        estudiantes_pagina = estudiantes[inicio:fin]
         
         # Limpiar tabla
         self.estudiantes_table.setRowCount(0)
-        menciones = {
-        1: "Media General",
-        2: "Técnico Superior"
-        }
         
         # Llenar tabla
         for estudiante in estudiantes_pagina:
             row = self.estudiantes_table.rowCount()
             self.estudiantes_table.insertRow(row)
-            
-            # Columna 0: Cédula
-            self.estudiantes_table.setItem(row, 0, QTableWidgetItem(estudiante['cedula']))
-            # Columna 1: Nombre
-            self.estudiantes_table.setItem(row, 1, QTableWidgetItem(estudiante['nombre']))
-            # Columna 2: Apellido
-            self.estudiantes_table.setItem(row, 2, QTableWidgetItem(estudiante['apellido']))
-            # Columna 3: Fecha Nacimiento
-            self.estudiantes_table.setItem(row, 3, QTableWidgetItem(str(estudiante['fecha_nacimiento'])))
-            # Columna 4: Teléfono
-            self.estudiantes_table.setItem(row, 4, QTableWidgetItem(estudiante.get('telefono') or ''))
-            # Columna 5: País
-            self.estudiantes_table.setItem(row, 5, QTableWidgetItem(estudiante.get('pais') or ''))
-            # Columna 6: Estado
-            self.estudiantes_table.setItem(row, 6, QTableWidgetItem(estudiante.get('estado') or ''))
-            # Columna 7: Municipio
-            self.estudiantes_table.setItem(row, 7, QTableWidgetItem(estudiante.get('municipio') or ''))
-            # Columna 8: Grado
-            self.estudiantes_table.setItem(row, 8, QTableWidgetItem(estudiante.get('nombre_grado') or ''))
-            # Columna 9: Sección
-            self.estudiantes_table.setItem(row, 9, QTableWidgetItem(estudiante.get('seccion') or ''))
-            # Columna 9: Mención
-            id_mencion = estudiante.get('id_mencion')
-            mencion_texto = menciones.get(id_mencion, '') if id_mencion else ''
-            self.estudiantes_table.setItem(row, 10, QTableWidgetItem(mencion_texto))
-            # Columna 11: Observaciones
-            self.estudiantes_table.setItem(row, 11, QTableWidgetItem(estudiante.get('observacion') or ''))
-            
-            # Columna 12: Botones de acción
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout()
-            actions_layout.setContentsMargins(5, 2, 5, 2)
-            actions_widget.setLayout(actions_layout)
-            
-            edit_btn = QPushButton("✏️")
-            edit_btn.setObjectName("action_btn")
-            edit_btn.setMaximumWidth(32)
-            edit_btn.setMinimumHeight(32)
-            edit_btn.setStyleSheet("QPushButton { background-color: #2196F3; }")
-            edit_btn.clicked.connect(lambda checked, e=estudiante: self.edit_estudiante(e))
-            actions_layout.addWidget(edit_btn)
-            
-            delete_btn = QPushButton("🗑️")
-            delete_btn.setObjectName("action_btn")
-            delete_btn.setMaximumWidth(32)
-            delete_btn.setMinimumHeight(32)
-            delete_btn.setStyleSheet("QPushButton { background-color: #f44336; }")
-            delete_btn.clicked.connect(lambda checked, cedula=estudiante['cedula']: self.delete_estudiante(cedula))
-            actions_layout.addWidget(delete_btn)
-            
-            self.estudiantes_table.setCellWidget(row, 12, actions_widget)
+            self.llenar_fila_estudiante(row, estudiante)
         
         # Actualizar controles de paginación
         self.actualizar_controles_paginacion_estudiantes()
 
+    def llenar_fila_estudiante(self, row, estudiante):
+        """Escribe los datos y botones de un estudiante en una fila de la tabla"""
+        menciones = {
+        1: "Media General",
+        2: "Técnico Superior"
+        }
+        
+        # Columna 0: Cédula
+        self.estudiantes_table.setItem(row, 0, QTableWidgetItem(estudiante['cedula']))
+        # Columna 1: Nombre
+        self.estudiantes_table.setItem(row, 1, QTableWidgetItem(estudiante['nombre']))
+        # Columna 2: Apellido
+        self.estudiantes_table.setItem(row, 2, QTableWidgetItem(estudiante['apellido']))
+        # Columna 3: Fecha Nacimiento
+        self.estudiantes_table.setItem(row, 3, QTableWidgetItem(str(estudiante['fecha_nacimiento'])))
+        # Columna 4: Teléfono
+        self.estudiantes_table.setItem(row, 4, QTableWidgetItem(estudiante.get('telefono') or ''))
+        # Columna 5: País
+        self.estudiantes_table.setItem(row, 5, QTableWidgetItem(estudiante.get('pais') or ''))
+        # Columna 6: Estado
+        self.estudiantes_table.setItem(row, 6, QTableWidgetItem(estudiante.get('estado') or ''))
+        # Columna 7: Municipio
+        self.estudiantes_table.setItem(row, 7, QTableWidgetItem(estudiante.get('municipio') or ''))
+        # Columna 8: Grado
+        self.estudiantes_table.setItem(row, 8, QTableWidgetItem(estudiante.get('nombre_grado') or ''))
+        # Columna 9: Sección
+        self.estudiantes_table.setItem(row, 9, QTableWidgetItem(estudiante.get('seccion') or ''))
+        # Columna 9: Mención
+        id_mencion = estudiante.get('id_mencion')
+        mencion_texto = menciones.get(id_mencion, '') if id_mencion else ''
+        self.estudiantes_table.setItem(row, 10, QTableWidgetItem(mencion_texto))
+        # Columna 11: Observaciones
+        self.estudiantes_table.setItem(row, 11, QTableWidgetItem(estudiante.get('observacion') or ''))
+        
+        # Columna 12: Botones de acción
+        actions_widget = QWidget()
+        actions_layout = QHBoxLayout()
+        actions_layout.setContentsMargins(5, 2, 5, 2)
+        actions_widget.setLayout(actions_layout)
+        
+        edit_btn = boton_accion("✏️", "editar")
+        edit_btn.clicked.connect(lambda checked, e=estudiante: self.edit_estudiante(e))
+        actions_layout.addWidget(edit_btn)
+        
+        delete_btn = boton_accion("🗑️", "eliminar")
+        delete_btn.clicked.connect(lambda checked, cedula=estudiante['cedula']: self.delete_estudiante(cedula))
+        actions_layout.addWidget(delete_btn)
+        
+        self.estudiantes_table.setCellWidget(row, 12, actions_widget)
+
     def delete_estudiante(self, cedula):
-        """Elimina un estudiante y actualiza todas las vistas (SIN TIMERS PELIGROSOS)"""
+        """Elimina un estudiante y actualiza todas las vistas sin volver a consultar"""
         reply = QMessageBox.question(
             self, 'Confirmar eliminación',
             f'¿Está seguro de eliminar el estudiante con cédula {cedula}?',
@@ -718,43 +564,11 @@ class MainWindow(QMainWindow):
         
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                # 1. GUARDAR ESTADO ANTES DE ELIMINAR
-                grado_estaba_visible = (
-                    hasattr(self, 'estudiantes_grado_container') and 
-                    self.estudiantes_grado_container.isVisible()
-                )
-                grado_a_recargar = None
-                
-                if grado_estaba_visible and hasattr(self, 'grado_actual_mostrado'):
-                    #  COPIAR el grado para evitar referencias
-                    grado_a_recargar = self.grado_actual_mostrado.copy()
-                
-                # 2. ELIMINAR DE LA BASE DE DATOS
+                # ELIMINAR DE LA BASE DE DATOS
                 if self.supabase_client.delete_estudiante(cedula):
                     
-                    # 3. RECARGAR TABLA PRINCIPAL
-                    self.load_estudiantes()
-                    
-                    # 4. ACTUALIZAR VISTA DE GRADOS SI ESTABA VISIBLE
-                    if grado_estaba_visible and grado_a_recargar:
-                        
-                        #  FORZAR ACTUALIZACIÓN DE LA UI
-                        self.estudiantes_grado_container.hide()
-                        
-                        #  PROCESAR EVENTOS PENDIENTES (reemplazo seguro del timer)
-                        from PyQt6.QtCore import QCoreApplication
-                        QCoreApplication.processEvents()
-                        
-                        #  MOSTRAR Y RECARGAR
-                        self.estudiantes_grado_container.show()
-                        self.mostrar_estudiantes_grado(grado_a_recargar)
-                    
-                    # 5. ACTUALIZAR BOTONES DE GRADOS
-                    self.load_grados_tab()
-                    
-                    # 6. ACTUALIZAR BÚSQUEDA DE CALIFICACIONES SI ESTÁ ACTIVA
-                    if hasattr(self, 'search_input') and self.search_input.text().strip():
-                        self.perform_search()
+                    # Las vistas y los contadores se actualizan desde el almacén
+                    self.store_estudiantes.eliminar(cedula)
                     
                     # MENSAJE DE ÉXITO
                     self.show_success(f"Estudiante con cédula {cedula} eliminado correctamente")
@@ -776,9 +590,13 @@ class MainWindow(QMainWindow):
         fin = min((self.pagina_actual_estudiantes + 1) * self.estudiantes_por_pagina, self.total_estudiantes)
         
         # Actualizar labels
-        self.estudiantes_page_info.setText(
-            f"Mostrando {inicio}-{fin} de {self.total_estudiantes} estudiantes"
-        )
+        if self.estudiantes_buscados is None:
+            texto = f"Mostrando {inicio}-{fin} de {self.total_estudiantes} estudiantes"
+        else:
+            texto = f"Mostrando {inicio}-{fin} de {self.total_estudiantes} resultados"
+            if self.estudiantes_busqueda_limitada:
+                texto += f" (solo los {LIMITE_BUSQUEDA} más parecidos; refine la búsqueda)"
+        self.estudiantes_page_info.setText(texto)
         self.estudiantes_page_number.setText(f"Página {pagina_mostrar} de {total_paginas}")
         
         # Habilitar/deshabilitar botones
@@ -800,12 +618,14 @@ class MainWindow(QMainWindow):
         elif accion == 'last':
             self.pagina_actual_estudiantes = total_paginas - 1
         
-        # Recargar sin resetear la página
-        self.load_estudiantes(reset_pagina=False)
+        # Solo se redibuja desde memoria: la lista ya está cargada
+        self.mostrar_pagina_estudiantes()
 
-    def load_docentes(self):
+    @medir
+    def load_docentes(self, docentes=None):
         """Carga la lista de docentes"""
-        docentes = self.supabase_client.get_all_docentes()
+        if docentes is None:
+            docentes = self.supabase_client.get_all_docentes()
         self.docentes_table.setRowCount(0)
         self.docentes_table.verticalHeader().setDefaultSectionSize(45)
         for docente in docentes:
@@ -825,34 +645,27 @@ class MainWindow(QMainWindow):
             actions_layout.setContentsMargins(5, 2, 5, 2)
             actions_widget.setLayout(actions_layout)
             
-            edit_btn = QPushButton("✏️")
-            edit_btn.setObjectName("action_btn")
-            edit_btn.setMaximumWidth(32)
-            edit_btn.setMinimumHeight(32)
-            edit_btn.setStyleSheet("QPushButton { background-color: #2196F3; }")
+            edit_btn = boton_accion("✏️", "editar")
             edit_btn.setToolTip("Editar docente")
             edit_btn.clicked.connect(lambda checked, d=docente: self.edit_docente(d))
             actions_layout.addWidget(edit_btn)
             
-            delete_btn = QPushButton("🗑️")
-            delete_btn.setObjectName("action_btn")
-            delete_btn.setMaximumWidth(32)
-            delete_btn.setMinimumHeight(32)
-            delete_btn.setStyleSheet("QPushButton { background-color: #f44336; }")
+            delete_btn = boton_accion("🗑️", "eliminar")
             delete_btn.setToolTip("Eliminar docente")
             delete_btn.clicked.connect(lambda checked, id=docente['cedula']: self.delete_docente(id))
             actions_layout.addWidget(delete_btn)
             
             self.docentes_table.setCellWidget(row, 6, actions_widget)
 
-    def load_asignaturas(self, reset_pagina=True):
-        """Carga la lista de asignaturas CON PAGINACIÓN"""
+    @medir
+    def load_asignaturas(self, asignaturas=None):
+        """Carga la lista de asignaturas CON PAGINACIÓN (desde la primera página)"""
         
-        if reset_pagina:
-            self.pagina_actual_asignaturas = 0
+        self.pagina_actual_asignaturas = 0
         
         # Obtener TODAS las asignaturas
-        asignaturas = self.supabase_client.get_all_asignaturas()
+        if asignaturas is None:
+            asignaturas = self.supabase_client.get_all_asignaturas()
         
         # Ordenar por nombre
         asignaturas_ordenadas = sorted(asignaturas, key=lambda x: x.get('nombre_asignatura', ''))
@@ -861,6 +674,14 @@ class MainWindow(QMainWindow):
         self.total_asignaturas = len(asignaturas_ordenadas)
         self.asignaturas_filtradas = asignaturas_ordenadas
         
+        # Con una búsqueda activa se repite sobre los datos nuevos
+        self.refrescar_vista_asignaturas()
+
+    def mostrar_pagina_asignaturas(self):
+        """Dibuja la página actual de asignaturas (o del resultado de la búsqueda) desde memoria"""
+        asignaturas = self.asignaturas_filtradas if self.asignaturas_buscadas is None else self.asignaturas_buscadas
+        self.total_asignaturas = len(asignaturas)
+        
         # Calcular paginación
         total_paginas = max(1, (self.total_asignaturas + self.asignaturas_por_pagina - 1) // self.asignaturas_por_pagina)
         
@@ -873,62 +694,57 @@ class MainWindow(QMainWindow):
         fin = min(inicio + self.asignaturas_por_pagina, self.total_asignaturas)
         
         # Obtener asignaturas de la página actual
-        asignaturas_pagina = asignaturas_ordenadas[inicio:fin]
+        asignaturas_pagina = asignaturas[inicio:fin]
         
         # Limpiar tabla
         self.asignaturas_table.setRowCount(0)
         
+        # Llenar tabla
+        for asignatura in asignaturas_pagina:
+            row = self.asignaturas_table.rowCount()
+            self.asignaturas_table.insertRow(row)
+            self.llenar_fila_asignatura(row, asignatura)
+        
+        # Actualizar controles de paginación
+        self.actualizar_controles_paginacion_asignaturas()
+
+    def llenar_fila_asignatura(self, row, asignatura):
+        """Escribe los datos y botones de una asignatura en una fila de la tabla"""
         # Diccionario de menciones
         menciones = {
             1: "Media General",
             2: "Técnico Superior"
         }
         
-        # Llenar tabla
-        for asignatura in asignaturas_pagina:
-            row = self.asignaturas_table.rowCount()
-            self.asignaturas_table.insertRow(row)
-            
-            docente_nombre = ''
-            if asignatura.get('docente_nombre') and asignatura.get('docente_apellido'):
-                docente_nombre = f"{asignatura['docente_nombre']} {asignatura['docente_apellido']}"
-            
-            # Obtener el texto de la mención
-            id_mencion = asignatura.get('id_mencion')
-            mencion_texto = menciones.get(id_mencion, '') if id_mencion else ''
-            
-            self.asignaturas_table.setItem(row, 0, QTableWidgetItem(str(asignatura['codigo'])))
-            self.asignaturas_table.setItem(row, 1, QTableWidgetItem(asignatura['nombre_asignatura']))
-            self.asignaturas_table.setItem(row, 2, QTableWidgetItem(mencion_texto))
-            self.asignaturas_table.setItem(row, 3, QTableWidgetItem(asignatura['nombre_grado'] or ''))
-            self.asignaturas_table.setItem(row, 4, QTableWidgetItem(docente_nombre))
-            
-            # Botones de acción
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout()
-            actions_layout.setContentsMargins(5, 2, 5, 2)
-            actions_widget.setLayout(actions_layout)
-            
-            edit_btn = QPushButton("✏️")
-            edit_btn.setObjectName("action_btn")
-            edit_btn.setMaximumWidth(32)
-            edit_btn.setMinimumHeight(32)
-            edit_btn.setStyleSheet("QPushButton { background-color: #2196F3; }")
-            edit_btn.clicked.connect(lambda checked, a=asignatura: self.edit_asignatura(a))
-            actions_layout.addWidget(edit_btn)
-            
-            delete_btn = QPushButton("🗑️")
-            delete_btn.setObjectName("action_btn")
-            delete_btn.setMaximumWidth(32)
-            delete_btn.setMinimumHeight(32)
-            delete_btn.setStyleSheet("QPushButton { background-color: #f44336; }")
-            delete_btn.clicked.connect(lambda checked, id=asignatura['codigo']: self.delete_asignatura(id))
-            actions_layout.addWidget(delete_btn)
-            
-            self.asignaturas_table.setCellWidget(row, 5, actions_widget)
+        docente_nombre = ''
+        if asignatura.get('docente_nombre') and asignatura.get('docente_apellido'):
+            docente_nombre = f"{asignatura['docente_nombre']} {asignatura['docente_apellido']}"
+        
+        # Obtener el texto de la mención
+        id_mencion = asignatura.get('id_mencion')
+        mencion_texto = menciones.get(id_mencion, '') if id_mencion else ''
+        
+        self.asignaturas_table.setItem(row, 0, QTableWidgetItem(str(asignatura['codigo'])))
+        self.asignaturas_table.setItem(row, 1, QTableWidgetItem(asignatura['nombre_asignatura']))
+        self.asignaturas_table.setItem(row, 2, QTableWidgetItem(mencion_texto))
+        self.asignaturas_table.setItem(row, 3, QTableWidgetItem(asignatura['nombre_grado'] or ''))
+        self.asignaturas_table.setItem(row, 4, QTableWidgetItem(docente_nombre))
+        
+        # Botones de acción
+        actions_widget = QWidget()
+        actions_layout = QHBoxLayout()
+        actions_layout.setContentsMargins(5, 2, 5, 2)
+        actions_widget.setLayout(actions_layout)
+        
+        edit_btn = boton_accion("✏️", "editar")
+        edit_btn.clicked.connect(lambda checked, a=asignatura: self.edit_asignatura(a))
+        actions_layout.addWidget(edit_btn)
+        
+        delete_btn = boton_accion("🗑️", "eliminar")
+        delete_btn.clicked.connect(lambda checked, id=asignatura['codigo']: self.delete_asignatura(id))
+        actions_layout.addWidget(delete_btn)
         
-        # Actualizar controles de paginación
-        self.actualizar_controles_paginacion_asignaturas()
+        self.asignaturas_table.setCellWidget(row, 5, actions_widget)
 
     def actualizar_controles_paginacion_asignaturas(self):
         """Actualiza los controles de paginación de asignaturas"""
@@ -940,9 +756,13 @@ class MainWindow(QMainWindow):
         fin = min((self.pagina_actual_asignaturas + 1) * self.asignaturas_por_pagina, self.total_asignaturas)
         
         # Actualizar labels
-        self.asignaturas_page_info.setText(
-            f"Mostrando {inicio}-{fin} de {self.total_asignaturas} asignaturas"
-        )
+        if self.asignaturas_buscadas is None:
+            texto = f"Mostrando {inicio}-{fin} de {self.total_asignaturas} asignaturas"
+        else:
+            texto = f"Mostrando {inicio}-{fin} de {self.total_asignaturas} resultados"
+            if self.asignaturas_busqueda_limitada:
+                texto += f" (solo los {LIMITE_BUSQUEDA} más parecidos; refine la búsqueda)"
+        self.asignaturas_page_info.setText(texto)
         self.asignaturas_page_number.setText(f"Página {pagina_mostrar} de {total_paginas}")
         
         # Habilitar/deshabilitar botones
@@ -964,107 +784,27 @@ class MainWindow(QMainWindow):
         elif accion == 'last':
             self.pagina_actual_asignaturas = total_paginas - 1
         
-        # Recargar sin resetear la página
-        self.load_asignaturas(reset_pagina=False)
+        # Solo se redibuja desde memoria: la lista ya está cargada
+        self.mostrar_pagina_asignaturas()
 
-    def filter_asignaturas(self, text):
-        """Filtra la tabla de asignaturas Y ACTUALIZA PAGINACIÓN"""
+    def buscar_asignaturas(self, text):
+        """Busca asignaturas en el servidor (en segundo plano; None si no hay filtro)"""
         if not text.strip():
-            # Si no hay filtro, mostrar todas
-            self.load_asignaturas(reset_pagina=True)
-            return
-        
-        # Filtrar asignaturas
-        text_lower = text.lower()
-        asignaturas_filtradas = []
-        
-        menciones = {
-            1: "Media General",
-            2: "Técnico Superior"
-        }
-        
-        for asignatura in self.asignaturas_filtradas:
-            # Buscar en todos los campos
-            id_mencion = asignatura.get('id_mencion')
-            mencion_texto = menciones.get(id_mencion, '') if id_mencion else ''
-            
-            docente_nombre = ''
-            if asignatura.get('docente_nombre') and asignatura.get('docente_apellido'):
-                docente_nombre = f"{asignatura['docente_nombre']} {asignatura['docente_apellido']}"
-            
-            campos = [
-                asignatura.get('codigo', ''),
-                asignatura.get('nombre_asignatura', ''),
-                mencion_texto,
-                asignatura.get('nombre_grado', ''),
-                docente_nombre
-            ]
-            
-            if any(text_lower in str(campo).lower() for campo in campos):
-                asignaturas_filtradas.append(asignatura)
-        
-        # Actualizar total
-        self.total_asignaturas = len(asignaturas_filtradas)
+            return None
+        # Uno más que el límite: indica si el resultado quedó recortado
+        return self.supabase_client.search_asignaturas(text, limit=LIMITE_BUSQUEDA + 1)
+
+    def mostrar_asignaturas_buscadas(self, text, asignaturas_filtradas):
+        """Dibuja la primera página del resultado de la búsqueda de asignaturas"""
+        # Sin filtro (None) se vuelve a la lista completa en memoria, sin consultar
+        self.asignaturas_busqueda_limitada = (asignaturas_filtradas is not None
+                                              and len(asignaturas_filtradas) > LIMITE_BUSQUEDA)
+        self.asignaturas_buscadas = (asignaturas_filtradas[:LIMITE_BUSQUEDA]
+                                     if asignaturas_filtradas is not None else None)
         self.pagina_actual_asignaturas = 0
-        
-        # Calcular índices
-        inicio = 0
-        fin = min(self.asignaturas_por_pagina, self.total_asignaturas)
-        
-        asignaturas_pagina = asignaturas_filtradas[inicio:fin]
-        
-        # Limpiar y llenar tabla
-        self.asignaturas_table.setRowCount(0)
-        
-        menciones = {
-            1: "Media General",
-            2: "Técnico Superior"
-        }
-        
-        for asignatura in asignaturas_pagina:
-            row = self.asignaturas_table.rowCount()
-            self.asignaturas_table.insertRow(row)
-            
-            docente_nombre = ''
-            if asignatura.get('docente_nombre') and asignatura.get('docente_apellido'):
-                docente_nombre = f"{asignatura['docente_nombre']} {asignatura['docente_apellido']}"
-            
-            id_mencion = asignatura.get('id_mencion')
-            mencion_texto = menciones.get(id_mencion, '') if id_mencion else ''
-            
-            self.asignaturas_table.setItem(row, 0, QTableWidgetItem(str(asignatura['codigo'])))
-            self.asignaturas_table.setItem(row, 1, QTableWidgetItem(asignatura['nombre_asignatura']))
-            self.asignaturas_table.setItem(row, 2, QTableWidgetItem(mencion_texto))
-            self.asignaturas_table.setItem(row, 3, QTableWidgetItem(asignatura['nombre_grado'] or ''))
-            self.asignaturas_table.setItem(row, 4, QTableWidgetItem(docente_nombre))
-            
-            # Botones
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout()
-            actions_layout.setContentsMargins(5, 2, 5, 2)
-            actions_widget.setLayout(actions_layout)
-            
-            edit_btn = QPushButton("✏️")
-            edit_btn.setObjectName("action_btn")
-            edit_btn.setMaximumWidth(32)
-            edit_btn.setMinimumHeight(32)
-            edit_btn.setStyleSheet("QPushButton { background-color: #2196F3; }")
-            edit_btn.clicked.connect(lambda checked, a=asignatura: self.edit_asignatura(a))
-            actions_layout.addWidget(edit_btn)
-            
-            delete_btn = QPushButton("🗑️")
-            delete_btn.setObjectName("action_btn")
-            delete_btn.setMaximumWidth(32)
-            delete_btn.setMinimumHeight(32)
-            delete_btn.setStyleSheet("QPushButton { background-color: #f44336; }")
-            delete_btn.clicked.connect(lambda checked, id=asignatura['codigo']: self.delete_asignatura(id))
-            actions_layout.addWidget(delete_btn)
-            
-            self.asignaturas_table.setCellWidget(row, 5, actions_widget)
-        
-        # Actualizar controles
-        self.actualizar_controles_paginacion_asignaturas()
+        self.mostrar_pagina_asignaturas()
 
+    @medir
     def load_grados(self):
         """Carga la lista de grados"""
         grados = self.supabase_client.get_all_grados()
@@ -1077,9 +817,11 @@ class MainWindow(QMainWindow):
             self.grados_table.setItem(row, 0, QTableWidgetItem(str(grado['id_grado'])))
             self.grados_table.setItem(row, 1, QTableWidgetItem(grado['nombre_grado']))
 
-    def load_periodos(self):
+    @medir
+    def load_periodos(self, periodos=None):
         """Carga la lista de períodos académicos"""
-        periodos = self.supabase_client.get_all_periodos()
+        if periodos is None:
+            periodos = self.supabase_client.get_all_periodos()
         self.periodos_table.setRowCount(0)
         
         for periodo in periodos:
@@ -1090,6 +832,7 @@ class MainWindow(QMainWindow):
             self.periodos_table.setItem(row, 1, QTableWidgetItem(str(periodo['fecha_inicio'])))
             self.periodos_table.setItem(row, 2, QTableWidgetItem(str(periodo['fecha_fin'])))
 
+    @medir
     def load_calificaciones(self):
         """Carga todas las calificaciones"""
         calificaciones = self.supabase_client.get_all_calificaciones()
@@ -1109,15 +852,216 @@ class MainWindow(QMainWindow):
             self.calificaciones_table.setItem(row, 7, QTableWidgetItem(str(cal['ajuste_3']) if cal['ajuste_3'] else '0'))
             self.calificaciones_table.setItem(row, 8, QTableWidgetItem(str(cal['nota_final']) if cal['nota_final'] else '0'))
 
+    # FUNCIONES DE ACTUALIZACIÓN INCREMENTAL (CAMBIOS REMOTOS)
+
+    def aplicar_cambio_remoto(self, cambio):
+        """
+        Aplica fila por fila un cambio notificado por otro equipo (los ecos de
+        las escrituras propias no llegan: ver SupabaseClient._es_eco)
+        """
+        tabla = cambio.get('tabla')
+        operacion = cambio.get('op')
+        clave = cambio.get('pk')
+        
+        if tabla == 'estudiante':
+            # Una sola fila: el almacén notifica a las vistas
+            if operacion == 'DELETE':
+                self.cedulas_remotas.discard(clave)
+                self.store_estudiantes.eliminar(clave)
+            else:
+                self.cedulas_remotas.add(clave)
+                if not self.estudiantes_remotos_timer.isActive():
+                    self.estudiantes_remotos_timer.start(200)
+        elif tabla == 'asignatura':
+            self.aplicar_cambio_asignatura(operacion, clave)
+        elif tabla == 'calificacion':
+            # Solo interesa si la búsqueda activa es la del estudiante afectado
+            if hasattr(self, 'search_input') and self.search_input.text().strip() == cambio.get('ref'):
+                self.perform_search()
+        elif tabla == 'grado':
+            self.grados_tab_timer.start(300)
+
+    def traer_estudiantes_remotos(self):
+        """Trae en segundo plano, con una sola consulta, los estudiantes notificados"""
+        if not self.cedulas_remotas:
+            return
+        tarea = _TareaTraerEstudiantes(self.supabase_client, sorted(self.cedulas_remotas))
+        self.cedulas_remotas.clear()
+        tarea.señales.terminado.connect(
+            lambda estudiantes: self._al_traer_estudiantes_remotos(tarea, estudiantes))
+        # La referencia mantiene vivas las señales hasta entregar el resultado
+        self._tareas_traer.add(tarea)
+        QThreadPool.globalInstance().start(tarea)
+
+    def _al_traer_estudiantes_remotos(self, tarea, estudiantes: List[Dict[str, Any]]):
+        """
+        Guarda en el almacén los estudiantes traídos (hilo de la GUI)
+        
+        Las cédulas sin fila no se eliminan aquí: una consulta fallida también
+        devuelve vacío, y las eliminaciones llegan en su propia notificación.
+        """
+        self._tareas_traer.discard(tarea)
+        for estudiante in estudiantes:
+            self.store_estudiantes.guardar(estudiante)
+
+    def avisar_lote_rechazado(self, rechazo):
+        """
+        Un cambio hecho sin conexión fue rechazado por el servidor: la réplica ya
+        volvió a los datos del servidor, las vistas se recargan desde ella
+        """
+        self.load_initial_data()
+        self.show_error(
+            f"El servidor rechazó cambios guardados sin conexión el {rechazo['creado'][:16].replace('T', ' ')} "
+            f"({', '.join(rechazo['tablas']) or 'sin tablas replicadas'}); se descartaron.\n\n{rechazo['error']}"
+        )
+
+    def on_estudiante_cambiado(self, operacion, cedula, estudiante, anterior):
+        """Aplica en todas las vistas el cambio de un estudiante del almacén"""
+        self.aplicar_cambio_lista_estudiantes(operacion, cedula, estudiante)
+        
+        # Contadores de los botones de grados (total, sección y mención)
+        grado_anterior = anterior.get('id_grado') if anterior else None
+        grado_nuevo = estudiante.get('id_grado') if estudiante else None
+        if anterior:
+            self.ajustar_conteo_grado(anterior, -1)
+        if estudiante:
+            self.ajustar_conteo_grado(estudiante, 1)
+        
+        # Grado abierto en la pestaña Grados
+        if self.grado_actual_mostrado:
+            id_mostrado = self.grado_actual_mostrado.get('id_grado')
+            # Quien deja el grado (o se elimina) deja de estar seleccionado
+            if grado_nuevo != id_mostrado:
+                self.seleccion_estudiantes.quitar(cedula)
+            if id_mostrado in (grado_anterior, grado_nuevo):
+                self.estudiantes_grado_todos = [
+                    e for e in self.estudiantes_grado_todos if e['cedula'] != cedula
+                ]
+                if estudiante and grado_nuevo == id_mostrado:
+                    claves = [(e['apellido'], e['nombre']) for e in self.estudiantes_grado_todos]
+                    posicion = bisect.bisect_right(claves, (estudiante['apellido'], estudiante['nombre']))
+                    self.estudiantes_grado_todos.insert(posicion, estudiante)
+                self.grado_vista_timer.start(0)
+        
+        # Búsqueda de calificaciones del estudiante eliminado
+        if (operacion == 'DELETE' and hasattr(self, 'search_input')
+                and self.search_input.text().strip() == cedula):
+            self.calificaciones_table.setRowCount(0)
+
+    def aplicar_cambio_lista_estudiantes(self, operacion, cedula, estudiante):
+        """Inserta, actualiza o elimina un estudiante en la lista ordenada de la pestaña"""
+        indice = next(
+            (i for i, e in enumerate(self.estudiantes_filtrados) if e['cedula'] == cedula),
+            None
+        )
+        
+        if operacion == 'DELETE':
+            if indice is None:
+                return
+            del self.estudiantes_filtrados[indice]
+            self.estudiantes_vista_timer.start(0)
+            return
+        
+        if indice is not None:
+            anterior = self.estudiantes_filtrados[indice]
+            if anterior.get('nombre_grado') == estudiante.get('nombre_grado'):
+                # Misma posición en el orden: reescribir solo la fila visible
+                self.estudiantes_filtrados[indice] = estudiante
+                inicio = self.pagina_actual_estudiantes * self.estudiantes_por_pagina
+                if (inicio <= indice < inicio + self.estudiantes_por_pagina
+                        and self.estudiantes_buscados is None):
+                    self.llenar_fila_estudiante(indice - inicio, estudiante)
+                else:
+                    self.estudiantes_vista_timer.start(0)
+                return
+            del self.estudiantes_filtrados[indice]
+        
+        # Insertar respetando el orden por grado
+        claves = [self.extraer_numero_grado(e.get('nombre_grado', '')) for e in self.estudiantes_filtrados]
+        posicion = bisect.bisect_right(claves, self.extraer_numero_grado(estudiante.get('nombre_grado', '')))
+        self.estudiantes_filtrados.insert(posicion, estudiante)
+        self.estudiantes_vista_timer.start(0)
+
+    def ajustar_conteo_grado(self, estudiante, delta):
+        """Suma o resta un estudiante a los contadores de su grado y actualiza el botón"""
+        id_grado = estudiante.get('id_grado')
+        if not id_grado:
+            return
+        conteo = self.conteo_grados.setdefault(
+            id_grado, {'count': 0, 'count_by_seccion': {}, 'count_by_mencion': {}}
+        )
+        conteo['count'] = max(0, conteo['count'] + delta)
+        for campo, clave in (('count_by_seccion', estudiante.get('seccion')),
+                             ('count_by_mencion', estudiante.get('id_mencion'))):
+            conteo[campo][clave] = max(0, conteo[campo].get(clave, 0) + delta)
+        self.vista_grados.modelo.actualizar_conteo(id_grado)
+
+    def refrescar_vista_estudiantes(self):
+        """Redibuja la página de estudiantes desde memoria, respetando el filtro activo"""
+        texto = self.estudiantes_search_input.text()
+        if texto.strip():
+            self.busqueda_estudiantes.refrescar()
+        else:
+            self.mostrar_pagina_estudiantes()
+
+    def aplicar_cambio_asignatura(self, operacion, codigo):
+        """Inserta, actualiza o elimina una asignatura en la lista en memoria"""
+        indice = next(
+            (i for i, a in enumerate(self.asignaturas_filtradas) if str(a['codigo']) == codigo),
+            None
+        )
+        
+        if operacion == 'DELETE':
+            if indice is not None:
+                del self.asignaturas_filtradas[indice]
+                self.refrescar_vista_asignaturas()
+            return
+        
+        asignatura = self.supabase_client.get_asignatura_by_codigo(codigo)
+        if asignatura is None:
+            return
+        
+        if indice is not None:
+            del self.asignaturas_filtradas[indice]
+        claves = [a.get('nombre_asignatura', '') for a in self.asignaturas_filtradas]
+        posicion = bisect.bisect_right(claves, asignatura.get('nombre_asignatura', ''))
+        self.asignaturas_filtradas.insert(posicion, asignatura)
+        
+        inicio = self.pagina_actual_asignaturas * self.asignaturas_por_pagina
+        if (indice == posicion and inicio <= posicion < inicio + self.asignaturas_por_pagina
+                and self.asignaturas_buscadas is None):
+            self.llenar_fila_asignatura(posicion - inicio, asignatura)
+        else:
+            self.refrescar_vista_asignaturas()
+
+    def refrescar_vista_asignaturas(self):
+        """Redibuja la página de asignaturas desde memoria, respetando el filtro activo"""
+        if self.asignaturas_search_input.text().strip():
+            self.busqueda_asignaturas.refrescar()
+        else:
+            self.mostrar_pagina_asignaturas()
+
+    def refrescar_grado_mostrado(self):
+        """Redibuja desde memoria la página del grado abierto en la pestaña Grados"""
+        if (self.grado_actual_mostrado and hasattr(self, 'estudiantes_grado_container')
+                and self.estudiantes_grado_container.isVisible()):
+            self.aplicar_filtros_grado(self.grado_actual_mostrado, reset_pagina=False)
+
     # FUNCIONES DE FILTRADO Y BUSQUEDA
 
     def perform_search(self):
-        """Ejecuta la búsqueda después del retraso del temporizador"""
-        cedula = self.search_input.text().strip()
-        self.calificaciones_table.setRowCount(0)
+        """Repite de inmediato la búsqueda de calificaciones activa"""
+        self.busqueda_calificaciones.refrescar()
+
+    def buscar_calificaciones(self, cedula):
+        """Consulta las calificaciones de una cédula (se ejecuta en segundo plano)"""
         if not cedula:
-            return
-        calificaciones = self.supabase_client.get_calificaciones_by_estudiante(cedula)
+            return []
+        return self.supabase_client.get_calificaciones_by_estudiante(cedula)
+
+    def mostrar_calificaciones(self, cedula, calificaciones):
+        """Llena la tabla de calificaciones con el resultado de la búsqueda"""
+        self.calificaciones_table.setRowCount(0)
         for cal in calificaciones:
             row = self.calificaciones_table.rowCount()
             self.calificaciones_table.insertRow(row)
@@ -1136,117 +1080,24 @@ class MainWindow(QMainWindow):
         self.calificaciones_table.setRowCount(0)
         self.search_input.clear()
 
-    def filter_estudiantes(self, text):
-        """Filtra la tabla de estudiantes Y ACTUALIZA PAGINACIÓN"""
+    def buscar_estudiantes(self, text):
+        """Busca estudiantes en el servidor (en segundo plano; None si no hay filtro)"""
         if not text.strip():
-            # Si no hay filtro, mostrar todas
-            self.load_estudiantes(reset_pagina=True)
-            return
-        
-        # Filtrar estudiantes
-        text_lower = text.lower()
-        estudiantes_filtrados = []
-        
-        # Diccionario de menciones
-        menciones = {
-            1: "Media General",
-            2: "Técnico Superior"
-        }
-        
-        for estudiante in self.estudiantes_filtrados:
-            # Buscar en todos los campos (incluyendo mención)
-            id_mencion = estudiante.get('id_mencion')
-            mencion_texto = menciones.get(id_mencion, '') if id_mencion else ''
-            
-            campos = [
-                estudiante.get('cedula', ''),
-                estudiante.get('nombre', ''),
-                estudiante.get('apellido', ''),
-                estudiante.get('telefono', ''),
-                estudiante.get('correo', ''),
-                estudiante.get('pais', ''),
-                estudiante.get('estado', ''),
-                estudiante.get('municipio', ''),
-                estudiante.get('nombre_grado', ''),
-                estudiante.get('seccion', ''),
-                mencion_texto,
-                estudiante.get('observacion', '')
-            ]
-            
-            if any(text_lower in str(campo).lower() for campo in campos):
-                estudiantes_filtrados.append(estudiante)
-        
-        # Actualizar total
-        self.total_estudiantes = len(estudiantes_filtrados)
+            return None
+        # Uno más que el límite: indica si el resultado quedó recortado
+        return self.supabase_client.search_estudiantes(text, limit=LIMITE_BUSQUEDA + 1)
+
+    def mostrar_estudiantes_buscados(self, text, estudiantes_filtrados):
+        """Dibuja la primera página del resultado de la búsqueda de estudiantes"""
+        # Sin filtro (None) se vuelve a la lista completa en memoria, sin consultar
+        self.estudiantes_busqueda_limitada = (estudiantes_filtrados is not None
+                                              and len(estudiantes_filtrados) > LIMITE_BUSQUEDA)
+        self.estudiantes_buscados = (estudiantes_filtrados[:LIMITE_BUSQUEDA]
+                                     if estudiantes_filtrados is not None else None)
         self.pagina_actual_estudiantes = 0
-        
-        # Calcular índices
-        inicio = 0
-        fin = min(self.estudiantes_por_pagina, self.total_estudiantes)
-        
-        estudiantes_pagina = estudiantes_filtrados[inicio:fin]
-        
-        # Limpiar y llenar tabla
-        self.estudiantes_table.setRowCount(0)
-        
-        for estudiante in estudiantes_pagina:
-            row = self.estudiantes_table.rowCount()
-            self.estudiantes_table.insertRow(row)
-            
-            # Columna 0: Cédula
-            self.estudiantes_table.setItem(row, 0, QTableWidgetItem(estudiante['cedula']))
-            # Columna 1: Nombre
-            self.estudiantes_table.setItem(row, 1, QTableWidgetItem(estudiante['nombre']))
-            # Columna 2: Apellido
-            self.estudiantes_table.setItem(row, 2, QTableWidgetItem(estudiante['apellido']))
-            # Columna 3: Fecha Nacimiento
-            self.estudiantes_table.setItem(row, 3, QTableWidgetItem(str(estudiante['fecha_nacimiento'])))
-            # Columna 4: Teléfono
-            self.estudiantes_table.setItem(row, 4, QTableWidgetItem(estudiante.get('telefono') or ''))
-            # Columna 5: País
-            self.estudiantes_table.setItem(row, 5, QTableWidgetItem(estudiante.get('pais') or ''))
-            # Columna 6: Estado
-            self.estudiantes_table.setItem(row, 6, QTableWidgetItem(estudiante.get('estado') or ''))
-            # Columna 7: Municipio
-            self.estudiantes_table.setItem(row, 7, QTableWidgetItem(estudiante.get('municipio') or ''))
-            # Columna 8: Grado
-            self.estudiantes_table.setItem(row, 8, QTableWidgetItem(estudiante.get('nombre_grado') or ''))
-            # Columna 9: Sección
-            self.estudiantes_table.setItem(row, 9, QTableWidgetItem(estudiante.get('seccion') or ''))
-            # Columna 10: Mención
-            id_mencion = estudiante.get('id_mencion')
-            mencion_texto = menciones.get(id_mencion, '') if id_mencion else ''
-            self.estudiantes_table.setItem(row, 10, QTableWidgetItem(mencion_texto))
-            # Columna 11: Observaciones
-            self.estudiantes_table.setItem(row, 11, QTableWidgetItem(estudiante.get('observacion') or ''))
-            
-            # Columna 12: Botones de acción
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout()
-            actions_layout.setContentsMargins(5, 2, 5, 2)
-            actions_widget.setLayout(actions_layout)
-            
-            edit_btn = QPushButton("✏️")
-            edit_btn.setObjectName("action_btn")
-            edit_btn.setMaximumWidth(32)
-            edit_btn.setMinimumHeight(32)
-            edit_btn.setStyleSheet("QPushButton { background-color: #2196F3; }")
-            edit_btn.clicked.connect(lambda checked, e=estudiante: self.edit_estudiante(e))
-            actions_layout.addWidget(edit_btn)
-            
-            delete_btn = QPushButton("🗑️")
-            delete_btn.setObjectName("action_btn")
-            delete_btn.setMaximumWidth(32)
-            delete_btn.setMinimumHeight(32)
-            delete_btn.setStyleSheet("QPushButton { background-color: #f44336; }")
-            delete_btn.clicked.connect(lambda checked, cedula=estudiante['cedula']: self.delete_estudiante(cedula))
-            actions_layout.addWidget(delete_btn)
-            
-            self.estudiantes_table.setCellWidget(row, 12, actions_widget)
-        
-        # Actualizar controles
-        self.actualizar_controles_paginacion_estudiantes()
+        self.mostrar_pagina_estudiantes()
 
+    @medir
     def filter_docentes(self, text):
         """Filtra la tabla de docentes"""
         for row in range(self.docentes_table.rowCount()):
@@ -1258,17 +1109,6 @@ class MainWindow(QMainWindow):
                     break
             self.docentes_table.setRowHidden(row, not match)
 
-    def filter_asignaturas(self, text):
-        """Filtra la tabla de asignaturas"""
-        for row in range(self.asignaturas_table.rowCount()):
-            match = False
-            for col in range(self.asignaturas_table.columnCount() - 1):
-                item = self.asignaturas_table.item(row, col)
-                if item and text.lower() in item.text().lower():
-                    match = True
-                    break
-            self.asignaturas_table.setRowHidden(row, not match)
-
     #FUNCIONES PARA GRADOS EXPANDIBLES 
 
     def cambiar_grado_estudiante(self, cedula_estudiante, grado_actual):
@@ -1312,8 +1152,14 @@ class MainWindow(QMainWindow):
                             "Éxito",
                             f"Estudiante cambiado a {nuevo_grado_nombre} correctamente"
                         )
-                        # Recargar la tabla de grados
-                        self.load_grados()
+                        # Actualizar el almacén: las vistas aplican el cambio
+                        previo = self.store_estudiantes.obtener(cedula_estudiante)
+                        if previo:
+                            self.store_estudiantes.guardar({
+                                **previo,
+                                'id_grado': nuevo_grado_id,
+                                'nombre_grado': nuevo_grado_nombre
+                            })
                     else:
                         QMessageBox.critical(self, "Error", "No se pudo cambiar el grado del estudiante")
                 except Exception as e:
@@ -1325,13 +1171,13 @@ class MainWindow(QMainWindow):
         """Abre diálogo para agregar estudiante"""
         dialog = EstudianteDialog(self, self.supabase_client)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_estudiantes()
+            self.store_estudiantes.guardar(dialog.estudiante_guardado)
 
     def edit_estudiante(self, estudiante):
         """Abre diálogo para editar estudiante"""
         dialog = EstudianteDialog(self, self.supabase_client, estudiante)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_estudiantes()
+            self.store_estudiantes.guardar(dialog.estudiante_guardado)
 
     def mostrar_estudiantes_grado(self, grado):
         """Muestra los estudiantes de un grado específico (VERSIÓN ANTI-FANTASMA)"""
@@ -1584,7 +1430,10 @@ class MainWindow(QMainWindow):
         self.estudiantes_search_input = QLineEdit()
         self.estudiantes_search_input.setPlaceholderText("Buscar estudiante...")
         self.estudiantes_search_input.setMaximumWidth(300)
-        self.estudiantes_search_input.textChanged.connect(self.filter_estudiantes)
+        self.busqueda_estudiantes = ControladorBusqueda(
+            self.estudiantes_search_input, self.buscar_estudiantes,
+            self.mostrar_estudiantes_buscados, retardo_ms=250, en_segundo_plano=True
+        )
         toolbar.addWidget(self.estudiantes_search_input)
         
         toolbar.addStretch()
@@ -1687,7 +1536,9 @@ class MainWindow(QMainWindow):
         search_input = QLineEdit()
         search_input.setPlaceholderText("Buscar docente...")
         search_input.setMaximumWidth(300)
-        search_input.textChanged.connect(self.filter_docentes)
+        self.busqueda_docentes = ControladorBusqueda(
+            search_input, None, lambda texto, _: self.filter_docentes(texto), retardo_ms=250
+        )
         toolbar.addWidget(search_input)
         
         toolbar.addStretch()
@@ -1730,7 +1581,10 @@ class MainWindow(QMainWindow):
         self.asignaturas_search_input = QLineEdit()
         self.asignaturas_search_input.setPlaceholderText("Buscar asignatura...")
         self.asignaturas_search_input.setMaximumWidth(300)
-        self.asignaturas_search_input.textChanged.connect(self.filter_asignaturas)
+        self.busqueda_asignaturas = ControladorBusqueda(
+            self.asignaturas_search_input, self.buscar_asignaturas,
+            self.mostrar_asignaturas_buscadas, retardo_ms=250, en_segundo_plano=True
+        )
         toolbar.addWidget(self.asignaturas_search_input)
         
         toolbar.addStretch()
@@ -1859,12 +1713,11 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.calificaciones_table)
         # Agregar pestaña
         self.tabs.addTab(tab, "Calificaciones")
-        # --- Temporizador (mejora el rendimiento del filtrado) ---
-        self.search_timer = QTimer()
-        self.search_timer.setSingleShot(True)
-        self.search_timer.timeout.connect(self.perform_search)
-        # Cada vez que se escribe algo, reinicia el temporizador
-        self.search_input.textChanged.connect(lambda: self.search_timer.start(400))
+        # --- Búsqueda con retardo, en segundo plano (consulta la base) ---
+        self.busqueda_calificaciones = ControladorBusqueda(
+            self.search_input, self.buscar_calificaciones,
+            self.mostrar_calificaciones, retardo_ms=400, en_segundo_plano=True
+        )
 
     def create_grados_tab(self):
         """Crea la pestaña de grados con botones por año"""
@@ -1878,14 +1731,15 @@ class MainWindow(QMainWindow):
         toolbar.addStretch()
         layout.addLayout(toolbar)
         
-        # Contenedor para los botones de grados
-        self.grados_container = QWidget()
-        self.grados_layout = QHBoxLayout()
-        self.grados_layout.setContentsMargins(0, 10, 0, 10)
-        self.grados_layout.setSpacing(10)
-        self.grados_container.setLayout(self.grados_layout)
+        # Tarjetas de grados (modelo + delegado: refrescar conteos no recrea widgets)
+        self.vista_grados = VistaGrados()
+        self.vista_grados.grado_seleccionado.connect(self.mostrar_estudiantes_grado)
+        layout.addWidget(self.vista_grados)
         
-        layout.addWidget(self.grados_container)
+        self.sin_grados_label = QLabel("No hay grados creados. Crea uno nuevo usando el botón '+ Nuevo Grado'")
+        self.sin_grados_label.setStyleSheet("color: #666; font-style: italic;")
+        self.sin_grados_label.setVisible(False)
+        layout.addWidget(self.sin_grados_label)
         
         # Contenedor para la tabla de estudiantes del grado seleccionado
         self.estudiantes_grado_container = QWidget()
@@ -1976,16 +1830,12 @@ class MainWindow(QMainWindow):
         
         self.tabs.addTab(tab, "Grados")
 
-    def load_grados_tab(self):
-        """Carga los botones de grados y sus estudiantes (FILTRANDO GRADOS INVÁLIDOS)"""
-        # Limpiar botones anteriores
-        while self.grados_layout.count():
-            item = self.grados_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-        
-        # Obtener todos los grados
-        grados = self.supabase_client.get_all_grados()
+    @medir
+    def load_grados_tab(self, grados=None):
+        """Carga las tarjetas de grados y sus conteos (FILTRANDO GRADOS INVÁLIDOS)"""
+        # Obtener todos los grados con sus conteos (agregados en SQL)
+        if grados is None:
+            grados = self.supabase_client.get_grado_counts()
         
         # ✅ FILTRAR GRADOS INVÁLIDOS O SIN NOMBRE ESPECÍFICO
         grados_validos = []
@@ -2002,82 +1852,32 @@ class MainWindow(QMainWindow):
             
             grados_validos.append(grado)
         
-        if not grados_validos:
-            # Mostrar mensaje si no hay grados válidos
-            no_grados_label = QLabel("No hay grados creados. Crea uno nuevo usando el botón '+ Nuevo Grado'")
-            no_grados_label.setStyleSheet("color: #666; font-style: italic;")
-            self.grados_layout.addWidget(no_grados_label)
-            return
+        # Mostrar mensaje si no hay grados válidos
+        self.sin_grados_label.setVisible(not grados_validos)
+        self.vista_grados.setVisible(bool(grados_validos))
         
         # Ordenar grados válidos
         grados_ordenados = sorted(grados_validos, key=lambda x: self.extraer_numero_grado(x['nombre_grado']))
         
-        # Obtener todos los estudiantes UNA SOLA VEZ para optimizar
-        todos_estudiantes = self.supabase_client.get_all_estudiantes()
-        
-        # Contar estudiantes por grado
-        conteo_por_grado = {}
-        for estudiante in todos_estudiantes:
-            id_grado = estudiante.get('id_grado')
-            if id_grado:
-                conteo_por_grado[id_grado] = conteo_por_grado.get(id_grado, 0) + 1
-        
-        # Crear botón para cada grado
-        for grado in grados_ordenados:
-            # Crear botón personalizado
-            grado_btn = QPushButton()
-            grado_btn.setFixedSize(150, 100)
-            
-            # Obtener conteo de estudiantes desde el diccionario
-            total_estudiantes = conteo_por_grado.get(grado['id_grado'], 0)
-            
-            # Texto del botón
-            btn_text = f"{grado['nombre_grado']}\n\n"
-            btn_text += f"👨‍🎓 {total_estudiantes} estudiante"
-            btn_text += "s" if total_estudiantes != 1 else ""
-            
-            grado_btn.setText(btn_text)
-            
-            # Estilo del botón
-            grado_btn.setStyleSheet(f"""
-                QPushButton {{
-                    background-color: #ffffff;
-                    color: #2c3e50;
-                    border: 2px solid #e0e0e0;
-                    border-radius: 8px;
-                    font-size: 13px;
-                    font-weight: 600;
-                    padding: 12px;
-                    text-align: center;
-                    border-bottom: 4px solid #e0e0e0;
-                }}
-                QPushButton:hover {{
-                    background-color: #f8f9fa;
-                    border-color: #3498db;
-                    border-bottom: 4px solid #3498db;
-                }}
-                QPushButton:pressed {{
-                    background-color: #e3f2fd;
-                    border-color: #2980b9;
-                    border-bottom: 2px solid #2980b9;
-                    margin-top: 2px;
-                }}
-            """)
-            
-            # Conectar señal
-            grado_btn.clicked.connect(lambda checked, g=grado: self.mostrar_estudiantes_grado(g))
-            
-            self.grados_layout.addWidget(grado_btn)
-        
-        # Agregar stretch
-        self.grados_layout.addStretch()
+        # Conteos por grado; los cambios posteriores los ajustan en memoria
+        self.conteo_grados = {
+            grado['id_grado']: {
+                'count': grado['count'],
+                'count_by_seccion': dict(grado['count_by_seccion']),
+                'count_by_mencion': dict(grado['count_by_mencion']),
+            }
+            for grado in grados_ordenados
+        }
+        self.vista_grados.modelo.cargar(grados_ordenados, self.conteo_grados)
 
+    @medir
     def mostrar_estudiantes_grado(self, grado):
         """Muestra los estudiantes de un grado específico con checkboxes al final"""
-        # Limpiar filtros y paginación al cambiar de grado
+        # Limpiar filtros, paginación y selección al cambiar de grado
         self.filtro_seccion_actual = None
         self.filtro_mencion_actual = None
         self.pagina_actual_grado = 0
+        self.seleccion_estudiantes.limpiar()
         
         self.grado_actual_mostrado = grado.copy()  
         
@@ -2098,14 +1898,16 @@ class MainWindow(QMainWindow):
         self.agregar_barra_acciones_masa(grado)
 
     def agregar_barra_acciones_masa(self, grado):
-        """Agrega barra de herramientas para acciones en masa (VERSIÓN ANTI-FANTASMA)"""
-        
-        # Limpiar barra anterior si existe
-        if hasattr(self, 'acciones_masa_container') and self.acciones_masa_container:
-            try:
-                self.acciones_masa_container.deleteLater()
-            except RuntimeError:
-                pass  # Barra ya fue eliminada
+        """
+        Muestra la barra de herramientas para acciones en masa
+
+        La barra se crea una sola vez: sus acciones usan el grado mostrado en
+        self.grado_actual_mostrado, así que cambiar de grado no crea widgets,
+        menús ni conexiones nuevas (antes se recreaba en cada clic).
+        """
+        if getattr(self, 'acciones_masa_container', None) is not None:
+            self.actualizar_contador_seleccion()
+            return
         
         # Crear contenedor
         self.acciones_masa_container = QWidget()
@@ -2128,13 +1930,11 @@ class MainWindow(QMainWindow):
         
         # Info de selección
         self.selection_info_label = QLabel("0 seleccionados")
-        self.selection_info_label.setStyleSheet("color: #666; font-style: italic;")
+        self.selection_info_label.setObjectName("selection_info")
+        establecer_estado(self.selection_info_label, "vacio")
         acciones_masa_layout.addWidget(self.selection_info_label)
         
-        #  CONECTAR CHECKBOXES INDIVIDUALES PARA ACTUALIZAR CONTADOR
-        for checkbox in self.checkboxes_estudiantes:
-            if checkbox:
-                checkbox.stateChanged.connect(self.actualizar_contador_seleccion)
+        # El contador se actualiza con la señal de la selección (no por checkbox)
         
         acciones_masa_layout.addStretch()
         
@@ -2143,7 +1943,7 @@ class MainWindow(QMainWindow):
         mover_seleccionados_btn.setObjectName("mover_btn")
         mover_seleccionados_btn.setToolTip("Mover todos los estudiantes seleccionados a otro grado")
         mover_seleccionados_btn.clicked.connect(
-            lambda: self.mover_estudiantes_seleccionados(grado['id_grado'])
+            lambda: self.mover_estudiantes_seleccionados(self.grado_actual_mostrado['id_grado'])
         )
         mover_seleccionados_btn.setStyleSheet("""
             QPushButton {
@@ -2206,32 +2006,32 @@ class MainWindow(QMainWindow):
         
         # Submenú Sección
         seccion_submenu = QMenu("📋 Sección", filtrar_menu)
-        seccion_submenu.addAction("Todas", lambda: self.aplicar_filtro_seccion(None, grado))
+        seccion_submenu.addAction("Todas", lambda: self.aplicar_filtro_seccion(None, self.grado_actual_mostrado))
         seccion_submenu.addSeparator()
-        seccion_submenu.addAction("A", lambda: self.aplicar_filtro_seccion("A", grado))
-        seccion_submenu.addAction("B", lambda: self.aplicar_filtro_seccion("B", grado))
-        seccion_submenu.addAction("C", lambda: self.aplicar_filtro_seccion("C", grado))
-        seccion_submenu.addAction("D", lambda: self.aplicar_filtro_seccion("D", grado))
-        seccion_submenu.addAction("E", lambda: self.aplicar_filtro_seccion("E", grado))
-        seccion_submenu.addAction("F", lambda: self.aplicar_filtro_seccion("F", grado))
-        seccion_submenu.addAction("G", lambda: self.aplicar_filtro_seccion("G", grado))
+        seccion_submenu.addAction("A", lambda: self.aplicar_filtro_seccion("A", self.grado_actual_mostrado))
+        seccion_submenu.addAction("B", lambda: self.aplicar_filtro_seccion("B", self.grado_actual_mostrado))
+        seccion_submenu.addAction("C", lambda: self.aplicar_filtro_seccion("C", self.grado_actual_mostrado))
+        seccion_submenu.addAction("D", lambda: self.aplicar_filtro_seccion("D", self.grado_actual_mostrado))
+        seccion_submenu.addAction("E", lambda: self.aplicar_filtro_seccion("E", self.grado_actual_mostrado))
+        seccion_submenu.addAction("F", lambda: self.aplicar_filtro_seccion("F", self.grado_actual_mostrado))
+        seccion_submenu.addAction("G", lambda: self.aplicar_filtro_seccion("G", self.grado_actual_mostrado))
         seccion_submenu.addSeparator()
-        seccion_submenu.addAction("Sin sección", lambda: self.aplicar_filtro_seccion("sin_seccion", grado))
+        seccion_submenu.addAction("Sin sección", lambda: self.aplicar_filtro_seccion("sin_seccion", self.grado_actual_mostrado))
         
         # Submenú Mención
         mencion_submenu = QMenu("🎓 Mención", filtrar_menu)
-        mencion_submenu.addAction("Todas", lambda: self.aplicar_filtro_mencion(None, grado))
+        mencion_submenu.addAction("Todas", lambda: self.aplicar_filtro_mencion(None, self.grado_actual_mostrado))
         mencion_submenu.addSeparator()
-        mencion_submenu.addAction("Media General", lambda: self.aplicar_filtro_mencion(1, grado))
-        mencion_submenu.addAction("Técnico Superior", lambda: self.aplicar_filtro_mencion(2, grado))
+        mencion_submenu.addAction("Media General", lambda: self.aplicar_filtro_mencion(1, self.grado_actual_mostrado))
+        mencion_submenu.addAction("Técnico Superior", lambda: self.aplicar_filtro_mencion(2, self.grado_actual_mostrado))
         mencion_submenu.addSeparator()
-        mencion_submenu.addAction("Sin mención", lambda: self.aplicar_filtro_mencion("sin_mencion", grado))
+        mencion_submenu.addAction("Sin mención", lambda: self.aplicar_filtro_mencion("sin_mencion", self.grado_actual_mostrado))
         
         # Agregar submenús al menú principal
         filtrar_menu.addMenu(seccion_submenu)
         filtrar_menu.addMenu(mencion_submenu)
         filtrar_menu.addSeparator()
-        filtrar_menu.addAction("🔄 Limpiar todos los filtros", lambda: self.limpiar_todos_filtros(grado))
+        filtrar_menu.addAction("🔄 Limpiar todos los filtros", lambda: self.limpiar_todos_filtros(self.grado_actual_mostrado))
         
         filtrar_btn.setMenu(filtrar_menu)
         acciones_masa_layout.addWidget(filtrar_btn)
@@ -2246,38 +2046,53 @@ class MainWindow(QMainWindow):
         self.estudiantes_grado_layout.insertWidget(1, self.acciones_masa_container)
 
     def actualizar_contador_seleccion(self):
-        """Actualiza el contador de estudiantes seleccionados"""
-        seleccionados = self.get_estudiantes_seleccionados()
-        total = len(seleccionados)
-        
-        if hasattr(self, 'selection_info_label') and self.selection_info_label:
-            if total == 0:
-                self.selection_info_label.setText("0 seleccionados")
-                self.selection_info_label.setStyleSheet("color: #666; font-style: italic;")
-            else:
-                self.selection_info_label.setText(f"{total} seleccionado{'s' if total != 1 else ''}")
-                self.selection_info_label.setStyleSheet("color: #2196F3; font-weight: bold;")
+        """Actualiza el contador de estudiantes seleccionados y el estado de "Seleccionar todos" """
+        total = len(self.seleccion_estudiantes)
+        
+        try:
+            if hasattr(self, 'selection_info_label') and self.selection_info_label:
+                if total == 0:
+                    self.selection_info_label.setText("0 seleccionados")
+                    establecer_estado(self.selection_info_label, "vacio")
+                else:
+                    self.selection_info_label.setText(f"{total} seleccionado{'s' if total != 1 else ''}")
+                    establecer_estado(self.selection_info_label, "activo")
+            
+            # Marcado solo si están todos los que cumplen el filtro (el conteo descarta rápido)
+            if self.select_all_checkbox:
+                todos = (total >= self.total_estudiantes_grado and self.seleccion_estudiantes.contiene_todas(
+                    e['cedula'] for e in self.estudiantes_grado_filtrados))
+                self.select_all_checkbox.blockSignals(True)
+                self.select_all_checkbox.setChecked(todos)
+                self.select_all_checkbox.blockSignals(False)
+        except RuntimeError:
+            pass  # Barra de acciones en masa ya eliminada
 
     def aplicar_filtro_seccion(self, seccion, grado):
         """Aplica filtro de sección y recarga la tabla"""
         self.filtro_seccion_actual = seccion
-        self.recargar_estudiantes_con_filtros(grado)
+        self.aplicar_filtros_grado(grado)
     
     def aplicar_filtro_mencion(self, mencion, grado):
         """Aplica filtro de mención y recarga la tabla"""
         self.filtro_mencion_actual = mencion
-        self.recargar_estudiantes_con_filtros(grado)
+        self.aplicar_filtros_grado(grado)
     
     def limpiar_todos_filtros(self, grado):
         """Limpia todos los filtros aplicados"""
         self.filtro_seccion_actual = None
         self.filtro_mencion_actual = None
-        self.recargar_estudiantes_con_filtros(grado)
+        self.aplicar_filtros_grado(grado)
     
     def recargar_estudiantes_con_filtros(self, grado, reset_pagina=True):
         """Recarga la tabla de estudiantes aplicando los filtros actuales con paginación"""
         # Obtener todos los estudiantes del grado
-        estudiantes = self.supabase_client.get_estudiantes_by_grado(grado['id_grado'])
+        self.estudiantes_grado_todos = self.supabase_client.get_estudiantes_by_grado(grado['id_grado'])
+        self.aplicar_filtros_grado(grado, reset_pagina)
+
+    def aplicar_filtros_grado(self, grado, reset_pagina=True):
+        """Aplica los filtros y la paginación a los estudiantes del grado ya cargados"""
+        estudiantes = self.estudiantes_grado_todos
         
         # Aplicar filtros
         estudiantes_filtrados = []
@@ -2386,19 +2201,18 @@ class MainWindow(QMainWindow):
             checkbox_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
             checkbox = QCheckBox()
             checkbox.setProperty('cedula', estudiante['cedula'])
-            checkbox.stateChanged.connect(self.actualizar_contador_seleccion)
+            checkbox.setChecked(estudiante['cedula'] in self.seleccion_estudiantes)
+            checkbox.toggled.connect(
+                lambda marcado, cedula=estudiante['cedula']: self.seleccion_estudiantes.marcar(cedula, marcado)
+            )
             checkbox_layout.addWidget(checkbox)
             checkbox_widget.setLayout(checkbox_layout)
             self.estudiantes_grado_table.setCellWidget(row, 8, checkbox_widget)
             self.checkboxes_estudiantes.append(checkbox)
         
-        # Actualizar contador de selección
+        # Actualizar contador de selección y estado de "Seleccionar todos"
         self.actualizar_contador_seleccion()
         
-        # Actualizar estado del checkbox "Seleccionar todos"
-        if hasattr(self, 'select_all_checkbox') and self.select_all_checkbox:
-            self.select_all_checkbox.setChecked(False)
-        
         # Actualizar controles de paginación
         self.actualizar_controles_paginacion_grado()
         
@@ -2457,8 +2271,8 @@ class MainWindow(QMainWindow):
         elif accion == 'last':
             self.pagina_actual_grado = total_paginas - 1
         
-        # Recargar sin resetear la página
-        self.recargar_estudiantes_con_filtros(self.grado_actual_mostrado, reset_pagina=False)
+        # Redibujar sin resetear la página (los estudiantes ya están en memoria)
+        self.aplicar_filtros_grado(self.grado_actual_mostrado, reset_pagina=False)
 
     def create_periodos_tab(self):
         """Crea la pestaña de períodos académicos"""
@@ -2553,76 +2367,29 @@ class MainWindow(QMainWindow):
             search_btn.clicked.connect(self.load_historial_completo)
             search_layout.addWidget(search_btn)
             
-            # SI ESTAS VIENDO ESTO SEGURAMENTE QUIERES LA FUNCIÓN DE IMPRIMIR PARA IMPRIMIR EL HISTORIAL ACADÉMICO COMPLETO, ASI QUE BUENA SUERTE CRACK
-            # Botón imprimir (inicialmente oculto)
-            #self.imprimir_historial_btn = QPushButton("🖨️ Imprimir Historial")
-            #self.imprimir_historial_btn.setStyleSheet("""
-            #"""QPushButton {
-            #        background-color: #4CAF50;
-            #        color: white;
-            #        border: none;
-            #        padding: 8px 20px;
-            #        border-radius: 4px;
-            #        font-size: 14px;
-            #        font-weight: bold;
-            #    }
-            #    QPushButton:hover {
-            #        background-color: #45a049;
-            #    }
-            #""")
-            #self.imprimir_historial_btn.clicked.connect(self.imprimir_historial)
-            #self.imprimir_historial_btn.setVisible(False)
-            #search_layout.addWidget(self.imprimir_historial_btn)
+            # Botón imprimir (visible con un historial cargado)
+            self.imprimir_historial_btn = QPushButton("🖨️ Imprimir Historial")
+            self.imprimir_historial_btn.setObjectName("imprimir_btn")
+            self.imprimir_historial_btn.clicked.connect(self.imprimir_historial)
+            self.imprimir_historial_btn.setVisible(False)
+            search_layout.addWidget(self.imprimir_historial_btn)
             
             search_layout.addStretch()
             
             main_layout.addWidget(search_frame)
             
             # ========== ÁREA DE CONTENIDO DEL HISTORIAL ==========
-            # Scroll area para el historial
-            scroll_area = QScrollArea()
-            scroll_area.setWidgetResizable(True)
-            scroll_area.setStyleSheet("""
-                QScrollArea {
-                    border: none;
-                    background-color: transparent;
-                                    color
-                }
-            """)
-            
-            # Widget contenedor del historial
-            self.historial_content = QWidget()
-            self.historial_layout = QVBoxLayout()
-            self.historial_layout.setSpacing(20)
-            self.historial_content.setLayout(self.historial_layout)
-            
-            scroll_area.setWidget(self.historial_content)
-            main_layout.addWidget(scroll_area)
-            
-            # Mensaje inicial
-            self.show_historial_placeholder()
+            # Ficha y árbol de años/materias: se crean una vez y se actualizan en el lugar
+            self.vista_historial = VistaHistorial()
+            main_layout.addWidget(self.vista_historial, 1)
             
             self.tabs.addTab(tab, "Historial Académico")
 
     def show_historial_placeholder(self):
-        """Muestra un mensaje placeholder cuando no hay historial cargado"""
-        # Limpiar layout
-        while self.historial_layout.count():
-            child = self.historial_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-        
-        placeholder = QLabel("👤 Busque un estudiante por su cédula para ver su historial académico completo")
-        placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        placeholder.setStyleSheet("""
-            QLabel {
-                color: #999;
-                font-size: 16px;
-                padding: 100px;
-            }
-        """)
-        self.historial_layout.addWidget(placeholder)
+        """Muestra el mensaje inicial cuando no hay historial cargado"""
+        self.vista_historial.limpiar()
 
+    @medir
     def load_historial_completo(self):
         """Carga y muestra el historial académico completo del estudiante"""
         cedula = self.historial_search.text().strip()
@@ -2631,220 +2398,53 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Advertencia", "Por favor ingrese la cédula del estudiante")
             return
         
+        cliente = self.cliente_async()
+        if cliente is not None:
+            # Estudiante, historial y calificaciones en curso se consultan a la vez
+            asyncio.ensure_future(self.load_historial_completo_async(cliente, cedula))
+            return
+        
         # Obtener historial completo
         historial_data = self.supabase_client.get_historial_completo_estudiante(cedula)
-        
+        self.mostrar_historial_completo(cedula, historial_data)
+
+    async def load_historial_completo_async(self, cliente, cedula):
+        """Obtiene el historial con AsyncSupabaseClient y lo muestra"""
+        historial_data = await cliente.get_historial_completo_estudiante(cedula)
+        if self.historial_search.text().strip() != cedula:
+            return  # El usuario ya pidió otro estudiante
+        self.mostrar_historial_completo(cedula, historial_data)
+
+    @medir
+    def mostrar_historial_completo(self, cedula, historial_data):
+        """Muestra el historial académico completo del estudiante (reinicia el modelo, no crea widgets)"""
         if not historial_data:
             QMessageBox.information(
                 self, 
                 "No encontrado", 
                 f"No se encontró ningún estudiante con la cédula {cedula}"
             )
+            self.current_historial_data = None
             self.show_historial_placeholder()
             self.imprimir_historial_btn.setVisible(False)
             return
         
         # Guardar datos para impresión
         self.current_historial_data = historial_data
+        self.imprimir_historial_btn.setVisible(True)
         
-        # Mostrar botón de imprimir
-        # self.imprimir_historial_btn.setVisible(True)
-        
-        # Limpiar layout anterior
-        while self.historial_layout.count():
-            child = self.historial_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-        
-        info_estudiante = historial_data['info_estudiante']
-        historial_por_año = historial_data['historial_por_año']
-        
-        # ========== INFORMACIÓN DEL ESTUDIANTE ==========
-        info_frame = QFrame()
-        info_frame.setStyleSheet("""
-            QFrame {
-                background-color: white;
-                border-radius: 8px;
-                border: 2px solid #2196F3;
-            }
-        """)
-        info_layout = QVBoxLayout()
-        info_layout.setContentsMargins(20, 20, 20, 20)
-        info_frame.setLayout(info_layout)
-        
-        # Título
-        titulo = QLabel(f"📋 Historial Académico")
-        titulo.setStyleSheet("""
-            font-size: 20px;
-            font-weight: bold;
-            color: #2196F3;
-            margin-bottom: 10px;
-        """)
-        info_layout.addWidget(titulo)
-        
-        # Información del estudiante
-        nombre_completo = f"{info_estudiante['nombre']} {info_estudiante['apellido']}"
-        
-        # Mención
-        menciones = {
-            1: "Media General",
-            2: "Técnico Superior"
-        }
-        id_mencion = info_estudiante.get('id_mencion')
-        mencion_texto = menciones.get(id_mencion, 'No asignada') if id_mencion else 'No asignada'
-        
-        # Domicilio
-        pais = info_estudiante.get('pais') or 'N/A'
-        estado = info_estudiante.get('estado') or 'N/A'
-        municipio = info_estudiante.get('municipio') or 'N/A'
-        domicilio = f"{pais}, {estado}, {municipio}"
-        
-        # Observaciones
-        observacion = info_estudiante.get('observacion') or 'Sin observaciones'
-        seccion = info_estudiante.get('seccion') or 'No asignada'
-
-        info_text = f"""
-        <p style='font-size: 14px; line-height: 1.8; color: #555;'>
-            <b>Nombre:</b> {nombre_completo}<br>
-            <b>Cédula:</b> {info_estudiante['cedula']}<br>
-            <b>Grado Actual:</b> {info_estudiante['nombre_grado'] or 'No asignado'}<br>
-            <b>Sección:</b> {seccion}<br>
-            <b>Mención:</b> {mencion_texto}<br>
-            <b>Fecha de Nacimiento:</b> {info_estudiante['fecha_nacimiento']}<br>
-            <b>Domicilio:</b> {domicilio}<br>
-            <b>Observaciones:</b> {observacion}
-        </p>
-        """
-        info_label = QLabel(info_text)
-        info_label.setTextFormat(Qt.TextFormat.RichText)
-        info_label.setWordWrap(True)
-        info_layout.addWidget(info_label)
-        
-        self.historial_layout.addWidget(info_frame)
-        
-        # ========== TABLAS POR AÑO (1RO A 6TO) ==========
-        años = ['1', '2', '3', '4', '5', '6']
-        nombres_años = {
-            '1': '1er Año',
-            '2': '2do Año',
-            '3': '3er Año',
-            '4': '4to Año',
-            '5': '5to Año',
-            '6': '6to Año'
-        }
-        
-        for año in años:
-            materias = historial_por_año.get(año, [])
-            
-            # Frame para cada año
-            año_frame = QFrame()
-            año_frame.setStyleSheet("""
-                QFrame {
-                    background-color: white;
-                    border-radius: 8px;
-                    border: 1px solid #ddd;
-                }
-            """)
-            año_layout = QVBoxLayout()
-            año_layout.setContentsMargins(15, 15, 15, 15)
-            año_frame.setLayout(año_layout)
-            
-            # Título del año
-            año_titulo = QLabel(f"📚 {nombres_años[año]}")
-            año_titulo.setStyleSheet("""
-                font-size: 16px;
-                font-weight: bold;
-                color: #333;
-                padding: 5px;
-            """)
-            año_layout.addWidget(año_titulo)
-            
-            # Tabla de materias
-            table = QTableWidget()
-            table.setColumnCount(3)
-            table.setHorizontalHeaderLabels(["Asignatura", "Nota Final", "Estado"])
-            table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
-            table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Fixed)
-            table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Fixed)
-            table.setColumnWidth(1, 100)
-            table.setColumnWidth(2, 120)
-            table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-            table.setStyleSheet("""
-                QTableWidget {
-                    border: 1px solid #ddd;
-                    gridline-color: #2196f3;
-                }
-                QHeaderView::section {
-                    background-color: #f5f5f5;
-                    padding: 8px;
-                    border: none;
-                    font-weight: bold;
-                    color:#555;
-                }
-            """)
-            
-            if materias:
-                table.setRowCount(len(materias))
-                for row, materia in enumerate(materias):
-                    # Asignatura
-                    asig_item = QTableWidgetItem(materia['nombre_asignatura'])
-                    table.setItem(row, 0, asig_item)
-                    
-                    # Nota Final
-                    nota = materia['nota_final']
-                    nota_text = f"{nota:.2f}" if nota is not None else "N/A"
-                    nota_item = QTableWidgetItem(nota_text)
-                    nota_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                    table.setItem(row, 1, nota_item)
-                    
-                    # Estado
-                    estado = materia.get('estado', 'N/A')
-                    estado_item = QTableWidgetItem(estado)
-                    estado_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                    
-                    # Colores según el estado
-                    if estado == 'APROBADO':
-                        estado_item.setBackground(QColor("#d4edda"))
-                        estado_item.setForeground(QColor("#155724"))
-                    elif estado == 'REPROBADO':
-                        estado_item.setBackground(QColor("#f8d7da"))
-                        estado_item.setForeground(QColor("#721c24"))
-                    elif estado == 'EN CURSO':
-                        estado_item.setBackground(QColor("#fff3cd"))
-                        estado_item.setForeground(QColor("#856404"))
-                    
-                    table.setItem(row, 2, estado_item)
-                
-                # Ajustar altura de la tabla
-                table.setMinimumHeight(60 + (len(materias) * 12))
-                table.setMaximumHeight(300)
-            else:
-                # Mostrar mensaje cuando no hay materias
-                table.setRowCount(1)
-                no_data_item = QTableWidgetItem("No hay materias registradas para este año")
-                no_data_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                no_data_item.setForeground(QColor("#999"))
-                table.setItem(0, 0, no_data_item)
-                table.setSpan(0, 0, 1, 3)
-                table.setMinimumHeight(80)
-            
-            año_layout.addWidget(table)
-            self.historial_layout.addWidget(año_frame)
-        
-        # Espaciador al final
-        self.historial_layout.addStretch()
+        self.vista_historial.mostrar(historial_data)
 
+    @medir
     def imprimir_historial(self):
-        """Genera e imprime/guarda el historial académico en PDF"""
+        """Genera y guarda el historial académico en PDF"""
         if not hasattr(self, 'current_historial_data') or not self.current_historial_data:
             QMessageBox.warning(self, "Advertencia", "No hay historial cargado para imprimir")
             return
         
         try:
-            from PyQt6.QtPrintSupport import QPrinter, QPrintDialog
-            from PyQt6.QtGui import QPainter, QPageLayout, QPageSize
-            from PyQt6.QtCore import QMarginsF
             from PyQt6.QtWidgets import QFileDialog
+            from ui.reportes import guardar_historial_pdf
             
             # Preguntar dónde guardar
             cedula = self.current_historial_data['info_estudiante']['cedula']
@@ -2860,20 +2460,9 @@ class MainWindow(QMainWindow):
             if not filename:
                 return  # Usuario canceló
             
-            # Crear PDF
-            printer = QPrinter(QPrinter.PrinterMode.HighResolution)
-            printer.setOutputFormat(QPrinter.OutputFormat.PdfFormat)
-            printer.setOutputFileName(filename)
-            
-            # Configurar página
-            page_layout = QPageLayout()
-            page_layout.setPageSize(QPageSize(QPageSize.PageSizeId.Letter))
-            page_layout.setOrientation(QPageLayout.Orientation.Portrait)
-            page_layout.setMargins(QMarginsF(20, 20, 20, 20))
-            printer.setPageLayout(page_layout)
-            
-            # Generar el contenido del PDF
-            self.generar_pdf_historial(printer)
+            # Generar el PDF (el mismo que produce python -m amalia historiales)
+            if not guardar_historial_pdf(filename, self.current_historial_data):
+                raise OSError(f"No se pudo escribir {filename}")
             
             QMessageBox.information(
                 self,
@@ -2893,135 +2482,3 @@ class MainWindow(QMainWindow):
                 "Error",
                 f"Error al generar el PDF:\n{str(e)}"
             )
-            import traceback
-
-    def generar_pdf_historial(self, printer):
-        """
-        Genera el contenido del PDF del historial
-        
-        Args:
-            printer: Objeto QPrinter configurado
-        """
-        from PyQt6.QtGui import QPainter, QFont, QPen
-        from PyQt6.QtCore import Qt, QRect
-        
-        painter = QPainter()
-        painter.begin(printer)
-        
-        # Configuración de fuentes
-        font_titulo = QFont("Arial", 16, QFont.Weight.Bold)
-        font_subtitulo = QFont("Arial", 12, QFont.Weight.Bold)
-        font_normal = QFont("Arial", 10)
-        font_small = QFont("Arial", 9)
-        
-        # Obtener dimensiones de la página
-        page_rect = printer.pageRect(QPrinter.Unit.DevicePixel)
-        width = int(page_rect.width())
-        height = int(page_rect.height())
-        
-        y_position = 50  # Posición vertical inicial
-        line_height = 25
-        
-        info_estudiante = self.current_historial_data['info_estudiante']
-        historial_por_año = self.current_historial_data['historial_por_año']
-        
-        # ========== ENCABEZADO ==========
-        painter.setFont(font_titulo)
-        painter.drawText(QRect(50, y_position, width - 100, 50), 
-                        Qt.AlignmentFlag.AlignCenter, 
-                        "HISTORIAL ACADÉMICO")
-        y_position += 60
-        
-        painter.setFont(font_subtitulo)
-        painter.drawText(QRect(50, y_position, width - 100, 30),
-                        Qt.AlignmentFlag.AlignCenter,
-                        "U.E Liceo Nueva Esparta")
-        y_position += 50
-        
-        # ========== INFORMACIÓN DEL ESTUDIANTE ==========
-        painter.setFont(font_normal)
-        nombre_completo = f"{info_estudiante['nombre']} {info_estudiante['apellido']}"
-        
-        painter.drawText(50, y_position, f"Nombre: {nombre_completo}")
-        y_position += line_height
-        
-        painter.drawText(50, y_position, f"Cédula: {info_estudiante['cedula']}")
-        y_position += line_height
-        
-        painter.drawText(50, y_position, f"Grado Actual: {info_estudiante['nombre_grado'] or 'No asignado'}")
-        y_position += line_height
-        
-        painter.drawText(50, y_position, f"Fecha de Nacimiento: {info_estudiante['fecha_nacimiento']}")
-        y_position += line_height + 20
-        
-        # Línea separadora
-        painter.drawLine(50, y_position, width - 50, y_position)
-        y_position += 30
-        
-        # ========== TABLAS POR AÑO ==========
-        años = ['1', '2', '3', '4', '5', '6']
-        nombres_años = {
-            '1': '1er Año',
-            '2': '2do Año',
-            '3': '3er Año',
-            '4': '4to Año',
-            '5': '5to Año',
-            '6': '6to Año'
-        }
-        
-        for año in años:
-            materias = historial_por_año.get(año, [])
-            
-            # Verificar si necesitamos nueva página
-            espacio_necesario = 100 + (len(materias) * 25) if materias else 100
-            if y_position + espacio_necesario > height - 100:
-                printer.newPage()
-                y_position = 50
-            
-            # Título del año
-            painter.setFont(font_subtitulo)
-            painter.drawText(50, y_position, nombres_años[año])
-            y_position += 30
-            
-            if materias:
-                # Encabezados de tabla
-                painter.setFont(font_small)
-                painter.setPen(QPen(Qt.GlobalColor.black, 2))
-                
-                col1_x = 70
-                col2_x = width - 250
-                col3_x = width - 150
-                
-                painter.drawText(col1_x, y_position, "Asignatura")
-                painter.drawText(col2_x, y_position, "Nota Final")
-                painter.drawText(col3_x, y_position, "Estado")
-                y_position += 5
-                
-                # Línea bajo encabezados
-                painter.drawLine(50, y_position, width - 50, y_position)
-                y_position += 20
-                
-                # Filas de materias
-                for materia in materias:
-                    painter.drawText(col1_x, y_position, materia['nombre_asignatura'])
-                    
-                    nota = materia['nota_final']
-                    nota_text = f"{nota:.2f}" if nota is not None else "N/A"
-                    painter.drawText(col2_x, y_position, nota_text)
-                    
-                    estado = materia.get('estado', 'N/A')
-                    painter.drawText(col3_x, y_position, estado)
-                    
-                    y_position += 25
-                
-                y_position += 15
-            else:
-                painter.setFont(font_small)
-                painter.drawText(70, y_position, "No hay materias registradas para este año")
-                y_position += 40
-            
-            # Línea separadora entre años
-            painter.drawLine(50, y_position, width - 50, y_position)
-            y_position += 25
-        
-        painter.end()
\ No newline at end of file
@@ -0,0 +1,518 @@
+"""
+Motor de reportes en PDF con plantillas compiladas
+
+Una Plantilla describe el reporte sin coordenadas: encabezado, bloque de
+campos del estudiante o grado, una tabla por sección (por año, por sección del
+grado...) y las reglas de paginación. Al compilarla para la página y la
+resolución se crean una sola vez las fuentes, sus métricas, las plumas y las
+posiciones de las columnas. Cada documento después solo se maqueta (operaciones
+por página calculadas con las métricas en caché) y se pinta.
+
+Historiales académicos, boletas y listas de clase usan el mismo motor, desde
+MainWindow y desde python -m amalia. Solo usa QtGui, así que funciona sin
+ventanas. Los tiempos de maquetado y de pintado por página quedan en
+`rendimiento` para medir las impresiones por lotes.
+"""
+import os
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from PyQt6.QtGui import (QGuiApplication, QPainter, QFont, QFontMetricsF, QPen, QColor,
+                         QPdfWriter, QPageLayout, QPageSize)
+from PyQt6.QtCore import Qt, QRectF, QLineF, QMarginsF
+
+INSTITUCION = "U.E Liceo Nueva Esparta"
+
+MENCIONES = {1: "Media General", 2: "Técnico Superior"}
+
+NOMBRES_AÑOS = {
+    '1': '1er Año',
+    '2': '2do Año',
+    '3': '3er Año',
+    '4': '4to Año',
+    '5': '5to Año',
+    '6': '6to Año'
+}
+
+# Las medidas del maquetado están pensadas en píxeles de pantalla
+RESOLUCION = 96
+
+# Carta vertical; el mismo objeto sirve para todos los PDF
+PAGINA = QPageLayout(
+    QPageSize(QPageSize.PageSizeId.Letter),
+    QPageLayout.Orientation.Portrait,
+    QMarginsF(20, 20, 20, 20)
+)
+
+MARGEN = 50       # Margen interior de la zona imprimible
+SANGRIA = 20      # Las tablas empiezan un poco más adentro que los campos
+ALTO_PIE = 40     # Reservado al pie de página
+
+FAMILIA = "Arial"
+
+# Estilo -> (puntos, negrita)
+ESTILOS = {
+    'titulo': (16, True),
+    'subtitulo': (12, True),
+    'normal': (10, False),
+    'tabla': (9, False),
+    'encabezado_tabla': (9, True),
+    'pie': (8, False),
+}
+
+IZQUIERDA = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+CENTRO = Qt.AlignmentFlag.AlignCenter
+DERECHA = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+
+
+def asegurar_aplicacion():
+    """
+    Crea una QGuiApplication sin ventanas si no existe ninguna (las fuentes la
+    necesitan); dentro de la aplicación de escritorio usa la que ya existe
+    """
+    if QGuiApplication.instance() is None:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        asegurar_aplicacion.app = QGuiApplication([])
+    return QGuiApplication.instance()
+
+
+# ==================== PLANTILLAS ====================
+
+class Columna:
+    """Columna de tabla: ancho relativo y función que obtiene el texto de la fila"""
+
+    def __init__(self, titulo: str, ancho: float, valor: Callable[[Dict], Any], alineacion=IZQUIERDA):
+        self.titulo = titulo
+        self.ancho = ancho
+        self.valor = valor
+        self.alineacion = alineacion
+
+
+class Tabla:
+    """
+    Tablas del reporte, una por sección
+
+    Args:
+        columnas: Columnas de todas las secciones
+        secciones: Función que devuelve [(título o None, filas)] a partir de los datos
+        vacio: Texto para una sección sin filas
+        minimo_filas: Filas que deben caber junto al título; si no, la sección
+                      empieza en la página siguiente
+    """
+
+    def __init__(self, columnas: List[Columna], secciones: Callable[[Dict], Iterable[Tuple[Optional[str], List[Dict]]]],
+                 vacio: str = "", minimo_filas: int = 3):
+        self.columnas = columnas
+        self.secciones = secciones
+        self.vacio = vacio
+        self.minimo_filas = minimo_filas
+
+
+class Plantilla:
+    """
+    Descripción de un reporte
+
+    Args:
+        titulo: Título de la primera página
+        campos: [(etiqueta, función que obtiene el valor)] bajo el título
+        tabla: Tablas del cuerpo
+        identificacion: Texto corto del documento (cabecera de las páginas
+                        siguientes y pie)
+    """
+
+    def __init__(self, titulo: str, campos: List[Tuple[str, Callable[[Dict], Any]]], tabla: Tabla,
+                 identificacion: Callable[[Dict], str]):
+        self.titulo = titulo
+        self.campos = campos
+        self.tabla = tabla
+        self.identificacion = identificacion
+        self._compiladas: Dict[tuple, "Maqueta"] = {}
+
+    def compilar(self, pagina: QPageLayout = PAGINA, resolucion: int = RESOLUCION) -> "Maqueta":
+        """Maqueta de la plantilla para una página y resolución (se arma una sola vez)"""
+        clave = (pagina.pageSize().id(), pagina.orientation(), resolucion)
+        maqueta = self._compiladas.get(clave)
+        if maqueta is None:
+            maqueta = self._compiladas[clave] = Maqueta(self, pagina, resolucion)
+        return maqueta
+
+
+# ==================== MAQUETADO ====================
+
+class Maqueta:
+    """Plantilla compilada: fuentes, métricas, plumas y columnas ya calculadas"""
+
+    def __init__(self, plantilla: Plantilla, pagina: QPageLayout, resolucion: int):
+        asegurar_aplicacion()
+        self.plantilla = plantilla
+        zona = pagina.paintRectPixels(resolucion)
+        self.ancho = zona.width()
+        self.alto = zona.height()
+
+        # Tamaños en píxeles del dispositivo: las métricas valen igual para el PDF
+        self.fuentes: Dict[str, QFont] = {}
+        self.metricas: Dict[str, QFontMetricsF] = {}
+        for estilo, (puntos, negrita) in ESTILOS.items():
+            fuente = QFont(FAMILIA)
+            fuente.setPixelSize(round(puntos * resolucion / 72))
+            fuente.setBold(negrita)
+            self.fuentes[estilo] = fuente
+            self.metricas[estilo] = QFontMetricsF(fuente)
+
+        self.plumas = {
+            'texto': QPen(QColor("black")),
+            'fina': QPen(QColor("#999999"), 1),
+            'gruesa': QPen(QColor("black"), 2),
+        }
+
+        self.alto_linea = self.metricas['normal'].height() * 1.7
+        self.alto_fila = self.metricas['tabla'].height() * 1.8
+        self.alto_seccion = self.metricas['subtitulo'].height() * 1.8
+
+        # Posición y ancho de cada columna
+        izquierda = MARGEN + SANGRIA
+        util = self.ancho - izquierda - MARGEN
+        total = sum(c.ancho for c in plantilla.tabla.columnas)
+        self.columnas: List[Tuple[Columna, float, float]] = []
+        for columna in plantilla.tabla.columnas:
+            ancho = util * columna.ancho / total
+            self.columnas.append((columna, izquierda, ancho))
+            izquierda += ancho
+
+    def maquetar(self, datos: Dict) -> List[List[tuple]]:
+        """Operaciones de dibujo de cada página para un documento"""
+        return _Documento(self, datos).armar()
+
+    def pintar(self, painter: QPainter, dispositivo, paginas: List[List[tuple]], primera: bool) -> List[float]:
+        """
+        Pinta las páginas maquetadas
+
+        Args:
+            primera: True si es el primer documento del dispositivo (no abre página nueva)
+
+        Returns:
+            Segundos de pintado de cada página
+        """
+        tiempos = []
+        for numero, operaciones in enumerate(paginas):
+            if numero or not primera:
+                dispositivo.newPage()
+            inicio = time.perf_counter()
+            estilo_actual = pluma_actual = None
+            for operacion in operaciones:
+                if operacion[0] == 'texto':
+                    _, estilo, rect, alineacion, texto = operacion
+                    if estilo != estilo_actual:
+                        painter.setFont(self.fuentes[estilo])
+                        estilo_actual = estilo
+                    if pluma_actual != 'texto':
+                        painter.setPen(self.plumas['texto'])
+                        pluma_actual = 'texto'
+                    painter.drawText(rect, alineacion, texto)
+                else:
+                    _, pluma, linea = operacion
+                    if pluma != pluma_actual:
+                        painter.setPen(self.plumas[pluma])
+                        pluma_actual = pluma
+                    painter.drawLine(linea)
+            tiempos.append(time.perf_counter() - inicio)
+        return tiempos
+
+
+class _Documento:
+    """Estado del maquetado de un documento (la Maqueta es compartida)"""
+
+    def __init__(self, maqueta: Maqueta, datos: Dict):
+        self.m = maqueta
+        self.datos = datos
+        self.identificacion = maqueta.plantilla.identificacion(datos)
+        self.paginas: List[List[tuple]] = []
+        self.y = 0.0
+
+    # ---------- primitivas ----------
+
+    def texto(self, estilo: str, x: float, ancho: float, alto: float, texto: str, alineacion=IZQUIERDA):
+        texto = self.m.metricas[estilo].elidedText(str(texto), Qt.TextElideMode.ElideRight, ancho - 4)
+        self.paginas[-1].append(('texto', estilo, QRectF(x, self.y, ancho, alto), alineacion, texto))
+
+    def linea(self, pluma: str = 'fina', desde: float = MARGEN):
+        self.paginas[-1].append(('linea', pluma, QLineF(desde, self.y, self.m.ancho - MARGEN, self.y)))
+
+    def cabe(self, alto: float) -> bool:
+        return self.y + alto <= self.m.alto - ALTO_PIE
+
+    def nueva_pagina(self):
+        self.paginas.append([])
+        self.y = MARGEN
+        if len(self.paginas) > 1:
+            # Cabecera corta en las páginas siguientes
+            alto = self.m.metricas['pie'].height() * 1.5
+            self.texto('pie', MARGEN, self.m.ancho - 2 * MARGEN, alto,
+                       f"{self.m.plantilla.titulo} - {self.identificacion}")
+            self.y += alto
+            self.linea()
+            self.y += 15
+
+    # ---------- bloques ----------
+
+    def armar(self) -> List[List[tuple]]:
+        self.nueva_pagina()
+        self.encabezado()
+        self.campos()
+        for titulo, filas in self.m.plantilla.tabla.secciones(self.datos):
+            self.seccion(titulo, filas)
+        self.pies()
+        return self.paginas
+
+    def encabezado(self):
+        ancho = self.m.ancho - 2 * MARGEN
+        alto = self.m.metricas['titulo'].height() * 2
+        self.texto('titulo', MARGEN, ancho, alto, self.m.plantilla.titulo, CENTRO)
+        self.y += alto
+        alto = self.m.metricas['subtitulo'].height() * 2
+        self.texto('subtitulo', MARGEN, ancho, alto, INSTITUCION, CENTRO)
+        self.y += alto + 10
+
+    def campos(self):
+        ancho = self.m.ancho - 2 * MARGEN
+        for etiqueta, valor in self.m.plantilla.campos:
+            self.texto('normal', MARGEN, ancho, self.m.alto_linea, f"{etiqueta}: {valor(self.datos)}")
+            self.y += self.m.alto_linea
+        self.y += 15
+        self.linea('gruesa')
+        self.y += 20
+
+    def encabezado_tabla(self):
+        for columna, x, ancho in self.m.columnas:
+            self.texto('encabezado_tabla', x, ancho, self.m.alto_fila, columna.titulo, columna.alineacion)
+        self.y += self.m.alto_fila
+        self.linea('gruesa')
+        self.y += 4
+
+    def titulo_seccion(self, titulo: Optional[str]):
+        if titulo:
+            self.texto('subtitulo', MARGEN, self.m.ancho - 2 * MARGEN, self.m.alto_seccion, titulo)
+            self.y += self.m.alto_seccion
+
+    def seccion(self, titulo: Optional[str], filas: List[Dict]):
+        tabla = self.m.plantilla.tabla
+        alto_titulo = self.m.alto_seccion if titulo else 0
+        minimo = max(1, min(tabla.minimo_filas, len(filas)))
+        if not self.cabe(alto_titulo + self.m.alto_fila * (minimo + 1)):
+            self.nueva_pagina()
+        self.titulo_seccion(titulo)
+
+        if not filas:
+            self.texto('tabla', MARGEN + SANGRIA, self.m.ancho - 2 * MARGEN - SANGRIA,
+                       self.m.alto_fila, tabla.vacio)
+            self.y += self.m.alto_fila * 1.5
+        else:
+            self.encabezado_tabla()
+            for fila in filas:
+                if not self.cabe(self.m.alto_fila):
+                    # La tabla sigue en otra página con su título y encabezado
+                    self.nueva_pagina()
+                    self.titulo_seccion(f"{titulo} (cont.)" if titulo else None)
+                    self.encabezado_tabla()
+                for columna, x, ancho in self.m.columnas:
+                    self.texto('tabla', x, ancho, self.m.alto_fila, columna.valor(fila), columna.alineacion)
+                self.y += self.m.alto_fila
+            self.y += 10
+
+        self.linea()
+        self.y += 20
+
+    def pies(self):
+        """Identificación y "Página N de M" al pie de cada página (M se conoce al final)"""
+        alto = self.m.metricas['pie'].height() * 1.5
+        ancho = self.m.ancho - 2 * MARGEN
+        total = len(self.paginas)
+        for numero, pagina in enumerate(self.paginas, 1):
+            rect = QRectF(MARGEN, self.m.alto - ALTO_PIE + 10, ancho, alto)
+            pagina.append(('texto', 'pie', rect, IZQUIERDA, self.identificacion))
+            pagina.append(('texto', 'pie', rect, DERECHA, f"Página {numero} de {total}"))
+
+
+# ==================== RENDIMIENTO ====================
+
+class Rendimiento:
+    """Tiempos acumulados de maquetado y pintado (por página) del proceso"""
+
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.documentos = 0
+        self.paginas = 0
+        self.maquetado = 0.0
+        self.pintado = 0.0
+        self.peor_pagina = 0.0
+
+    def registrar(self, maquetado: float, tiempos_paginas: List[float]):
+        self.documentos += 1
+        self.paginas += len(tiempos_paginas)
+        self.maquetado += maquetado
+        self.pintado += sum(tiempos_paginas)
+        self.peor_pagina = max([self.peor_pagina] + tiempos_paginas)
+
+    def resumen(self) -> str:
+        if not self.paginas:
+            return "Reportes: sin páginas generadas"
+        return (f"Reportes: {self.documentos} documentos, {self.paginas} páginas; "
+                f"maquetado {self.maquetado * 1000 / self.documentos:.1f} ms/documento, "
+                f"pintado {self.pintado * 1000 / self.paginas:.1f} ms/página "
+                f"(máx {self.peor_pagina * 1000:.1f} ms)")
+
+
+rendimiento = Rendimiento()
+
+
+def guardar_pdf(ruta: str, plantilla: Plantilla, documentos: Iterable[Dict], titulo: str = "") -> bool:
+    """
+    Genera un PDF con uno o más documentos de la misma plantilla (cada uno
+    empieza en página nueva)
+
+    Returns:
+        True si el PDF se abrió y se cerró sin errores (QPainter.begin/end)
+    """
+    asegurar_aplicacion()
+    maqueta = plantilla.compilar()
+    writer = QPdfWriter(ruta)
+    writer.setResolution(RESOLUCION)
+    writer.setPageLayout(PAGINA)
+    writer.setTitle(titulo or plantilla.titulo.capitalize())
+
+    painter = QPainter()
+    if not painter.begin(writer):
+        return False
+    try:
+        primera = True
+        for datos in documentos:
+            inicio = time.perf_counter()
+            paginas = maqueta.maquetar(datos)
+            maquetado = time.perf_counter() - inicio
+            rendimiento.registrar(maquetado, maqueta.pintar(painter, writer, paginas, primera))
+            primera = False
+    finally:
+        # end() vuelca y cierra el archivo: False si no se pudo escribir
+        escrito = painter.end()
+    return escrito
+
+
+# ==================== REPORTES ====================
+
+def _nota(valor) -> str:
+    return f"{valor:.2f}" if valor is not None else "N/A"
+
+
+def _nota_con_ajuste(nota, ajuste) -> str:
+    if nota is None:
+        return "-"
+    return f"{nota:.2f}" + (f" ({ajuste:+g})" if ajuste else "")
+
+
+def _secciones_historial(datos: Dict) -> List[Tuple[str, List[Dict]]]:
+    historial_por_año = datos['historial_por_año']
+    return [(nombre, historial_por_año.get(año, [])) for año, nombre in NOMBRES_AÑOS.items()]
+
+
+def _secciones_lista(datos: Dict) -> List[Tuple[str, List[Dict]]]:
+    """Estudiantes agrupados por sección y numerados dentro de cada una"""
+    por_seccion: Dict[Optional[str], List[Dict]] = OrderedDict()
+    for estudiante in sorted(datos['estudiantes'], key=lambda e: (e.get('seccion') or '~', e['apellido'], e['nombre'])):
+        por_seccion.setdefault(estudiante.get('seccion'), []).append(estudiante)
+    return [(f"Sección {seccion}" if seccion else "Sin sección",
+             [dict(e, numero=n) for n, e in enumerate(estudiantes, 1)])
+            for seccion, estudiantes in por_seccion.items()]
+
+
+HISTORIAL = Plantilla(
+    titulo="HISTORIAL ACADÉMICO",
+    campos=[
+        ("Nombre", lambda d: f"{d['info_estudiante']['nombre']} {d['info_estudiante']['apellido']}"),
+        ("Cédula", lambda d: d['info_estudiante']['cedula']),
+        ("Grado Actual", lambda d: d['info_estudiante']['nombre_grado'] or 'No asignado'),
+        ("Fecha de Nacimiento", lambda d: d['info_estudiante']['fecha_nacimiento']),
+    ],
+    tabla=Tabla(
+        columnas=[
+            Columna("Asignatura", 6, lambda m: m['nombre_asignatura']),
+            # Las materias en curso sin nota traen 0.0 de relleno (ver ModeloHistorial.data)
+            Columna("Nota Final", 1.5, lambda m: _nota(None if m.get('sin_nota') else m['nota_final']), CENTRO),
+            Columna("Estado", 1.5, lambda m: m.get('estado') or 'N/A', CENTRO),
+        ],
+        secciones=_secciones_historial,
+        vacio="No hay materias registradas para este año",
+    ),
+    identificacion=lambda d: f"{d['info_estudiante']['apellido']}, {d['info_estudiante']['nombre']} "
+                             f"- C.I. {d['info_estudiante']['cedula']}",
+)
+
+BOLETA = Plantilla(
+    titulo="BOLETA DE CALIFICACIONES",
+    campos=[
+        ("Nombre", lambda d: f"{d['estudiante']['nombre']} {d['estudiante']['apellido']}"),
+        ("Cédula", lambda d: d['estudiante']['cedula']),
+        ("Año", lambda d: d['estudiante']['nombre_grado'] or 'No asignado'),
+        ("Sección", lambda d: d['estudiante'].get('seccion') or 'No asignada'),
+        ("Mención", lambda d: MENCIONES.get(d['estudiante'].get('id_mencion'), 'No asignada')),
+    ],
+    tabla=Tabla(
+        columnas=[
+            Columna("Asignatura", 4, lambda c: c['nombre_asignatura']),
+            Columna("1er Lapso", 1.3, lambda c: _nota_con_ajuste(c['nota_1'], c['ajuste_1']), CENTRO),
+            Columna("2do Lapso", 1.3, lambda c: _nota_con_ajuste(c['nota_2'], c['ajuste_2']), CENTRO),
+            Columna("3er Lapso", 1.3, lambda c: _nota_con_ajuste(c['nota_3'], c['ajuste_3']), CENTRO),
+            Columna("Nota Final", 1.2, lambda c: _nota(c['nota_final']), CENTRO),
+        ],
+        secciones=lambda d: [(None, d['calificaciones'])],
+        vacio="El estudiante no tiene calificaciones registradas",
+    ),
+    identificacion=lambda d: f"{d['estudiante']['apellido']}, {d['estudiante']['nombre']} "
+                             f"- C.I. {d['estudiante']['cedula']}",
+)
+
+LISTA_CLASE = Plantilla(
+    titulo="LISTA DE CLASE",
+    campos=[
+        ("Grado", lambda d: d['grado']['nombre_grado']),
+        ("Estudiantes", lambda d: len(d['estudiantes'])),
+        ("Fecha", lambda d: date.today().strftime("%d/%m/%Y")),
+    ],
+    tabla=Tabla(
+        columnas=[
+            Columna("N°", 0.6, lambda e: e['numero'], CENTRO),
+            Columna("Cédula", 1.6, lambda e: e['cedula']),
+            Columna("Apellidos", 2.6, lambda e: e['apellido']),
+            Columna("Nombres", 2.6, lambda e: e['nombre']),
+            Columna("Firma", 2.6, lambda e: ""),
+        ],
+        secciones=_secciones_lista,
+        vacio="El grado no tiene estudiantes",
+        minimo_filas=5,
+    ),
+    identificacion=lambda d: d['grado']['nombre_grado'],
+)
+
+
+def guardar_historial_pdf(ruta: str, datos: Dict[str, Any]) -> bool:
+    """PDF del historial (datos de SupabaseClient.get_historial_completo_estudiante)"""
+    return guardar_pdf(ruta, HISTORIAL, [datos],
+                       f"Historial académico {datos['info_estudiante']['cedula']}")
+
+
+def guardar_boleta_pdf(ruta: str, datos: Dict[str, Any]) -> bool:
+    """PDF de la boleta (datos de SupabaseClient.get_estudiante_con_calificaciones)"""
+    return guardar_pdf(ruta, BOLETA, [datos], f"Boleta {datos['estudiante']['cedula']}")
+
+
+def guardar_listas_pdf(ruta: str, listas: Iterable[Dict[str, Any]]) -> bool:
+    """
+    PDF con la lista de clase de uno o más grados
+
+    Args:
+        listas: [{'grado': grado, 'estudiantes': [...]}], un documento por grado
+    """
+    return guardar_pdf(ruta, LISTA_CLASE, listas, "Listas de clase")
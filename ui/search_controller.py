@@ -0,0 +1,112 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QLineEdit
+from typing import Any, Callable, Optional
+import os
+
+
+def retardo_configurado(por_defecto: int) -> int:
+    """Retardo de búsqueda en ms (variable de entorno AMALIA_RETARDO_BUSQUEDA_MS)"""
+    try:
+        return max(0, int(os.getenv("AMALIA_RETARDO_BUSQUEDA_MS", por_defecto)))
+    except ValueError:
+        return por_defecto
+
+
+class _TareaBusqueda(QRunnable):
+    """Ejecuta la búsqueda en un hilo del pool y entrega el resultado al controlador"""
+
+    def __init__(self, controlador, generacion: int, texto: str):
+        super().__init__()
+        self.controlador = controlador
+        self.generacion = generacion
+        self.texto = texto
+
+    def run(self):
+        # Si ya se escribió otra cosa, ni siquiera se consulta
+        if self.generacion != self.controlador.generacion:
+            return
+        try:
+            resultado = self.controlador.buscar(self.texto)
+        except Exception as e:
+            print(f"Error en la búsqueda '{self.texto}': {e}")
+            return
+        try:
+            self.controlador.terminado.emit(self.generacion, self.texto, resultado)
+        except RuntimeError:
+            pass  # El controlador se destruyó (ventana cerrada)
+
+
+class ControladorBusqueda(QObject):
+    """
+    Búsqueda con retardo (debounce) para un campo de texto
+
+    Cada pulsación reinicia el temporizador; al vencer se ejecuta buscar(texto)
+    y mostrar(texto, resultado) con lo obtenido. Con en_segundo_plano=True la
+    búsqueda corre en el QThreadPool global y cada ejecución lleva un número
+    de generación: los resultados de un texto que ya cambió se descartan.
+
+    Args:
+        campo: QLineEdit observado
+        buscar: Función texto -> resultado (en segundo plano no debe tocar widgets);
+                None si mostrar filtra por sí misma (recibe resultado None)
+        mostrar: Función (texto, resultado) que actualiza la vista (hilo de la GUI)
+        retardo_ms: Retardo tras la última pulsación
+        en_segundo_plano: Ejecutar buscar fuera del hilo de la GUI (consultas a la base)
+    """
+
+    # (generación, texto, resultado) desde el hilo del pool
+    terminado = pyqtSignal(int, str, object)
+
+    def __init__(self, campo: QLineEdit, buscar: Optional[Callable[[str], Any]],
+                 mostrar: Callable[[str, Any], None], retardo_ms: int = 300,
+                 en_segundo_plano: bool = False, parent=None):
+        super().__init__(parent or campo)
+        self.campo = campo
+        self.buscar = buscar
+        self.mostrar = mostrar
+        self.en_segundo_plano = en_segundo_plano
+        self.generacion = 0
+
+        self.temporizador = QTimer(self)
+        self.temporizador.setSingleShot(True)
+        self.temporizador.setInterval(retardo_configurado(retardo_ms))
+        self.temporizador.timeout.connect(self.ejecutar)
+
+        self.terminado.connect(self._entregar)
+        campo.textChanged.connect(self._al_escribir)
+
+    def _al_escribir(self, _texto: str):
+        """Reinicia el retardo y anula cualquier búsqueda en curso"""
+        self.generacion += 1
+        self.temporizador.start()
+
+    def texto(self) -> str:
+        """Texto actual del campo, sin espacios en los extremos"""
+        return self.campo.text().strip()
+
+    def ejecutar(self):
+        """Ejecuta la búsqueda con el texto actual"""
+        self.temporizador.stop()
+        self.generacion += 1
+        texto = self.texto()
+
+        if not self.en_segundo_plano or self.buscar is None:
+            self.mostrar(texto, self.buscar(texto) if self.buscar else None)
+            return
+
+        QThreadPool.globalInstance().start(_TareaBusqueda(self, self.generacion, texto))
+
+    def refrescar(self):
+        """Repite la búsqueda actual de inmediato (por ejemplo tras un cambio remoto)"""
+        self.ejecutar()
+
+    def cancelar(self):
+        """Descarta la búsqueda pendiente y los resultados que aún no llegaron"""
+        self.temporizador.stop()
+        self.generacion += 1
+
+    def _entregar(self, generacion: int, texto: str, resultado: Any):
+        """Muestra el resultado solo si corresponde a la última búsqueda"""
+        if generacion != self.generacion:
+            return
+        self.mostrar(texto, resultado)
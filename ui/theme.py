@@ -0,0 +1,386 @@
+"""
+Tema visual: una sola hoja de estilos para la ventana principal
+
+La hoja se arma una vez (selectores por objectName y propiedades dinámicas) y
+queda en caché. Los widgets que se crean al llenar tablas no llaman a
+setStyleSheet: se marcan con objectName/propiedades y Qt reutiliza la hoja
+ya interpretada.
+"""
+from functools import lru_cache
+
+from PyQt6.QtWidgets import QPushButton, QWidget
+
+# Botones de acción de las filas: propiedad "accion" -> (color, color al pasar el mouse)
+COLORES_ACCION = {
+    'editar': ('#2196F3', '#1976D2'),
+    'eliminar': ('#f44336', '#d32f2f'),
+}
+
+# Etiquetas con estado: (objectName, valor de la propiedad "estado") -> reglas
+ESTADOS = {
+    ('selection_info', 'vacio'): "color: #666; font-style: italic;",
+    ('selection_info', 'activo'): "color: #2196F3; font-weight: bold;",
+}
+
+HOJA_BASE = """
+/* Campos de texto */
+QLineEdit {
+    background-color: white;
+    border: 1px solid #e0e0e0;
+    border-radius: 6px;
+    padding: 8px 12px;
+    font-size: 14px;
+    color: #333;
+}
+QLineEdit:focus {
+    border: 1px solid #2563eb;
+    background-color: white;
+}
+
+/* Pestañas */
+QTabWidget::pane {
+    border: none;
+    background-color: #f0f4f8;
+}
+
+QTabBar::tab {
+    background-color: #dae3ed;
+    color: #4a5568;
+    padding: 10px 20px;
+    border: none;
+    border-bottom: 2px solid transparent;
+    font-size: 14px;
+    margin-right: 2px;
+}
+
+QTabBar::tab:selected {
+    background-color: #f0f4f8;
+    color: #0d1f3d;
+    border-bottom: 2px solid #2563eb;
+    font-weight: bold;
+}
+
+QTabBar::tab:hover {
+    background-color: #c9d6e3;
+    color: #0d1f3d;
+}
+
+/* Tablas */
+QTableWidget {
+    border: 2px solid #2563eb;
+    border-radius: 8px;
+    background-color: white;
+    gridline-color: #e5e7eb;
+}
+
+QTableWidget::item {
+    padding: 8px;
+    font-size: 13px;
+    color: #333;
+    background-color: white;
+}
+
+QTableWidget::item:selected {
+    background-color: #e3f2fd;
+    color: #1565c0;
+}
+
+/* Headers de tabla */
+QHeaderView::section {
+    background-color: #f8f9fa;
+    color: #1f2937;
+    padding: 10px;
+    border: none;
+    border-bottom: 2px solid #e0e0e0;
+    font-weight: bold;
+    font-size: 13px;
+}
+
+/* Números de fila */
+QHeaderView::section:vertical {
+    background-color: #f8f9fa;
+    color: #666;
+    padding: 5px;
+    border: none;
+    border-right: 1px solid #e0e0e0;
+    border-bottom: 1px solid #f0f0f0;
+    font-size: 12px;
+    min-width: 40px;
+    max-width: 40px;
+}
+
+QTableCornerButton::section {
+    background-color: #f8f9fa;
+    border: none;
+}
+
+/* Scrollbars */
+QScrollBar:vertical {
+    background: #f0f4f8;
+    width: 12px;
+    border-radius: 6px;
+}
+
+QScrollBar::handle:vertical {
+    background: #cbd5e1;
+    border-radius: 6px;
+    min-height: 20px;
+}
+
+QScrollBar::handle:vertical:hover {
+    background: #94a3b8;
+}
+
+QScrollBar:horizontal {
+    background: #f0f4f8;
+    height: 12px;
+    border-radius: 6px;
+}
+
+QScrollBar::handle:horizontal {
+    background: #cbd5e1;
+    border-radius: 6px;
+    min-width: 20px;
+}
+
+QScrollBar::handle:horizontal:hover {
+    background: #94a3b8;
+}
+
+QScrollBar::add-line, QScrollBar::sub-line {
+    border: none;
+    background: none;
+}
+
+/* ============ ESTILOS DE BOTONES ============ */
+
+/* Botones principales */
+QPushButton {
+    background-color: #2563eb;
+    color: white;
+    border: none;
+    border-radius: 6px;
+    padding: 10px 20px;
+    font-size: 14px;
+    font-weight: 600;
+    min-width: 120px;
+}
+
+/* Botones de acción (pequeños, en tablas) */
+QPushButton#action_btn {
+    padding: 2px 4px;
+    font-size: 14px;
+    min-width: 23px;
+    max-width: 25px;
+    min-height: 23px;
+    max-height: 25px;
+    border-radius: 4px;
+
+}
+
+QPushButton:hover {
+    background-color: #1d4ed8;
+}
+
+QPushButton:pressed {
+    background-color: #1e40af;
+}
+
+QPushButton:disabled {
+    background-color: #cbd5e1;
+    color: #94a3b8;
+}
+
+/* Botón de cerrar sesión */
+QPushButton#logout_btn {
+    background-color: rgba(255, 255, 255, 0.2);
+    border: 1px solid rgba(255, 255, 255, 0.3);
+    min-width: 100px;
+}
+
+QPushButton#logout_btn:hover {
+    background-color: rgba(255, 255, 255, 0.3);
+}
+
+/* Botón de volver */
+QPushButton#volver_btn {
+    background-color: #64748b;
+}
+
+QPushButton#volver_btn:hover {
+    background-color: #475569;
+}
+
+/* Botón de búsqueda */
+QPushButton#search_btn {
+    background-color: #10b981;
+    min-width: 100px;
+}
+
+QPushButton#search_btn:hover {
+    background-color: #059669;
+}
+
+/* Botón de actualizar */
+QPushButton#refresh_btn {
+    background-color: #2563eb;
+    min-width: 100px;
+}
+
+QPushButton#refresh_btn:hover {
+    background-color: #1d4ed8;
+}
+
+/* Botón de agregar */
+QPushButton#add_btn {
+    background-color: #2563eb;
+}
+
+QPushButton#add_btn:hover {
+    background-color: #1d4ed8;
+}
+
+/* Botón de mover seleccionados */
+QPushButton#mover_btn {
+    background-color: #2196F3;
+    font-weight: bold;
+    padding: 8px 16px;
+}
+
+QPushButton#mover_btn:hover {
+    background-color: #1976D2;
+}
+/* Campos de fecha (DateEdit) */
+QDateEdit {
+    background-color: white;
+    border: 1px solid #e0e0e0;
+    border-radius: 6px;
+    padding: 8px 12px;
+    font-size: 14px;
+    color: #333;
+}
+QDateEdit:focus {
+    border: 1px solid #2563eb;
+    background-color: white;
+}
+QDateEdit::drop-down {
+    subcontrol-origin: padding;
+    subcontrol-position: top right;
+    width: 25px;
+    border-left: 1px solid #e0e0e0;
+    border-radius: 0 6px 6px 0;
+}
+
+/* Combos (QComboBox) */
+QComboBox {
+    background-color: white;
+    border: 1px solid #e0e0e0;
+    border-radius: 6px;
+    padding: 8px 12px;
+    font-size: 14px;
+    color: #333;
+    min-height: 40px;
+}
+QComboBox:focus {
+    border: 1px solid #2563eb;
+    background-color: white;
+}
+QComboBox::drop-down {
+    subcontrol-origin: padding;
+    subcontrol-position: top right;
+    width: 25px;
+    border-left: 1px solid #e0e0e0;
+    border-radius: 0 6px 6px 0;
+}
+QComboBox QAbstractItemView {
+    background-color: white;
+    border: 1px solid #e0e0e0;
+    border-radius: 6px;
+    padding: 4px;
+    selection-background-color: #e3f2fd;
+    selection-color: #1565c0;
+}
+
+/* Historial académico (ui/historial_view.py) */
+QLabel#historial_placeholder {
+    color: #999;
+    font-size: 16px;
+    padding: 100px;
+}
+QFrame#historial_info {
+    background-color: white;
+    border-radius: 8px;
+    border: 2px solid #2196F3;
+}
+QLabel#historial_titulo {
+    font-size: 20px;
+    font-weight: bold;
+    color: #2196F3;
+    margin-bottom: 10px;
+}
+QTreeView#historial_arbol {
+    background-color: white;
+    border: 1px solid #ddd;
+    border-radius: 8px;
+    font-size: 13px;
+}
+QTreeView#historial_arbol::item {
+    padding: 6px 4px;
+}
+QPushButton#imprimir_btn {
+    background-color: #4CAF50;
+    color: white;
+    border: none;
+    padding: 8px 20px;
+    border-radius: 4px;
+    font-size: 14px;
+    font-weight: bold;
+}
+QPushButton#imprimir_btn:hover {
+    background-color: #45a049;
+}
+"""
+
+
+def _reglas_dinamicas() -> str:
+    """Reglas generadas para las propiedades dinámicas"""
+    reglas = []
+    for accion, (color, hover) in COLORES_ACCION.items():
+        reglas.append(
+            f'QPushButton#action_btn[accion="{accion}"] {{ background-color: {color}; }}\n'
+            f'QPushButton#action_btn[accion="{accion}"]:hover {{ background-color: {hover}; }}'
+        )
+    for (nombre, estado), estilo in ESTADOS.items():
+        reglas.append(f'QLabel#{nombre}[estado="{estado}"] {{ {estilo} }}')
+    return "\n".join(reglas)
+
+
+@lru_cache(maxsize=None)
+def hoja_de_estilos() -> str:
+    """Hoja de estilos completa de la ventana principal (se arma una sola vez)"""
+    return HOJA_BASE + "\n/* Propiedades dinámicas */\n" + _reglas_dinamicas() + "\n"
+
+
+def boton_accion(texto: str, accion: str) -> QPushButton:
+    """
+    Crea un botón de acción para una fila de tabla, sin hoja de estilos propia
+
+    Args:
+        texto: Texto o emoji del botón
+        accion: Clave de COLORES_ACCION ('editar', 'eliminar')
+    """
+    boton = QPushButton(texto)
+    boton.setObjectName("action_btn")
+    boton.setProperty("accion", accion)
+    boton.setMaximumWidth(32)
+    boton.setMinimumHeight(32)
+    return boton
+
+
+def establecer_estado(widget: QWidget, estado: str):
+    """Cambia la propiedad "estado" de un widget y vuelve a aplicar la hoja"""
+    if widget.property("estado") == estado:
+        return
+    widget.setProperty("estado", estado)
+    widget.style().unpolish(widget)
+    widget.style().polish(widget)